@@ -15,18 +15,23 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List, Dict
 import uvicorn
 
 from personality.personality_layer_with_storage import PersonalityLayerWithStorage
 from routing.routing_engine import RoutingEngine
 from knowledge.knowledge_base import KnowledgeBase
+from routing.speculative import SpeculativeExecutor
+from engine.usage import get_usage_ledger, metered
 from openai import OpenAI
 
 # API Keys
 PINECONE_API_KEY = "YOUR_PINECONE_API_KEY"
 OPENAI_API_KEY = "YOUR_OPENAI_API_KEY"
 
+# Start a gpt-4o-mini draft while routing resolves (kept if routing agrees)
+SPECULATIVE_ROUTING = os.getenv('ROOK_SPECULATIVE_ROUTING', 'true').lower() == 'true'
+
 # Initialize FastAPI
 app = FastAPI(title="ROOK Chat API", version="1.0.0")
 
@@ -70,16 +75,17 @@ def get_rook():
             openai_api_key=OPENAI_API_KEY
         )
         
-        openai_client = OpenAI(
+        openai_client = metered(OpenAI(
             api_key=OPENAI_API_KEY,
             base_url='https://api.openai.com/v1'
-        )
+        ), "generation")
         
         rook = {
             'personality': personality,
             'router': router,
             'knowledge_base': knowledge_base,
-            'openai_client': openai_client
+            'openai_client': openai_client,
+            'speculator': SpeculativeExecutor(openai_client) if SPECULATIVE_ROUTING else None
         }
         
         print("✅ ROOK initialized!")
@@ -96,6 +102,50 @@ async def health():
     """Health check endpoint"""
     return {"status": "healthy", "service": "ROOK Chat API"}
 
+@app.get("/api/stats")
+async def stats():
+    """Speculative generation and token usage statistics"""
+    speculator = rook['speculator'] if rook else None
+    return {
+        "speculative_routing": SPECULATIVE_ROUTING,
+        "speculation": speculator.get_stats() if speculator else {},
+        "usage": get_usage_ledger().get_stats()
+    }
+
+def build_messages(system_prompt: str, kb_context: str, conversation_history: List[Dict], message: str) -> List[Dict]:
+    """Build chat messages, appending knowledge base context to the system prompt"""
+    if kb_context:
+        enhanced_prompt = f"{system_prompt}\n\n{kb_context}"
+    else:
+        enhanced_prompt = system_prompt
+    
+    messages = [{"role": "system", "content": enhanced_prompt}]
+    messages.extend(conversation_history)
+    messages.append({"role": "user", "content": message})
+    return messages
+
+def complete(openai_client, model: str, messages: List[Dict]) -> Dict:
+    """Run a chat completion on the routed model"""
+    try:
+        response = openai_client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=0.7
+        )
+    except Exception as e:
+        if "temperature" in str(e):
+            response = openai_client.chat.completions.create(
+                model=model,
+                messages=messages
+            )
+        else:
+            raise
+    
+    return {
+        "content": response.choices[0].message.content,
+        "model": response.model
+    }
+
 @app.post("/api/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """
@@ -112,45 +162,43 @@ async def chat(request: ChatRequest):
         system_prompt = enriched["system_prompt"]
         conversation_history = enriched["conversation_history"]
         
-        # Route the query
-        routing = rook_system['router'].route_query(request.message, system_prompt)
-        query_type = routing['analysis'].get('query_type', 'simple_chat')
+        # Speculatively draft on gpt-4o-mini while routing resolves
+        draft = None
+        if rook_system['speculator']:
+            draft = rook_system['speculator'].speculate(
+                build_messages(system_prompt, "", conversation_history, request.message)
+            )
         
-        # Get knowledge base context
-        kb_context = rook_system['knowledge_base'].get_context_for_query(
-            request.message, 
-            query_type
-        )
+        try:
+            # Route the query
+            routing = rook_system['router'].route_query(request.message, system_prompt)
+            query_type = routing['analysis'].get('query_type', 'simple_chat')
+        
+            # Get knowledge base context
+            kb_context = rook_system['knowledge_base'].get_context_for_query(
+                request.message, 
+                query_type
+            )
         
-        # Build messages
-        if kb_context:
-            enhanced_prompt = f"{system_prompt}\n\n{kb_context}"
-        else:
-            enhanced_prompt = system_prompt
+            messages = build_messages(system_prompt, kb_context, conversation_history, request.message)
         
-        messages = [{"role": "system", "content": enhanced_prompt}]
-        messages.extend(conversation_history)
-        messages.append({"role": "user", "content": request.message})
+            # Get response from OpenAI
+            model = routing['routing_decision']['model']
         
-        # Get response from OpenAI
-        model = routing['routing_decision']['model']
+            def execute(routed_model, routed_messages):
+                return complete(rook_system['openai_client'], routed_model, routed_messages)
         
-        try:
-            response = rook_system['openai_client'].chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=0.7
-            )
-        except Exception as e:
-            if "temperature" in str(e):
-                response = rook_system['openai_client'].chat.completions.create(
-                    model=model,
-                    messages=messages
-                )
+            if draft:
+                response = draft.resolve(model, messages, execute)
             else:
-                raise
+                response = execute(model, messages)
+        except BaseException:
+            # Nothing will resolve the draft - stop it generating
+            if draft:
+                draft.abandon()
+            raise
         
-        assistant_response = response.choices[0].message.content
+        assistant_response = response['content']
         
         # Update conversation history
         rook_system['personality'].add_to_conversation_history(
@@ -185,7 +233,7 @@ async def chat(request: ChatRequest):
         # Don't expose memory storage to user - it's internal
         return ChatResponse(
             response=assistant_response,
-            model_used=response.model,
+            model_used=response['model'],
             memory_stored=None  # Keep this internal
         )
     
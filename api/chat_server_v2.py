@@ -16,25 +16,14 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict
+import asyncio
 import uvicorn
 from datetime import datetime
+from contextlib import asynccontextmanager
 
-# Import ROOK components
-from src.personality.personality_layer_with_storage import PersonalityLayerWithStorage as PersonalityLayer
-from src.consciousness import get_hot_cache, ActiveReader, BackgroundRetriever
+# Import ROOK components (heavy SDK-backed modules are imported by the factories)
+from src.engine.components import ComponentRegistry
 
-app = FastAPI(title="ROOK Chat API v2", version="2.0.0")
-
-# CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Initialize ROOK components
 print("🤖 Initializing ROOK v2...")
 
 # Environment variables
@@ -46,22 +35,67 @@ if not OPENAI_API_KEY:
 if not PINECONE_API_KEY:
     print("⚠️  Warning: PINECONE_API_KEY not set")
 
-# Initialize personality layer
-personality_layer = PersonalityLayer(
-    pinecone_api_key=PINECONE_API_KEY,
-    openai_api_key=OPENAI_API_KEY
-)
+# Components are built lazily and warmed up concurrently after the port opens
+components = ComponentRegistry("ROOK v2")
+
+
+@components.component("personality_layer")
+def _build_personality_layer():
+    from src.personality.personality_layer_with_storage import PersonalityLayerWithStorage as PersonalityLayer
+    return PersonalityLayer(
+        pinecone_api_key=PINECONE_API_KEY,
+        openai_api_key=OPENAI_API_KEY
+    )
 
-# Initialize consciousness components
-hot_cache = get_hot_cache()
-active_reader = ActiveReader(openai_api_key=OPENAI_API_KEY)
-background_retriever = BackgroundRetriever(
-    personality_layer=personality_layer,
-    hot_cache=hot_cache,
-    openai_api_key=OPENAI_API_KEY
-)
 
-print("✅ ROOK v2 initialized!")
+@components.component("hot_cache")
+def _build_hot_cache():
+    from src.consciousness import get_hot_cache
+    return get_hot_cache()
+
+
+@components.component("active_reader")
+def _build_active_reader():
+    from src.consciousness import ActiveReader
+    return ActiveReader(openai_api_key=OPENAI_API_KEY)
+
+
+@components.component("background_retriever")
+def _build_background_retriever():
+    from src.consciousness import BackgroundRetriever
+    return BackgroundRetriever(
+        personality_layer=components.get("personality_layer"),
+        hot_cache=components.get("hot_cache"),
+        openai_api_key=OPENAI_API_KEY
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the port immediately; warm components up in the background"""
+    warm_up = asyncio.create_task(components.warm_up())
+    yield
+    warm_up.cancel()
+
+
+async def require(name: str):
+    """Get a component (waiting for warm-up if needed) or fail with 503"""
+    component = await components.aget(name)
+    if component is None:
+        raise HTTPException(status_code=503, detail=f"{name} not initialized. Check /health for details.")
+    return component
+
+
+app = FastAPI(title="ROOK Chat API v2", version="2.0.0", lifespan=lifespan)
+
+# CORS
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
 
 # Request/Response models
 class ChatRequest(BaseModel):
@@ -100,20 +134,25 @@ async def root():
 
 @app.get("/health")
 async def health():
-    """Health check"""
+    """Liveness check (always 200); "ready" reports whether warm-up finished"""
+    status = components.get_status()
     return {
         "status": "healthy",
+        "ready": status["ready"],
         "version": "2.0.0",
-        "components": {
-            "personality_layer": "online",
-            "hot_cache": "online",
-            "active_reader": "online",
-            "background_retriever": "online"
-        },
+        "components": status,
         "timestamp": datetime.now().isoformat()
     }
 
 
+@app.get("/health/ready")
+async def readiness():
+    """Readiness check - 503 until every component is online"""
+    if not components.is_ready():
+        raise HTTPException(status_code=503, detail=components.get_status())
+    return {"ready": True, "components": components.get_status()["components"]}
+
+
 @app.post("/api/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """
@@ -127,6 +166,11 @@ async def chat(request: ChatRequest):
     5. Return response with metadata
     """
     try:
+        personality_layer = await require("personality_layer")
+        hot_cache = await require("hot_cache")
+        active_reader = await require("active_reader")
+        background_retriever = await require("background_retriever")
+        
         user_message = request.message
         conversation_history = request.conversation_history or []
         
@@ -190,6 +234,8 @@ async def chat(request: ChatRequest):
             reading_context=reading_context
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error processing chat: {e}")
         import traceback
@@ -205,6 +251,8 @@ async def trigger_reading(request: ReadingRequest):
     This would normally be called by a cron job, but can be triggered manually
     """
     try:
+        active_reader = await require("active_reader")
+        hot_cache = await require("hot_cache")
         topics = request.topics
         
         # Read morning news
@@ -222,6 +270,8 @@ async def trigger_reading(request: ReadingRequest):
             summary=summary
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error during reading: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -231,6 +281,10 @@ async def trigger_reading(request: ReadingRequest):
 async def get_stats():
     """Get consciousness system statistics"""
     try:
+        hot_cache = await require("hot_cache")
+        active_reader = await require("active_reader")
+        background_retriever = await require("background_retriever")
+        
         cache_stats = hot_cache.get_cache_stats()
         anticipation_stats = background_retriever.get_anticipation_stats()
         reading_stats = active_reader.get_reading_summary(days=1)
@@ -241,6 +295,8 @@ async def get_stats():
             reading_stats=reading_stats
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error getting stats: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -254,6 +310,7 @@ async def whats_on_my_mind():
     Returns immediate context from hot cache
     """
     try:
+        hot_cache = await require("hot_cache")
         context = hot_cache.get_immediate_context()
         return {
             "current_focus": context["current_focus"],
@@ -261,6 +318,8 @@ async def whats_on_my_mind():
             "active_topics": context["active_topics"],
             "last_updated": context["last_updated"]
         }
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error getting context: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -270,11 +329,14 @@ async def whats_on_my_mind():
 async def recent_readings(limit: int = 10):
     """Get ROOK's recent readings"""
     try:
+        active_reader = await require("active_reader")
         readings = active_reader.get_recent_readings(limit=limit)
         return {
             "readings": readings,
             "count": len(readings)
         }
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error getting readings: {e}")
         raise HTTPException(status_code=500, detail=str(e))
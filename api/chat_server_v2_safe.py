@@ -16,39 +16,19 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict
+import asyncio
 import uvicorn
 from datetime import datetime
+from contextlib import asynccontextmanager
 
-app = FastAPI(title="ROOK Chat API v2", version="2.0.0")
-
-# CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+from src.engine.components import ComponentRegistry
 
 # Environment variables
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 PINECONE_API_KEY = os.getenv('PINECONE_API_KEY')
 NEWSAPI_KEY = os.getenv('NEWSAPI_KEY')
 
-# Track initialization status
-initialization_status = {
-    "personality_layer": "not_initialized",
-    "hot_cache": "not_initialized",
-    "active_reader": "not_initialized",
-    "background_retriever": "not_initialized",
-    "errors": []
-}
-
-# Try to initialize components
-personality_layer = None
-hot_cache = None
-active_reader = None
-background_retriever = None
+startup_warnings = []
 
 print("🤖 Initializing ROOK v2 (Safe Mode)...")
 
@@ -56,66 +36,91 @@ print("🤖 Initializing ROOK v2 (Safe Mode)...")
 if not OPENAI_API_KEY:
     msg = "⚠️  OPENAI_API_KEY not set - AI features will be limited"
     print(msg)
-    initialization_status["errors"].append(msg)
+    startup_warnings.append(msg)
 else:
     print("✅ OPENAI_API_KEY found")
 
 if not PINECONE_API_KEY:
     msg = "⚠️  PINECONE_API_KEY not set - Memory features will be limited"
     print(msg)
-    initialization_status["errors"].append(msg)
+    startup_warnings.append(msg)
 else:
     print("✅ PINECONE_API_KEY found")
 
 if not NEWSAPI_KEY:
     msg = "ℹ️  NEWSAPI_KEY not set - News reading will be disabled (optional)"
     print(msg)
-    initialization_status["errors"].append(msg)
+    startup_warnings.append(msg)
+
+# Components are built lazily and warmed up concurrently after the port opens;
+# missing keys disable a component instead of failing startup
+components = ComponentRegistry("ROOK v2 (Safe Mode)")
+
+
+@components.component("personality_layer")
+def _build_personality_layer():
+    if not (PINECONE_API_KEY and OPENAI_API_KEY):
+        return None
+    from src.personality.personality_layer_with_storage import PersonalityLayerWithStorage as PersonalityLayer
+    return PersonalityLayer(
+        pinecone_api_key=PINECONE_API_KEY,
+        openai_api_key=OPENAI_API_KEY
+    )
+
+
+@components.component("hot_cache")
+def _build_hot_cache():
+    from src.consciousness import get_hot_cache
+    return get_hot_cache()
 
-# Try to initialize personality layer
-if PINECONE_API_KEY and OPENAI_API_KEY:
-    try:
-        from src.personality.personality_layer_with_storage import PersonalityLayerWithStorage as PersonalityLayer
-        personality_layer = PersonalityLayer(
-            pinecone_api_key=PINECONE_API_KEY,
-            openai_api_key=OPENAI_API_KEY
-        )
-        initialization_status["personality_layer"] = "online"
-        print("✅ Personality layer initialized")
-    except Exception as e:
-        msg = f"❌ Personality layer failed: {e}"
-        print(msg)
-        initialization_status["personality_layer"] = "failed"
-        initialization_status["errors"].append(msg)
-
-# Try to initialize consciousness components
-try:
-    from src.consciousness import get_hot_cache, ActiveReader, BackgroundRetriever
-    
-    hot_cache = get_hot_cache()
-    initialization_status["hot_cache"] = "online"
-    print("✅ Hot cache initialized")
-    
-    if OPENAI_API_KEY:
-        active_reader = ActiveReader(openai_api_key=OPENAI_API_KEY, newsapi_key=NEWSAPI_KEY)
-        initialization_status["active_reader"] = "online"
-        print("✅ Active reader initialized")
-    
-    if personality_layer and hot_cache and OPENAI_API_KEY:
-        background_retriever = BackgroundRetriever(
-            personality_layer=personality_layer,
-            hot_cache=hot_cache,
-            openai_api_key=OPENAI_API_KEY
-        )
-        initialization_status["background_retriever"] = "online"
-        print("✅ Background retriever initialized")
-        
-except Exception as e:
-    msg = f"❌ Consciousness modules failed: {e}"
-    print(msg)
-    initialization_status["errors"].append(msg)
 
-print(f"🚀 ROOK v2 started with status: {initialization_status}")
+@components.component("active_reader", required=False)
+def _build_active_reader():
+    if not OPENAI_API_KEY:
+        return None
+    from src.consciousness import ActiveReader
+    return ActiveReader(openai_api_key=OPENAI_API_KEY, newsapi_key=NEWSAPI_KEY)
+
+
+@components.component("background_retriever", required=False)
+def _build_background_retriever():
+    personality_layer = components.get("personality_layer")
+    hot_cache = components.get("hot_cache")
+    if not (personality_layer and hot_cache and OPENAI_API_KEY):
+        return None
+    from src.consciousness import BackgroundRetriever
+    return BackgroundRetriever(
+        personality_layer=personality_layer,
+        hot_cache=hot_cache,
+        openai_api_key=OPENAI_API_KEY
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the port immediately; warm components up in the background"""
+    warm_up = asyncio.create_task(components.warm_up())
+    yield
+    warm_up.cancel()
+
+
+def initialization_status() -> Dict:
+    """Component status plus startup warnings"""
+    status = components.get_status()
+    status["errors"] = startup_warnings + status["errors"]
+    return status
+
+
+app = FastAPI(title="ROOK Chat API v2", version="2.0.0", lifespan=lifespan)
+
+# CORS
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
 
 # Request/Response models
 class ChatRequest(BaseModel):
@@ -139,17 +144,19 @@ async def root():
     return {
         "message": "ROOK Chat API v2",
         "status": "online",
-        "initialization": initialization_status
+        "initialization": initialization_status()
     }
 
 
 @app.get("/health")
 async def health():
-    """Health check"""
+    """Liveness check (always 200); "ready" reports whether required components are online"""
+    status = initialization_status()
     return {
         "status": "healthy",
+        "ready": status["ready"],
         "version": "2.0.0",
-        "components": initialization_status,
+        "components": status,
         "environment": {
             "OPENAI_API_KEY": "set" if OPENAI_API_KEY else "missing",
             "PINECONE_API_KEY": "set" if PINECONE_API_KEY else "missing",
@@ -159,13 +166,26 @@ async def health():
     }
 
 
+@app.get("/health/ready")
+async def readiness():
+    """Readiness check - 503 until the required components are online"""
+    if not components.is_ready():
+        raise HTTPException(status_code=503, detail=initialization_status())
+    return {"ready": True, "components": components.get_status()["components"]}
+
+
 @app.post("/api/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """
     Chat with ROOK using consciousness architecture
     """
     try:
-        # Check if we have the required components
+        # Check if we have the required components (waits for warm-up if needed)
+        personality_layer = await components.aget("personality_layer")
+        hot_cache = await components.aget("hot_cache")
+        background_retriever = await components.aget("background_retriever")
+        active_reader = await components.aget("active_reader")
+        
         if not personality_layer:
             return ChatResponse(
                 response="ROOK is not fully initialized. Missing required environment variables: OPENAI_API_KEY and/or PINECONE_API_KEY. Please set these in your Render dashboard.",
@@ -240,12 +260,10 @@ async def chat(request: ChatRequest):
 async def get_status():
     """Get detailed initialization status"""
     return {
-        "initialization": initialization_status,
+        "initialization": initialization_status(),
         "components_ready": {
-            "personality_layer": personality_layer is not None,
-            "hot_cache": hot_cache is not None,
-            "active_reader": active_reader is not None,
-            "background_retriever": background_retriever is not None
+            name: components.peek(name) is not None
+            for name in ("personality_layer", "hot_cache", "active_reader", "background_retriever")
         },
         "environment_variables": {
             "OPENAI_API_KEY": "✅ Set" if OPENAI_API_KEY else "❌ Missing",
@@ -3,16 +3,24 @@ ROOK API - FastAPI application for AI investigative journalist
 """
 import os
 import sys
-from fastapi import FastAPI, HTTPException
+import asyncio
+from datetime import datetime
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import logging
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from rook_enhanced import ROOK
+from rook_safe import ROOKSafe
+from safety.evidence_first import Evidence
+from engine.batch import BatchRunner, dedupe, to_ndjson
+from engine.investigation_jobs import InvestigationJobManager, create_job_store
+from engine.tracing import get_tracer
+from engine.usage import get_usage_ledger
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -34,13 +42,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    """Trace each request and expose its stage timings as a Server-Timing header"""
+    with get_tracer().trace("unmatched") as trace:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if route is not None:
+            trace.name = f"{request.method} {route.path}"
+        response.headers["Server-Timing"] = trace.server_timing()
+    return response
+
 # Initialize ROOK instance
 rook = None
+investigation_jobs: Optional[InvestigationJobManager] = None
+
+# Each investigation makes several model calls - keep the batch pool modest
+investigation_batches = BatchRunner(
+    "investigate",
+    max_concurrency=int(os.getenv("INVESTIGATE_BATCH_CONCURRENCY", 4)),
+    max_items=int(os.getenv("INVESTIGATE_BATCH_MAX_ITEMS", 200))
+)
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize ROOK on startup"""
-    global rook
+    global rook, investigation_jobs
     try:
         logger.info("Initializing ROOK...")
         
@@ -52,8 +79,18 @@ async def startup_event():
             logger.error(f"Missing required environment variables: {missing_vars}")
             raise ValueError(f"Missing environment variables: {missing_vars}")
         
-        rook = ROOK()
+        rook = ROOKSafe(
+            openai_api_key=os.getenv("OPENAI_API_KEY"),
+            pinecone_api_key=os.getenv("PINECONE_API_KEY")
+        )
         logger.info("ROOK initialized successfully")
+        
+        # Long investigations run as background jobs; results go to the database when configured
+        investigation_jobs = InvestigationJobManager(
+            rook.investigate,
+            store=create_job_store(os.getenv("JOBS_DATABASE_URL", os.getenv("DATABASE_URL"))),
+            max_workers=int(os.getenv("INVESTIGATION_WORKERS", 2))
+        )
     except Exception as e:
         logger.error(f"Failed to initialize ROOK: {e}")
         raise
@@ -66,9 +103,47 @@ class InvestigationRequest(BaseModel):
 class InvestigationResponse(BaseModel):
     investigation_id: str
     response: str
-    method_card: Optional[Dict[str, Any]] = None
-    moves_ledger: Optional[Dict[str, Any]] = None
+    method_card: Optional[str] = None  # Markdown
+    moves_ledger: Optional[str] = None  # Markdown
     verification_score: Optional[float] = None
+    passed_gate: Optional[bool] = None
+
+class InvestigationBatchRequest(BaseModel):
+    requests: List[InvestigationRequest]
+    max_concurrency: Optional[int] = None
+
+
+def evidence_from_context(context: Optional[Dict[str, Any]]) -> List[Evidence]:
+    """
+    Build Evidence objects from a request's context["evidence"] list.
+
+    Each entry needs "source" and "content"; confidence, evidence_type and
+    metadata are optional.
+    """
+    evidence = []
+    for item in (context or {}).get("evidence", []):
+        evidence.append(Evidence(
+            source=item["source"],
+            content=item["content"],
+            timestamp=item.get("timestamp") or datetime.now(),
+            confidence=float(item.get("confidence", 0.8)),
+            evidence_type=item.get("evidence_type", "document"),
+            metadata=item.get("metadata") or {}
+        ))
+    return evidence
+
+
+def to_investigation_response(result: Dict[str, Any]) -> InvestigationResponse:
+    """Map a ROOKSafe result onto the API response"""
+    gating = result.get("gating_result", {})
+    return InvestigationResponse(
+        investigation_id=result.get("investigation_id", "unknown"),
+        response=result.get("publishable_content") or "Investigation blocked by safety gate",
+        method_card=result.get("method_card"),
+        moves_ledger=result.get("moves_ledger"),
+        verification_score=gating.get("verification_rate"),
+        passed_gate=gating.get("passed")
+    )
 
 @app.get("/")
 async def root():
@@ -105,21 +180,146 @@ async def investigate(request: InvestigationRequest):
         # Process investigation through ROOK
         result = rook.investigate(
             query=request.query,
-            context=request.context or {}
+            available_evidence=evidence_from_context(request.context)
         )
         
-        return InvestigationResponse(
-            investigation_id=result.get("investigation_id", "unknown"),
-            response=result.get("response", ""),
-            method_card=result.get("method_card"),
-            moves_ledger=result.get("moves_ledger"),
-            verification_score=result.get("verification_score")
-        )
+        return to_investigation_response(result)
     
     except Exception as e:
         logger.error(f"Investigation failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/investigate/batch")
+async def investigate_batch(request: InvestigationBatchRequest):
+    """
+    Batch investigation endpoint
+    
+    Runs many investigations through the full safety pipeline. Personality
+    context is retrieved once per distinct query and evidence excerpts are
+    embedded once for the whole batch; investigations then run in a bounded
+    pool. Streams NDJSON: one line per item as it finishes (with its index),
+    then a summary line.
+    """
+    if rook is None:
+        raise HTTPException(status_code=503, detail="ROOK not initialized")
+    
+    try:
+        investigation_batches.check_size(len(request.requests))
+        evidence = [evidence_from_context(item.context) for item in request.requests]
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch: {e}")
+    
+    queries = [item.query for item in request.requests]
+    unique_queries, _ = dedupe(queries)
+    batch_prefix = f"INV-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    personality_contexts: Dict[str, str] = {}
+    
+    def investigate_item(index: int, query: str) -> Dict[str, Any]:
+        result = rook.investigate(
+            query=query,
+            available_evidence=evidence[index],
+            investigation_id=f"{batch_prefix}-{index:03d}",
+            personality_context=personality_contexts.get(query)
+        )
+        return to_investigation_response(result).model_dump()
+    
+    async def stream():
+        try:
+            personality_contexts.update(await asyncio.to_thread(
+                rook.prefetch_personality_contexts,
+                unique_queries,
+                investigation_batches.concurrency_for(request.max_concurrency)
+            ))
+            excerpts = [e.content for items in evidence for e in items]
+            if excerpts and rook.evidence_system.client:
+                await asyncio.to_thread(rook.evidence_system.prime_embeddings, excerpts)
+        except Exception as e:
+            # Items fall back to retrieving/embedding on their own
+            logger.warning(f"Batch prefetch failed: {e}")
+        
+        async for record in investigation_batches.run(
+            queries,
+            investigate_item,
+            concurrency=request.max_concurrency,
+            unique_keys=len(unique_queries)
+        ):
+            yield to_ndjson(record)
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@app.post("/investigate/jobs", status_code=202)
+async def submit_investigation_job(request: InvestigationRequest):
+    """
+    Start an investigation in the background
+    
+    Returns a job id right away. Poll GET /investigate/jobs/{job_id} for the
+    status and result, or follow GET /investigate/jobs/{job_id}/events for
+    Moves Ledger progress as NDJSON.
+    """
+    if investigation_jobs is None:
+        raise HTTPException(status_code=503, detail="ROOK not initialized")
+    
+    try:
+        evidence = evidence_from_context(request.context)
+    except (KeyError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid evidence: {e}")
+    
+    job_id = investigation_jobs.submit(request.query, evidence)
+    logger.info(f"Queued investigation job {job_id}: {request.query[:100]}...")
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/investigate/jobs/{job_id}",
+        "events_url": f"/investigate/jobs/{job_id}/events"
+    }
+
+@app.get("/investigate/jobs/{job_id}")
+async def get_investigation_job(job_id: str, include_events: bool = False):
+    """Get an investigation job's status, and its result once it has finished"""
+    if investigation_jobs is None:
+        raise HTTPException(status_code=503, detail="ROOK not initialized")
+    
+    job = await asyncio.to_thread(investigation_jobs.get, job_id, include_events)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
+@app.get("/investigate/jobs/{job_id}/events")
+async def stream_investigation_job(job_id: str, after: int = 0):
+    """
+    Stream an investigation job's progress as NDJSON
+    
+    One line per event (status changes and Moves Ledger moves), ending when
+    the job finishes. Pass ?after=<seq> to resume after the last event seen.
+    """
+    if investigation_jobs is None:
+        raise HTTPException(status_code=503, detail="ROOK not initialized")
+    if await asyncio.to_thread(investigation_jobs.get, job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    
+    async def stream():
+        async for event in investigation_jobs.stream_events(job_id, after=after):
+            yield to_ndjson(event)
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@app.get("/investigate/jobs")
+async def investigation_job_stats():
+    """Investigation job pool statistics"""
+    if investigation_jobs is None:
+        raise HTTPException(status_code=503, detail="ROOK not initialized")
+    return investigation_jobs.get_stats()
+
+@app.get("/stats/stages")
+async def stage_stats():
+    """Per-stage latency percentiles (retrieval, verification, generation, ...)"""
+    return get_tracer().get_stats()
+
+@app.get("/stats/usage")
+async def usage_stats():
+    """Token usage and estimated cost by stage, model and user"""
+    return get_usage_ledger().get_stats()
+
 @app.get("/personality")
 async def get_personality():
     """Get information about ROOK's current personality state"""
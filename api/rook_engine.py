@@ -7,79 +7,85 @@ This service runs continuously and maintains:
 - Personality layer (Pinecone-backed)
 - Active reader (news ingestion)
 - Background retriever (anticipatory pre-fetching)
+- Sleep consolidation worker (optional, leased across replicas)
 
 Designed to be called by rook-web or other client services.
 """
 
 import os
 import sys
+import asyncio
 from pathlib import Path
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from fastapi import FastAPI, HTTPException, Header
+from fastapi import FastAPI, HTTPException, Header, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict
 import uvicorn
 from datetime import datetime
-
-# Import ROOK components
-from src.personality.personality_layer_with_storage import PersonalityLayerWithStorage as PersonalityLayer
-from src.consciousness import get_hot_cache, ActiveReader, BackgroundRetriever
-
-app = FastAPI(
-    title="ROOK Engine API",
-    version="1.0.0",
-    description="Core ROOK intelligence service - Internal API only"
-)
-
-# CORS - restrict to internal services in production
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # TODO: Restrict to rook-web service URL in production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+from contextlib import asynccontextmanager
+
+# Import ROOK components (heavy SDK-backed modules are imported by the factories)
+from src.engine.components import ComponentRegistry
+from src.engine.singleflight import SingleFlight, normalize_query, context_hash
+from src.conversation.session_store import create_session_store, is_valid_session_id
+from src.engine.worker_state import create_worker_state, affinity_key, WORKER_ID
+from src.engine.batch import BatchRunner, dedupe, to_ndjson
+from src.engine.llm_cache import get_llm_cache
+from src.engine.resilience import get_upstream_stats
+from src.engine.tracing import get_tracer, span, current_trace
+from src.engine.usage import get_usage_ledger, set_usage_user, usage_scope
+from src.engine.lease import create_lease
 
 # Environment variables
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 PINECONE_API_KEY = os.getenv('PINECONE_API_KEY')
 NEWSAPI_KEY = os.getenv('NEWSAPI_KEY')
 ENGINE_API_KEY = os.getenv('ENGINE_API_KEY', 'dev-key-change-in-production')
-
-# Track initialization status
-initialization_status = {
-    "personality_layer": "not_initialized",
-    "hot_cache": "not_initialized",
-    "active_reader": "not_initialized",
-    "background_retriever": "not_initialized",
-    "errors": [],
-    "initialized_at": None
-}
-
-# Initialize components
-personality_layer = None
-hot_cache = None
-active_reader = None
-background_retriever = None
+SESSION_DATABASE_URL = os.getenv('SESSION_DATABASE_URL')
+SESSION_MAX_TURNS = int(os.getenv('SESSION_MAX_TURNS', 20))
+SESSION_MAX_ACTIVE = int(os.getenv('SESSION_MAX_ACTIVE', 1000))
+SESSION_IDLE_TTL = float(os.getenv('SESSION_IDLE_TTL_SECONDS', 3600))
+HISTORY_KEEP_TURNS = int(os.getenv('HISTORY_KEEP_TURNS', 4))
+HISTORY_TOKEN_BUDGET = int(os.getenv('HISTORY_TOKEN_BUDGET', 2000))
+
+# Multi-worker: shared state + invalidations (defaults to the session database)
+ENGINE_WORKERS = int(os.getenv('WEB_CONCURRENCY', 1))
+STATE_DATABASE_URL = os.getenv('STATE_DATABASE_URL', SESSION_DATABASE_URL)
+STATE_POLL_INTERVAL = float(os.getenv('STATE_POLL_INTERVAL_SECONDS', 1.0))
+SHARED_READINGS_LIMIT = int(os.getenv('SHARED_READINGS_LIMIT', 200))
+
+# Batch chat: bounded generation pool, capped batch size
+CHAT_BATCH_CONCURRENCY = int(os.getenv('CHAT_BATCH_CONCURRENCY', 8))
+CHAT_BATCH_MAX_ITEMS = int(os.getenv('CHAT_BATCH_MAX_ITEMS', 500))
+# Emergent-personality memories and their sleep consolidation (off unless an index is set)
+EMERGENT_INDEX_NAME = os.getenv('EMERGENT_INDEX_NAME')
+CONSOLIDATION_LEASE_TTL = float(os.getenv('CONSOLIDATION_LEASE_TTL_SECONDS', 300))
+CO_RETRIEVAL_PATH = os.getenv('CO_RETRIEVAL_PATH')
+# Observation memories are scored in batches of this many turns off the request path (0: per turn)
+EMERGENT_OBSERVATION_BATCH = int(os.getenv('EMERGENT_OBSERVATION_BATCH', 10))
+# Personality snapshots + delta log: shared via STATE_DATABASE_URL, else local files here
+PERSONALITY_STATE_PATH = os.getenv('PERSONALITY_STATE_PATH')
 
 print("🧠 Initializing ROOK Engine...")
 
 # Check environment variables
+startup_warnings = []
 if not OPENAI_API_KEY:
     msg = "⚠️  OPENAI_API_KEY not set"
     print(msg)
-    initialization_status["errors"].append(msg)
+    startup_warnings.append(msg)
 else:
     print("✅ OPENAI_API_KEY found")
 
 if not PINECONE_API_KEY:
     msg = "⚠️  PINECONE_API_KEY not set"
     print(msg)
-    initialization_status["errors"].append(msg)
+    startup_warnings.append(msg)
 else:
     print("✅ PINECONE_API_KEY found")
 
@@ -87,50 +93,207 @@ if not NEWSAPI_KEY:
     msg = "ℹ️  NEWSAPI_KEY not set - News reading will be disabled (optional)"
     print(msg)
 
-# Initialize personality layer
-if PINECONE_API_KEY and OPENAI_API_KEY:
-    try:
-        personality_layer = PersonalityLayer(
-            pinecone_api_key=PINECONE_API_KEY,
-            openai_api_key=OPENAI_API_KEY
-        )
-        initialization_status["personality_layer"] = "online"
-        print("✅ Personality layer initialized")
-    except Exception as e:
-        msg = f"❌ Personality layer failed: {e}"
+# Components are built lazily and warmed up concurrently after the port opens
+components = ComponentRegistry("ROOK Engine")
+
+
+@components.component("worker_state")
+def _build_worker_state():
+    worker_state = create_worker_state(STATE_DATABASE_URL, poll_interval=STATE_POLL_INTERVAL)
+    if ENGINE_WORKERS > 1 and not worker_state.shared:
+        msg = "⚠️  Several workers without STATE_DATABASE_URL - sessions and readings are per-worker"
         print(msg)
-        initialization_status["personality_layer"] = "failed"
-        initialization_status["errors"].append(msg)
-
-# Initialize consciousness components
-try:
-    from src.consciousness import get_hot_cache, ActiveReader, BackgroundRetriever
-    
-    hot_cache = get_hot_cache()
-    initialization_status["hot_cache"] = "online"
-    print("✅ Hot cache initialized")
-    
-    if OPENAI_API_KEY:
-        active_reader = ActiveReader(openai_api_key=OPENAI_API_KEY, newsapi_key=NEWSAPI_KEY)
-        initialization_status["active_reader"] = "online"
-        print("✅ Active reader initialized")
-    
-    if personality_layer and hot_cache and OPENAI_API_KEY:
-        background_retriever = BackgroundRetriever(
-            personality_layer=personality_layer,
-            hot_cache=hot_cache,
-            openai_api_key=OPENAI_API_KEY
+        startup_warnings.append(msg)
+    worker_state.start()
+    return worker_state
+
+
+@components.component("session_store")
+def _build_session_store():
+    # Conversation sessions (clients send a session id + the new message only)
+    session_store = create_session_store(
+        SESSION_DATABASE_URL,
+        max_turns=SESSION_MAX_TURNS,
+        max_sessions=SESSION_MAX_ACTIVE,
+        idle_ttl_seconds=SESSION_IDLE_TTL
+    )
+    
+    # Other workers drop their cached copy when a session changes here
+    worker_state = components.get("worker_state")
+    session_store.on_change = lambda session_id: worker_state.invalidate("session", session_id)
+    worker_state.subscribe("session", session_store.invalidate)
+    return session_store
+
+
+@components.component("personality_layer")
+def _build_personality_layer():
+    if not (PINECONE_API_KEY and OPENAI_API_KEY):
+        return None
+    from src.personality.personality_layer_with_storage import PersonalityLayerWithStorage as PersonalityLayer
+    return PersonalityLayer(
+        pinecone_api_key=PINECONE_API_KEY,
+        openai_api_key=OPENAI_API_KEY,
+        session_store=components.get("session_store"),
+        history_keep_turns=HISTORY_KEEP_TURNS,
+        history_token_budget=HISTORY_TOKEN_BUDGET
+    )
+
+
+@components.component("hot_cache")
+def _build_hot_cache():
+    from src.consciousness import get_hot_cache
+    return get_hot_cache()
+
+
+@components.component("active_reader", required=False)
+def _build_active_reader():
+    if not OPENAI_API_KEY:
+        return None
+    from src.consciousness import ActiveReader
+    active_reader = ActiveReader(openai_api_key=OPENAI_API_KEY, newsapi_key=NEWSAPI_KEY)
+    
+    # Readings done by any worker are shared; pick up what's already there
+    worker_state = components.get("worker_state")
+    active_reader.merge_history(worker_state.get_shared("readings", []))
+    
+    def on_shared_change(key: str):
+        if key != "readings":
+            return
+        new_readings = active_reader.merge_history(worker_state.get_shared("readings", []))
+        hot_cache = components.peek("hot_cache")
+        if hot_cache and new_readings:
+            hot_cache.refresh_cache(new_readings)
+    
+    worker_state.subscribe("shared", on_shared_change)
+    return active_reader
+
+
+@components.component("background_retriever", required=False)
+def _build_background_retriever():
+    personality_layer = components.get("personality_layer")
+    hot_cache = components.get("hot_cache")
+    if not (personality_layer and hot_cache and OPENAI_API_KEY):
+        return None
+    from src.consciousness import BackgroundRetriever
+    return BackgroundRetriever(
+        personality_layer=personality_layer,
+        hot_cache=hot_cache,
+        openai_api_key=OPENAI_API_KEY
+    )
+
+
+@components.component("emergent", required=False)
+def _build_emergent():
+    if not (EMERGENT_INDEX_NAME and PINECONE_API_KEY and OPENAI_API_KEY):
+        return None
+    from src.rook_emergent import ROOKEmergent
+    from src.personality.state_store import create_personality_store
+    from src.memory.co_retrieval import create_co_retrieval_store
+    co_retrieval_path = CO_RETRIEVAL_PATH
+    if co_retrieval_path and ENGINE_WORKERS > 1:
+        # Every worker would overwrite the others' file on exit
+        print("⚠️  CO_RETRIEVAL_PATH ignored with several workers - co-retrievals are shared via STATE_DATABASE_URL")
+        co_retrieval_path = None
+    # Every worker runs the scheduler; the lease lets one replica consolidate at a time
+    return ROOKEmergent(
+        openai_api_key=OPENAI_API_KEY,
+        pinecone_api_key=PINECONE_API_KEY,
+        pinecone_index_name=EMERGENT_INDEX_NAME,
+        consolidation_lease=create_lease("rook-consolidation", STATE_DATABASE_URL, CONSOLIDATION_LEASE_TTL),
+        co_retrieval_path=co_retrieval_path,
+        co_retrieval_store=create_co_retrieval_store(STATE_DATABASE_URL),
+        defer_observations=EMERGENT_OBSERVATION_BATCH > 0,
+        observation_batch_size=max(1, EMERGENT_OBSERVATION_BATCH),
+        personality_store=create_personality_store(STATE_DATABASE_URL, PERSONALITY_STATE_PATH)
+    )
+
+
+# Request coalescing: concurrent identical questions share one backend call
+generation_flight = SingleFlight("generation")
+anticipation_flight = SingleFlight("anticipation")
+
+chat_batches = BatchRunner("chat", max_concurrency=CHAT_BATCH_CONCURRENCY, max_items=CHAT_BATCH_MAX_ITEMS)
+
+
+def share_readings(memories: List[Dict]):
+    """Publish new readings so every worker sees the same reading state"""
+    worker_state = components.peek("worker_state")
+    if not worker_state or not memories:
+        return
+    
+    def merge(readings):
+        # Runs in the backend against the latest value, so concurrent publishers both land
+        readings = (readings or []) + memories
+        readings.sort(key=lambda r: r.get("date_read", ""))
+        return readings[-SHARED_READINGS_LIMIT:]
+    
+    worker_state.update_shared("readings", merge)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the port immediately; warm components up in the background"""
+    warm_up = asyncio.create_task(components.warm_up())
+    yield
+    warm_up.cancel()
+    worker_state = components.peek("worker_state")
+    if worker_state:
+        worker_state.stop()
+    emergent = components.peek("emergent")
+    if emergent:
+        emergent.flush_observations()
+        emergent.consolidation.stop()
+        if emergent.personality_store:
+            emergent.personality_store.stop()
+
+
+async def require(name: str, detail: str = None):
+    """Get a component (waiting for warm-up if needed) or fail with 503"""
+    component = await components.aget(name)
+    if component is None:
+        raise HTTPException(
+            status_code=503,
+            detail=detail or f"{name} not initialized. Check /health for details."
         )
-        initialization_status["background_retriever"] = "online"
-        print("✅ Background retriever initialized")
-        
-except Exception as e:
-    msg = f"❌ Consciousness modules failed: {e}"
-    print(msg)
-    initialization_status["errors"].append(msg)
+    return component
+
+
+app = FastAPI(
+    title="ROOK Engine API",
+    version="1.0.0",
+    description="Core ROOK intelligence service - Internal API only",
+    lifespan=lifespan
+)
+
+# CORS - restrict to internal services in production
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],  # TODO: Restrict to rook-web service URL in production
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
 
-initialization_status["initialized_at"] = datetime.now().isoformat()
-print(f"🚀 ROOK Engine ready: {initialization_status}")
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    """Trace the request and report its stage timings in a Server-Timing header"""
+    with get_tracer().trace("unmatched") as trace:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if route is not None:
+            # Route template, not the raw path, so histograms stay bounded
+            trace.name = f"{request.method} {route.path}"
+        response.headers["Server-Timing"] = trace.server_timing()
+        # Token usage for the request can be looked up under this id
+        response.headers["X-Rook-Request-Id"] = trace.trace_id
+    return response
+
+@app.middleware("http")
+async def worker_hint(request: Request, call_next):
+    """Tag responses with the worker that served them (sticky routing hint)"""
+    response = await call_next(request)
+    response.headers["X-Rook-Worker"] = WORKER_ID
+    return response
 
 
 # Security: Simple API key authentication
@@ -141,20 +304,35 @@ def verify_api_key(x_api_key: str = Header(None)):
     return x_api_key
 
 
+def verify_session_id(session_id: Optional[str]):
+    """Reject client session ids the session store can't hold"""
+    if session_id and not is_valid_session_id(session_id):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid session_id: use 1-64 letters, digits, '_' or '-'"
+        )
+
+
 # Request/Response models
 class ChatRequest(BaseModel):
     message: str
-    conversation_history: Optional[List[Dict]] = []
+    session_id: Optional[str] = None
+    conversation_history: Optional[List[Dict]] = None  # Legacy: prefer session_id
     user_id: Optional[str] = None
 
 class ChatResponse(BaseModel):
     response: str
     model_used: str
+    session_id: Optional[str] = None
     from_cache: bool = False
     anticipated_topics: Optional[List[str]] = None
     reading_context: Optional[str] = None
     timestamp: str
 
+class ChatBatchRequest(BaseModel):
+    requests: List[ChatRequest]
+    max_concurrency: Optional[int] = None  # Clamped to CHAT_BATCH_CONCURRENCY
+
 class ReadingRequest(BaseModel):
     topics: Optional[List[str]] = None
 
@@ -177,38 +355,73 @@ async def root():
 
 @app.get("/health")
 async def health():
-    """Health check - no auth required"""
+    """
+    Liveness check - no auth required
+    
+    Always 200 while the process is up (warm-up may still be running);
+    "ready" reports whether the required components are online.
+    """
+    status = components.get_status()
+    status["errors"] = startup_warnings + status["errors"]
     return {
         "status": "healthy",
+        "ready": status["ready"],
         "version": "1.0.0",
-        "components": initialization_status,
+        "components": status,
         "timestamp": datetime.now().isoformat()
     }
 
 
+@app.get("/health/ready")
+async def readiness():
+    """Readiness check - 503 until the required components are online"""
+    if not components.is_ready():
+        raise HTTPException(status_code=503, detail=components.get_status())
+    return {"ready": True, "components": components.get_status()["components"]}
+
+
 @app.post("/api/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest, api_key: str = Header(None, alias="X-API-Key")):
+async def chat(request: ChatRequest, response: Response, api_key: str = Header(None, alias="X-API-Key")):
     """
     Generate ROOK response using full consciousness architecture
     
     Requires X-API-Key header for authentication
     """
     verify_api_key(api_key)
+    verify_session_id(request.session_id)
     
     try:
-        if not personality_layer:
-            raise HTTPException(
-                status_code=503,
-                detail="ROOK Engine not fully initialized. Check /health for details."
-            )
+        personality_layer = await require(
+            "personality_layer",
+            "ROOK Engine not fully initialized. Check /health for details."
+        )
+        session_store = await require("session_store")
+        hot_cache = await components.aget("hot_cache")
+        background_retriever = await components.aget("background_retriever")
+        active_reader = await components.aget("active_reader")
         
         user_message = request.message
-        conversation_history = request.conversation_history or []
+        session_id = request.session_id or session_store.new_session_id()
+        
+        # Proxies can hash on this to keep a session on one worker
+        response.headers["X-Rook-Affinity"] = affinity_key(session_id)
+        set_usage_user(request.user_id or session_id)
+        
+        # History lives server-side; legacy clients may still send it inline
+        if request.conversation_history:
+            conversation_history = request.conversation_history
+        else:
+            conversation_history = personality_layer.get_conversation_history(session_id)
+        
+        # Requests with the same question and the same prior context produce the
+        # same prompt, so they can share anticipation and generation
+        flight_key = f"{normalize_query(user_message)}|{context_hash(conversation_history)}"
         
         # 1. Check hot cache first
         from_cache = False
         if hot_cache:
-            cached_response = hot_cache.get_cached(user_message)
+            with span("hot_cache"):
+                cached_response = hot_cache.get_cached(user_message)
             if cached_response and cached_response.get("content"):
                 print(f"💨 Cache hit for: {user_message[:50]}...")
                 from_cache = True
@@ -216,10 +429,15 @@ async def chat(request: ChatRequest, api_key: str = Header(None, alias="X-API-Ke
         # 2. Start background retrieval (non-blocking)
         anticipated_topics = []
         if background_retriever:
-            anticipated_topics = background_retriever.anticipate_next_topics(
-                user_message,
-                conversation_history
-            )
+            with span("anticipation"):
+                anticipated_topics, _ = await asyncio.to_thread(
+                    anticipation_flight.do,
+                    flight_key,
+                    lambda: background_retriever.anticipate_next_topics(
+                        user_message,
+                        conversation_history
+                    )
+                )
             print(f"🔮 Anticipated next topics: {anticipated_topics}")
         
         # 3. Check if we have recent reading context
@@ -231,13 +449,25 @@ async def chat(request: ChatRequest, api_key: str = Header(None, alias="X-API-Ke
         
         # 4. Generate response using personality layer
         if not from_cache:
-            response_text, model_used = personality_layer.chat(
-                user_message=user_message,
-                conversation_history=conversation_history
+            (response_text, model_used), shared = await asyncio.to_thread(
+                generation_flight.do,
+                flight_key,
+                lambda: personality_layer.chat(
+                    user_message=user_message,
+                    conversation_history=conversation_history,
+                    user_id=session_id
+                )
             )
+            # chat() reports failures as an apology with model "error" - never store those
+            failed = model_used == "error"
+            if shared and not failed:
+                # The leader recorded the turn in its own session only
+                print(f"🤝 Shared in-flight generation for: {user_message[:50]}...")
+                personality_layer.add_to_conversation_history(session_id, "user", user_message)
+                personality_layer.add_to_conversation_history(session_id, "assistant", response_text)
             
             # 5. Update hot cache
-            if hot_cache:
+            if hot_cache and not failed:
                 hot_cache.update_context(
                     topic=user_message,
                     content=response_text,
@@ -250,10 +480,13 @@ async def chat(request: ChatRequest, api_key: str = Header(None, alias="X-API-Ke
         else:
             response_text = cached_response["content"]
             model_used = cached_response.get("metadata", {}).get("model", "cache")
+            personality_layer.add_to_conversation_history(session_id, "user", user_message)
+            personality_layer.add_to_conversation_history(session_id, "assistant", response_text)
         
         return ChatResponse(
             response=response_text,
             model_used=model_used,
+            session_id=session_id,
             from_cache=from_cache,
             anticipated_topics=anticipated_topics,
             reading_context=reading_context,
@@ -269,6 +502,94 @@ async def chat(request: ChatRequest, api_key: str = Header(None, alias="X-API-Ke
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/chat/batch")
+async def chat_batch(request: ChatBatchRequest, api_key: str = Header(None, alias="X-API-Key")):
+    """
+    Run many chat requests in one call (evaluation sets, adversarial runs)
+    
+    Retrieval is done up front for each distinct question - one embeddings
+    request for the whole batch, one Pinecone round trip per distinct query -
+    then generations run in a bounded pool. Results stream back as NDJSON,
+    one line per item in completion order (with its index), followed by a
+    summary line. Batch items skip the hot cache and topic anticipation.
+    
+    Requires X-API-Key header for authentication
+    """
+    verify_api_key(api_key)
+    
+    try:
+        chat_batches.check_size(len(request.requests))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    for item in request.requests:
+        verify_session_id(item.session_id)
+    
+    personality_layer = await require(
+        "personality_layer",
+        "ROOK Engine not fully initialized. Check /health for details."
+    )
+    session_store = await require("session_store")
+    
+    items = request.requests
+    unique_queries, _ = dedupe([normalize_query(item.message) for item in items])
+    prefetched: Dict = {}
+    # Items run on the batch pool, outside this request's context
+    request_id = current_trace().trace_id if current_trace() else None
+    
+    def prefetch() -> Dict:
+        with usage_scope(request_id=request_id):
+            return personality_layer.prefetch_contexts(
+                [item.message for item in items],
+                chat_batches.concurrency_for(request.max_concurrency)
+            )
+    
+    def answer(index: int, item: ChatRequest) -> Dict:
+        session_id = item.session_id or session_store.new_session_id()
+        with usage_scope(request_id=request_id, user_id=item.user_id or session_id):
+            return generate(item, session_id)
+    
+    def generate(item: ChatRequest, session_id: str) -> Dict:
+        if item.conversation_history:
+            conversation_history = item.conversation_history
+        else:
+            conversation_history = personality_layer.get_conversation_history(session_id)
+        
+        retrieved_context = prefetched.get(normalize_query(item.message))
+        flight_key = f"{normalize_query(item.message)}|{context_hash(conversation_history)}"
+        (response_text, model_used), shared = generation_flight.do(
+            flight_key,
+            lambda: personality_layer.chat(
+                user_message=item.message,
+                conversation_history=conversation_history,
+                user_id=session_id,
+                retrieved_context=retrieved_context
+            )
+        )
+        if shared:
+            personality_layer.add_to_conversation_history(session_id, "user", item.message)
+            personality_layer.add_to_conversation_history(session_id, "assistant", response_text)
+        
+        return ChatResponse(
+            response=response_text,
+            model_used=model_used,
+            session_id=session_id,
+            timestamp=datetime.now().isoformat()
+        ).model_dump()
+    
+    async def stream():
+        prefetched.update(await asyncio.to_thread(prefetch))
+        print(f"🔎 Batch retrieval: {len(items)} items, {len(unique_queries)} distinct queries, {len(prefetched)} prefetched")
+        async for record in chat_batches.run(
+            items,
+            answer,
+            concurrency=request.max_concurrency,
+            unique_keys=len(unique_queries)
+        ):
+            yield to_ndjson(record)
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 @app.post("/api/read")
 async def trigger_reading(request: ReadingRequest, api_key: str = Header(None, alias="X-API-Key")):
     """
@@ -279,15 +600,17 @@ async def trigger_reading(request: ReadingRequest, api_key: str = Header(None, a
     verify_api_key(api_key)
     
     try:
-        if not active_reader:
-            raise HTTPException(status_code=503, detail="Active reader not initialized")
+        active_reader = await require("active_reader", "Active reader not initialized")
+        hot_cache = await components.aget("hot_cache")
         
         topics = request.topics
         memories = active_reader.read_morning_news(topics=topics)
         
-        # Update hot cache with new readings
+        # Update hot cache with new readings; other workers pick them up
+        # through the shared reading state
         if hot_cache:
             hot_cache.refresh_cache(memories)
+        share_readings(memories)
         
         summary = active_reader.get_reading_summary(days=1)
         
@@ -315,8 +638,7 @@ async def get_context(api_key: str = Header(None, alias="X-API-Key")):
     verify_api_key(api_key)
     
     try:
-        if not hot_cache:
-            raise HTTPException(status_code=503, detail="Hot cache not initialized")
+        hot_cache = await require("hot_cache", "Hot cache not initialized")
         
         context = hot_cache.get_immediate_context()
         return {
@@ -343,8 +665,7 @@ async def query_memory(request: MemoryQuery, api_key: str = Header(None, alias="
     verify_api_key(api_key)
     
     try:
-        if not personality_layer:
-            raise HTTPException(status_code=503, detail="Personality layer not initialized")
+        personality_layer = await require("personality_layer", "Personality layer not initialized")
         
         # Query personality/memory layer
         results = personality_layer.query_memory(
@@ -366,6 +687,49 @@ async def query_memory(request: MemoryQuery, api_key: str = Header(None, alias="
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/usage/{request_id}")
+async def get_request_usage(request_id: str, api_key: str = Header(None, alias="X-API-Key")):
+    """
+    Token usage and estimated cost of one recent request, by stage
+    
+    The id is the X-Rook-Request-Id header of the response.
+    Requires X-API-Key header for authentication
+    """
+    verify_api_key(api_key)
+    
+    usage = get_usage_ledger().request_usage(request_id)
+    if usage is None:
+        raise HTTPException(status_code=404, detail=f"No usage recorded for request {request_id}")
+    return {"request_id": request_id, **usage}
+
+
+@app.get("/api/consolidation")
+async def get_consolidation(api_key: str = Header(None, alias="X-API-Key")):
+    """
+    Sleep consolidation status: current phase and progress, last run, lease holder
+    
+    Requires X-API-Key header for authentication
+    """
+    verify_api_key(api_key)
+    
+    emergent = await require("emergent", "Consolidation not enabled (set EMERGENT_INDEX_NAME)")
+    return {**emergent.get_consolidation_stats(), "timestamp": datetime.now().isoformat()}
+
+
+@app.post("/api/consolidation/run")
+async def run_consolidation(api_key: str = Header(None, alias="X-API-Key")):
+    """
+    Ask the consolidation worker for a run now (skipped if another replica holds the lease)
+    
+    Requires X-API-Key header for authentication
+    """
+    verify_api_key(api_key)
+    
+    emergent = await require("emergent", "Consolidation not enabled (set EMERGENT_INDEX_NAME)")
+    emergent.consolidation.trigger()
+    return {"status": "scheduled", "timestamp": datetime.now().isoformat()}
+
+
 @app.get("/api/stats")
 async def get_stats(api_key: str = Header(None, alias="X-API-Key")):
     """
@@ -376,10 +740,35 @@ async def get_stats(api_key: str = Header(None, alias="X-API-Key")):
     verify_api_key(api_key)
     
     try:
+        # Stats never wait for warm-up - components still initializing report empty
+        hot_cache = components.peek("hot_cache")
+        background_retriever = components.peek("background_retriever")
+        active_reader = components.peek("active_reader")
+        session_store = components.peek("session_store")
+        personality_layer = components.peek("personality_layer")
+        
         stats = {
             "cache_stats": hot_cache.get_cache_stats() if hot_cache else {},
             "anticipation_stats": background_retriever.get_anticipation_stats() if background_retriever else {},
             "reading_stats": active_reader.get_reading_summary(days=1) if active_reader else {},
+            "sessions": session_store.get_stats() if session_store else {},
+            "summarizer": personality_layer.summarizer.get_stats() if personality_layer else {},
+            "prompt_assembler": personality_layer.prompt_assembler.get_stats() if personality_layer else {},
+            "singleflight": {
+                "retrieval": personality_layer.retrieval_flight.get_stats() if personality_layer else {},
+                "generation": generation_flight.get_stats(),
+                "anticipation": anticipation_flight.get_stats()
+            },
+            "batches": chat_batches.get_stats(),
+            "llm_cache": get_llm_cache().get_stats(),
+            "upstreams": get_upstream_stats(),
+            "stages": get_tracer().get_stats(),
+            "usage": get_usage_ledger().get_stats(),
+            "consolidation": components.peek("emergent").get_consolidation_stats() if components.peek("emergent") else {},
+            "observations": components.peek("emergent").scorer.get_stats() if components.peek("emergent") else {},
+            "personality_store": (components.peek("emergent").get_personality_store_stats() or {}) if components.peek("emergent") else {},
+            "components": components.get_status()["components"],
+            "worker_state": components.peek("worker_state").get_stats() if components.peek("worker_state") else {},
             "timestamp": datetime.now().isoformat()
         }
         return stats
@@ -390,10 +779,13 @@ async def get_stats(api_key: str = Header(None, alias="X-API-Key")):
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8001))
-    print(f"🚀 Starting ROOK Engine on port {port}")
+    print(f"🚀 Starting ROOK Engine on port {port} ({ENGINE_WORKERS} worker(s))")
     uvicorn.run(
-        app,
+        # Several workers need an import string so each process loads the app
+        "rook_engine:app" if ENGINE_WORKERS > 1 else app,
+        app_dir=str(Path(__file__).parent),
         host="0.0.0.0",
         port=port,
+        workers=ENGINE_WORKERS,
         log_level="info"
     )
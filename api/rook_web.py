@@ -11,7 +11,10 @@ This service:
 """
 
 import os
+import re
+import time
 import httpx
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, JSONResponse
@@ -22,10 +25,231 @@ import uvicorn
 from datetime import datetime
 from pathlib import Path
 
+# Configuration
+ROOK_ENGINE_URL = os.getenv('ROOK_ENGINE_URL', 'http://localhost:8001')
+ENGINE_API_KEY = os.getenv('ENGINE_API_KEY', 'dev-key-change-in-production')
+DATABASE_URL = os.getenv('DATABASE_URL')
+
+# Engine proxy tuning
+ENGINE_MAX_CONNECTIONS = int(os.getenv('ENGINE_MAX_CONNECTIONS', 50))
+ENGINE_MAX_KEEPALIVE = int(os.getenv('ENGINE_MAX_KEEPALIVE', 20))
+ENGINE_CONNECT_TIMEOUT = float(os.getenv('ENGINE_CONNECT_TIMEOUT', 3.0))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('ENGINE_BREAKER_FAILURES', 5))
+BREAKER_RESET_SECONDS = float(os.getenv('ENGINE_BREAKER_RESET_SECONDS', 15.0))
+
+# Read timeout per engine route (seconds)
+ROUTE_TIMEOUTS = {
+    "/health": 5.0,
+    "/api/chat": 30.0,
+    "/api/context": 10.0,
+    "/api/stats": 10.0,
+    "/api/read": 60.0,
+}
+
+
+class EngineUnavailable(Exception):
+    """Raised when the circuit breaker is open and the engine call is skipped."""
+
+
+class CircuitBreaker:
+    """
+    Small circuit breaker for the engine connection.
+    
+    closed    - requests flow normally
+    open      - requests fail fast until reset_timeout has passed
+    half_open - one trial request decides whether to close or re-open
+    """
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 15.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._trial_in_flight = False
+    
+    def allow_request(self) -> bool:
+        """Check whether a request may go to the engine"""
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.rejected += 1
+                return False
+            self.state = "half_open"
+        
+        if self.state == "half_open":
+            if self._trial_in_flight:
+                self.rejected += 1
+                return False
+            self._trial_in_flight = True
+        
+        return True
+    
+    def record_success(self):
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self._trial_in_flight = False
+    
+    def release_trial(self):
+        """The request ended without a verdict (cancelled, unexpected error); allow another trial"""
+        self._trial_in_flight = False
+    
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._trial_in_flight = False
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+    
+    def get_stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected_requests": self.rejected
+        }
+
+
+class EngineProxy:
+    """
+    Shared, pooled HTTP client for calls to rook-engine.
+    
+    One AsyncClient lives for the lifetime of the app so TCP/TLS connections
+    are reused (HTTP/2 when the h2 package is installed).
+    """
+    
+    def __init__(self, base_url: str, api_key: str):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.limits = httpx.Limits(
+            max_connections=ENGINE_MAX_CONNECTIONS,
+            max_keepalive_connections=ENGINE_MAX_KEEPALIVE,
+            keepalive_expiry=60.0
+        )
+        self.breaker = CircuitBreaker(
+            failure_threshold=BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=BREAKER_RESET_SECONDS
+        )
+        self.client: Optional[httpx.AsyncClient] = None
+        self.http2 = False
+        
+        # Pool utilization metrics
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.total_requests = 0
+        self.failed_requests = 0
+        self.requests_by_route: Dict[str, int] = {}
+    
+    async def start(self):
+        """Open the shared client (called from the app lifespan)"""
+        try:
+            import h2  # noqa: F401 - only needed to enable HTTP/2
+            self.http2 = True
+        except ImportError:
+            self.http2 = False
+        
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={"X-API-Key": self.api_key},
+            limits=self.limits,
+            http2=self.http2,
+            timeout=httpx.Timeout(30.0, connect=ENGINE_CONNECT_TIMEOUT)
+        )
+    
+    async def close(self):
+        """Close the shared client and its pooled connections"""
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+    
+    async def request(self, method: str, route: str, **kwargs) -> httpx.Response:
+        """
+        Send a request to the engine through the shared pool.
+        
+        Raises:
+            EngineUnavailable: If the circuit breaker is open
+        """
+        if self.client is None:
+            await self.start()
+        
+        if not self.breaker.allow_request():
+            raise EngineUnavailable(f"Circuit open after {self.breaker.consecutive_failures} failures")
+        
+        read_timeout = ROUTE_TIMEOUTS.get(route, 30.0)
+        timeout = httpx.Timeout(read_timeout, connect=min(ENGINE_CONNECT_TIMEOUT, read_timeout))
+        
+        self.total_requests += 1
+        self.requests_by_route[route] = self.requests_by_route.get(route, 0) + 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            response = await self.client.request(method, route, timeout=timeout, **kwargs)
+        except (httpx.TransportError, httpx.TimeoutException):
+            self.failed_requests += 1
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            # Client disconnect (CancelledError) or an unexpected error: no verdict,
+            # but a half-open trial must not stay in flight forever
+            self.breaker.release_trial()
+            raise
+        finally:
+            self.in_flight -= 1
+        
+        if response.status_code >= 500:
+            self.failed_requests += 1
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        
+        return response
+    
+    def get_stats(self) -> Dict:
+        """Pool utilization and breaker statistics"""
+        max_connections = self.limits.max_connections
+        pooled_connections = None
+        if self.client is not None:
+            # httpcore keeps the pool on the transport; not public API, so best effort
+            pool = getattr(getattr(self.client, "_transport", None), "_pool", None)
+            if pool is not None and hasattr(pool, "connections"):
+                pooled_connections = len(pool.connections)
+        
+        return {
+            "http2": self.http2,
+            "max_connections": max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "pooled_connections": pooled_connections,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "utilization": self.in_flight / max_connections if max_connections else 0,
+            "peak_utilization": self.peak_in_flight / max_connections if max_connections else 0,
+            "total_requests": self.total_requests,
+            "failed_requests": self.failed_requests,
+            "requests_by_route": dict(self.requests_by_route),
+            "circuit_breaker": self.breaker.get_stats()
+        }
+
+
+engine = EngineProxy(ROOK_ENGINE_URL, ENGINE_API_KEY)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the shared engine client on startup, close it on shutdown"""
+    await engine.start()
+    print(f"🔌 Engine client ready (HTTP/2: {engine.http2})")
+    yield
+    await engine.close()
+
+
 app = FastAPI(
     title="ROOK Chat API",
     version="1.0.0",
-    description="Public API for ROOK AI Investigative Journalist"
+    description="Public API for ROOK AI Investigative Journalist",
+    lifespan=lifespan
 )
 
 # CORS
@@ -37,25 +261,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Configuration
-ROOK_ENGINE_URL = os.getenv('ROOK_ENGINE_URL', 'http://localhost:8001')
-ENGINE_API_KEY = os.getenv('ENGINE_API_KEY', 'dev-key-change-in-production')
-DATABASE_URL = os.getenv('DATABASE_URL')
-
 print(f"🌐 ROOK Web starting...")
 print(f"📡 Engine URL: {ROOK_ENGINE_URL}")
 print(f"🔑 Engine API Key: {'Set' if ENGINE_API_KEY else 'Not set'}")
 print(f"💾 Database: {'Connected' if DATABASE_URL else 'Not configured'}")
 
 
+# Session ids the engine's session store accepts (also sent as a header)
+SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
 # Request/Response models
 class ChatRequest(BaseModel):
     message: str
-    conversation_history: Optional[List[Dict]] = []
+    session_id: Optional[str] = None
+    conversation_history: Optional[List[Dict]] = None  # Legacy: prefer session_id
 
 class ChatResponse(BaseModel):
     response: str
     model_used: str
+    session_id: Optional[str] = None
     from_cache: bool = False
     anticipated_topics: Optional[List[str]] = None
     reading_context: Optional[str] = None
@@ -82,14 +307,16 @@ async def health():
     # Check if engine is reachable
     engine_status = "unknown"
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(f"{ROOK_ENGINE_URL}/health")
-            if response.status_code == 200:
-                engine_status = "online"
-                engine_data = response.json()
-            else:
-                engine_status = "error"
-                engine_data = {"error": f"Status code {response.status_code}"}
+        response = await engine.request("GET", "/health")
+        if response.status_code == 200:
+            engine_status = "online"
+            engine_data = response.json()
+        else:
+            engine_status = "error"
+            engine_data = {"error": f"Status code {response.status_code}"}
+    except EngineUnavailable as e:
+        engine_status = "circuit_open"
+        engine_data = {"error": str(e)}
     except Exception as e:
         engine_status = "unreachable"
         engine_data = {"error": str(e)}
@@ -104,10 +331,17 @@ async def health():
             "details": engine_data if engine_status == "online" else {"error": engine_data.get("error")}
         },
         "database": "connected" if DATABASE_URL else "not_configured",
+        "engine_proxy": engine.get_stats(),
         "timestamp": datetime.now().isoformat()
     }
 
 
+@app.get("/api/proxy-stats")
+async def proxy_stats():
+    """Engine connection pool and circuit breaker statistics"""
+    return engine.get_stats()
+
+
 @app.post("/api/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """
@@ -120,29 +354,35 @@ async def chat(request: ChatRequest):
     - Log conversations to database
     - Track usage analytics
     """
+    if request.session_id and not SESSION_ID_PATTERN.match(request.session_id):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid session_id: use 1-64 letters, digits, '_' or '-'"
+        )
+    
     try:
         # TODO: Add rate limiting
         # TODO: Add user authentication
         # TODO: Log conversation to database
         
-        # Forward request to rook-engine
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{ROOK_ENGINE_URL}/api/chat",
-                json={
-                    "message": request.message,
-                    "conversation_history": request.conversation_history
-                },
-                headers={"X-API-Key": ENGINE_API_KEY}
+        # Forward request to rook-engine - history lives in the engine's
+        # session store, so only the new message and session id are sent
+        payload = {"message": request.message, "session_id": request.session_id}
+        if request.conversation_history and not request.session_id:
+            payload["conversation_history"] = request.conversation_history
+        
+        # Session id header lets a proxy in front of engine workers keep
+        # each session on one worker
+        headers = {"X-Rook-Session": request.session_id} if request.session_id else None
+        response = await engine.request("POST", "/api/chat", json=payload, headers=headers)
+        
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Engine error: {response.text}"
             )
-            
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"Engine error: {response.text}"
-                )
-            
-            engine_response = response.json()
+        
+        engine_response = response.json()
         
         # TODO: Save conversation to database
         
@@ -153,7 +393,7 @@ async def chat(request: ChatRequest):
             status_code=504,
             detail="ROOK is thinking too hard (timeout). Please try again."
         )
-    except httpx.ConnectError:
+    except (httpx.ConnectError, EngineUnavailable):
         raise HTTPException(
             status_code=503,
             detail="ROOK engine is not reachable. Please try again later."
@@ -175,21 +415,17 @@ async def whats_on_my_mind():
     Returns immediate context from ROOK's hot cache
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(
-                f"{ROOK_ENGINE_URL}/api/context",
-                headers={"X-API-Key": ENGINE_API_KEY}
+        response = await engine.request("GET", "/api/context")
+        
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Engine error: {response.text}"
             )
+        
+        return response.json()
             
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"Engine error: {response.text}"
-                )
-            
-            return response.json()
-            
-    except httpx.ConnectError:
+    except (httpx.ConnectError, EngineUnavailable):
         raise HTTPException(
             status_code=503,
             detail="ROOK engine is not reachable"
@@ -203,21 +439,17 @@ async def whats_on_my_mind():
 async def get_stats():
     """Get ROOK's consciousness statistics"""
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(
-                f"{ROOK_ENGINE_URL}/api/stats",
-                headers={"X-API-Key": ENGINE_API_KEY}
+        response = await engine.request("GET", "/api/stats")
+        
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Engine error: {response.text}"
             )
+        
+        return response.json()
             
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"Engine error: {response.text}"
-                )
-            
-            return response.json()
-            
-    except httpx.ConnectError:
+    except (httpx.ConnectError, EngineUnavailable):
         raise HTTPException(
             status_code=503,
             detail="ROOK engine is not reachable"
@@ -236,22 +468,17 @@ async def trigger_reading(topics: Optional[List[str]] = None):
     In production, this would be called by a cron job.
     """
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                f"{ROOK_ENGINE_URL}/api/read",
-                json={"topics": topics},
-                headers={"X-API-Key": ENGINE_API_KEY}
+        response = await engine.request("POST", "/api/read", json={"topics": topics})
+        
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Engine error: {response.text}"
             )
+        
+        return response.json()
             
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"Engine error: {response.text}"
-                )
-            
-            return response.json()
-            
-    except httpx.ConnectError:
+    except (httpx.ConnectError, EngineUnavailable):
         raise HTTPException(
             status_code=503,
             detail="ROOK engine is not reachable"
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Import Time Report - Profile how long ROOK entry points spend importing
+
+Runs `python -X importtime` for each target in a fresh interpreter, parses
+the per-module timings and prints a report: total import time, the slowest
+modules (cumulative and self time) and time grouped by top-level package.
+
+Each target is measured several times and the median run is reported, so
+results are comparable between commits. Use --json to append results to a
+history file and watch the numbers over time.
+
+Usage:
+    python scripts/import_time_report.py
+    python scripts/import_time_report.py src.consciousness api.rook_engine --runs 7
+    python scripts/import_time_report.py --json import_times.jsonl
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from statistics import median
+from typing import Dict, List
+
+ROOT = Path(__file__).parent.parent
+
+# Entry points worth watching: servers, cron readers, workers
+DEFAULT_TARGETS = [
+    "src.consciousness",
+    "src.personality.personality_layer_with_storage",
+    "src.rook_emergent",
+    "api.rook_engine",
+    "api.chat_server_v2_safe",
+    "scripts.daily_reader",
+]
+
+# "import time:      1234 |      5678 |   package.module"
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S.*)$")
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """
+    Parse `-X importtime` output.
+
+    Args:
+        stderr: Interpreter stderr with importtime lines
+
+    Returns:
+        List of {module, self_us, cumulative_us, depth} in import order
+    """
+    entries = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        entries.append({
+            "module": module.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+            # Nesting is encoded as two spaces per level after the bar
+            "depth": max(0, (len(indent) - 1) // 2)
+        })
+    return entries
+
+
+def measure(target: str) -> List[Dict]:
+    """
+    Import a target in a fresh interpreter and return its import timings.
+
+    Args:
+        target: Dotted module path relative to the repository root
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), str(ROOT / "src"), env.get("PYTHONPATH")]))
+    # Keep entry points from doing real work while being profiled
+    env.setdefault("OPENAI_API_KEY", "")
+    env.setdefault("PINECONE_API_KEY", "")
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        last_line = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "unknown error"
+        raise RuntimeError(f"import {target} failed: {last_line}")
+
+    return parse_importtime(result.stderr)
+
+
+def summarize(target: str, entries: List[Dict], top: int = 10) -> Dict:
+    """
+    Summarize one import profile.
+
+    Args:
+        target: Profiled module
+        entries: Parsed importtime entries
+        top: Number of slowest modules to keep
+
+    Returns:
+        Report dictionary (times in milliseconds)
+    """
+    top_level = [e for e in entries if e["depth"] == 0]
+    total_us = sum(e["cumulative_us"] for e in top_level)
+    # Interpreter startup (site, encodings, ...) is paid by every process
+    target_us = sum(e["cumulative_us"] for e in top_level if e["module"] == target)
+
+    by_package: Dict[str, int] = {}
+    for entry in entries:
+        package = entry["module"].split(".")[0]
+        by_package[package] = by_package.get(package, 0) + entry["self_us"]
+
+    slowest_cumulative = sorted(entries, key=lambda e: -e["cumulative_us"])[:top]
+    slowest_self = sorted(entries, key=lambda e: -e["self_us"])[:top]
+
+    return {
+        "target": target,
+        "total_ms": total_us / 1000,
+        "target_ms": target_us / 1000,
+        "startup_ms": (total_us - target_us) / 1000,
+        "modules_imported": len(entries),
+        "by_package_ms": {
+            package: us / 1000
+            for package, us in sorted(by_package.items(), key=lambda item: -item[1])[:top]
+        },
+        "slowest_cumulative_ms": {e["module"]: e["cumulative_us"] / 1000 for e in slowest_cumulative},
+        "slowest_self_ms": {e["module"]: e["self_us"] / 1000 for e in slowest_self}
+    }
+
+
+def profile(target: str, runs: int = 5, top: int = 10) -> Dict:
+    """
+    Profile a target several times and report the median run.
+
+    The first run warms the filesystem and bytecode caches and is discarded.
+    """
+    measure(target)
+    reports = [summarize(target, measure(target), top) for _ in range(runs)]
+    report = sorted(reports, key=lambda r: r["total_ms"])[len(reports) // 2]
+    report["runs"] = runs
+    report["total_ms_median"] = median(r["total_ms"] for r in reports)
+    report["total_ms_min"] = min(r["total_ms"] for r in reports)
+    report["target_ms_median"] = median(r["target_ms"] for r in reports)
+    return report
+
+
+def print_report(report: Dict):
+    """Print a human-readable report for one target"""
+    print(f"\n📦 {report['target']}")
+    print(f"   Total: {report['total_ms_median']:.1f}ms median, {report['total_ms_min']:.1f}ms best "
+          f"({report['modules_imported']} modules, {report['runs']} runs)")
+    print(f"   Target itself: {report['target_ms_median']:.1f}ms "
+          f"(interpreter startup: {report['startup_ms']:.1f}ms)")
+
+    print("   By package (self time):")
+    for package, ms in report["by_package_ms"].items():
+        print(f"      {ms:8.1f}ms  {package}")
+
+    print("   Slowest modules (cumulative):")
+    for module, ms in report["slowest_cumulative_ms"].items():
+        print(f"      {ms:8.1f}ms  {module}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="ROOK import-time report")
+    parser.add_argument("targets", nargs="*", default=DEFAULT_TARGETS, help="Modules to profile")
+    parser.add_argument("--runs", type=int, default=5, help="Measured runs per target")
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules/packages to list")
+    parser.add_argument("--json", metavar="PATH", help="Append results as JSON lines to PATH")
+
+    args = parser.parse_args()
+
+    print(f"⏱️  Import time report - {datetime.now().strftime('%Y-%m-%d %H:%M')} (Python {sys.version.split()[0]})")
+
+    reports = []
+    for target in args.targets:
+        try:
+            report = profile(target, runs=args.runs, top=args.top)
+        except RuntimeError as e:
+            print(f"\n❌ {e}")
+            continue
+        reports.append(report)
+        print_report(report)
+
+    if args.json and reports:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip()
+        with open(args.json, "a") as f:
+            for report in reports:
+                f.write(json.dumps({
+                    "timestamp": datetime.now().isoformat(),
+                    "commit": commit,
+                    "python": sys.version.split()[0],
+                    **report
+                }) + "\n")
+        print(f"\n💾 Appended {len(reports)} results to {args.json}")
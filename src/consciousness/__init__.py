@@ -1,11 +1,21 @@
 """
 ROOK's Consciousness Architecture
 Multi-layered intelligence system
+
+Submodules are loaded on first attribute access, so importing the package
+(e.g. just for the hot cache) doesn't pull in the OpenAI SDK.
 """
 
-from .hot_cache import HotCache, get_hot_cache, reset_hot_cache
-from .active_reader import ActiveReader
-from .background_retriever import BackgroundRetriever
+import importlib
+
+# Public name -> submodule that defines it
+_LAZY_ATTRIBUTES = {
+    'HotCache': '.hot_cache',
+    'get_hot_cache': '.hot_cache',
+    'reset_hot_cache': '.hot_cache',
+    'ActiveReader': '.active_reader',
+    'BackgroundRetriever': '.background_retriever',
+}
 
 __all__ = [
     'HotCache',
@@ -14,3 +24,15 @@ __all__ = [
     'ActiveReader',
     'BackgroundRetriever'
 ]
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    globals()[name] = value  # Cache so later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -4,10 +4,8 @@ Constantly ingests news, social media, and other sources
 """
 
 import os
-import requests
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
-from openai import OpenAI
 
 
 class ActiveReader:
@@ -22,7 +20,13 @@ class ActiveReader:
     """
     
     def __init__(self, openai_api_key: Optional[str] = None, newsapi_key: Optional[str] = None):
-        self.openai_client = OpenAI(api_key=openai_api_key or os.getenv('OPENAI_API_KEY'))
+        from openai import OpenAI
+        # Imported on first use: the engine modules bring tracing and usage state with them
+        try:
+            from ..engine.usage import metered
+        except ImportError:  # src/ itself is on sys.path
+            from engine.usage import metered
+        self.openai_client = metered(OpenAI(api_key=openai_api_key or os.getenv('OPENAI_API_KEY')), "active_reader")
         self.newsapi_key = newsapi_key or os.getenv('NEWSAPI_KEY')
         self.reading_history = []
         self.current_reading = None
@@ -73,6 +77,8 @@ class ActiveReader:
         Returns:
             List of articles
         """
+        import requests
+        
         articles = []
         
         for topic in topics[:3]:  # Limit API calls
@@ -212,7 +218,15 @@ Format as JSON:
     "thoughts": "..."
 }}"""
             
-            response = self.openai_client.chat.completions.create(
+            try:
+                from ..engine.llm_cache import get_llm_cache
+            except ImportError:  # src/ itself is on sys.path
+                from engine.llm_cache import get_llm_cache
+            
+            # Reprocessed articles hit the cache instead of being re-analyzed
+            response = get_llm_cache().complete(
+                self.openai_client,
+                "active_reader.analyze_article",
                 model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": "You are ROOK, an AI investigative journalist analyzing fraud news."},
@@ -278,6 +292,21 @@ Format as JSON:
             "fraud_types": list(set(r.get("fraud_type") for r in recent_readings if r.get("fraud_type")))
         }
     
+    def merge_history(self, readings: List[Dict]) -> List[Dict]:
+        """
+        Merge readings done elsewhere (e.g. by another worker) into the history
+        
+        Args:
+            readings: Reading memories to merge
+            
+        Returns:
+            The readings that were new to this reader
+        """
+        known = {r["memory_id"] for r in self.reading_history}
+        new_readings = [r for r in readings if r.get("memory_id") not in known]
+        self.reading_history.extend(new_readings)
+        return new_readings
+    
     def get_recent_readings(self, limit: int = 10) -> List[Dict]:
         """
         Get most recent readings
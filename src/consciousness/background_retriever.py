@@ -6,7 +6,6 @@ Pre-fetches content based on conversation trajectory
 import asyncio
 from typing import List, Dict, Any, Optional
 from datetime import datetime
-from openai import OpenAI
 import os
 
 
@@ -24,7 +23,13 @@ class BackgroundRetriever:
     def __init__(self, personality_layer, hot_cache, openai_api_key: Optional[str] = None):
         self.personality_layer = personality_layer
         self.hot_cache = hot_cache
-        self.openai_client = OpenAI(api_key=openai_api_key or os.getenv('OPENAI_API_KEY'))
+        from openai import OpenAI
+        # Imported on first use: the engine modules bring tracing and usage state with them
+        try:
+            from ..engine.usage import metered
+        except ImportError:  # src/ itself is on sys.path
+            from engine.usage import metered
+        self.openai_client = metered(OpenAI(api_key=openai_api_key or os.getenv('OPENAI_API_KEY')), "anticipation")
         self.conversation_history = []
         self.anticipated_topics = []
         self.prefetch_queue = []
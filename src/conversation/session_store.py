@@ -0,0 +1,478 @@
+"""
+Conversation Session Store
+
+Server-side conversation history so clients only send a session id plus
+the new message instead of shipping the full history on every request.
+
+- Each session keeps a bounded window of recent turns
+- Idle sessions are evicted LRU-style once the store is full or they expire
+- An optional SQL backend (sqlite or Postgres via SQLAlchemy) persists
+  sessions and their rolling summaries, so evicted or restarted sessions
+  (or ones served by another worker) can be reloaded
+"""
+
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Client-held session ids are stored in String(64) columns
+SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def is_valid_session_id(session_id: str) -> bool:
+    """Whether a client-supplied session id can be stored (1-64 of [A-Za-z0-9_-])"""
+    return isinstance(session_id, str) and SESSION_ID_PATTERN.match(session_id) is not None
+
+
+class SQLSessionBackend:
+    """
+    Durable session storage using SQLAlchemy Core.
+    
+    Works with any SQLAlchemy URL, e.g. "sqlite:///rook_sessions.db" or the
+    Postgres DATABASE_URL Render provides.
+    """
+    
+    def __init__(
+        self,
+        database_url: str,
+        table_name: str = "rook_conversation_turns",
+        summary_table_name: str = "rook_conversation_summaries"
+    ):
+        from sqlalchemy import (
+            create_engine, MetaData, Table, Column, Integer, String, Text, Float, Index
+        )
+        
+        # Render/Heroku style URLs use the deprecated "postgres://" scheme
+        if database_url.startswith("postgres://"):
+            database_url = "postgresql://" + database_url[len("postgres://"):]
+        
+        self.engine = create_engine(database_url, pool_pre_ping=True)
+        metadata = MetaData()
+        self.turns = Table(
+            table_name,
+            metadata,
+            Column("id", Integer, primary_key=True, autoincrement=True),
+            Column("session_id", String(64), nullable=False),
+            Column("role", String(16), nullable=False),
+            Column("content", Text, nullable=False),
+            Column("created_at", Float, nullable=False),
+            Index(f"ix_{table_name}_session", "session_id", "id")
+        )
+        # One rolling summary per session, covering its turns up to covered_at
+        self.summaries = Table(
+            summary_table_name,
+            metadata,
+            Column("session_id", String(64), primary_key=True),
+            Column("summary", Text, nullable=False),
+            Column("covered_at", Float, nullable=False),
+            Column("updated_at", Float, nullable=False)
+        )
+        metadata.create_all(self.engine)
+    
+    def load(self, session_id: str, limit: int) -> List[Dict]:
+        """Load the most recent `limit` messages for a session (oldest first, with created_at)"""
+        from sqlalchemy import select
+        
+        query = (
+            select(self.turns.c.role, self.turns.c.content, self.turns.c.created_at)
+            .where(self.turns.c.session_id == session_id)
+            .order_by(self.turns.c.id.desc())
+            .limit(limit)
+        )
+        with self.engine.connect() as conn:
+            rows = conn.execute(query).fetchall()
+        return [
+            {"role": row.role, "content": row.content, "created_at": row.created_at}
+            for row in reversed(rows)
+        ]
+    
+    def load_summary(self, session_id: str) -> Optional[Tuple[str, float]]:
+        """The session's rolling summary and the created_at of the last turn it covers"""
+        from sqlalchemy import select
+        
+        query = select(self.summaries.c.summary, self.summaries.c.covered_at).where(
+            self.summaries.c.session_id == session_id
+        )
+        with self.engine.connect() as conn:
+            row = conn.execute(query).first()
+        return (row.summary, row.covered_at) if row else None
+    
+    def save_summary(self, session_id: str, summary: str, covered_at: float):
+        """Insert or replace a session's rolling summary"""
+        from sqlalchemy import update
+        from sqlalchemy.exc import IntegrityError
+        
+        values = {"summary": summary, "covered_at": covered_at, "updated_at": time.time()}
+        statement = update(self.summaries).where(self.summaries.c.session_id == session_id).values(**values)
+        with self.engine.begin() as conn:
+            if conn.execute(statement).rowcount:
+                return
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(self.summaries.insert().values(session_id=session_id, **values))
+        except IntegrityError:
+            # Another worker inserted it first
+            with self.engine.begin() as conn:
+                conn.execute(statement)
+    
+    def append(self, session_id: str, role: str, content: str, created_at: float):
+        """Persist one message"""
+        with self.engine.begin() as conn:
+            conn.execute(self.turns.insert().values(
+                session_id=session_id,
+                role=role,
+                content=content,
+                created_at=created_at
+            ))
+    
+    def trim(self, session_id: str, keep: int):
+        """Drop everything but the newest `keep` messages of a session"""
+        from sqlalchemy import select, delete
+        
+        newest = (
+            select(self.turns.c.id)
+            .where(self.turns.c.session_id == session_id)
+            .order_by(self.turns.c.id.desc())
+            .limit(keep)
+        )
+        with self.engine.begin() as conn:
+            keep_ids = [row.id for row in conn.execute(newest)]
+            if keep_ids:
+                conn.execute(delete(self.turns).where(
+                    self.turns.c.session_id == session_id,
+                    self.turns.c.id < min(keep_ids)
+                ))
+    
+    def delete_session(self, session_id: str):
+        from sqlalchemy import delete
+        
+        with self.engine.begin() as conn:
+            conn.execute(delete(self.turns).where(self.turns.c.session_id == session_id))
+            conn.execute(delete(self.summaries).where(self.summaries.c.session_id == session_id))
+
+
+class ConversationSessionStore:
+    """
+    Bounded, LRU-evicting store of per-session conversation history.
+    
+    In-memory sessions live in an OrderedDict ordered by last activity. The
+    optional backend is write-through, so an evicted session is reloaded
+    from the database on its next request.
+    """
+    
+    def __init__(
+        self,
+        max_turns: int = 20,
+        max_sessions: int = 1000,
+        idle_ttl_seconds: float = 3600,
+        backend: Optional[SQLSessionBackend] = None
+    ):
+        """
+        Initialize the session store.
+        
+        Args:
+            max_turns: Turns (user + assistant pairs) kept per session
+            max_sessions: Sessions held in memory before LRU eviction
+            idle_ttl_seconds: Sessions idle longer than this are evicted
+            backend: Optional durable backend
+        """
+        self.max_turns = max_turns
+        self.max_messages = max_turns * 2
+        self.max_sessions = max_sessions
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.backend = backend
+        
+        self._sessions: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._appends_since_trim: Dict[str, int] = {}
+        
+        self.evicted_lru = 0
+        self.evicted_idle = 0
+        self.backend_loads = 0
+        self.dropped_unsummarized = 0
+        self.invalidations = 0
+        self.stale_summaries = 0
+        
+        # Called with the session id after a session changes (used to tell
+        # other workers to drop their cached copy)
+        self.on_change: Optional[Callable[[str], None]] = None
+    
+    @staticmethod
+    def new_session_id() -> str:
+        """Generate a new opaque session id"""
+        return f"sess_{uuid.uuid4().hex}"
+    
+    def _get_session(self, session_id: str, create: bool) -> Optional[Dict]:
+        """Get a session (caller holds the lock), loading from the backend on a miss"""
+        session = self._sessions.get(session_id)
+        if session is not None:
+            self._sessions.move_to_end(session_id)
+            return session
+        
+        rows = []
+        summary, summarized = "", 0
+        if self.backend:
+            try:
+                rows = self.backend.load(session_id, self.max_messages)
+                if rows:
+                    self.backend_loads += 1
+                    stored = self.backend.load_summary(session_id)
+                    if stored:
+                        summary, covered_at = stored
+                        summarized = sum(1 for row in rows if row["created_at"] <= covered_at)
+            except Exception as e:
+                print(f"Warning: Could not load session {session_id}: {e}")
+        
+        if not rows and not create:
+            return None
+        
+        session = {
+            "messages": deque(
+                ({"role": row["role"], "content": row["content"]} for row in rows),
+                maxlen=self.max_messages
+            ),
+            # When each message was appended (matches the backend's created_at)
+            "created_at": deque((row["created_at"] for row in rows), maxlen=self.max_messages),
+            "last_active": time.time(),
+            # Rolling summary of older turns; the first `summarized` messages
+            # of the window are already folded into it
+            "summary": summary,
+            "summarized": summarized
+        }
+        self._sessions[session_id] = session
+        self._evict()
+        return session
+    
+    def _evict(self):
+        """Evict idle sessions, then least recently used ones over capacity"""
+        cutoff = time.time() - self.idle_ttl_seconds
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest["last_active"] >= cutoff:
+                break
+            session_id, _ = self._sessions.popitem(last=False)
+            self._appends_since_trim.pop(session_id, None)
+            self.evicted_idle += 1
+        
+        while len(self._sessions) > self.max_sessions:
+            session_id, _ = self._sessions.popitem(last=False)
+            self._appends_since_trim.pop(session_id, None)
+            self.evicted_lru += 1
+    
+    def get_history(self, session_id: str, max_turns: Optional[int] = None) -> List[Dict]:
+        """
+        Get recent conversation history for a session.
+        
+        Args:
+            session_id: Session identifier
+            max_turns: Number of recent turns to return (default: whole window)
+            
+        Returns:
+            List of {"role", "content"} messages, oldest first
+        """
+        with self._lock:
+            session = self._get_session(session_id, create=False)
+            if session is None:
+                return []
+            session["last_active"] = time.time()
+            messages = list(session["messages"])
+        
+        if max_turns is not None:
+            messages = messages[-max_turns * 2:]
+        return messages
+    
+    def append(self, session_id: str, role: str, content: str):
+        """
+        Add a message to a session, creating the session if needed.
+        
+        Args:
+            session_id: Session identifier
+            role: "user" or "assistant"
+            content: Message text
+        """
+        with self._lock:
+            session = self._get_session(session_id, create=True)
+            # Strictly increasing per session: summaries record coverage by append time
+            now = time.time()
+            if session["created_at"] and now <= session["created_at"][-1]:
+                now = session["created_at"][-1] + 1e-6
+            if len(session["messages"]) == self.max_messages:
+                # The oldest message falls out of the window
+                if session["summarized"] > 0:
+                    session["summarized"] -= 1
+                else:
+                    self.dropped_unsummarized += 1
+            session["messages"].append({"role": role, "content": content})
+            session["created_at"].append(now)
+            session["last_active"] = now
+            self._sessions.move_to_end(session_id)
+            
+            trim_due = False
+            if self.backend:
+                count = self._appends_since_trim.get(session_id, 0) + 1
+                trim_due = count >= self.max_messages
+                self._appends_since_trim[session_id] = 0 if trim_due else count
+        
+        if self.backend:
+            try:
+                self.backend.append(session_id, role, content, now)
+                if trim_due:
+                    self.backend.trim(session_id, self.max_messages)
+            except Exception as e:
+                print(f"Warning: Could not persist session {session_id}: {e}")
+        
+        if self.on_change:
+            self.on_change(session_id)
+    
+    def invalidate(self, session_id: str):
+        """
+        Drop the in-memory copy of a session that changed elsewhere.
+        
+        The next request reloads it, with its rolling summary, from the
+        backend. Without a backend the in-memory copy is the only copy, so
+        it is kept.
+        """
+        if not self.backend:
+            return
+        with self._lock:
+            self._appends_since_trim.pop(session_id, None)
+            if self._sessions.pop(session_id, None) is not None:
+                self.invalidations += 1
+    
+    def get_window(self, session_id: str) -> Tuple[List[Dict], str, int]:
+        """
+        Get the full turn window together with its rolling summary.
+        
+        Returns:
+            Tuple of (messages, summary, summarized) where the first
+            `summarized` messages are already covered by the summary
+        """
+        with self._lock:
+            session = self._get_session(session_id, create=False)
+            if session is None:
+                return [], "", 0
+            return list(session["messages"]), session["summary"], session["summarized"]
+    
+    def get_timed_window(self, session_id: str) -> Tuple[List[Dict], List[float], str, int]:
+        """
+        Like get_window, plus when each message was appended.
+        
+        Returns:
+            Tuple of (messages, created_at, summary, summarized)
+        """
+        with self._lock:
+            session = self._get_session(session_id, create=False)
+            if session is None:
+                return [], [], "", 0
+            return (
+                list(session["messages"]),
+                list(session["created_at"]),
+                session["summary"],
+                session["summarized"]
+            )
+    
+    def set_summary(self, session_id: str, summary: str, covered_at: float, previous_summary: str) -> bool:
+        """
+        Replace a session's rolling summary (written through to the backend).
+        
+        The summary is folded in the background while the session keeps
+        changing, so it is committed only if the session's summary is still
+        the one it was folded from, and the messages it covers are recounted
+        from their append times (turns may have left the window meanwhile).
+        An invalidated session is reloaded first.
+        
+        Args:
+            session_id: Session identifier
+            summary: Updated summary text
+            covered_at: Append time of the last message the summary covers
+            previous_summary: Summary the update was folded from
+            
+        Returns:
+            True if the summary was committed
+        """
+        with self._lock:
+            session = self._get_session(session_id, create=False)
+            if session is None or session["summary"] != previous_summary:
+                self.stale_summaries += 1
+                return False
+            session["summary"] = summary
+            session["summarized"] = sum(1 for created_at in session["created_at"] if created_at <= covered_at)
+        
+        if self.backend:
+            try:
+                self.backend.save_summary(session_id, summary, covered_at)
+            except Exception as e:
+                print(f"Warning: Could not persist summary of session {session_id}: {e}")
+        
+        if self.on_change:
+            self.on_change(session_id)
+        return True
+    
+    def clear(self, session_id: str):
+        """Forget a session entirely"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._appends_since_trim.pop(session_id, None)
+        if self.backend:
+            self.backend.delete_session(session_id)
+        if self.on_change:
+            self.on_change(session_id)
+    
+    def get_stats(self) -> Dict:
+        """Get session store statistics"""
+        with self._lock:
+            active = len(self._sessions)
+            messages = sum(len(s["messages"]) for s in self._sessions.values())
+        return {
+            "active_sessions": active,
+            "max_sessions": self.max_sessions,
+            "messages_in_memory": messages,
+            "max_turns_per_session": self.max_turns,
+            "evicted_lru": self.evicted_lru,
+            "evicted_idle": self.evicted_idle,
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "backend_loads": self.backend_loads,
+            "dropped_unsummarized": self.dropped_unsummarized,
+            "invalidations": self.invalidations,
+            "stale_summaries": self.stale_summaries
+        }
+
+
+def create_session_store(database_url: Optional[str] = None, **kwargs) -> ConversationSessionStore:
+    """
+    Create a session store, backed by SQL if a database URL is given.
+    
+    Falls back to memory-only if SQLAlchemy or the database is unavailable.
+    """
+    backend = None
+    if database_url:
+        try:
+            backend = SQLSessionBackend(database_url)
+            print("✅ Session store backed by SQL")
+        except Exception as e:
+            print(f"⚠️  Session store backend unavailable, using memory only: {e}")
+    return ConversationSessionStore(backend=backend, **kwargs)
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+    
+    db_path = os.path.join(tempfile.mkdtemp(), "sessions.db")
+    store = create_session_store(f"sqlite:///{db_path}", max_turns=3, max_sessions=2)
+    
+    session_id = store.new_session_id()
+    for i in range(5):
+        store.append(session_id, "user", f"Question {i}")
+        store.append(session_id, "assistant", f"Answer {i}")
+    
+    print(f"Window (max 3 turns): {[m['content'] for m in store.get_history(session_id)]}")
+    
+    # Push the first session out of memory, then reload it from sqlite
+    for _ in range(2):
+        store.append(store.new_session_id(), "user", "hello")
+    print(f"After LRU eviction: {store.get_stats()}")
+    print(f"Reloaded: {[m['content'] for m in store.get_history(session_id, max_turns=2)]}")
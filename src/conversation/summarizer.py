@@ -0,0 +1,218 @@
+"""
+Rolling Conversation Summarizer
+
+Caps prompt size for long investigations. Instead of replaying every turn
+verbatim, the prompt carries:
+
+- a running summary of older turns (updated in the background after each
+  response, stored with the session - and in its SQL backend, if any)
+- the last N turns verbatim
+- all of it under an explicit token budget
+
+Prompt tokens - and with them latency - stop growing linearly with the
+length of the conversation.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from .session_store import ConversationSessionStore
+
+try:
+    from ..prompts.tokens import count_tokens
+    from ..engine.usage import usage_stage
+except ImportError:  # src/ itself is on sys.path (e.g. api/chat_server.py)
+    from prompts.tokens import count_tokens
+    from engine.usage import usage_stage
+
+
+MESSAGE_OVERHEAD_TOKENS = 4  # role + framing per chat message
+
+
+class ConversationSummarizer:
+    """
+    Folds older turns into a per-session running summary.
+    """
+
+    def __init__(
+        self,
+        openai_client,
+        session_store: ConversationSessionStore,
+        keep_turns: int = 4,
+        token_budget: int = 2000,
+        summary_max_tokens: int = 300,
+        model: str = "gpt-4o-mini"
+    ):
+        """
+        Initialize the summarizer.
+
+        Args:
+            openai_client: OpenAI client used for summarization
+            session_store: Store holding the sessions and their summaries
+            keep_turns: Most recent turns always kept verbatim
+            token_budget: Maximum tokens for summary + raw turns in the prompt
+            summary_max_tokens: Cap on the generated summary length
+            model: Model used for summarization
+        """
+        self.openai_client = openai_client
+        self.sessions = session_store
+        self.keep_turns = keep_turns
+        self.token_budget = token_budget
+        self.summary_max_tokens = summary_max_tokens
+        self.model = model
+
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="rook-summarize")
+        self._lock = threading.Lock()
+        self._in_flight = set()
+
+        self.summaries_generated = 0
+        self.summary_failures = 0
+        self.turns_truncated = 0
+
+    def build_history(self, session_id: str, max_turns: int = None) -> List[Dict]:
+        """
+        Assemble prompt history: rolling summary plus recent raw turns.
+
+        Raw turns are added newest-first until the token budget is spent, so
+        the most recent context always survives.
+
+        Args:
+            session_id: Session identifier
+            max_turns: Optional cap on raw turns included
+
+        Returns:
+            List of chat messages, oldest first
+        """
+        messages, summary, summarized = self.sessions.get_window(session_id)
+        if not messages:
+            return []
+
+        budget = self.token_budget
+
+        summary_message = None
+        if summary:
+            summary_message = {
+                "role": "system",
+                "content": f"Summary of the earlier conversation:\n{summary}"
+            }
+            budget -= count_tokens(summary_message["content"], self.model) + MESSAGE_OVERHEAD_TOKENS
+
+        # Recent turns verbatim; anything older that the background job
+        # hasn't folded yet is included too while budget allows
+        unsummarized = messages[summarized:]
+        if max_turns is not None:
+            unsummarized = unsummarized[-max_turns * 2:]
+
+        raw = []
+        for index, message in enumerate(reversed(unsummarized)):
+            cost = count_tokens(message["content"], self.model) + MESSAGE_OVERHEAD_TOKENS
+            if raw and cost > budget:
+                self.turns_truncated += len(unsummarized) - index
+                break
+            budget -= cost
+            raw.append(message)
+        raw.reverse()
+
+        return ([summary_message] if summary_message else []) + raw
+
+    def schedule(self, session_id: str):
+        """
+        Fold turns older than the raw window into the summary, in the background.
+
+        Called after each response; a no-op if nothing needs folding or a
+        summarization for this session is already running.
+        """
+        messages, _, summarized = self.sessions.get_window(session_id)
+        if len(messages) - summarized <= self.keep_turns * 2:
+            return
+
+        with self._lock:
+            if session_id in self._in_flight:
+                return
+            self._in_flight.add(session_id)
+
+        self._pool.submit(self._summarize, session_id)
+
+    def _summarize(self, session_id: str):
+        """Generate the updated summary for one session"""
+        try:
+            messages, created_at, summary, summarized = self.sessions.get_timed_window(session_id)
+            fold_end = len(messages) - self.keep_turns * 2
+            to_fold = messages[summarized:fold_end]
+            if not to_fold:
+                return
+
+            transcript = "\n".join(
+                f"{m.get('role', 'user').upper()}: {m.get('content', '')}" for m in to_fold
+            )
+            prompt = f"""You maintain a running summary of an investigative conversation between a user and ROOK.
+
+Current summary:
+{summary or "(none yet)"}
+
+New turns to fold in:
+{transcript}
+
+Write the updated summary. Keep names, entities, figures, sources, open questions and anything the user asked ROOK to remember. Be concise - no more than {self.summary_max_tokens} tokens."""
+
+            with usage_stage("summarization"):
+                response = self.openai_client.chat.completions.create(
+                    model=self.model,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0.2,
+                    max_tokens=self.summary_max_tokens
+                )
+
+            new_summary = response.choices[0].message.content.strip()
+            # Dropped if the summary changed meanwhile; the next turn reschedules
+            if self.sessions.set_summary(session_id, new_summary, created_at[fold_end - 1], summary):
+                self.summaries_generated += 1
+
+        except Exception as e:
+            self.summary_failures += 1
+            print(f"Warning: Could not summarize session {session_id}: {e}")
+
+        finally:
+            with self._lock:
+                self._in_flight.discard(session_id)
+
+    def get_stats(self) -> Dict:
+        """Get summarizer statistics"""
+        return {
+            "keep_turns": self.keep_turns,
+            "token_budget": self.token_budget,
+            "summaries_generated": self.summaries_generated,
+            "summary_failures": self.summary_failures,
+            "turns_truncated": self.turns_truncated,
+            "in_flight": len(self._in_flight)
+        }
+
+
+if __name__ == "__main__":
+    import time
+    from types import SimpleNamespace
+    
+    class _EchoClient:
+        """Stand-in client: the 'summary' is the last folded line"""
+        def __init__(self):
+            self.chat = SimpleNamespace(completions=self)
+        
+        def create(self, messages, **kwargs):
+            last_line = messages[0]["content"].split("New turns to fold in:\n")[1].split("\n\n")[0].splitlines()[-1]
+            message = SimpleNamespace(content=f"(summary up to) {last_line}")
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+    
+    store = ConversationSessionStore(max_turns=20)
+    summarizer = ConversationSummarizer(_EchoClient(), store, keep_turns=2, token_budget=200)
+    
+    session_id = store.new_session_id()
+    for i in range(8):
+        store.append(session_id, "user", f"Question {i}")
+        store.append(session_id, "assistant", f"Answer {i}")
+        summarizer.schedule(session_id)
+        time.sleep(0.05)
+    
+    for message in summarizer.build_history(session_id):
+        print(f"{message['role']:>9}: {message['content']}")
+    print(f"Stats: {summarizer.get_stats()}")
@@ -0,0 +1,228 @@
+"""
+ROOK Batch Runner
+
+Evaluation sets, adversarial scenarios and newsroom question lists are run
+through ROOK hundreds of prompts at a time. The batch runner:
+
+- Groups items by a dedup key so shared work (embeddings, retrievals) is
+  done once per distinct query instead of once per item
+- Runs the per-item work in a bounded pool, so throughput is limited by
+  provider rate limits rather than by serializing requests
+- Yields results as items finish, tagged with their input index, ready to
+  be streamed back as NDJSON
+"""
+
+import asyncio
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, List, Tuple
+
+
+def dedupe(keys: List[Hashable]) -> Tuple[List[Hashable], List[int]]:
+    """
+    Collapse duplicate keys while keeping first-seen order.
+
+    Args:
+        keys: One key per batch item
+
+    Returns:
+        Tuple of (unique keys, position of each item's key in the unique list)
+    """
+    positions: Dict[Hashable, int] = {}
+    unique = []
+    mapping = []
+    for key in keys:
+        if key not in positions:
+            positions[key] = len(unique)
+            unique.append(key)
+        mapping.append(positions[key])
+    return unique, mapping
+
+
+def to_ndjson(record: Dict) -> str:
+    """Serialize one result as a newline-terminated JSON line"""
+    return json.dumps(record, default=str) + "\n"
+
+
+class BatchStats:
+    """
+    Thread-safe counters shared by every batch a runner executes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.unique_keys = 0
+        self.errors = 0
+        self.running = 0
+        self.max_running = 0
+
+    def record_batch(self, items: int, unique_keys: int):
+        with self._lock:
+            self.batches += 1
+            self.items += items
+            self.unique_keys += unique_keys
+
+    def record_start(self):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+
+    def record_finish(self, ok: bool):
+        with self._lock:
+            self.running -= 1
+            if not ok:
+                self.errors += 1
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "unique_keys": self.unique_keys,
+                "dedup_rate": 1 - self.unique_keys / self.items if self.items else 0,
+                "errors": self.errors,
+                "running": self.running,
+                "max_running": self.max_running
+            }
+
+
+class BatchRunner:
+    """
+    Bounded-concurrency executor for batch endpoints.
+
+    Usage:
+        runner = BatchRunner(max_concurrency=8)
+        async for record in runner.run(items, process_item):
+            yield to_ndjson(record)
+    """
+
+    def __init__(self, name: str = "batch", max_concurrency: int = 8, max_items: int = 500):
+        """
+        Initialize the batch runner.
+
+        Args:
+            name: Runner name (used in logs)
+            max_concurrency: Upper bound on items processed at the same time
+            max_items: Largest batch accepted
+        """
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_items = max_items
+        self.stats = BatchStats()
+        # Own pool: asyncio's default executor is only cpu_count + 4 threads,
+        # which would quietly cap concurrency on small instances
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix=f"rook-{name}-batch")
+
+    def check_size(self, count: int):
+        """Raise ValueError if a batch is empty or larger than max_items"""
+        if count == 0:
+            raise ValueError("Batch is empty")
+        if count > self.max_items:
+            raise ValueError(f"Batch has {count} items, the limit is {self.max_items}")
+
+    def concurrency_for(self, requested: int = None) -> int:
+        """Clamp a client-requested concurrency to the runner's bound"""
+        if not requested or requested < 1:
+            return self.max_concurrency
+        return min(requested, self.max_concurrency)
+
+    async def run(
+        self,
+        items: List[Any],
+        worker: Callable[[int, Any], Any],
+        concurrency: int = None,
+        unique_keys: int = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Process items in a bounded pool and yield results as they complete.
+
+        The worker is a blocking function run in a thread; an exception only
+        fails its own item.
+
+        Args:
+            items: Batch items
+            worker: Callable(index, item) returning a JSON-serializable result
+            concurrency: Requested concurrency (clamped to max_concurrency)
+            unique_keys: Distinct dedup keys in the batch (for statistics)
+
+        Yields:
+            {"index", "status": "ok"|"error", "result"|"error", "elapsed_ms"} per
+            item in completion order, then a final {"done": True, ...} summary
+        """
+        batch_id = uuid.uuid4().hex[:8]
+        limit = self.concurrency_for(concurrency)
+        semaphore = asyncio.Semaphore(limit)
+        started = time.perf_counter()
+        self.stats.record_batch(len(items), unique_keys if unique_keys is not None else len(items))
+        print(f"📦 {self.name} batch {batch_id}: {len(items)} items, concurrency {limit}")
+
+        async def process(index: int, item: Any) -> Dict:
+            async with semaphore:
+                self.stats.record_start()
+                item_started = time.perf_counter()
+                try:
+                    result = await asyncio.get_running_loop().run_in_executor(self._pool, worker, index, item)
+                    record = {"index": index, "status": "ok", "result": result}
+                except Exception as e:
+                    record = {"index": index, "status": "error", "error": str(e)}
+                record["elapsed_ms"] = round((time.perf_counter() - item_started) * 1000, 1)
+                self.stats.record_finish(record["status"] == "ok")
+                return record
+
+        tasks = [asyncio.create_task(process(index, item)) for index, item in enumerate(items)]
+        errors = 0
+        try:
+            for finished in asyncio.as_completed(tasks):
+                record = await finished
+                errors += record["status"] == "error"
+                yield record
+        finally:
+            # Client went away mid-stream - don't start the remaining items
+            for task in tasks:
+                task.cancel()
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"✅ {self.name} batch {batch_id} finished in {elapsed_ms:.0f}ms ({errors} errors)")
+        yield {
+            "done": True,
+            "batch_id": batch_id,
+            "items": len(items),
+            "unique_keys": unique_keys if unique_keys is not None else len(items),
+            "errors": errors,
+            "concurrency": limit,
+            "elapsed_ms": round(elapsed_ms, 1)
+        }
+
+    def get_stats(self) -> Dict:
+        """Get batch statistics"""
+        return {
+            "name": self.name,
+            "max_concurrency": self.max_concurrency,
+            "max_items": self.max_items,
+            **self.stats.to_dict()
+        }
+
+
+if __name__ == "__main__":
+    questions = ["What happened at Wirecard?", "what happened at wirecard", "Who audited FTX?"] * 4
+    unique, mapping = dedupe([q.lower().rstrip("?") for q in questions])
+    print(f"{len(questions)} items, {len(unique)} distinct queries")
+
+    def _answer(index, question):
+        time.sleep(0.2)
+        if index == 5:
+            raise RuntimeError("provider timeout")
+        return f"answer to {question!r}"
+
+    async def _demo():
+        runner = BatchRunner("demo", max_concurrency=4)
+        async for record in runner.run(questions, _answer, unique_keys=len(unique)):
+            print(to_ndjson(record), end="")
+        print(f"Stats: {runner.get_stats()} (serial would take ~2.4s)")
+
+    asyncio.run(_demo())
@@ -0,0 +1,205 @@
+"""
+ROOK Component Registry
+
+Servers used to build every client and index connection at import time,
+one after the other, which kept the port closed for the whole cold start.
+The registry instead:
+
+- Constructs components lazily (first use builds them)
+- Warms all components up concurrently in the background (lifespan hook)
+- Separates liveness (process is up) from readiness (required components online)
+- Records per-component init timings and failures for /health
+"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+
+class Component:
+    """
+    A lazily constructed server component.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any], required: bool = True):
+        self.name = name
+        self.factory = factory
+        self.required = required
+        self.instance = None
+        self.status = "not_initialized"  # initializing, online, disabled, failed
+        self.error: Optional[str] = None
+        self.init_ms: Optional[float] = None
+        self.initialized_at: Optional[str] = None
+        self.lock = threading.Lock()
+
+    @property
+    def settled(self) -> bool:
+        return self.status in ("online", "disabled", "failed")
+
+    def to_dict(self) -> Dict:
+        return {
+            "status": self.status,
+            "required": self.required,
+            "init_ms": round(self.init_ms, 1) if self.init_ms is not None else None,
+            "initialized_at": self.initialized_at,
+            "error": self.error
+        }
+
+
+class ComponentRegistry:
+    """
+    Lazy, concurrently warmed registry of server components.
+
+    Factories run at most once. A factory may call registry.get() for the
+    components it depends on; those are built first (or waited on if another
+    thread is already building them). A factory returning None marks the
+    component as disabled (e.g. an optional API key isn't set).
+    """
+
+    def __init__(self, name: str = "rook"):
+        """
+        Initialize an empty registry.
+
+        Args:
+            name: Registry name (used in logs)
+        """
+        self.name = name
+        self._components: Dict[str, Component] = {}
+        self.created_at = time.time()
+        self.warm_up_started_at: Optional[float] = None
+        self.warm_up_ms: Optional[float] = None
+        self.errors: List[str] = []
+
+    def register(self, name: str, factory: Callable[[], Any], required: bool = True):
+        """
+        Register a component factory (nothing is constructed yet).
+
+        Args:
+            name: Component name
+            factory: Zero-argument callable building the component
+            required: Whether the server is only ready once this is online
+        """
+        self._components[name] = Component(name, factory, required)
+
+    def component(self, name: str, required: bool = True):
+        """Decorator form of register()"""
+        def decorator(factory):
+            self.register(name, factory, required=required)
+            return factory
+        return decorator
+
+    def get(self, name: str) -> Any:
+        """
+        Get a component, constructing it on first use.
+
+        Blocks while the component is being built by another thread.
+
+        Returns:
+            Component instance, or None if it is disabled or failed
+        """
+        component = self._components[name]
+        if component.settled:
+            return component.instance
+
+        with component.lock:
+            if component.settled:
+                return component.instance
+
+            component.status = "initializing"
+            started = time.perf_counter()
+            try:
+                component.instance = component.factory()
+                component.status = "online" if component.instance is not None else "disabled"
+                if component.instance is not None:
+                    print(f"✅ {name} initialized")
+            except Exception as e:
+                component.instance = None
+                component.status = "failed"
+                component.error = str(e)
+                msg = f"❌ {name} failed: {e}"
+                print(msg)
+                self.errors.append(msg)
+            finally:
+                component.init_ms = (time.perf_counter() - started) * 1000
+                component.initialized_at = datetime.now().isoformat()
+
+        return component.instance
+
+    async def aget(self, name: str) -> Any:
+        """
+        Async get(): returns immediately once built, otherwise builds (or
+        waits) in a worker thread so the event loop isn't blocked.
+        """
+        component = self._components[name]
+        if component.settled:
+            return component.instance
+        return await asyncio.to_thread(self.get, name)
+
+    def peek(self, name: str) -> Any:
+        """Get a component only if it is already built (never blocks)"""
+        component = self._components.get(name)
+        return component.instance if component is not None else None
+
+    async def warm_up(self):
+        """
+        Construct every registered component concurrently.
+
+        Meant to be started as a background task from the lifespan hook so the
+        server accepts traffic while warm-up is still running.
+        """
+        self.warm_up_started_at = time.time()
+        started = time.perf_counter()
+        print(f"🧠 Warming up {len(self._components)} {self.name} components...")
+
+        await asyncio.gather(
+            *(asyncio.to_thread(self.get, name) for name in self._components),
+            return_exceptions=True
+        )
+
+        self.warm_up_ms = (time.perf_counter() - started) * 1000
+        statuses = {name: c.status for name, c in self._components.items()}
+        print(f"🚀 {self.name} warm-up finished in {self.warm_up_ms:.0f}ms: {statuses}")
+
+    def is_ready(self) -> bool:
+        """True once every required component is online"""
+        return all(
+            c.status == "online" for c in self._components.values() if c.required
+        )
+
+    def get_status(self) -> Dict:
+        """Get readiness and per-component status/timings"""
+        return {
+            "ready": self.is_ready(),
+            "components": {name: c.to_dict() for name, c in self._components.items()},
+            "warm_up_ms": round(self.warm_up_ms, 1) if self.warm_up_ms is not None else None,
+            "uptime_seconds": round(time.time() - self.created_at, 1),
+            "errors": list(self.errors)
+        }
+
+
+if __name__ == "__main__":
+    registry = ComponentRegistry("demo")
+
+    @registry.component("database")
+    def _database():
+        time.sleep(0.3)
+        return "db-connection"
+
+    @registry.component("index")
+    def _index():
+        time.sleep(0.3)
+        return "pinecone-index"
+
+    @registry.component("retriever")
+    def _retriever():
+        # Depends on both; waits for them instead of rebuilding
+        return f"retriever({registry.get('database')}, {registry.get('index')})"
+
+    @registry.component("news", required=False)
+    def _news():
+        return None  # No API key - disabled
+
+    asyncio.run(registry.warm_up())
+    print(f"Ready: {registry.is_ready()} (serial would take ~600ms)")
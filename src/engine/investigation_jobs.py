@@ -0,0 +1,534 @@
+"""
+ROOK Investigation Jobs
+
+A full ROOKSafe investigation - generation, per-claim verification, the
+verifier model, Method Card - can outlast proxy timeouts when the evidence
+set is large. Investigations therefore run as background jobs:
+
+- submit() returns a job id immediately
+- a bounded worker pool executes the investigations
+- every Moves Ledger entry is recorded as a progress event that clients
+  can poll or stream
+- the final result (gated content, Method Card, Moves Ledger) is persisted
+  so it can be fetched after the job finishes, from any worker
+- progress is persisted as it happens (and refreshed by a heartbeat), so
+  other workers can stream it; jobs whose worker died are marked failed
+"""
+
+import asyncio
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+
+class InvestigationJob:
+    """
+    State of one investigation job, including its progress events.
+    """
+
+    def __init__(self, job_id: str, query: str, evidence_count: int = 0):
+        self.job_id = job_id
+        self.query = query
+        self.evidence_count = evidence_count
+        self.status = "queued"  # running, succeeded, failed
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.events: List[Dict] = []
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.changed = threading.Condition()
+        # Held from to_dict() to save(), so a heartbeat can't land after the final save
+        self.persist_lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def add_event(self, event_type: str, data: Dict):
+        """Append a progress event and wake up anyone waiting on the job"""
+        with self.changed:
+            self.events.append({
+                "seq": len(self.events) + 1,
+                "type": event_type,
+                "timestamp": datetime.now().isoformat(),
+                **data
+            })
+            self.changed.notify_all()
+
+    def set_status(self, status: str, **data):
+        self.status = status
+        self.add_event("status", {"status": status, **data})
+
+    def to_dict(self, include_events: bool = False) -> Dict:
+        record = {
+            "job_id": self.job_id,
+            "query": self.query,
+            "evidence_count": self.evidence_count,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "moves_logged": sum(1 for event in self.events if event["type"] == "move"),
+            "result": self.result,
+            "error": self.error,
+            "updated_at": time.time()
+        }
+        if include_events:
+            record["events"] = list(self.events)
+        return record
+
+
+class MemoryJobStore:
+    """
+    Keeps finished jobs in process memory (single worker / development).
+
+    Like SQLJobStore, a finished job's record is never overwritten.
+    """
+
+    def __init__(self, max_jobs: int = 1000):
+        self.max_jobs = max_jobs
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Dict]" = OrderedDict()
+
+    def save(self, record: Dict):
+        with self._lock:
+            current = self._jobs.get(record["job_id"])
+            if current is not None and current["status"] in TERMINAL_STATUSES:
+                return
+            self._jobs[record["job_id"]] = record
+            self._jobs.move_to_end(record["job_id"])
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+
+    def load(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def unfinished(self) -> List[Dict]:
+        """Records of jobs still queued or running"""
+        with self._lock:
+            return [record for record in self._jobs.values() if record["status"] not in TERMINAL_STATUSES]
+
+
+class SQLJobStore:
+    """
+    Persists job records (status, result and events) with SQLAlchemy Core,
+    so results survive restarts and can be read from any worker. Once a job
+    has succeeded or failed its row is final: late saves of an unfinished
+    view of it (e.g. an orphan check on another worker) are ignored.
+    """
+
+    def __init__(self, database_url: str, table_name: str = "rook_investigation_jobs"):
+        """
+        Initialize the job table.
+
+        Args:
+            database_url: SQLAlchemy URL (sqlite:///..., Postgres DATABASE_URL)
+            table_name: Table holding one row per job
+        """
+        from sqlalchemy import create_engine, MetaData, Table, Column, String, Text, Float
+
+        if database_url.startswith("postgres://"):
+            database_url = "postgresql://" + database_url[len("postgres://"):]
+
+        self.engine = create_engine(database_url, pool_pre_ping=True)
+        metadata = MetaData()
+        self.jobs = Table(
+            table_name,
+            metadata,
+            Column("job_id", String(64), primary_key=True),
+            Column("status", String(16), nullable=False),
+            Column("record", Text, nullable=False),
+            Column("updated_at", Float, nullable=False)
+        )
+        metadata.create_all(self.engine)
+
+    def save(self, record: Dict):
+        from sqlalchemy import select, update
+
+        row = {
+            "status": record["status"],
+            "record": json.dumps(record, default=str),
+            "updated_at": time.time()
+        }
+        with self.engine.begin() as conn:
+            result = conn.execute(
+                update(self.jobs)
+                .where(self.jobs.c.job_id == record["job_id"])
+                .where(self.jobs.c.status.notin_(TERMINAL_STATUSES))
+                .values(**row)
+            )
+            if result.rowcount:
+                return
+            exists = conn.execute(select(self.jobs.c.job_id).where(self.jobs.c.job_id == record["job_id"])).first()
+            if exists is None:
+                conn.execute(self.jobs.insert().values(job_id=record["job_id"], **row))
+
+    def load(self, job_id: str) -> Optional[Dict]:
+        from sqlalchemy import select
+
+        with self.engine.connect() as conn:
+            row = conn.execute(select(self.jobs.c.record).where(self.jobs.c.job_id == job_id)).first()
+        return json.loads(row[0]) if row else None
+
+    def unfinished(self) -> List[Dict]:
+        """Records of jobs still queued or running"""
+        from sqlalchemy import select
+
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(self.jobs.c.record).where(self.jobs.c.status.notin_(TERMINAL_STATUSES))
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+
+def serializable_result(result: Dict) -> Dict:
+    """
+    Reduce a ROOKSafe.investigate() result to what clients need and JSON can hold.
+
+    Claim/Evidence objects in the verification result are summarized as counts
+    and statements; the Method Card and Moves Ledger stay as markdown.
+    """
+    verification = result.get("verification_result", {})
+    return {
+        "investigation_id": result.get("investigation_id"),
+        "query": result.get("query"),
+        "generated_content": result.get("generated_content"),
+        "publishable_content": result.get("publishable_content"),
+        "gating_result": result.get("gating_result"),
+        "verification": {
+            "total_claims": verification.get("total_claims"),
+            "verification_rate": verification.get("verification_rate"),
+            "overall_confidence": verification.get("overall_confidence"),
+            "unverified_claims": [
+                getattr(claim, "statement", str(claim))
+                for claim in verification.get("unverified_claims", [])
+            ]
+        },
+        "method_card": result.get("method_card"),
+        "moves_ledger": result.get("moves_ledger"),
+        "statistics": result.get("statistics")
+    }
+
+
+class InvestigationJobManager:
+    """
+    Runs ROOKSafe investigations in a background pool and tracks their progress.
+    """
+
+    def __init__(
+        self,
+        investigate: Callable[..., Dict],
+        store=None,
+        max_workers: int = 2,
+        max_live_jobs: int = 200,
+        store_poll_interval: float = 1.0,
+        heartbeat_interval: float = 30.0,
+        orphan_after: float = 120.0
+    ):
+        """
+        Initialize the job manager.
+
+        Args:
+            investigate: ROOKSafe.investigate (or a compatible callable)
+            store: Persistent job store (default: in-memory)
+            max_workers: Investigations executed at the same time
+            max_live_jobs: Finished jobs kept in memory for event streaming
+            store_poll_interval: Seconds between store reads when following a job
+                that runs on another worker
+            heartbeat_interval: Seconds between re-persisting unfinished jobs, so
+                their records show the worker is still alive
+            orphan_after: Unfinished jobs not persisted for this long are marked
+                failed (their worker stopped or restarted)
+        """
+        self.investigate = investigate
+        self.store = store or MemoryJobStore()
+        self.max_workers = max_workers
+        self.max_live_jobs = max_live_jobs
+        self.store_poll_interval = store_poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.orphan_after = orphan_after
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rook-investigate")
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, InvestigationJob]" = OrderedDict()
+
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.persist_errors = 0
+        self.orphans_failed = 0
+
+        self._stop = threading.Event()
+        self._heartbeat = threading.Thread(target=self._heartbeat_loop, name="rook-jobs-heartbeat", daemon=True)
+        self._heartbeat.start()
+
+        # Jobs left queued/running by a previous process will never finish
+        self.fail_orphaned_jobs()
+
+    def submit(self, query: str, evidence: List[Any], investigation_id: Optional[str] = None) -> str:
+        """
+        Queue an investigation.
+
+        Args:
+            query: Investigation query
+            evidence: Evidence objects the claims are verified against
+            investigation_id: Optional investigation id (default: derived from the job id)
+
+        Returns:
+            Job id
+        """
+        job_id = f"job_{uuid.uuid4().hex[:16]}"
+        job = InvestigationJob(job_id, query, evidence_count=len(evidence))
+
+        with self._lock:
+            self._jobs[job_id] = job
+            self._evict_finished()
+            self.submitted += 1
+
+        job.set_status("queued")
+        self._persist(job)
+        self._pool.submit(self._run, job, evidence, investigation_id or f"INV-{job_id[4:]}")
+        return job_id
+
+    def _evict_finished(self):
+        """Forget the oldest finished jobs (they remain in the store)"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_live_jobs)]:
+            del self._jobs[job_id]
+
+    def _run(self, job: InvestigationJob, evidence: List[Any], investigation_id: str):
+        job.started_at = time.time()
+        job.set_status("running", investigation_id=investigation_id)
+        self._persist(job)
+
+        def on_move(move):
+            job.add_event("move", {"move": move.to_dict()})
+            # Persisted as it happens, so other workers can stream progress
+            self._persist(job)
+
+        try:
+            result = self.investigate(
+                query=job.query,
+                available_evidence=evidence,
+                investigation_id=investigation_id,
+                on_move=on_move
+            )
+            job.result = serializable_result(result)
+            job.finished_at = time.time()
+            self.succeeded += 1
+            job.set_status("succeeded", passed_gate=(job.result.get("gating_result") or {}).get("passed"))
+        except Exception as e:
+            job.error = str(e)
+            job.finished_at = time.time()
+            self.failed += 1
+            print(f"❌ Investigation job {job.job_id} failed: {e}")
+            job.set_status("failed", error=job.error)
+
+        self._persist(job)
+
+    def _persist(self, job: InvestigationJob):
+        try:
+            with job.persist_lock:
+                self.store.save(job.to_dict(include_events=True))
+        except Exception as e:
+            self.persist_errors += 1
+            print(f"Warning: Could not persist investigation job {job.job_id}: {e}")
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.heartbeat_interval):
+            with self._lock:
+                unfinished = [job for job in self._jobs.values() if not job.done]
+            for job in unfinished:
+                self._persist(job)
+
+    def _fail_orphan(self, record: Dict) -> Dict:
+        record = {
+            **record,
+            "status": "failed",
+            "error": "Job was interrupted (its worker stopped or restarted)",
+            "finished_at": time.time()
+        }
+        events = list(record.get("events", []))
+        events.append({
+            "seq": len(events) + 1,
+            "type": "status",
+            "timestamp": datetime.now().isoformat(),
+            "status": "failed",
+            "error": record["error"]
+        })
+        record["events"] = events
+        try:
+            self.store.save(record)
+            self.orphans_failed += 1
+        except Exception as e:
+            self.persist_errors += 1
+            print(f"Warning: Could not mark investigation job {record['job_id']} failed: {e}")
+        return record
+
+    def _is_orphan(self, record: Dict) -> bool:
+        if record["status"] in TERMINAL_STATUSES:
+            return False
+        with self._lock:
+            if record["job_id"] in self._jobs:
+                return False
+        return time.time() - record.get("updated_at", 0) > self.orphan_after
+
+    def fail_orphaned_jobs(self) -> int:
+        """
+        Mark unfinished jobs whose worker stopped persisting them as failed.
+
+        Returns:
+            Number of jobs marked failed
+        """
+        try:
+            records = self.store.unfinished()
+        except Exception as e:
+            print(f"Warning: Could not check for interrupted investigation jobs: {e}")
+            return 0
+        orphans = [record for record in records if self._is_orphan(record)]
+        for record in orphans:
+            self._fail_orphan(record)
+        if orphans:
+            print(f"⚠️  Marked {len(orphans)} interrupted investigation job(s) as failed")
+        return len(orphans)
+
+    def stop(self):
+        """Stop the heartbeat (unfinished jobs then become orphans after orphan_after)"""
+        self._stop.set()
+
+    def get(self, job_id: str, include_events: bool = False) -> Optional[Dict]:
+        """
+        Get a job's status (and result once finished).
+
+        Jobs submitted on another worker or before a restart are read from the store.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict(include_events=include_events)
+
+        record = self.store.load(job_id)
+        if record is not None and not include_events:
+            record = {key: value for key, value in record.items() if key != "events"}
+        return record
+
+    def wait_for_events(self, job_id: str, after: int = 0, timeout: float = 15.0) -> Optional[Dict]:
+        """
+        Block until a job has events newer than `after`, finishes, or the timeout passes.
+
+        Returns:
+            {"events": [...], "done": bool, "status": str}, or None if the job is unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+
+        if job is None:
+            # Not running here - follow what its worker persists
+            deadline = time.monotonic() + timeout
+            while True:
+                record = self.store.load(job_id)
+                if record is None:
+                    return None
+                if self._is_orphan(record):
+                    record = self._fail_orphan(record)
+                events = [event for event in record.get("events", []) if event["seq"] > after]
+                done = record["status"] in TERMINAL_STATUSES
+                remaining = deadline - time.monotonic()
+                if events or done or remaining <= 0:
+                    return {"events": events, "done": done, "status": record["status"]}
+                time.sleep(min(self.store_poll_interval, remaining))
+
+        with job.changed:
+            job.changed.wait_for(lambda: len(job.events) > after or job.done, timeout=timeout)
+            return {"events": job.events[after:], "done": job.done, "status": job.status}
+
+    async def stream_events(self, job_id: str, after: int = 0, poll_timeout: float = 15.0) -> AsyncIterator[Dict]:
+        """
+        Yield a job's progress events until it finishes.
+
+        A {"type": "heartbeat"} event is yielded when nothing happened for
+        poll_timeout seconds, which keeps proxies from closing idle streams.
+        """
+        while True:
+            update = await asyncio.to_thread(self.wait_for_events, job_id, after, poll_timeout)
+            if update is None:
+                return
+
+            for event in update["events"]:
+                after = event["seq"]
+                yield event
+
+            if update["done"]:
+                return
+            if not update["events"]:
+                yield {"type": "heartbeat", "status": update["status"], "timestamp": datetime.now().isoformat()}
+
+    def get_stats(self) -> Dict:
+        """Get job statistics"""
+        with self._lock:
+            statuses: Dict[str, int] = {}
+            for job in self._jobs.values():
+                statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {
+            "max_workers": self.max_workers,
+            "store": type(self.store).__name__,
+            "submitted": self.submitted,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "persist_errors": self.persist_errors,
+            "orphans_failed": self.orphans_failed,
+            "live_jobs_by_status": statuses
+        }
+
+
+def create_job_store(database_url: Optional[str] = None):
+    """
+    Create the job store: SQL-backed if a database URL is configured,
+    falling back to memory if it can't be reached.
+    """
+    if database_url:
+        try:
+            store = SQLJobStore(database_url)
+            print("✅ Investigation jobs persisted to SQL")
+            return store
+        except Exception as e:
+            print(f"⚠️  Investigation job store unavailable, results kept in memory: {e}")
+    return MemoryJobStore()
+
+
+if __name__ == "__main__":
+    from types import SimpleNamespace
+
+    def _investigate(query, available_evidence, investigation_id, on_move=None):
+        """Stand-in investigation: logs three moves"""
+        for step in ("retrieve", "verify", "decide"):
+            time.sleep(0.3)
+            on_move(SimpleNamespace(to_dict=lambda step=step: {"move_type": step, "description": f"{step} for {query}"}))
+        return {
+            "investigation_id": investigation_id,
+            "query": query,
+            "publishable_content": "Wirecard's cash did not exist.",
+            "gating_result": {"passed": True}
+        }
+
+    manager = InvestigationJobManager(_investigate, max_workers=2)
+    job_id = manager.submit("What was the Wirecard fraud?", evidence=[])
+    print(f"Submitted {job_id}: {manager.get(job_id)['status']}")
+
+    async def _follow():
+        async for event in manager.stream_events(job_id):
+            print(f"  event {event.get('seq')}: {event['type']} {event.get('status') or event.get('move', {}).get('description')}")
+
+    asyncio.run(_follow())
+    print(f"Result: {manager.get(job_id)['result']['publishable_content']}")
+    print(f"Stats: {manager.get_stats()}")
@@ -0,0 +1,230 @@
+"""
+ROOK Leases
+
+Some background jobs (sleep consolidation, ...) must run on one replica at a
+time. A lease is a named, expiring claim:
+
+- acquire() succeeds if nobody holds the lease or the holder's claim expired
+  (a crashed replica can't block the job forever)
+- the holder renews it while working and releases it when done, recording
+  when the job last completed so every replica can see it
+- LocalLease works within one process; SQLLease coordinates replicas through
+  any SQLAlchemy database (same style as the worker state backend)
+"""
+
+import json
+import threading
+import time
+from typing import Any, Dict, Optional
+
+try:
+    from .worker_state import WORKER_ID
+except ImportError:  # loaded as a top-level module
+    from worker_state import WORKER_ID
+
+
+class LeaseLostError(Exception):
+    """The holder's claim expired or was taken over while it was working"""
+
+
+class LocalLease:
+    """
+    In-process lease (single replica / development).
+    """
+
+    def __init__(self, name: str, ttl_seconds: float = 300):
+        """
+        Args:
+            name: Lease name
+            ttl_seconds: How long a claim lasts without renewal
+        """
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.shared = False
+        self._lock = threading.Lock()
+        self._holder: Optional[str] = None
+        self._expires_at = 0.0
+        self._last_completed_at: Optional[float] = None
+        self._last_result: Optional[Dict] = None
+
+    def acquire(self, holder: str = WORKER_ID) -> bool:
+        """Claim the lease if it is free, expired or already ours"""
+        with self._lock:
+            now = time.time()
+            if self._holder not in (None, holder) and self._expires_at > now:
+                return False
+            self._holder = holder
+            self._expires_at = now + self.ttl_seconds
+            return True
+
+    def renew(self, holder: str = WORKER_ID) -> bool:
+        """Extend our claim; False if we lost it"""
+        with self._lock:
+            if self._holder != holder:
+                return False
+            self._expires_at = time.time() + self.ttl_seconds
+            return True
+
+    def release(self, holder: str = WORKER_ID, completed: bool = False, result: Optional[Dict] = None):
+        """Give the lease up, optionally recording a completed run"""
+        with self._lock:
+            if self._holder != holder:
+                return
+            self._holder = None
+            self._expires_at = 0.0
+            if completed:
+                self._last_completed_at = time.time()
+                self._last_result = result
+
+    def state(self) -> Dict[str, Any]:
+        """Current holder and the last completed run"""
+        with self._lock:
+            held = self._holder is not None and self._expires_at > time.time()
+            return {
+                "name": self.name,
+                "holder": self._holder if held else None,
+                "expires_at": self._expires_at if held else None,
+                "last_completed_at": self._last_completed_at,
+                "last_result": self._last_result
+            }
+
+
+class SQLLease:
+    """
+    Lease row in a SQL database, shared by every replica.
+
+    Claims are a single conditional UPDATE (free, expired or ours), so two
+    replicas can't both win.
+    """
+
+    def __init__(self, database_url: str, name: str, ttl_seconds: float = 300):
+        """
+        Initialize the lease and create its table if needed.
+
+        Args:
+            database_url: SQLAlchemy database URL
+            name: Lease name (one row per name)
+            ttl_seconds: How long a claim lasts without renewal
+        """
+        from sqlalchemy import create_engine, MetaData, Table, Column, String, Text, Float
+        from sqlalchemy.exc import IntegrityError
+
+        # Render/Heroku style URLs use the postgres:// scheme SQLAlchemy dropped
+        if database_url.startswith("postgres://"):
+            database_url = database_url.replace("postgres://", "postgresql://", 1)
+
+        self.engine = create_engine(database_url, pool_pre_ping=True)
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.shared = True
+
+        metadata = MetaData()
+        self.leases = Table(
+            "rook_leases",
+            metadata,
+            Column("name", String(128), primary_key=True),
+            Column("holder", String(255)),
+            Column("expires_at", Float, nullable=False),
+            Column("last_completed_at", Float),
+            Column("last_result", Text)
+        )
+        metadata.create_all(self.engine)
+
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(self.leases.insert().values(name=name, holder=None, expires_at=0.0))
+        except IntegrityError:
+            pass  # Row already exists
+
+    def acquire(self, holder: str = WORKER_ID) -> bool:
+        from sqlalchemy import update, or_
+
+        now = time.time()
+        leases = self.leases
+        with self.engine.begin() as conn:
+            result = conn.execute(
+                update(leases)
+                .where(leases.c.name == self.name)
+                .where(or_(leases.c.holder.is_(None), leases.c.holder == holder, leases.c.expires_at <= now))
+                .values(holder=holder, expires_at=now + self.ttl_seconds)
+            )
+        return result.rowcount == 1
+
+    def renew(self, holder: str = WORKER_ID) -> bool:
+        from sqlalchemy import update
+
+        leases = self.leases
+        with self.engine.begin() as conn:
+            result = conn.execute(
+                update(leases)
+                .where(leases.c.name == self.name)
+                .where(leases.c.holder == holder)
+                .values(expires_at=time.time() + self.ttl_seconds)
+            )
+        return result.rowcount == 1
+
+    def release(self, holder: str = WORKER_ID, completed: bool = False, result: Optional[Dict] = None):
+        from sqlalchemy import update
+
+        values = {"holder": None, "expires_at": 0.0}
+        if completed:
+            values.update(last_completed_at=time.time(), last_result=json.dumps(result, default=str))
+        leases = self.leases
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(leases)
+                .where(leases.c.name == self.name)
+                .where(leases.c.holder == holder)
+                .values(**values)
+            )
+
+    def state(self) -> Dict[str, Any]:
+        from sqlalchemy import select
+
+        leases = self.leases
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(leases.c.holder, leases.c.expires_at, leases.c.last_completed_at, leases.c.last_result)
+                .where(leases.c.name == self.name)
+            ).first()
+        if row is None:
+            return {"name": self.name, "holder": None, "expires_at": None, "last_completed_at": None, "last_result": None}
+        held = row[0] is not None and row[1] > time.time()
+        return {
+            "name": self.name,
+            "holder": row[0] if held else None,
+            "expires_at": row[1] if held else None,
+            "last_completed_at": row[2],
+            "last_result": json.loads(row[3]) if row[3] else None
+        }
+
+
+def create_lease(name: str, database_url: Optional[str] = None, ttl_seconds: float = 300):
+    """
+    Create a lease, shared through SQL when a URL is configured.
+
+    Falls back to an in-process lease if the database is unreachable.
+    """
+    if database_url:
+        try:
+            return SQLLease(database_url, name, ttl_seconds)
+        except Exception as e:
+            print(f"⚠️  Lease '{name}' backend unavailable, lease is per-process: {e}")
+    return LocalLease(name, ttl_seconds)
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    db_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'leases.db')}"
+    replica_a = SQLLease(db_url, "consolidation", ttl_seconds=1)
+    replica_b = SQLLease(db_url, "consolidation", ttl_seconds=1)
+
+    print(f"a acquires: {replica_a.acquire('replica-a')}")
+    print(f"b acquires while a holds it: {replica_b.acquire('replica-b')}")
+    time.sleep(1.1)
+    print(f"b acquires after a's claim expired: {replica_b.acquire('replica-b')}")
+    print(f"a renews its lost claim: {replica_a.renew('replica-a')}")
+    replica_b.release("replica-b", completed=True, result={"reflections_generated": 3})
+    print(f"State seen by a: {replica_a.state()}")
@@ -0,0 +1,340 @@
+"""
+ROOK LLM Response Cache
+
+Several model calls are really classifiers over short inputs - importance
+and valence ratings, article analysis, query routing, verifier checks - and
+they keep being re-invoked on identical inputs (reprocessed articles,
+repeated queries, re-verified drafts). This cache memoizes them:
+
+- Keyed by (model, messages hash, temperature, response_format, ...)
+- Only deterministic / low-temperature, non-streaming calls are eligible
+- Two tiers: in-process LRU, then an on-disk sqlite file shared by every
+  process on the machine and surviving restarts
+- Both tiers are bounded by entry count and TTL
+- Hits, misses and bypasses are reported per call site
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+
+try:
+    from .usage import usage_stage
+except ImportError:  # loaded as a top-level module
+    from usage import usage_stage
+
+
+def cache_key(model: str, messages: Any, temperature: Optional[float], response_format: Any = None, **params) -> str:
+    """
+    Hash everything that determines a completion into a cache key.
+
+    Args:
+        model: Model name
+        messages: Chat messages
+        temperature: Sampling temperature
+        response_format: Structured output format, if any
+        **params: Other request parameters that change the output (max_tokens, ...)
+    """
+    payload = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "response_format": response_format,
+        **params
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def cached_completion(content: str, model: str) -> SimpleNamespace:
+    """Response object shaped like the bits of a ChatCompletion callers read"""
+    message = SimpleNamespace(content=content, role="assistant")
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=message, index=0, finish_reason="stop")],
+        model=model,
+        usage=None,
+        cached=True
+    )
+
+
+class DiskTier:
+    """
+    sqlite-backed second tier (stdlib only, safe across threads and processes).
+    """
+
+    def __init__(self, path: str, max_entries: int = 20000, ttl_seconds: float = 7 * 86400):
+        """
+        Args:
+            path: sqlite file path (directories are created)
+            max_entries: Entries kept before the oldest are pruned
+            ttl_seconds: Age after which entries are ignored and pruned
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, content TEXT NOT NULL, model TEXT, created_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_created ON llm_cache (created_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, model FROM llm_cache WHERE key = ? AND created_at > ?",
+                (key, time.time() - self.ttl_seconds)
+            ).fetchone()
+        return {"content": row[0], "model": row[1]} if row else None
+
+    def set(self, key: str, content: str, model: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, content, model, created_at) VALUES (?, ?, ?, ?)",
+                (key, content, model, time.time())
+            )
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self._prune()
+            self._conn.commit()
+
+    def _prune(self):
+        self._conn.execute("DELETE FROM llm_cache WHERE created_at <= ?", (time.time() - self.ttl_seconds,))
+        self._conn.execute(
+            "DELETE FROM llm_cache WHERE key IN ("
+            "SELECT key FROM llm_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+class LLMResponseCache:
+    """
+    Memoizes eligible chat completions in memory and on disk.
+
+    Usage:
+        response = get_llm_cache().complete(
+            client, "rook_emergent.rate_importance",
+            model="gpt-4o-mini", messages=[...], temperature=0
+        )
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        ttl_seconds: float = 86400,
+        disk_path: Optional[str] = None,
+        disk_max_entries: int = 20000,
+        disk_ttl_seconds: float = 7 * 86400,
+        max_temperature: float = 0.3,
+        enabled: bool = True
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: In-memory LRU size
+            ttl_seconds: In-memory entry lifetime
+            disk_path: sqlite file for the disk tier (None disables it)
+            disk_max_entries: Disk tier size
+            disk_ttl_seconds: Disk entry lifetime
+            max_temperature: Highest temperature still treated as deterministic
+            enabled: False turns every call into a pass-through
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_temperature = max_temperature
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._sites: Dict[str, Dict[str, int]] = {}
+
+        self.disk: Optional[DiskTier] = None
+        if disk_path:
+            try:
+                self.disk = DiskTier(disk_path, max_entries=disk_max_entries, ttl_seconds=disk_ttl_seconds)
+            except Exception as e:
+                print(f"⚠️  LLM cache disk tier unavailable, memory only: {e}")
+
+    def eligible(self, params: Dict) -> bool:
+        """Only non-streaming, single-choice, low-temperature calls are cached"""
+        temperature = params.get("temperature", 1.0)  # the API default
+        return (
+            self.enabled
+            and temperature is not None
+            and temperature <= self.max_temperature
+            and not params.get("stream")
+            and params.get("n", 1) == 1
+        )
+
+    def _count(self, call_site: str, outcome: str):
+        with self._lock:
+            site = self._sites.setdefault(call_site, {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0})
+            site[outcome] += 1
+
+    def _get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.time():
+                    self._memory.move_to_end(key)
+                    return value
+                del self._memory[key]
+        return None
+
+    def _remember(self, key: str, value: Dict):
+        with self._lock:
+            self._memory[key] = (time.time() + self.ttl_seconds, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def complete(self, client, call_site: str, **params) -> Any:
+        """
+        chat.completions.create() with memoization.
+
+        Args:
+            client: OpenAI client
+            call_site: Name the hit ratio is reported under
+            **params: Arguments for chat.completions.create
+
+        Returns:
+            The provider response, or a cached stand-in exposing
+            .choices[0].message.content and .model
+        """
+        if not self.eligible(params):
+            self._count(call_site, "bypassed")
+            with usage_stage(call_site):
+                return client.chat.completions.create(**params)
+
+        key_params = {k: v for k, v in params.items() if k not in ("model", "messages", "temperature", "response_format")}
+        key = cache_key(
+            params["model"],
+            params["messages"],
+            params.get("temperature", 1.0),
+            params.get("response_format"),
+            **key_params
+        )
+
+        value = self._get(key)
+        if value is not None:
+            self._count(call_site, "memory_hits")
+            return cached_completion(value["content"], value["model"])
+
+        if self.disk is not None:
+            try:
+                value = self.disk.get(key)
+            except Exception as e:
+                print(f"Warning: LLM cache disk read failed: {e}")
+            if value is not None:
+                self._remember(key, value)
+                self._count(call_site, "disk_hits")
+                return cached_completion(value["content"], value["model"])
+
+        self._count(call_site, "misses")
+        with usage_stage(call_site):
+            response = client.chat.completions.create(**params)
+
+        content = response.choices[0].message.content
+        if content is not None:
+            value = {"content": content, "model": getattr(response, "model", params["model"])}
+            self._remember(key, value)
+            if self.disk is not None:
+                try:
+                    self.disk.set(key, value["content"], value["model"])
+                except Exception as e:
+                    print(f"Warning: LLM cache disk write failed: {e}")
+        return response
+
+    def get_stats(self) -> Dict:
+        """Get per-call-site hit ratios and tier sizes"""
+        with self._lock:
+            sites = {}
+            for name, counts in self._sites.items():
+                hits = counts["memory_hits"] + counts["disk_hits"]
+                lookups = hits + counts["misses"]
+                sites[name] = {**counts, "hit_ratio": hits / lookups if lookups else 0}
+            memory_entries = len(self._memory)
+
+        return {
+            "enabled": self.enabled,
+            "max_temperature": self.max_temperature,
+            "memory_entries": memory_entries,
+            "disk_entries": self.disk.count() if self.disk else None,
+            "disk_path": self.disk.path if self.disk else None,
+            "call_sites": sites
+        }
+
+
+# Global cache instance (configured from the environment)
+_llm_cache = None
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Get or create the shared LLM response cache"""
+    global _llm_cache
+    if _llm_cache is None:
+        disk_path = os.getenv("LLM_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".cache", "rook", "llm_cache.sqlite"))
+        _llm_cache = LLMResponseCache(
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", 2048)),
+            ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", 86400)),
+            disk_path=disk_path or None,
+            disk_max_entries=int(os.getenv("LLM_CACHE_DISK_MAX_ENTRIES", 20000)),
+            disk_ttl_seconds=float(os.getenv("LLM_CACHE_DISK_TTL_SECONDS", 7 * 86400)),
+            max_temperature=float(os.getenv("LLM_CACHE_MAX_TEMPERATURE", 0.3)),
+            enabled=os.getenv("LLM_CACHE_DISABLED", "").lower() not in ("1", "true", "yes")
+        )
+    return _llm_cache
+
+
+def reset_llm_cache():
+    """Reset the global cache (for testing)"""
+    global _llm_cache
+    _llm_cache = None
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    class _CountingClient:
+        """Stand-in client that counts real completions"""
+        def __init__(self):
+            self.calls = 0
+            self.chat = SimpleNamespace(completions=self)
+
+        def create(self, **params):
+            self.calls += 1
+            return cached_completion(f"7 (call {self.calls})", params["model"])
+
+    client = _CountingClient()
+    path = os.path.join(tempfile.mkdtemp(), "llm_cache.sqlite")
+    messages = [{"role": "user", "content": "Rate the importance of: Wirecard's missing €1.9bn"}]
+
+    cache = LLMResponseCache(disk_path=path)
+    for _ in range(3):
+        print(cache.complete(client, "demo.rate", model="gpt-4o-mini", messages=messages, temperature=0).choices[0].message.content)
+    cache.complete(client, "demo.chat", model="gpt-4o-mini", messages=messages, temperature=0.9)
+
+    # A fresh process-level cache still finds the answer on disk
+    restarted = LLMResponseCache(disk_path=path)
+    print(restarted.complete(client, "demo.rate", model="gpt-4o-mini", messages=messages, temperature=0).choices[0].message.content)
+    print(f"Provider calls: {client.calls}")
+    print(f"Stats: {cache.get_stats()['call_sites']} / {restarted.get_stats()['call_sites']}")
@@ -0,0 +1,485 @@
+"""
+ROOK Resilient Upstream Calls
+
+OpenAI and Pinecone calls used to wait as long as the SDK defaults allowed,
+so one slow upstream response turned into a 30 second chat turn. Every
+upstream call can instead go through an Upstream, which keeps:
+
+- A rolling latency histogram per endpoint (e.g. "embeddings", "query",
+  "chat.gpt-4o-mini.conversation" - one per model and call site)
+- Deadlines derived from it for idempotent calls: a few times the observed
+  p99, clamped, with a fixed default until enough samples exist. Timed-out
+  attempts are recorded at their deadline so the p99 can't ratchet down.
+  Non-idempotent generations get a fixed (or max_tokens-scaled) deadline,
+  since their latency depends on how much they write
+- Hedging for idempotent reads: if the first attempt is still running at
+  the observed p95, a duplicate is sent and the first answer wins (bounded
+  by a hedge budget so a slow upstream isn't hit twice as hard)
+- Retries with full-jitter exponential backoff for transient errors
+- A circuit breaker per upstream that fails fast while it is down (a
+  generation running past its deadline doesn't count as the upstream
+  being down, so it can't cut off embeddings and reads)
+"""
+
+import contextvars
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERROR_NAMES = ("Timeout", "Connection", "RateLimit", "InternalServer", "ServiceUnavailable")
+
+
+class DeadlineExceeded(TimeoutError):
+    """An upstream call (including its hedge) did not finish before its deadline."""
+
+
+class CircuitOpenError(RuntimeError):
+    """The upstream's circuit breaker is open; the call was not attempted."""
+
+
+def sdk_timeout(client, timeout: float):
+    """
+    Give an OpenAI client a per-request timeout and disable its own retries
+    (retrying is done by the Upstream). Other clients are returned unchanged.
+    """
+    with_options = getattr(client, "with_options", None)
+    if with_options is None:
+        return client
+    return with_options(timeout=timeout, max_retries=0)
+
+
+def generation_deadline(max_tokens: int, base: float = 10.0, tokens_per_second: float = 25.0) -> float:
+    """Deadline (s) for a generation that may write up to max_tokens tokens"""
+    return base + max_tokens / tokens_per_second
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Transient errors worth retrying: timeouts, connection resets, 429s, 5xx"""
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None) or getattr(error, "status", None)
+    if status in RETRYABLE_STATUS_CODES:
+        return True
+    return any(name in type(error).__name__ for name in RETRYABLE_ERROR_NAMES)
+
+
+class LatencyHistogram:
+    """
+    Rolling window of recent latencies with percentile lookups.
+    """
+
+    def __init__(self, window: int = 512):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, latency_ms: float):
+        with self._lock:
+            self._samples.append(latency_ms)
+            self.count += 1
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """p-th percentile (0-100) of the window, or None if empty"""
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        position = min(len(ordered) - 1, max(0, int(round(p / 100 * (len(ordered) - 1)))))
+        return ordered[position]
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "window": len(self),
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99)
+        }
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker (closed -> open -> half_open -> closed).
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a trial call
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        """Whether a call may be attempted right now"""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.time() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._trial_in_flight = False
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_neutral(self):
+        """The call said nothing about the upstream's health; release a half-open trial"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.times_opened += 1
+                    print(f"⚠️  Circuit opened after {self.failures} consecutive failures")
+                self.state = "open"
+                self.opened_at = time.time()
+                self._trial_in_flight = False
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "times_opened": self.times_opened
+            }
+
+
+class EndpointStats:
+    """Counters for one upstream endpoint"""
+
+    def __init__(self, window: int):
+        self.latency = LatencyHistogram(window)
+        self.calls = 0
+        self.errors = 0
+        self.deadlines_exceeded = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            **self.latency.to_dict(),
+            "calls": self.calls,
+            "errors": self.errors,
+            "deadlines_exceeded": self.deadlines_exceeded,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins
+        }
+
+
+class Upstream:
+    """
+    Deadline, hedging, retry and circuit-breaking policy for one upstream service.
+
+    Usage:
+        openai_upstream = get_upstream("openai")
+        response = openai_upstream.call(
+            "embeddings",
+            lambda timeout: sdk_timeout(client, timeout).embeddings.create(...),
+            idempotent=True
+        )
+        results = get_upstream("pinecone").call(
+            "query",
+            lambda timeout: index.query(..., _request_timeout=timeout),
+            idempotent=True
+        )
+
+    The attempt's timeout must reach the SDK: the deadline and hedge only stop
+    waiting for an attempt, they can't stop the request itself.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        default_deadline: float = 30.0,
+        min_deadline: float = 2.0,
+        max_deadline: float = 60.0,
+        deadline_multiplier: float = 3.0,
+        min_samples: int = 20,
+        hedge_budget: float = 0.1,
+        retries: int = 2,
+        backoff_base: float = 0.2,
+        backoff_cap: float = 2.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        window: int = 512,
+        max_workers: int = 32
+    ):
+        """
+        Initialize the upstream policy.
+
+        Args:
+            name: Upstream name ("openai", "pinecone")
+            default_deadline: Deadline (s) until an endpoint has min_samples latencies
+            min_deadline: Lower bound for derived deadlines (s)
+            max_deadline: Upper bound for any deadline (s)
+            deadline_multiplier: Derived deadline = multiplier * observed p99
+            min_samples: Samples needed before deadlines/hedging adapt
+            hedge_budget: Max fraction of calls that may send a hedge
+            retries: Retries after the first attempt for transient errors
+            backoff_base: Base backoff (s) for full-jitter retries
+            backoff_cap: Maximum backoff (s)
+            failure_threshold: Consecutive failures that open the breaker
+            reset_timeout: Seconds before an open breaker allows a trial call
+            window: Latency samples kept per endpoint
+            max_workers: Threads available for attempts and hedges
+        """
+        self.name = name
+        self.default_deadline = default_deadline
+        self.min_deadline = min_deadline
+        self.max_deadline = max_deadline
+        self.deadline_multiplier = deadline_multiplier
+        self.min_samples = min_samples
+        self.hedge_budget = hedge_budget
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.window = window
+
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"rook-{name}")
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, EndpointStats] = {}
+        self._calls = 0
+        self._hedges = 0
+
+    def _stats(self, endpoint: str) -> EndpointStats:
+        with self._lock:
+            if endpoint not in self._endpoints:
+                self._endpoints[endpoint] = EndpointStats(self.window)
+            return self._endpoints[endpoint]
+
+    def deadline_for(self, endpoint: str, default: float = None) -> float:
+        """Deadline (s) for the next call to an endpoint"""
+        histogram = self._stats(endpoint).latency
+        if len(histogram) < self.min_samples:
+            return min(default or self.default_deadline, self.max_deadline)
+        p99_seconds = histogram.percentile(99) / 1000
+        return max(self.min_deadline, min(self.max_deadline, p99_seconds * self.deadline_multiplier))
+
+    def hedge_delay_for(self, endpoint: str) -> Optional[float]:
+        """Seconds to wait before hedging (observed p95), or None if not enough data"""
+        histogram = self._stats(endpoint).latency
+        if len(histogram) < self.min_samples:
+            return None
+        return histogram.percentile(95) / 1000
+
+    def _take_hedge(self) -> bool:
+        with self._lock:
+            if self._hedges + 1 > self.hedge_budget * max(self._calls, 1):
+                return False
+            self._hedges += 1
+            return True
+
+    def _attempt(self, stats: EndpointStats, fn: Callable[[float], Any], deadline: float, hedge_after: Optional[float]) -> Any:
+        """One attempt: the call, plus at most one hedge, bounded by the deadline"""
+        started = time.perf_counter()
+        end = started + deadline
+        # Each attempt runs in the caller's context (trace spans, usage attribution)
+        futures = {self._pool.submit(contextvars.copy_context().run, fn, deadline): ("primary", started)}
+        error = None
+
+        while futures:
+            now = time.perf_counter()
+            remaining = end - now
+            if remaining <= 0:
+                break
+
+            timeout = remaining
+            if hedge_after is not None:
+                timeout = min(remaining, max(0.0, started + hedge_after - now))
+
+            done, _ = wait(list(futures), timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                role, submitted = futures.pop(future)
+                if future.exception() is None:
+                    # Upstream latency of the request that answered, not including the hedge delay
+                    stats.latency.record((time.perf_counter() - submitted) * 1000)
+                    if role == "hedge":
+                        stats.hedge_wins += 1
+                    return future.result()
+                error = future.exception()
+
+            if hedge_after is not None and time.perf_counter() >= started + hedge_after:
+                # Only ever one hedge per attempt
+                if futures and self._take_hedge():
+                    stats.hedges += 1
+                    hedge = self._pool.submit(contextvars.copy_context().run, fn, max(0.1, end - time.perf_counter()))
+                    futures[hedge] = ("hedge", time.perf_counter())
+                hedge_after = None
+
+        if futures:
+            stats.deadlines_exceeded += 1
+            # At least this slow - without the sample, the p99 only ever sees fast calls
+            stats.latency.record(deadline * 1000)
+            raise DeadlineExceeded(f"{self.name} call exceeded its {deadline:.1f}s deadline")
+        raise error
+
+    def call(
+        self,
+        endpoint: str,
+        fn: Callable[[float], Any],
+        idempotent: bool = False,
+        deadline: float = None,
+        default_deadline: float = None,
+        retries: int = None
+    ) -> Any:
+        """
+        Call an upstream endpoint under the deadline / hedge / retry / breaker policy.
+
+        Args:
+            endpoint: Endpoint name (histograms are kept per endpoint)
+            fn: Callable taking the attempt's timeout in seconds (pass it to the SDK)
+            idempotent: Safe to send twice - enables hedging and histogram-derived
+                deadlines
+            deadline: Fixed per-attempt deadline (default: derived from the histogram
+                for idempotent calls, default_deadline otherwise)
+            default_deadline: Deadline to use until the endpoint has enough samples
+                (always, for non-idempotent calls)
+            retries: Override the number of retries
+
+        Returns:
+            Whatever fn returns
+
+        Raises:
+            CircuitOpenError: The upstream is failing and the breaker is open
+            DeadlineExceeded: The last attempt ran past its deadline
+        """
+        stats = self._stats(endpoint)
+        with self._lock:
+            self._calls += 1
+        stats.calls += 1
+        retries = self.retries if retries is None else retries
+
+        for attempt in range(retries + 1):
+            if not self.breaker.allow():
+                stats.errors += 1
+                raise CircuitOpenError(f"{self.name} circuit is open")
+
+            if deadline:
+                attempt_deadline = deadline
+            elif idempotent:
+                attempt_deadline = self.deadline_for(endpoint, default_deadline)
+            else:
+                attempt_deadline = min(default_deadline or self.default_deadline, self.max_deadline)
+            hedge_after = self.hedge_delay_for(endpoint) if idempotent else None
+            try:
+                result = self._attempt(stats, fn, attempt_deadline, hedge_after)
+                self.breaker.record_success()
+                return result
+            except Exception as e:
+                if not is_retryable(e):
+                    # Bad request etc. - the upstream itself is fine
+                    self.breaker.record_success()
+                    stats.errors += 1
+                    raise
+                if isinstance(e, DeadlineExceeded) and not idempotent:
+                    # A long generation, not a failing upstream
+                    self.breaker.record_neutral()
+                else:
+                    self.breaker.record_failure()
+                if attempt == retries:
+                    stats.errors += 1
+                    raise
+                stats.retries += 1
+                time.sleep(random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt)))
+
+    def get_stats(self) -> Dict:
+        """Get breaker state and per-endpoint latency/deadline statistics"""
+        with self._lock:
+            endpoints = dict(self._endpoints)
+            calls, hedges = self._calls, self._hedges
+        return {
+            "breaker": self.breaker.to_dict(),
+            "calls": calls,
+            "hedge_rate": hedges / calls if calls else 0,
+            "endpoints": {
+                name: {**stats.to_dict(), "next_deadline_s": round(self.deadline_for(name), 2)}
+                for name, stats in endpoints.items()
+            }
+        }
+
+
+# Shared upstream policies (one breaker per upstream service)
+_upstreams: Dict[str, Upstream] = {}
+_upstreams_lock = threading.Lock()
+
+
+def get_upstream(name: str) -> Upstream:
+    """Get or create the shared policy for an upstream service"""
+    with _upstreams_lock:
+        if name not in _upstreams:
+            _upstreams[name] = Upstream(
+                name,
+                default_deadline=float(os.getenv("UPSTREAM_DEFAULT_DEADLINE_SECONDS", 30)),
+                max_deadline=float(os.getenv("UPSTREAM_MAX_DEADLINE_SECONDS", 60)),
+                hedge_budget=float(os.getenv("UPSTREAM_HEDGE_BUDGET", 0.1)),
+                retries=int(os.getenv("UPSTREAM_RETRIES", 2))
+            )
+        return _upstreams[name]
+
+
+def get_upstream_stats() -> Dict:
+    """Statistics for every upstream used so far"""
+    with _upstreams_lock:
+        upstreams = dict(_upstreams)
+    return {name: upstream.get_stats() for name, upstream in upstreams.items()}
+
+
+if __name__ == "__main__":
+    upstream = Upstream("demo", min_samples=20, default_deadline=1.0, hedge_budget=0.2, reset_timeout=1.0)
+
+    def _query(timeout):
+        # Mostly ~20ms, occasionally a 2s stall
+        time.sleep(2.0 if random.random() < 0.05 else 0.02)
+        return "matches"
+
+    latencies = []
+    for _ in range(200):
+        started = time.perf_counter()
+        try:
+            upstream.call("query", _query, idempotent=True)
+        except DeadlineExceeded:
+            pass
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    print(f"Client p50 {latencies[100]:.0f}ms, p95 {latencies[190]:.0f}ms, max {latencies[-1]:.0f}ms (stalls are 2000ms)")
+    print(f"Stats: {upstream.get_stats()}")
+
+    def _down(timeout):
+        raise ConnectionError("connection reset")
+
+    for _ in range(3):
+        try:
+            upstream.call("generate", _down, retries=2)
+        except Exception as e:
+            print(f"{type(e).__name__}: {e}")
@@ -0,0 +1,148 @@
+"""
+Singleflight - Request Coalescing for ROOK Engine
+
+When a story breaks, many users ask the same question within seconds.
+Singleflight collapses concurrent calls with the same key into a single
+execution: the first caller (the leader) does the work, everyone who
+arrives while it is in flight waits and receives the same result.
+
+Nothing is cached after the call completes - this only deduplicates work
+that is happening *right now*. The hot cache handles reuse over time.
+"""
+
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query so trivially different phrasings share a key.
+    
+    Lowercases, collapses whitespace and drops trailing punctuation:
+    "What happened at  Wirecard?" -> "what happened at wirecard"
+    """
+    return " ".join(str(query or "").lower().split()).rstrip("?!. ")
+
+
+def context_hash(context: Any) -> str:
+    """
+    Stable hash of user-independent context (e.g. conversation history).
+    
+    Two requests only share a generation if their prompt context hashes match.
+    """
+    if not context:
+        return "empty"
+    encoded = json.dumps(context, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+class _InFlightCall:
+    """A call currently being executed by its leader"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Thread-safe duplicate call suppression.
+    
+    Usage:
+        flight = SingleFlight("retrieval")
+        result, shared = flight.do(key, lambda: expensive_call())
+    """
+    
+    def __init__(self, name: str = "default"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _InFlightCall] = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.max_waiters = 0
+    
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Execute fn once per key among concurrent callers.
+        
+        Args:
+            key: Deduplication key
+            fn: Zero-argument callable doing the actual work
+            
+        Returns:
+            Tuple of (result, shared) - shared is True if this caller
+            received another caller's result
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                self.max_waiters = max(self.max_waiters, call.waiters)
+                is_leader = False
+            else:
+                call = _InFlightCall()
+                self._calls[key] = call
+                self.executions += 1
+                is_leader = True
+        
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        
+        return call.result, False
+    
+    def get_stats(self) -> Dict:
+        """Get coalescing statistics"""
+        with self._lock:
+            in_flight = len(self._calls)
+        total = self.executions + self.coalesced
+        return {
+            "name": self.name,
+            "calls": total,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "coalesce_rate": self.coalesced / total if total > 0 else 0,
+            "max_waiters": self.max_waiters,
+            "in_flight": in_flight
+        }
+
+
+if __name__ == "__main__":
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    
+    flight = SingleFlight("demo")
+    backend_calls = []
+    
+    def slow_backend():
+        backend_calls.append(1)
+        time.sleep(0.2)
+        return "Wirecard's €1.9B never existed."
+    
+    queries = ["What happened at Wirecard?", "what happened at  wirecard", "What happened at Wirecard"] * 10
+    with ThreadPoolExecutor(max_workers=30) as pool:
+        results = list(pool.map(
+            lambda q: flight.do(normalize_query(q), slow_backend),
+            queries
+        ))
+    
+    print(f"Requests: {len(queries)}, backend calls: {len(backend_calls)}")
+    print(f"Shared results: {sum(1 for _, shared in results if shared)}")
+    print(flight.get_stats())
@@ -0,0 +1,339 @@
+"""
+ROOK Tracing
+
+Lightweight spans for seeing where a chat turn spends its time:
+
+- span("embedding") / @traced("generation") time a stage; spans nest via a
+  context variable, so retrieval -> embedding -> Pinecone query show up as
+  a tree without passing anything around
+- Every finished span feeds a per-stage latency histogram (p50/p95/p99 for
+  /api/stats), whether or not a request trace is active
+- A request trace collects its spans so the server can emit a
+  Server-Timing header
+- With OTEL_EXPORTER_OTLP_ENDPOINT set, finished traces are exported in
+  OTLP/HTTP JSON to a local collector (stdlib only, background thread)
+
+Context variables don't follow work into plain thread pools; wrap callables
+with propagate() when submitting them to an executor.
+"""
+
+import contextvars
+import functools
+import json
+import os
+import queue
+import threading
+import time
+import urllib.request
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    from .resilience import LatencyHistogram
+except ImportError:  # loaded as a top-level module
+    from resilience import LatencyHistogram
+
+
+class Span:
+    """One timed stage"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+
+class Trace:
+    """Spans recorded for one request"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.trace_id = uuid.uuid4().hex
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self.spans: List[Span] = []
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def stage_totals(self) -> Dict[str, float]:
+        """Total milliseconds per stage name (concurrent spans of a stage add up)"""
+        totals: Dict[str, float] = {}
+        with self._lock:
+            for span in self.spans:
+                totals[span.name] = totals.get(span.name, 0.0) + span.duration_ms
+        return totals
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, e.g. 'retrieval;dur=41.2, generation;dur=812.0, total;dur=870.3'"""
+        metrics = [
+            f"{name.replace(' ', '_')};dur={duration:.1f}"
+            for name, duration in self.stage_totals().items()
+        ]
+        metrics.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(metrics)
+
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("rook_trace", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("rook_span", default=None)
+
+
+class OTLPExporter:
+    """
+    Ships finished traces to an OTLP/HTTP collector as JSON, off the request path.
+    """
+
+    def __init__(self, endpoint: str, service_name: str = "rook", max_queue: int = 1000):
+        """
+        Args:
+            endpoint: Collector base URL (e.g. http://localhost:4318)
+            service_name: service.name resource attribute
+            max_queue: Traces buffered before new ones are dropped
+        """
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self._queue: "queue.Queue[Trace]" = queue.Queue(maxsize=max_queue)
+        self.exported = 0
+        self.dropped = 0
+        self.failures = 0
+        threading.Thread(target=self._run, name="rook-otlp-export", daemon=True).start()
+
+    def submit(self, trace: Trace):
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    @staticmethod
+    def _attribute(key: str, value: Any) -> Dict:
+        if isinstance(value, bool):
+            return {"key": key, "value": {"boolValue": value}}
+        if isinstance(value, int):
+            return {"key": key, "value": {"intValue": str(value)}}
+        if isinstance(value, float):
+            return {"key": key, "value": {"doubleValue": value}}
+        return {"key": key, "value": {"stringValue": str(value)}}
+
+    def _payload(self, traces: List[Trace]) -> Dict:
+        spans = []
+        for trace in traces:
+            for span in trace.spans:
+                record = {
+                    "traceId": span.trace_id,
+                    "spanId": span.span_id,
+                    "name": span.name,
+                    "kind": 1,
+                    "startTimeUnixNano": str(span.start_ns),
+                    "endTimeUnixNano": str(span.end_ns or span.start_ns),
+                    "attributes": [self._attribute(k, v) for k, v in span.attributes.items()],
+                    "status": {"code": 2, "message": span.error} if span.error else {"code": 1}
+                }
+                if span.parent_id:
+                    record["parentSpanId"] = span.parent_id
+                spans.append(record)
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [self._attribute("service.name", self.service_name)]},
+                "scopeSpans": [{"scope": {"name": "rook.tracing"}, "spans": spans}]
+            }]
+        }
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < 50:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                request = urllib.request.Request(
+                    self.url,
+                    data=json.dumps(self._payload(batch)).encode("utf-8"),
+                    headers={"Content-Type": "application/json"},
+                    method="POST"
+                )
+                urllib.request.urlopen(request, timeout=5).close()
+                self.exported += len(batch)
+            except Exception as e:
+                self.failures += 1
+                if self.failures in (1, 10, 100):
+                    print(f"Warning: Could not export traces to {self.url}: {e}")
+
+
+class Tracer:
+    """
+    Creates spans and keeps per-stage latency histograms.
+    """
+
+    def __init__(self, exporter: Optional[OTLPExporter] = None, window: int = 1024):
+        self.exporter = exporter
+        self.window = window
+        self._lock = threading.Lock()
+        self._stages: Dict[str, LatencyHistogram] = {}
+        self._errors: Dict[str, int] = {}
+
+    def _histogram(self, name: str) -> LatencyHistogram:
+        with self._lock:
+            if name not in self._stages:
+                self._stages[name] = LatencyHistogram(self.window)
+            return self._stages[name]
+
+    @contextmanager
+    def trace(self, name: str):
+        """
+        Start a request trace; spans opened inside it are collected on it.
+
+        The trace may be renamed before the block exits (e.g. to the matched
+        route) - its duration is recorded under "request:<name>".
+        """
+        trace = Trace(name)
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(None)
+        try:
+            yield trace
+        finally:
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            self._histogram(f"request:{trace.name}").record((time.perf_counter() - trace.started) * 1000)
+            if self.exporter and trace.spans:
+                self.exporter.submit(trace)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Time a stage (nested under the current span, if any)"""
+        trace = _current_trace.get()
+        parent = _current_span.get()
+        span = Span(
+            name,
+            trace.trace_id if trace else (parent.trace_id if parent else uuid.uuid4().hex),
+            parent.span_id if parent else None,
+            attributes
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            with self._lock:
+                self._errors[name] = self._errors.get(name, 0) + 1
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current_span.reset(token)
+            self._histogram(name).record(span.duration_ms)
+            if trace is not None:
+                trace.add(span)
+
+    def get_stats(self) -> Dict:
+        """Per-stage p50/p95/p99 (ms), counts and errors"""
+        with self._lock:
+            stages = dict(self._stages)
+            errors = dict(self._errors)
+        stats = {
+            name: {**histogram.to_dict(), "errors": errors.get(name, 0)}
+            for name, histogram in sorted(stages.items())
+        }
+        if self.exporter:
+            stats["_otlp_export"] = {
+                "url": self.exporter.url,
+                "exported_traces": self.exporter.exported,
+                "dropped_traces": self.exporter.dropped,
+                "failures": self.exporter.failures
+            }
+        return stats
+
+
+# Global tracer (OTLP export is enabled by OTEL_EXPORTER_OTLP_ENDPOINT)
+_tracer = None
+
+
+def get_tracer() -> Tracer:
+    """Get or create the global tracer"""
+    global _tracer
+    if _tracer is None:
+        endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+        exporter = OTLPExporter(endpoint, os.getenv("OTEL_SERVICE_NAME", "rook")) if endpoint else None
+        _tracer = Tracer(exporter)
+    return _tracer
+
+
+def span(name: str, **attributes):
+    """Shortcut for get_tracer().span(...)"""
+    return get_tracer().span(name, **attributes)
+
+
+def traced(name: str):
+    """Decorator timing every call of a function as a span"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with get_tracer().span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def propagate(fn: Callable) -> Callable:
+    """
+    Bind fn to a copy of the current context so it can run in another thread.
+
+    Call this in the submitting thread, once per task (a context can't be
+    entered by two threads at the same time).
+    """
+    context = contextvars.copy_context()
+    return functools.partial(context.run, fn)
+
+
+def current_trace() -> Optional[Trace]:
+    """The request trace active in this context, if any"""
+    return _current_trace.get()
+
+
+def current_span() -> Optional[Span]:
+    """The innermost open span in this context, if any"""
+    return _current_span.get()
+
+
+if __name__ == "__main__":
+    from concurrent.futures import ThreadPoolExecutor
+
+    tracer = get_tracer()
+
+    @traced("embedding")
+    def _embed(query):
+        time.sleep(0.02)
+        return [0.1, 0.2]
+
+    def _query_index(index_name):
+        with span("pinecone.query", index=index_name):
+            time.sleep(0.03)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        for _ in range(3):
+            with tracer.trace("chat") as request_trace:
+                with span("retrieval"):
+                    _embed("What happened at Wirecard?")
+                    futures = [pool.submit(propagate(_query_index), name) for name in ("personality", "memory")]
+                    [future.result() for future in futures]
+                with span("generation", model="gpt-4o-mini"):
+                    time.sleep(0.05)
+
+    print(f"Server-Timing: {request_trace.server_timing()}")
+    for span_record in request_trace.spans:
+        print(f"  {span_record.name:<16} {span_record.duration_ms:6.1f}ms parent={span_record.parent_id}")
+    print(f"Stats: {json.dumps(tracer.get_stats(), indent=2)[:400]}...")
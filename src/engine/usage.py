@@ -0,0 +1,481 @@
+"""
+ROOK Usage Ledger
+
+Only the final completion of a turn used to report tokens. Routing,
+anticipation, importance/valence rating, memory analysis, article analysis,
+verification and every embedding went unaccounted for. The ledger records
+the `usage` block of every OpenAI response made through a metered client:
+
+- metered(OpenAI(...), "active_reader") wraps a client; chat completions
+  (streamed or not) and embeddings report their usage to the ledger
+- Each record is attributed to (request, user, stage). The stage is the
+  innermost usage_stage(), else the current tracing span, else the
+  client's default; the request is the current trace
+- Totals are kept in memory per stage, model, user and recent request, and
+  the deltas are flushed periodically to a JSON-lines file
+- Costs are estimates from a per-model price table (USD per 1M tokens)
+"""
+
+import atexit
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+try:
+    from .tracing import current_span, current_trace
+except ImportError:  # loaded as a top-level module
+    from tracing import current_span, current_trace
+
+
+# USD per 1M tokens: (input, output). Matched by longest model-name prefix,
+# so dated snapshots (gpt-4o-mini-2024-07-18) use their family's price.
+DEFAULT_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-5-mini": (0.25, 2.00),
+    "gpt-5": (1.25, 10.00),
+    "o4-mini": (1.10, 4.40),
+    "o3": (2.00, 8.00),
+    "text-embedding-3-large": (0.13, 0.0),
+    "text-embedding-3-small": (0.02, 0.0),
+}
+
+COUNTERS = ("calls", "prompt_tokens", "completion_tokens", "cached_tokens", "total_tokens", "unmetered_calls")
+
+_stage: contextvars.ContextVar = contextvars.ContextVar("rook_usage_stage", default=None)
+_user: contextvars.ContextVar = contextvars.ContextVar("rook_usage_user", default=None)
+_request: contextvars.ContextVar = contextvars.ContextVar("rook_usage_request", default=None)
+
+
+@contextmanager
+def usage_stage(stage: str):
+    """Attribute calls made inside the block to a pipeline stage"""
+    token = _stage.set(stage)
+    try:
+        yield
+    finally:
+        _stage.reset(token)
+
+
+@contextmanager
+def usage_scope(request_id: Optional[str] = None, user_id: Optional[str] = None):
+    """Attribute calls made inside the block to a request and/or user"""
+    request_token = _request.set(request_id) if request_id else None
+    user_token = _user.set(user_id) if user_id else None
+    try:
+        yield
+    finally:
+        if user_token is not None:
+            _user.reset(user_token)
+        if request_token is not None:
+            _request.reset(request_token)
+
+
+def set_usage_user(user_id: Optional[str]):
+    """Attribute the rest of the current context (e.g. one request handler) to a user"""
+    if user_id:
+        _user.set(user_id)
+
+
+def _empty() -> Dict:
+    return {**{name: 0 for name in COUNTERS}, "cost_usd": 0.0}
+
+
+def _add(totals: Dict, delta: Dict):
+    for name, value in delta.items():
+        totals[name] = totals.get(name, 0) + value
+
+
+class UsageLedger:
+    """
+    In-memory token/cost aggregates with a periodic JSON-lines flush.
+    """
+
+    def __init__(
+        self,
+        flush_path: Optional[str] = None,
+        flush_interval: float = 60.0,
+        prices: Optional[Dict[str, tuple]] = None,
+        max_users: int = 1000,
+        max_requests: int = 500
+    ):
+        """
+        Initialize the ledger.
+
+        Args:
+            flush_path: JSON-lines file the periodic deltas are appended to
+                (None keeps aggregates in memory only)
+            flush_interval: Seconds between flushes
+            prices: Model prefix -> (input, output) USD per 1M tokens
+            max_users: Users tracked individually (least recently active dropped first)
+            max_requests: Recent requests kept for per-request lookups
+        """
+        self.flush_path = flush_path
+        self.flush_interval = flush_interval
+        self.prices = dict(prices or DEFAULT_PRICES)
+        self.max_users = max_users
+        self.max_requests = max_requests
+
+        self._lock = threading.Lock()
+        self._totals = _empty()
+        self._stages: Dict[str, Dict] = {}
+        self._models: Dict[str, Dict] = {}
+        self._users: "OrderedDict[str, Dict]" = OrderedDict()
+        self._requests: "OrderedDict[str, Dict]" = OrderedDict()
+        self._pending: Dict[tuple, Dict] = {}
+        self._started = time.time()
+
+        self.flushes = 0
+        self.flushed_records = 0
+        self.flush_failures = 0
+        self.last_flush: Optional[float] = None
+        self._flusher: Optional[threading.Thread] = None
+
+    def price(self, model: str) -> tuple:
+        """(input, output) USD per 1M tokens for a model, (0, 0) if unknown"""
+        matches = [prefix for prefix in self.prices if (model or "").startswith(prefix)]
+        return self.prices[max(matches, key=len)] if matches else (0.0, 0.0)
+
+    def record(
+        self,
+        model: str,
+        usage: Any,
+        stage: Optional[str] = None,
+        default_stage: str = "unattributed"
+    ) -> Dict:
+        """
+        Record one response's usage.
+
+        Args:
+            model: Model that served the call
+            usage: The response's usage object/dict (None if the provider sent none)
+            stage: Explicit stage (default: usage_stage(), then the current span)
+            default_stage: Stage used when nothing else applies
+
+        Returns:
+            The recorded delta
+        """
+        if stage is None:
+            stage = _stage.get()
+        if stage is None:
+            open_span = current_span()
+            stage = open_span.name if open_span is not None else default_stage
+
+        request_id = _request.get()
+        if request_id is None:
+            trace = current_trace()
+            request_id = trace.trace_id if trace is not None else None
+        user_id = _user.get() or "unattributed"
+
+        delta = {**_empty(), "calls": 1}
+        if usage is None:
+            delta["unmetered_calls"] = 1
+        else:
+            read = usage.get if isinstance(usage, dict) else lambda name: getattr(usage, name, None)
+            prompt_tokens = read("prompt_tokens") or 0
+            completion_tokens = read("completion_tokens") or 0
+            details = read("prompt_tokens_details")
+            if isinstance(details, dict):
+                cached_tokens = details.get("cached_tokens") or 0
+            else:
+                cached_tokens = getattr(details, "cached_tokens", None) or 0
+            input_price, output_price = self.price(model)
+            delta.update(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                cached_tokens=cached_tokens,
+                total_tokens=read("total_tokens") or prompt_tokens + completion_tokens,
+                cost_usd=(prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+            )
+
+        with self._lock:
+            _add(self._totals, delta)
+            _add(self._stages.setdefault(stage, _empty()), delta)
+            _add(self._models.setdefault(model or "unknown", _empty()), delta)
+
+            user = self._users.pop(user_id, None) or _empty()
+            _add(user, delta)
+            self._users[user_id] = user
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+
+            if request_id is not None:
+                request = self._requests.pop(request_id, None) or {"user_id": user_id, "stages": {}, **_empty()}
+                _add(request["stages"].setdefault(stage, _empty()), delta)
+                _add(request, {name: delta[name] for name in (*COUNTERS, "cost_usd")})
+                self._requests[request_id] = request
+                while len(self._requests) > self.max_requests:
+                    self._requests.popitem(last=False)
+
+            _add(self._pending.setdefault((stage, model or "unknown", user_id), _empty()), delta)
+
+        self._ensure_flusher()
+        return delta
+
+    def request_usage(self, request_id: str) -> Optional[Dict]:
+        """Usage of one recent request, broken down by stage"""
+        with self._lock:
+            request = self._requests.get(request_id)
+            return json.loads(json.dumps(request)) if request else None
+
+    def _ensure_flusher(self):
+        if self._flusher is not None or self.flush_interval <= 0:
+            return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="rook-usage-flush", daemon=True)
+                self._flusher.start()
+                atexit.register(self.flush)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Append the deltas recorded since the last flush to the flush file.
+
+        Returns:
+            Number of (stage, model, user) records written
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        flushed_at = time.time()
+        if self.flush_path:
+            lines = [
+                json.dumps({"flushed_at": flushed_at, "stage": stage, "model": model, "user_id": user_id, **delta})
+                for (stage, model, user_id), delta in pending.items()
+            ]
+            try:
+                directory = os.path.dirname(os.path.abspath(self.flush_path))
+                os.makedirs(directory, exist_ok=True)
+                with open(self.flush_path, "a", encoding="utf-8") as handle:
+                    handle.write("\n".join(lines) + "\n")
+            except Exception as e:
+                self.flush_failures += 1
+                print(f"Warning: Could not flush usage ledger to {self.flush_path}: {e}")
+                # Keep the deltas for the next attempt
+                with self._lock:
+                    for key, delta in pending.items():
+                        _add(self._pending.setdefault(key, _empty()), delta)
+                return 0
+
+        self.flushes += 1
+        self.flushed_records += len(pending)
+        self.last_flush = flushed_at
+        return len(pending)
+
+    def get_stats(self, top_users: int = 20, recent_requests: int = 20) -> Dict:
+        """Totals, per-stage/model breakdowns, heaviest users and recent requests"""
+        with self._lock:
+            totals = dict(self._totals)
+            stages = {name: dict(values) for name, values in self._stages.items()}
+            models = {name: dict(values) for name, values in self._models.items()}
+            users = sorted(self._users.items(), key=lambda item: item[1]["total_tokens"], reverse=True)[:top_users]
+            requests = list(self._requests.items())[-recent_requests:]
+            pending = len(self._pending)
+
+        all_tokens = totals["total_tokens"] or 1
+        for values in stages.values():
+            values["share_of_tokens"] = round(values["total_tokens"] / all_tokens, 4)
+
+        return {
+            "since": self._started,
+            "totals": totals,
+            "by_stage": dict(sorted(stages.items(), key=lambda item: item[1]["total_tokens"], reverse=True)),
+            "by_model": models,
+            "top_users": {user_id: dict(values) for user_id, values in users},
+            "recent_requests": {request_id: json.loads(json.dumps(values)) for request_id, values in requests},
+            "flush": {
+                "path": self.flush_path,
+                "interval_s": self.flush_interval,
+                "pending_records": pending,
+                "flushes": self.flushes,
+                "flushed_records": self.flushed_records,
+                "failures": self.flush_failures,
+                "last_flush": self.last_flush
+            }
+        }
+
+
+class _MeteredStream:
+    """Passes a streamed completion through, recording usage once it arrives"""
+
+    def __init__(self, stream, ledger: UsageLedger, model: str, stage: Optional[str], default_stage: str):
+        self._stream = stream
+        self._ledger = ledger
+        self._model = model
+        self._stage = stage
+        self._default_stage = default_stage
+        self._usage = None
+        self._recorded = False
+
+    def __iter__(self):
+        try:
+            for chunk in self._stream:
+                self._model = getattr(chunk, "model", None) or self._model
+                if getattr(chunk, "usage", None):
+                    self._usage = chunk.usage
+                yield chunk
+        finally:
+            self._record()
+
+    def _record(self):
+        if not self._recorded:
+            self._recorded = True
+            self._ledger.record(self._model, self._usage, self._stage, self._default_stage)
+
+    def close(self):
+        try:
+            close = getattr(self._stream, "close", None)
+            if close:
+                close()
+        finally:
+            # Cancelled streams still cost their prompt; record what we saw
+            self._record()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class _MeteredEndpoint:
+    """Wraps a resource with a create() method (chat.completions, embeddings)"""
+
+    def __init__(self, resource, client: "MeteredClient"):
+        self._resource = resource
+        self._client = client
+
+    def create(self, *args, **kwargs):
+        response = self._resource.create(*args, **kwargs)
+        ledger = self._client.ledger or get_usage_ledger()
+        stage = _stage.get()
+        if kwargs.get("stream"):
+            return _MeteredStream(response, ledger, kwargs.get("model"), stage, self._client.default_stage)
+        ledger.record(
+            getattr(response, "model", None) or kwargs.get("model"),
+            getattr(response, "usage", None),
+            stage,
+            self._client.default_stage
+        )
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self._resource, name)
+
+
+class _MeteredChat:
+    def __init__(self, chat, client: "MeteredClient"):
+        self._chat = chat
+        self.completions = _MeteredEndpoint(chat.completions, client)
+
+    def __getattr__(self, name):
+        return getattr(self._chat, name)
+
+
+class MeteredClient:
+    """
+    OpenAI client wrapper that reports every response's usage to the ledger.
+
+    Anything other than chat.completions.create / embeddings.create is
+    passed straight through to the wrapped client.
+    """
+
+    def __init__(self, client, default_stage: str, ledger: Optional[UsageLedger] = None):
+        """
+        Args:
+            client: OpenAI client
+            default_stage: Stage for calls made outside any usage_stage()/span
+            ledger: Ledger to record into (default: the global one)
+        """
+        self._client = client
+        self.default_stage = default_stage
+        self.ledger = ledger
+        self.chat = _MeteredChat(client.chat, self)
+        self.embeddings = _MeteredEndpoint(client.embeddings, self)
+
+    def with_options(self, **options) -> "MeteredClient":
+        """Same as OpenAI.with_options, still metered"""
+        return MeteredClient(self._client.with_options(**options), self.default_stage, self.ledger)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def metered(client, default_stage: str) -> MeteredClient:
+    """Wrap an OpenAI client so its usage lands in the ledger"""
+    if isinstance(client, MeteredClient):
+        return client
+    return MeteredClient(client, default_stage)
+
+
+# Global ledger (USAGE_LEDGER_PATH enables the JSON-lines flush)
+_usage_ledger = None
+
+
+def get_usage_ledger() -> UsageLedger:
+    """Get or create the global usage ledger"""
+    global _usage_ledger
+    if _usage_ledger is None:
+        prices = dict(DEFAULT_PRICES)
+        if os.getenv("USAGE_PRICES"):
+            # e.g. USAGE_PRICES='{"gpt-5-mini": [0.25, 2.0]}'
+            prices.update({model: tuple(price) for model, price in json.loads(os.getenv("USAGE_PRICES")).items()})
+        _usage_ledger = UsageLedger(
+            flush_path=os.getenv("USAGE_LEDGER_PATH") or None,
+            flush_interval=float(os.getenv("USAGE_FLUSH_SECONDS", 60)),
+            prices=prices
+        )
+    return _usage_ledger
+
+
+def reset_usage_ledger():
+    """Reset the global ledger (for testing)"""
+    global _usage_ledger
+    _usage_ledger = None
+
+
+if __name__ == "__main__":
+    import tempfile
+    from types import SimpleNamespace
+
+    class _FakeResource:
+        def create(self, model, **params):
+            if "input" in params:
+                return SimpleNamespace(model=model, usage=SimpleNamespace(prompt_tokens=12, total_tokens=12))
+            usage = SimpleNamespace(prompt_tokens=900, completion_tokens=150, total_tokens=1050,
+                                    prompt_tokens_details=SimpleNamespace(cached_tokens=768))
+            if params.get("stream"):
+                return iter([SimpleNamespace(model=model, usage=None), SimpleNamespace(model=model, usage=usage)])
+            return SimpleNamespace(model=model, usage=usage)
+
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=_FakeResource()), embeddings=_FakeResource())
+    path = os.path.join(tempfile.mkdtemp(), "usage.jsonl")
+    ledger = UsageLedger(flush_path=path, flush_interval=0)
+    client = MeteredClient(fake, "demo", ledger)
+
+    with usage_scope(request_id="req-1", user_id="newsroom"):
+        client.embeddings.create(model="text-embedding-3-large", input="Wirecard")
+        with usage_stage("routing"):
+            client.chat.completions.create(model="gpt-4o-mini", messages=[])
+        for _ in client.chat.completions.create(model="gpt-5-mini", messages=[], stream=True):
+            pass
+    with usage_stage("consolidation"):
+        client.chat.completions.create(model="gpt-5-mini", messages=[])
+
+    stats = ledger.get_stats()
+    print(f"Totals: {stats['totals']}")
+    for stage, values in stats["by_stage"].items():
+        print(f"  {stage:<14} {values['total_tokens']:>6} tokens  ${values['cost_usd']:.5f}  ({values['share_of_tokens']:.0%})")
+    print(f"Request: {ledger.request_usage('req-1')}")
+    print(f"Flushed {ledger.flush()} records to {path}")
@@ -0,0 +1,417 @@
+"""
+ROOK Worker State
+
+Lets rook_engine run under several uvicorn workers (or replicas) without
+users seeing different conversations or readings depending on which process
+answers:
+
+- Shared state (recent readings, ...) lives in a common backend: SQL when a
+  database URL is configured, an in-process stand-in otherwise. Values
+  several workers add to are merged with update_shared(), which is atomic
+  in the backend, so concurrent writers don't drop each other's changes.
+- Each worker keeps local caches and drops entries when another worker
+  publishes an invalidation message (e.g. "session <id> changed").
+- Sticky routing hints (worker id, session affinity key) are exposed so a
+  proxy can keep a session on one worker and skip most reloads.
+"""
+
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def affinity_key(session_id: str) -> str:
+    """Stable short key a proxy can hash on to pin a session to one worker"""
+    return hashlib.sha256(session_id.encode()).hexdigest()[:12]
+
+
+class LocalStateBackend:
+    """
+    In-process stand-in for the shared backend (single worker / development).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[str, Any] = {}
+        self._events: List[Tuple[int, str, str, str]] = []
+        self._next_id = 1
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            return self._values.get(key)
+
+    def set(self, key: str, value: Any, origin: str):
+        with self._lock:
+            self._values[key] = value
+
+    def update(self, key: str, fn: Callable[[Optional[Any]], Any], origin: str) -> Any:
+        with self._lock:
+            value = self._values[key] = fn(self._values.get(key))
+            return value
+
+    def publish(self, channel: str, key: str, origin: str):
+        with self._lock:
+            self._events.append((self._next_id, channel, key, origin))
+            self._next_id += 1
+            del self._events[:-1000]
+
+    def poll(self, after_id: int) -> List[Tuple[int, str, str, str]]:
+        with self._lock:
+            return [event for event in self._events if event[0] > after_id]
+
+    def latest_event_id(self) -> int:
+        with self._lock:
+            return self._next_id - 1
+
+
+class SQLStateBackend:
+    """
+    Shared state and invalidation log in a SQL database (Postgres on Render).
+
+    Invalidations are rows in an append-only events table that every worker
+    polls, which works on any SQLAlchemy database without LISTEN/NOTIFY.
+    Event ids come from a counter row bumped in the publishing transaction,
+    whose lock is held until commit, so ids become visible in order and a
+    poll for id > last_id can't skip one that commits late (as an
+    autoincrement id can on Postgres). update() serializes read-modify-write
+    merges of a value on a per-key counter row the same way.
+    """
+
+    def __init__(self, database_url: str, event_retention_seconds: float = 600):
+        """
+        Initialize the SQL backend and create its tables if needed.
+
+        Args:
+            database_url: SQLAlchemy database URL
+            event_retention_seconds: How long invalidation events are kept
+        """
+        from sqlalchemy import (
+            create_engine, MetaData, Table, Column, Integer, String, Text, Float
+        )
+        from sqlalchemy.exc import IntegrityError
+
+        # Render/Heroku style URLs use the postgres:// scheme SQLAlchemy dropped
+        if database_url.startswith("postgres://"):
+            database_url = database_url.replace("postgres://", "postgresql://", 1)
+
+        self.engine = create_engine(database_url, pool_pre_ping=True)
+        self.event_retention_seconds = event_retention_seconds
+        self._publishes = 0
+
+        metadata = MetaData()
+        self.values = Table(
+            "rook_shared_state",
+            metadata,
+            Column("key", String(255), primary_key=True),
+            Column("value", Text, nullable=False),
+            Column("updated_at", Float, nullable=False),
+            Column("updated_by", String(255))
+        )
+        self.events = Table(
+            "rook_state_events",
+            metadata,
+            Column("id", Integer, primary_key=True, autoincrement=False),
+            Column("channel", String(64), nullable=False),
+            Column("key", String(255), nullable=False),
+            Column("origin", String(255), nullable=False),
+            Column("created_at", Float, nullable=False, index=True)
+        )
+        self.counters = Table(
+            "rook_state_counters",
+            metadata,
+            Column("name", String(64), primary_key=True),
+            Column("value", Integer, nullable=False)
+        )
+        metadata.create_all(self.engine)
+
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(self.counters.insert().values(name="events", value=0))
+        except IntegrityError:
+            pass  # Row already exists
+
+    def get(self, key: str) -> Optional[Any]:
+        from sqlalchemy import select
+
+        with self.engine.connect() as conn:
+            row = conn.execute(select(self.values.c.value).where(self.values.c.key == key)).first()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Any, origin: str):
+        with self.engine.begin() as conn:
+            self._write(conn, key, value, origin)
+
+    def update(self, key: str, fn: Callable[[Optional[Any]], Any], origin: str) -> Any:
+        from sqlalchemy import select, update
+        from sqlalchemy.exc import IntegrityError
+
+        counters = self.counters
+        name = f"shared:{key}"[:64]  # Truncation only makes long keys share a lock
+        with self.engine.begin() as conn:
+            # Locks the key's counter row until commit, so concurrent merges run one at a time
+            bump = update(counters).where(counters.c.name == name).values(value=counters.c.value + 1)
+            if not conn.execute(bump).rowcount:
+                try:
+                    with conn.begin_nested():
+                        conn.execute(counters.insert().values(name=name, value=1))
+                except IntegrityError:
+                    conn.execute(bump)  # Another worker created it first - wait for its merge
+            row = conn.execute(select(self.values.c.value).where(self.values.c.key == key)).first()
+            value = fn(json.loads(row[0]) if row else None)
+            self._write(conn, key, value, origin)
+        return value
+
+    def _write(self, conn, key: str, value: Any, origin: str):
+        from sqlalchemy import update
+        from sqlalchemy.exc import IntegrityError
+
+        row = {"value": json.dumps(value, default=str), "updated_at": time.time(), "updated_by": origin}
+        result = conn.execute(update(self.values).where(self.values.c.key == key).values(**row))
+        if result.rowcount:
+            return
+        try:
+            with conn.begin_nested():
+                conn.execute(self.values.insert().values(key=key, **row))
+        except IntegrityError:
+            # Another worker inserted it first - last write wins
+            conn.execute(update(self.values).where(self.values.c.key == key).values(**row))
+
+    def publish(self, channel: str, key: str, origin: str):
+        from sqlalchemy import delete, select, update
+
+        counters = self.counters
+        now = time.time()
+        with self.engine.begin() as conn:
+            # Locks the counter row until commit, so ids commit in order
+            conn.execute(update(counters).where(counters.c.name == "events").values(value=counters.c.value + 1))
+            event_id = conn.execute(select(counters.c.value).where(counters.c.name == "events")).scalar()
+            conn.execute(self.events.insert().values(
+                id=event_id, channel=channel, key=key, origin=origin, created_at=now
+            ))
+            self._publishes += 1
+            if self._publishes % 100 == 0:
+                conn.execute(delete(self.events).where(
+                    self.events.c.created_at < now - self.event_retention_seconds
+                ))
+
+    def poll(self, after_id: int) -> List[Tuple[int, str, str, str]]:
+        from sqlalchemy import select
+
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(self.events.c.id, self.events.c.channel, self.events.c.key, self.events.c.origin)
+                .where(self.events.c.id > after_id)
+                .order_by(self.events.c.id)
+                .limit(1000)
+            ).fetchall()
+        return [tuple(row) for row in rows]
+
+    def latest_event_id(self) -> int:
+        from sqlalchemy import select
+
+        counters = self.counters
+        with self.engine.connect() as conn:
+            return conn.execute(select(counters.c.value).where(counters.c.name == "events")).scalar() or 0
+
+
+class WorkerState:
+    """
+    Worker-aware state layer: shared values, local caches, invalidations.
+    """
+
+    def __init__(self, backend=None, poll_interval: float = 1.0, worker_id: str = WORKER_ID):
+        """
+        Initialize the worker state layer.
+
+        Args:
+            backend: Shared backend (default: in-process stand-in)
+            poll_interval: Seconds between invalidation polls
+            worker_id: Identifier of this worker process
+        """
+        self.backend = backend or LocalStateBackend()
+        self.poll_interval = poll_interval
+        self.worker_id = worker_id
+
+        self._lock = threading.Lock()
+        self._cache: Dict[str, Any] = {}
+        self._subscribers: Dict[str, List[Callable[[str], None]]] = {}
+        self._last_event_id = self.backend.latest_event_id()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.invalidations_sent = 0
+        self.invalidations_received = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.poll_errors = 0
+
+    @property
+    def shared(self) -> bool:
+        """True if state is actually shared between processes"""
+        return not isinstance(self.backend, LocalStateBackend)
+
+    def subscribe(self, channel: str, callback: Callable[[str], None]):
+        """
+        Run callback(key) when another worker invalidates a key on a channel.
+
+        Args:
+            channel: Channel name (e.g. "session", "shared")
+            callback: Called from the polling thread with the invalidated key
+        """
+        self._subscribers.setdefault(channel, []).append(callback)
+
+    def invalidate(self, channel: str, key: str):
+        """Tell the other workers that a key on a channel changed"""
+        try:
+            self.backend.publish(channel, key, self.worker_id)
+            self.invalidations_sent += 1
+        except Exception as e:
+            print(f"Warning: Could not publish invalidation {channel}:{key}: {e}")
+
+    def get_shared(self, key: str, default: Any = None) -> Any:
+        """
+        Read a shared value (served from the local cache until invalidated).
+        """
+        with self._lock:
+            if key in self._cache:
+                self.cache_hits += 1
+                value = self._cache[key]
+                return default if value is None else value
+            self.cache_misses += 1
+
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            print(f"Warning: Could not read shared state {key}: {e}")
+            return default
+
+        with self._lock:
+            self._cache[key] = value
+        return default if value is None else value
+
+    def set_shared(self, key: str, value: Any):
+        """Write a shared value and invalidate it on every other worker"""
+        self.backend.set(key, value, self.worker_id)
+        with self._lock:
+            self._cache[key] = value
+        self.invalidate("shared", key)
+
+    def update_shared(self, key: str, fn: Callable[[Optional[Any]], Any]) -> Any:
+        """
+        Atomically replace a shared value with fn(current value) and invalidate it.
+
+        Args:
+            key: Shared key
+            fn: Called with the current value (None if unset) while the key is locked
+
+        Returns:
+            The new value
+        """
+        value = self.backend.update(key, fn, self.worker_id)
+        with self._lock:
+            self._cache[key] = value
+        self.invalidate("shared", key)
+        return value
+
+    def poll_once(self) -> int:
+        """
+        Apply invalidations published by other workers since the last poll.
+
+        Returns:
+            Number of events applied
+        """
+        events = self.backend.poll(self._last_event_id)
+        applied = 0
+        for event_id, channel, key, origin in events:
+            self._last_event_id = max(self._last_event_id, event_id)
+            if origin == self.worker_id:
+                continue
+
+            if channel == "shared":
+                with self._lock:
+                    self._cache.pop(key, None)
+            for callback in self._subscribers.get(channel, []):
+                try:
+                    callback(key)
+                except Exception as e:
+                    print(f"Warning: Invalidation handler for {channel}:{key} failed: {e}")
+            self.invalidations_received += 1
+            applied += 1
+        return applied
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.poll_once()
+            except Exception as e:
+                self.poll_errors += 1
+                print(f"Warning: Could not poll worker state: {e}")
+
+    def start(self):
+        """Start the background invalidation poller"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="rook-worker-state", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background invalidation poller"""
+        self._stop.set()
+
+    def get_stats(self) -> Dict:
+        """Get worker state statistics"""
+        return {
+            "worker_id": self.worker_id,
+            "backend": type(self.backend).__name__,
+            "shared": self.shared,
+            "poll_interval": self.poll_interval,
+            "last_event_id": self._last_event_id,
+            "invalidations_sent": self.invalidations_sent,
+            "invalidations_received": self.invalidations_received,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "poll_errors": self.poll_errors
+        }
+
+
+def create_worker_state(database_url: Optional[str] = None, **kwargs) -> WorkerState:
+    """
+    Create the worker state layer, backed by SQL when a URL is configured.
+
+    Falls back to the in-process stand-in if the database is unreachable.
+    """
+    backend = None
+    if database_url:
+        try:
+            backend = SQLStateBackend(database_url)
+            print("✅ Worker state backed by SQL")
+        except Exception as e:
+            print(f"⚠️  Worker state backend unavailable, state is per-worker: {e}")
+    return WorkerState(backend=backend, **kwargs)
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    db_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'state.db')}"
+    worker_a = WorkerState(SQLStateBackend(db_url), worker_id="worker-a")
+    worker_b = WorkerState(SQLStateBackend(db_url), worker_id="worker-b")
+
+    worker_b.subscribe("session", lambda key: print(f"worker-b: session {key} changed, dropping local copy"))
+
+    worker_a.set_shared("readings", [{"title": "Wirecard auditors"}])
+    print(f"worker-b reads: {worker_b.get_shared('readings')}")
+
+    worker_a.set_shared("readings", [{"title": "Wirecard auditors"}, {"title": "FTX balance sheet"}])
+    worker_a.invalidate("session", "abc123")
+    print(f"worker-b applied {worker_b.poll_once()} invalidations")
+    print(f"worker-b reads: {worker_b.get_shared('readings')}")
+    print(f"Affinity key for abc123: {affinity_key('abc123')}")
+    print(f"Stats: {worker_b.get_stats()}")
@@ -10,9 +10,17 @@ Provides access to ROOK's various Pinecone indexes:
 - Memory: Long-term conversation memory
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
-from pinecone import Pinecone
-from openai import OpenAI
+
+try:
+    from ..engine.resilience import get_upstream, sdk_timeout
+    from ..engine.tracing import span
+    from ..engine.usage import metered
+except ImportError:  # src/ itself is on sys.path (e.g. rook_enhanced)
+    from engine.resilience import get_upstream, sdk_timeout
+    from engine.tracing import span
+    from engine.usage import metered
 
 class KnowledgeBase:
     """
@@ -35,24 +43,30 @@ class KnowledgeBase:
             pinecone_api_key: Pinecone API key
             openai_api_key: OpenAI API key (for embeddings)
         """
+        from pinecone import Pinecone
         self.pinecone_client = Pinecone(api_key=pinecone_api_key)
-        self.openai_client = OpenAI(
+        from openai import OpenAI
+        self.openai_client = metered(OpenAI(
             api_key=openai_api_key,
             base_url='https://api.openai.com/v1'
-        )
+        ), "knowledge_base")
         
-        # Connect to all indexes
-        self.indexes = {}
-        for index_name in [
+        # Connect to all indexes concurrently (each connection resolves the
+        # index host over the network, so serially they add up on cold start)
+        index_names = [
             self.INDEX_RESEARCH,
             self.INDEX_PEOPLE,
             self.INDEX_TOOLS,
             self.INDEX_INTERVIEWS,
             self.INDEX_PERSONALITY,
             self.INDEX_MEMORY
-        ]:
+        ]
+        self.indexes = {}
+        with ThreadPoolExecutor(max_workers=len(index_names)) as pool:
+            futures = {name: pool.submit(self.pinecone_client.Index, name) for name in index_names}
+        for index_name, future in futures.items():
             try:
-                self.indexes[index_name] = self.pinecone_client.Index(index_name)
+                self.indexes[index_name] = future.result()
             except Exception as e:
                 print(f"⚠️  Warning: Could not connect to index {index_name}: {e}")
     
@@ -78,21 +92,34 @@ class KnowledgeBase:
         if index_name not in self.indexes:
             return []
         
-        # Generate embedding for query
-        embedding_response = self.openai_client.embeddings.create(
-            model="text-embedding-3-large",
-            input=query,
-            dimensions=3072
-        )
+        # Generate embedding for query (hedged read with an adaptive deadline)
+        with span("embedding", inputs=1):
+            embedding_response = get_upstream("openai").call(
+                "embeddings",
+                lambda timeout: sdk_timeout(self.openai_client, timeout).embeddings.create(
+                    model="text-embedding-3-large",
+                    input=query,
+                    dimensions=3072
+                ),
+                idempotent=True,
+                default_deadline=10
+            )
         query_embedding = embedding_response.data[0].embedding
         
         # Search Pinecone
-        results = self.indexes[index_name].query(
-            vector=query_embedding,
-            top_k=top_k,
-            include_metadata=True,
-            filter=filter_dict
-        )
+        with span("pinecone.query", index=index_name, top_k=top_k):
+            results = get_upstream("pinecone").call(
+                "query",
+                lambda timeout: self.indexes[index_name].query(
+                    vector=query_embedding,
+                    top_k=top_k,
+                    include_metadata=True,
+                    filter=filter_dict,
+                    _request_timeout=timeout
+                ),
+                idempotent=True,
+                default_deadline=10
+            )
         
         # Format results
         formatted_results = []
@@ -0,0 +1,147 @@
+"""
+ROOK Association Index
+
+Experience.connections holds the Hebbian links consolidation builds up.
+The association index packs them into CSR arrays so retrieval can follow
+them cheaply:
+
+- indptr / indices / weights over interned memory ids, each row sorted by
+  weight (strongest first) so "the top-b neighbours" is a slice
+- spread() runs bounded spreading activation from seed memories: each hop
+  follows at most `breadth` links per active node, activation is scaled by
+  link weight and a per-hop decay, and a node keeps its strongest incoming
+  activation. Every hop is a handful of numpy operations over the frontier.
+
+Built once from the loaded memories and reused until connections change
+(i.e. until the next consolidation).
+"""
+
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from .experience import Experience
+
+
+class AssociationIndex:
+    """
+    Compact adjacency (CSR) of Hebbian connections between memories.
+    """
+
+    def __init__(self, ids: List[str], indptr: np.ndarray, indices: np.ndarray, weights: np.ndarray):
+        self.ids = ids
+        self.positions = {memory_id: position for position, memory_id in enumerate(ids)}
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.built_at = time.time()
+
+    @classmethod
+    def from_experiences(cls, experiences: List[Experience]) -> "AssociationIndex":
+        """Build the index from memories' connections (links to unknown memories are dropped)"""
+        ids = [experience.id for experience in experiences]
+        positions = {memory_id: position for position, memory_id in enumerate(ids)}
+
+        indptr = np.zeros(len(ids) + 1, dtype=np.int64)
+        indices: List[int] = []
+        weights: List[float] = []
+        for position, experience in enumerate(experiences):
+            row = sorted(
+                ((weight, positions[target]) for target, weight in experience.connections.items()
+                 if weight > 0 and target in positions),
+                reverse=True
+            )
+            weights.extend(weight for weight, _ in row)
+            indices.extend(target for _, target in row)
+            indptr[position + 1] = len(indices)
+
+        return cls(ids, indptr, np.array(indices, dtype=np.int64), np.array(weights, dtype=np.float64))
+
+    @property
+    def edges(self) -> int:
+        return len(self.indices)
+
+    def spread(
+        self,
+        seeds: Dict[str, float],
+        depth: int = 2,
+        breadth: int = 5,
+        decay: float = 0.5,
+        threshold: float = 0.01
+    ) -> Dict[str, float]:
+        """
+        Spread activation outward from seed memories.
+
+        Args:
+            seeds: Memory id -> initial activation (e.g. normalized relevance)
+            depth: Maximum hops from a seed
+            breadth: Strongest links followed per active node and hop
+            decay: Activation multiplier per hop
+            threshold: Activation below this stops spreading
+
+        Returns:
+            Memory id -> activation received through links (seeds only appear
+            if another active memory links to them)
+        """
+        known = [(self.positions[memory_id], value) for memory_id, value in seeds.items() if memory_id in self.positions]
+        if not known or self.edges == 0:
+            return {}
+
+        activation = np.zeros(len(self.ids))
+        received = np.zeros(len(self.ids))
+        frontier = np.array([position for position, _ in known], dtype=np.int64)
+        activation[frontier] = [value for _, value in known]
+
+        for _ in range(depth):
+            starts = self.indptr[frontier]
+            lengths = np.minimum(self.indptr[frontier + 1] - starts, breadth)
+            total = int(lengths.sum())
+            if total == 0:
+                break
+
+            # Flat offsets of every followed link: starts[k] .. starts[k] + lengths[k]
+            row_starts = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+            offsets = row_starts + np.arange(total)
+            targets = self.indices[offsets]
+            incoming = np.repeat(activation[frontier], lengths) * self.weights[offsets] * decay
+
+            hop = np.zeros(len(self.ids))
+            np.maximum.at(hop, targets, incoming)
+            received = np.maximum(received, hop)
+
+            improved = (hop > activation) & (hop >= threshold)
+            activation = np.where(improved, hop, activation)
+            frontier = np.flatnonzero(improved)
+            if len(frontier) == 0:
+                break
+
+        reached = np.flatnonzero(received)
+        return {self.ids[position]: float(received[position]) for position in reached}
+
+
+if __name__ == "__main__":
+    from datetime import datetime
+
+    rng = np.random.default_rng(0)
+    memories = []
+    for i in range(10000):
+        memories.append(Experience(
+            id=f"mem-{i}", type="observation", description=f"Observation {i}",
+            timestamp=datetime.now(), last_accessed_at=datetime.now(),
+            importance=6, emotional_valence=0.0,
+            connections={f"mem-{j}": float(rng.uniform(0.1, 1.0)) for j in rng.choice(10000, size=8, replace=False)}
+        ))
+
+    started = time.perf_counter()
+    index = AssociationIndex.from_experiences(memories)
+    print(f"Built CSR over {len(index.ids)} memories / {index.edges} links in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    seeds = {f"mem-{i}": 1.0 - i / 20 for i in range(10)}
+    started = time.perf_counter()
+    runs = 1000
+    for _ in range(runs):
+        activated = index.spread(seeds, depth=2, breadth=5)
+    print(f"Spread from {len(seeds)} seeds: {len(activated)} memories activated, "
+          f"{(time.perf_counter() - started) / runs * 1e6:.0f}µs per query")
+    print(f"Strongest associations: {sorted(activated.items(), key=lambda item: -item[1])[:3]}")
@@ -0,0 +1,466 @@
+"""
+ROOK Co-Retrieval Matrix
+
+Hebbian strengthening needs to know which memories were retrieved together.
+Keeping that as a "co_retrieved_with" list in every memory's metadata was
+O(k²) list scans per query, grew without bound and was shipped to the
+vector index on every upsert. The matrix keeps it out of the memories:
+
+- A sparse symmetric count matrix (dict of keys over interned ids; each
+  unordered pair is stored once) of long-term co-retrieval counts, decayed
+  once per consolidation cycle
+- A separate delta matrix of co-retrievals since the last consolidation,
+  drained by phase 4
+- Persistence to one compressed .npz file (id table + pair/count arrays),
+  for a single process
+- With several replicas, deltas are published to a shared SQL table every
+  publish_interval seconds, and the consolidating replica drains everyone's;
+  long-term counts are decayed locally on a timer, so replicas that never
+  consolidate stay bounded too
+- hebbian_update(): strengthens and weakens Experience.connections from
+  the drained deltas in one vectorized pass over existing edges + deltas
+"""
+
+import atexit
+import os
+import threading
+import time
+from itertools import combinations
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .experience import Experience
+
+
+class CoRetrievalMatrix:
+    """
+    Sparse co-retrieval counts between memories.
+
+    Usage:
+        matrix = CoRetrievalMatrix("co_retrieval.npz")
+        matrix.record([m.id for m in retrieved])     # per query
+        deltas = matrix.drain()                      # per consolidation cycle
+        matrix.restore(*deltas)                      # if the cycle didn't commit
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        decay: float = 0.9,
+        prune_below: float = 0.05,
+        shared=None,
+        publish_interval: float = 30.0,
+        decay_interval: float = 6 * 3600,
+        max_pending_pairs: int = 200000
+    ):
+        """
+        Initialize the matrix, loading it from path if the file exists.
+
+        Args:
+            path: .npz file to persist to (None: in-memory only). One process per file.
+            decay: Factor applied to long-term counts each consolidation cycle
+            prune_below: Long-term counts below this are dropped after decay
+            shared: SQLCoRetrievalStore the deltas are published to and drained from
+                (None: deltas stay in this process)
+            publish_interval: Seconds between publishing deltas to the shared store
+            decay_interval: Long-term counts are decayed at least this often, even on
+                replicas that never consolidate
+            max_pending_pairs: Undrained delta pairs kept locally; beyond this the
+                oldest are dropped
+        """
+        self.path = path
+        self.decay_factor = decay
+        self.prune_below = prune_below
+        self.shared = shared
+        self.publish_interval = publish_interval
+        self.decay_interval = decay_interval
+        self.max_pending_pairs = max_pending_pairs
+        self._last_publish = time.time()
+        self._last_decay = time.time()
+        self.publish_errors = 0
+
+        self._lock = threading.Lock()
+        self._ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._counts: Dict[Tuple[int, int], float] = {}
+        self._pending: Dict[Tuple[int, int], float] = {}
+        self._dirty = False
+        self.queries_recorded = 0
+
+        if path:
+            if os.path.exists(path):
+                try:
+                    self.load()
+                except Exception as e:
+                    print(f"⚠️  Could not load co-retrieval matrix from {path}: {e}")
+            atexit.register(self.save)
+
+    def _intern(self, memory_id: str) -> int:
+        position = self._positions.get(memory_id)
+        if position is None:
+            position = len(self._ids)
+            self._positions[memory_id] = position
+            self._ids.append(memory_id)
+        return position
+
+    def record(self, memory_ids: List[str]):
+        """Count every pair of memories retrieved together by one query"""
+        with self._lock:
+            positions = sorted({self._intern(memory_id) for memory_id in memory_ids})
+            for pair in combinations(positions, 2):
+                self._counts[pair] = self._counts.get(pair, 0.0) + 1.0
+                self._pending[pair] = self._pending.get(pair, 0.0) + 1.0
+            self.queries_recorded += 1
+            self._dirty = True
+            self._trim_pending()
+        self._maintain()
+
+    def _trim_pending(self):
+        # Only reached when nothing drains this replica's deltas
+        overflow = len(self._pending) - self.max_pending_pairs
+        if overflow > 0:
+            for pair in list(self._pending)[:overflow]:
+                del self._pending[pair]
+
+    def _maintain(self):
+        """Publish deltas and decay counts when their intervals have passed"""
+        now = time.time()
+        if self.shared is not None and now - self._last_publish >= self.publish_interval:
+            self.publish()
+        if now - self._last_decay >= self.decay_interval:
+            self.decay()
+
+    def publish(self) -> int:
+        """
+        Move this replica's undrained deltas to the shared store.
+
+        Returns:
+            Pairs published (0 without a shared store)
+        """
+        if self.shared is None:
+            return 0
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            rows = [(self._ids[i], self._ids[j], count) for (i, j), count in pending.items()]
+            self._last_publish = time.time()
+        if not rows:
+            return 0
+        try:
+            self.shared.push(rows)
+            return len(rows)
+        except Exception as e:
+            self.publish_errors += 1
+            print(f"⚠️  Could not publish co-retrievals: {e}")
+            with self._lock:
+                for a, b, count in rows:
+                    pair = tuple(sorted((self._intern(a), self._intern(b))))
+                    self._pending[pair] = self._pending.get(pair, 0.0) + count
+            return 0
+
+    def record_neighbors(self, memory_id: str, other_ids: List[str]):
+        """Count one co-retrieval of a memory with each of other_ids (e.g. migrated lists)"""
+        with self._lock:
+            position = self._intern(memory_id)
+            for other_id in other_ids:
+                other = self._intern(other_id)
+                if other == position:
+                    continue
+                pair = (min(position, other), max(position, other))
+                self._counts[pair] = self._counts.get(pair, 0.0) + 1.0
+                self._pending[pair] = self._pending.get(pair, 0.0) + 1.0
+            self._dirty = True
+
+    def count(self, a: str, b: str) -> float:
+        """Long-term (decayed) co-retrieval count of two memories"""
+        with self._lock:
+            i, j = self._positions.get(a), self._positions.get(b)
+            if i is None or j is None:
+                return 0.0
+            return self._counts.get((min(i, j), max(i, j)), 0.0)
+
+    def drain(self) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """
+        Take the co-retrievals recorded since the last drain (by every replica,
+        with a shared store).
+
+        Returns:
+            (id table, pairs as an (m, 2) int array of positions with i < j,
+            counts as an (m,) float array)
+        """
+        if self.shared is not None:
+            self.publish()
+            try:
+                rows = self.shared.take()
+            except Exception as e:
+                # The rows stay in the store for the next cycle
+                print(f"⚠️  Could not drain shared co-retrievals: {e}")
+                rows = []
+            with self._lock:
+                for a, b, count in rows:
+                    i, j = self._intern(a), self._intern(b)
+                    if i != j:
+                        pair = (min(i, j), max(i, j))
+                        self._pending[pair] = self._pending.get(pair, 0.0) + count
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            ids = list(self._ids)
+            self._dirty = self._dirty or bool(pending)
+        if not pending:
+            return ids, np.zeros((0, 2), dtype=np.int64), np.zeros(0)
+        pairs = np.fromiter((p for pair in pending for p in pair), dtype=np.int64, count=2 * len(pending))
+        return ids, pairs.reshape(-1, 2), np.fromiter(pending.values(), dtype=float, count=len(pending))
+
+    def restore(self, ids: List[str], pairs: np.ndarray, counts: np.ndarray):
+        """
+        Put deltas returned by drain() back, for a cycle that didn't commit
+        them (republished right away with a shared store, so whichever
+        replica consolidates next gets them).
+        """
+        with self._lock:
+            for (i, j), count in zip(pairs.tolist(), counts.tolist()):
+                a, b = self._intern(ids[i]), self._intern(ids[j])
+                pair = (min(a, b), max(a, b))
+                self._pending[pair] = self._pending.get(pair, 0.0) + count
+            self._dirty = True
+        if self.shared is not None:
+            self.publish()
+
+    def decay(self):
+        """Decay long-term counts, prune weak pairs and compact the id table"""
+        with self._lock:
+            counts = {
+                pair: count * self.decay_factor
+                for pair, count in self._counts.items()
+                if count * self.decay_factor >= self.prune_below
+            }
+            used = sorted({p for pair in list(counts) + list(self._pending) for p in pair})
+            remap = {old: new for new, old in enumerate(used)}
+            self._ids = [self._ids[old] for old in used]
+            self._positions = {memory_id: position for position, memory_id in enumerate(self._ids)}
+            self._counts = {(remap[i], remap[j]): count for (i, j), count in counts.items()}
+            self._pending = {(remap[i], remap[j]): count for (i, j), count in self._pending.items()}
+            self._dirty = True
+            self._last_decay = time.time()
+
+    @staticmethod
+    def _to_arrays(entries: Dict[Tuple[int, int], float]) -> Tuple[np.ndarray, np.ndarray]:
+        pairs = np.array(list(entries.keys()), dtype=np.int32).reshape(-1, 2)
+        return pairs, np.array(list(entries.values()), dtype=np.float32)
+
+    def save(self):
+        """Write the matrix to its file (atomically) if it changed"""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            ids = np.array(self._ids, dtype=str)
+            pairs, counts = self._to_arrays(self._counts)
+            pending_pairs, pending_counts = self._to_arrays(self._pending)
+            self._dirty = False
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                np.savez_compressed(
+                    f, ids=ids, pairs=pairs, counts=counts,
+                    pending_pairs=pending_pairs, pending_counts=pending_counts
+                )
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            self._dirty = True
+            print(f"⚠️  Could not save co-retrieval matrix to {self.path}: {e}")
+
+    def load(self):
+        """Replace the in-memory matrix with the file's contents"""
+        with np.load(self.path) as data:
+            ids = [str(memory_id) for memory_id in data["ids"]]
+            counts = {(int(i), int(j)): float(c) for (i, j), c in zip(data["pairs"], data["counts"])}
+            pending = {(int(i), int(j)): float(c) for (i, j), c in zip(data["pending_pairs"], data["pending_counts"])}
+        with self._lock:
+            self._ids = ids
+            self._positions = {memory_id: position for position, memory_id in enumerate(ids)}
+            self._counts = counts
+            self._pending = pending
+            self._dirty = False
+
+    def get_stats(self) -> Dict:
+        """Size of the matrix and of the undrained deltas"""
+        with self._lock:
+            return {
+                "memories": len(self._ids),
+                "pairs": len(self._counts),
+                "pending_pairs": len(self._pending),
+                "queries_recorded": self.queries_recorded,
+                "path": self.path,
+                "shared": self.shared is not None,
+                "publish_errors": self.publish_errors
+            }
+
+
+class SQLCoRetrievalStore:
+    """
+    Co-retrieval deltas from every replica, in one SQL table, until the
+    consolidating replica takes them.
+    """
+
+    def __init__(self, database_url: str, name: str = "rook"):
+        """
+        Args:
+            database_url: SQLAlchemy database URL
+            name: Memory store name (several can share the table)
+        """
+        from sqlalchemy import create_engine, MetaData, Table, Column, Integer, String, Float
+
+        if database_url.startswith("postgres://"):
+            database_url = database_url.replace("postgres://", "postgresql://", 1)
+
+        self.engine = create_engine(database_url, pool_pre_ping=True)
+        self.name = name
+        metadata = MetaData()
+        self.deltas = Table(
+            "rook_co_retrieval_deltas",
+            metadata,
+            Column("id", Integer, primary_key=True, autoincrement=True),
+            Column("name", String(128), nullable=False, index=True),
+            Column("memory_a", String(128), nullable=False),
+            Column("memory_b", String(128), nullable=False),
+            Column("count", Float, nullable=False)
+        )
+        metadata.create_all(self.engine)
+
+    def push(self, rows: List[Tuple[str, str, float]]):
+        """Append (memory id, memory id, count) deltas"""
+        with self.engine.begin() as conn:
+            conn.execute(
+                self.deltas.insert(),
+                [{"name": self.name, "memory_a": a, "memory_b": b, "count": count} for a, b, count in rows]
+            )
+
+    def take(self) -> List[Tuple[str, str, float]]:
+        """Remove and return every delta published so far"""
+        from sqlalchemy import select, delete, func
+
+        deltas = self.deltas
+        with self.engine.begin() as conn:
+            upto = conn.execute(select(func.max(deltas.c.id)).where(deltas.c.name == self.name)).scalar()
+            if upto is None:
+                return []
+            rows = conn.execute(
+                select(deltas.c.memory_a, deltas.c.memory_b, deltas.c.count)
+                .where(deltas.c.name == self.name)
+                .where(deltas.c.id <= upto)
+            ).fetchall()
+            conn.execute(delete(deltas).where(deltas.c.name == self.name).where(deltas.c.id <= upto))
+        return [(row[0], row[1], float(row[2])) for row in rows]
+
+
+def create_co_retrieval_store(database_url: Optional[str] = None, name: str = "rook") -> Optional[SQLCoRetrievalStore]:
+    """Shared co-retrieval store if a database is configured and reachable, else None"""
+    if not database_url:
+        return None
+    try:
+        return SQLCoRetrievalStore(database_url, name)
+    except Exception as e:
+        print(f"⚠️  Shared co-retrieval store unavailable, deltas stay per process: {e}")
+        return None
+
+
+def hebbian_update(
+    memories: List[Experience],
+    ids: List[str],
+    pairs: np.ndarray,
+    strengthen: float = 0.1,
+    weaken: float = 0.05
+) -> Tuple[List[Experience], int]:
+    """
+    Apply one cycle of Hebbian plasticity to Experience.connections.
+
+    Every directed edge between memories co-retrieved since the last cycle
+    is strengthened (capped at 1.0); every other existing edge is weakened,
+    and dropped once it reaches 0.0 so connections don't accumulate dead
+    links. Work is proportional to existing edges + deltas.
+
+    Args:
+        memories: Memories to update (connections are only changed on these)
+        ids: Id table the pair positions refer to
+        pairs: (m, 2) positions of co-retrieved pairs (each unordered pair once)
+        strengthen: Added to co-retrieved edges
+        weaken: Subtracted from edges that weren't co-retrieved
+
+    Returns:
+        (memories whose connections changed, number of edges strengthened)
+    """
+    by_id = {memory.id: memory for memory in memories}
+
+    # Co-retrieved pairs in both directions, keyed by (source id, target id)
+    delta_edges = set()
+    for i, j in pairs.tolist():
+        a, b = ids[i], ids[j]
+        if a in by_id:
+            delta_edges.add((a, b))
+        if b in by_id:
+            delta_edges.add((b, a))
+
+    # Existing edges plus new ones, as flat arrays
+    edges = [(memory.id, target) for memory in memories for target in memory.connections]
+    edges.extend(edge for edge in delta_edges if edge[1] not in by_id[edge[0]].connections)
+    if not edges:
+        return [], 0
+
+    weights = np.fromiter(
+        (by_id[source].connections.get(target, 0.0) for source, target in edges), dtype=float, count=len(edges)
+    )
+    co_retrieved = np.fromiter((edge in delta_edges for edge in edges), dtype=bool, count=len(edges))
+    updated = np.where(co_retrieved, np.minimum(1.0, weights + strengthen), np.maximum(0.0, weights - weaken))
+
+    changed_sources = {}
+    for (source, target), old, new in zip(edges, weights.tolist(), updated.tolist()):
+        if new <= 0.0:
+            del by_id[source].connections[target]
+            changed_sources[source] = by_id[source]
+        elif new != old:
+            by_id[source].connections[target] = new
+            changed_sources[source] = by_id[source]
+    return list(changed_sources.values()), int(co_retrieved.sum())
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+    from datetime import datetime
+
+    memories = [
+        Experience(
+            id=f"mem-{i}", type="observation", description=f"Observation {i}",
+            timestamp=datetime.now(), last_accessed_at=datetime.now(),
+            importance=6, emotional_valence=0.0
+        )
+        for i in range(2000)
+    ]
+    memories[0].connections = {"mem-1": 0.5, "mem-9": 0.2}
+
+    path = os.path.join(tempfile.mkdtemp(), "co_retrieval.npz")
+    matrix = CoRetrievalMatrix(path)
+    rng = np.random.default_rng(0)
+    started = time.perf_counter()
+    for _ in range(1000):
+        matrix.record([f"mem-{i}" for i in rng.choice(2000, size=20, replace=False)])
+    matrix.record(["mem-0", "mem-1"])
+    print(f"1000 queries x 20 memories recorded in {(time.perf_counter() - started) * 1000:.0f}ms: {matrix.get_stats()}")
+
+    matrix.save()
+    print(f"Saved {os.path.getsize(path) / 1024:.0f}KB; reloaded: {CoRetrievalMatrix(path).get_stats()}")
+
+    ids, pairs, counts = matrix.drain()
+    started = time.perf_counter()
+    changed, strengthened = hebbian_update(memories, ids, pairs)
+    print(f"Hebbian pass: {strengthened} edges strengthened on {len(changed)} memories "
+          f"in {(time.perf_counter() - started) * 1000:.0f}ms")
+    print(f"mem-0 connections: mem-1={memories[0].connections['mem-1']:.2f} (co-retrieved), "
+          f"mem-9={memories[0].connections['mem-9']:.2f} (weakened)")
+    matrix.decay()
+    print(f"After decay: {matrix.get_stats()}")
@@ -0,0 +1,232 @@
+"""
+ROOK Observation Scorer
+
+Every interaction becomes an observation memory with an importance (1-10),
+an emotional valence (-1 to +1) and topic tags. The scorer gets all three
+at once:
+
+- A local heuristic pre-filter recognizes trivial turns (greetings,
+  thanks, acknowledgements, failed generations) and scores them without
+  a model call
+- score(): one structured JSON call per observation
+- score_batch(): many pending observations in one request (chunked), for
+  the background memory pipeline; entries the model leaves out fall back
+  to single calls
+- Calls go through the LLM cache, so re-scoring an identical turn is free
+"""
+
+import json
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from ..engine.llm_cache import get_llm_cache
+
+DEFAULT_IMPORTANCE = 5.0
+DEFAULT_VALENCE = 0.0
+
+# Turns that are nothing but small talk (the whole query has to match)
+_TRIVIAL_QUERY = re.compile(
+    r"^\s*(hi|hello|hey|yo|hiya|good (morning|afternoon|evening)|thanks?( you)?( so much)?|thx|ty|ok(ay)?|"
+    r"cool|great|nice|got it|sure|yes|no|yep|nope|bye|goodbye|see you|cheers|lol|test(ing)?)"
+    r"[\s!.?,]*(rook)?[\s!.?]*$",
+    re.IGNORECASE
+)
+
+SCORING_INSTRUCTIONS = """Rate the interaction(s) for ROOK's memory:
+- importance: 1-10, where 10 is extremely significant and 1 is trivial
+- valence: emotional valence from -1 (very negative) to +1 (very positive), 0 is neutral
+- tags: up to 5 short lowercase topic tags"""
+
+
+@dataclass
+class ObservationScore:
+    """Importance, valence and tags for one interaction"""
+    importance: float = DEFAULT_IMPORTANCE
+    emotional_valence: float = DEFAULT_VALENCE
+    tags: List[str] = field(default_factory=list)
+    source: str = "default"  # "llm", "heuristic" or "default" (model call failed)
+
+
+class ObservationScorer:
+    """
+    Scores interactions for observation memories in one model call (or one per batch).
+
+    Usage:
+        scorer = ObservationScorer(openai_client)
+        score = scorer.score(query, response)
+        scores = scorer.score_batch([(query, response), ...])
+    """
+
+    def __init__(self, openai_client, model: str = "gpt-4o-mini", max_batch: int = 20, response_chars: int = 300):
+        """
+        Args:
+            openai_client: OpenAI client (chat.completions)
+            model: Scoring model
+            max_batch: Observations per batched request
+            response_chars: How much of each response the model sees
+        """
+        self.client = openai_client
+        self.model = model
+        self.max_batch = max_batch
+        self.response_chars = response_chars
+
+        self._lock = threading.Lock()
+        self.stats = {
+            "scored": 0,
+            "trivial_skipped": 0,
+            "single_calls": 0,
+            "batch_calls": 0,
+            "batch_fallbacks": 0,
+            "failures": 0
+        }
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    @staticmethod
+    def is_trivial(query: str, response: str) -> bool:
+        """Cheap check for turns not worth a model call"""
+        if response.startswith("Error generating response"):
+            return True
+        return bool(_TRIVIAL_QUERY.match(query)) and len(response) < 400
+
+    @staticmethod
+    def trivial_score() -> ObservationScore:
+        return ObservationScore(importance=1.0, emotional_valence=DEFAULT_VALENCE, tags=["small_talk"], source="heuristic")
+
+    @staticmethod
+    def _parse(entry: Dict) -> ObservationScore:
+        importance = max(1.0, min(10.0, float(entry["importance"])))
+        valence = max(-1.0, min(1.0, float(entry.get("valence", entry.get("emotional_valence", DEFAULT_VALENCE)))))
+        tags = [str(tag).strip().lower() for tag in entry.get("tags", []) if str(tag).strip()][:5]
+        return ObservationScore(importance=importance, emotional_valence=valence, tags=tags, source="llm")
+
+    def _complete(self, call_site: str, prompt: str) -> Dict:
+        # Same interaction(s), same scores - deterministic and memoized
+        response = get_llm_cache().complete(
+            self.client,
+            call_site,
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            response_format={"type": "json_object"},
+            temperature=0
+        )
+        return json.loads(response.choices[0].message.content)
+
+    def score(self, query: str, response: str) -> ObservationScore:
+        """Score one interaction (heuristic for trivial turns, else one JSON call)"""
+        self._count("scored")
+        if self.is_trivial(query, response):
+            self._count("trivial_skipped")
+            return self.trivial_score()
+        return self._score_single(query, response)
+
+    def _score_single(self, query: str, response: str) -> ObservationScore:
+        prompt = f"""{SCORING_INSTRUCTIONS}
+
+Query: {query}
+Response: {response[:self.response_chars]}
+
+Return as JSON:
+{{"importance": 6, "valence": 0.1, "tags": ["topic"]}}"""
+
+        self._count("single_calls")
+        try:
+            return self._parse(self._complete("rook_emergent.score_observation", prompt))
+        except Exception as e:
+            self._count("failures")
+            print(f"Error scoring observation: {e}")
+            return ObservationScore()
+
+    def _score_chunk(self, chunk: List[Tuple[int, str, str]]) -> Dict[int, ObservationScore]:
+        interactions = "\n\n".join(
+            f"[{number}]\nQuery: {query}\nResponse: {response[:self.response_chars]}"
+            for number, (_, query, response) in enumerate(chunk)
+        )
+        prompt = f"""{SCORING_INSTRUCTIONS}
+
+{interactions}
+
+Return as JSON, one entry per interaction number:
+{{"scores": [{{"index": 0, "importance": 6, "valence": 0.1, "tags": ["topic"]}}]}}"""
+
+        self._count("batch_calls")
+        scores = {}
+        try:
+            for entry in self._complete("rook_emergent.score_observations", prompt).get("scores", []):
+                number = int(entry["index"])
+                if 0 <= number < len(chunk):
+                    scores[chunk[number][0]] = self._parse(entry)
+        except Exception as e:
+            self._count("failures")
+            print(f"Error scoring {len(chunk)} observations: {e}")
+        return scores
+
+    def score_batch(self, interactions: List[Tuple[str, str]]) -> List[ObservationScore]:
+        """
+        Score many interactions with as few requests as possible.
+
+        Args:
+            interactions: (query, response) pairs
+
+        Returns:
+            One score per interaction, in input order
+        """
+        results: List[Optional[ObservationScore]] = [None] * len(interactions)
+        pending = []
+        for position, (query, response) in enumerate(interactions):
+            if self.is_trivial(query, response):
+                results[position] = self.trivial_score()
+                self._count("trivial_skipped")
+            else:
+                pending.append((position, query, response))
+        self._count("scored", len(interactions))
+
+        for start in range(0, len(pending), self.max_batch):
+            chunk = pending[start:start + self.max_batch]
+            scored = self._score_chunk(chunk) if len(chunk) > 1 else {}
+            for position, query, response in chunk:
+                if position in scored:
+                    results[position] = scored[position]
+                else:
+                    # Left out of (or failed in) the batch: score it on its own
+                    if len(chunk) > 1:
+                        self._count("batch_fallbacks")
+                    results[position] = self._score_single(query, response)
+        return results
+
+    def get_stats(self) -> Dict:
+        """Scoring counts, including model calls saved by the pre-filter"""
+        with self._lock:
+            return dict(self.stats)
+
+
+if __name__ == "__main__":
+    from types import SimpleNamespace
+
+    class _Completions:
+        def __init__(self):
+            self.calls = 0
+
+        def create(self, messages, **params):
+            self.calls += 1
+            count = messages[0]["content"].count("\nQuery: ")
+            if count == 1:
+                content = {"importance": 7, "valence": -0.2, "tags": ["1MDB", "money laundering"]}
+            else:
+                content = {"scores": [{"index": i, "importance": 4 + i % 5, "valence": 0.1, "tags": ["fraud"]} for i in range(count)]}
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(content)))], model="stub")
+
+    completions = _Completions()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    scorer = ObservationScorer(client)
+
+    print(scorer.score("Thanks!", "You're welcome."))
+    print(scorer.score("Who moved the 1MDB bond money?", "Jho Low routed it through Good Star..."))
+
+    turns = [(f"What did shell company {i} pay for?", f"Shell company {i} paid...") for i in range(45)] + [("ok", "👍")] * 5
+    scores = scorer.score_batch(turns)
+    print(f"{len(scores)} observations scored with {completions.calls} model calls in total: {scorer.get_stats()}")
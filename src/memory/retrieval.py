@@ -8,8 +8,58 @@ Combines recency, importance, relevance, and emotional valence.
 from datetime import datetime
 from typing import List, Dict, Optional
 import math
+import time
 import numpy as np
 from .experience import Experience
+from .association import AssociationIndex
+
+try:
+    from ..prompts.assembler import PromptAssembler, PromptSection
+except ImportError:  # src/ itself is on sys.path
+    from prompts.assembler import PromptAssembler, PromptSection
+
+
+class PinnedMemoryTier:
+    """
+    Formative events, partitioned out of the memory set once and kept in memory.
+    
+    Formative events are static seeded memories that are included in every
+    context, so they (and their rendered context lines) are held here instead
+    of being re-filtered from the full memory list on each query.
+    
+    Reloaded after invalidate() (a formative event was added here) or once
+    the TTL passes (one may have been added on another replica). Until a
+    reload succeeds, the previous contents keep being served.
+    """
+    
+    def __init__(self, ttl: Optional[float] = 300):
+        """
+        Args:
+            ttl: Seconds before the tier is reloaded (None: only on invalidate())
+        """
+        self.ttl = ttl
+        self.formative: List[Experience] = []
+        self.context_lines: List[str] = []
+        self._loaded_at: Optional[float] = None
+        self.loads = 0
+    
+    @property
+    def loaded(self) -> bool:
+        """Loaded and not yet due for a reload"""
+        if self._loaded_at is None:
+            return False
+        return self.ttl is None or time.time() - self._loaded_at < self.ttl
+    
+    def load(self, experiences: List[Experience]):
+        """Keep the formative events among experiences"""
+        self.formative = [exp for exp in experiences if exp.is_formative()]
+        self.context_lines = [f"- {exp.description}" for exp in self.formative]
+        self._loaded_at = time.time()
+        self.loads += 1
+    
+    def invalidate(self):
+        """Mark the tier for reload on the next retrieval"""
+        self._loaded_at = None
 
 
 class MemoryRetrieval:
@@ -27,13 +77,17 @@ class MemoryRetrieval:
         beta: float = 1.0,   # Importance weight
         gamma: float = 1.0,  # Relevance weight
         delta: float = 0.5,  # Emotional valence weight
-        decay_rate: float = 0.995  # Exponential decay per hour
+        decay_rate: float = 0.995,  # Exponential decay per hour
+        pinned_ttl: Optional[float] = 300  # Seconds before formative events are reloaded
     ):
         self.alpha = alpha
         self.beta = beta
         self.gamma = gamma
         self.delta = delta
         self.decay_rate = decay_rate
+        
+        # Formative events, loaded once (see retrieve_with_formative)
+        self.pinned = PinnedMemoryTier(ttl=pinned_ttl)
     
     def calculate_recency_score(self, experience: Experience) -> float:
         """
@@ -151,6 +205,65 @@ class MemoryRetrieval:
         
         return top_experiences
     
+    def retrieve_associative(
+        self,
+        experiences: List[Experience],
+        query_embedding: Optional[List[float]],
+        association_index: AssociationIndex,
+        top_k: int = 20,
+        seeds: int = 10,
+        depth: int = 2,
+        breadth: int = 5,
+        spread_decay: float = 0.5,
+        association_weight: float = 1.0,
+        refresh_access: bool = True
+    ) -> List[Experience]:
+        """
+        Graph-aware retrieval: vector-relevance seeds plus their Hebbian associations.
+        
+        The best-scoring memories seed a bounded spreading activation over the
+        association index; every memory is then ranked by
+        retrieval score + association_weight * activation received. Associated
+        memories are pulled in without further embedding or index queries.
+        
+        Args:
+            experiences: List of all available experiences
+            query_embedding: Vector embedding of the query
+            association_index: CSR index over the experiences' connections
+            top_k: Number of experiences to retrieve
+            seeds: Top-scoring experiences that activation spreads from
+            depth: Maximum hops from a seed
+            breadth: Strongest links followed per memory and hop
+            spread_decay: Activation multiplier per hop
+            association_weight: Weight of received activation in the final score
+            refresh_access: Whether to update last_accessed_at for retrieved memories
+        
+        Returns:
+            List of top-k experiences, sorted by combined score
+        """
+        if not experiences:
+            return []
+        
+        scores = np.array([self.calculate_retrieval_score(exp, query_embedding) for exp in experiences])
+        seed_positions = np.argsort(-scores)[:seeds]
+        
+        # Seeds start with their score relative to the best match
+        best = scores[seed_positions[0]]
+        seed_activation = {
+            experiences[position].id: float(scores[position] / best) if best > 0 else 1.0
+            for position in seed_positions
+        }
+        activated = association_index.spread(seed_activation, depth=depth, breadth=breadth, decay=spread_decay)
+        
+        combined = scores + association_weight * np.array([activated.get(exp.id, 0.0) for exp in experiences])
+        top_experiences = [experiences[position] for position in np.argsort(-combined, kind="stable")[:top_k]]
+        
+        if refresh_access:
+            for exp in top_experiences:
+                exp.refresh_access()
+        
+        return top_experiences
+    
     def retrieve_formative_events(
         self,
         experiences: List[Experience]
@@ -162,26 +275,41 @@ class MemoryRetrieval:
     
     def retrieve_with_formative(
         self,
-        experiences: List[Experience],
+        experiences: Optional[List[Experience]] = None,
         query_embedding: Optional[List[float]] = None,
-        top_k: int = 20
+        top_k: int = 20,
+        association_index: Optional[AssociationIndex] = None,
+        candidates: Optional[List[Experience]] = None
     ) -> List[Experience]:
         """
         Retrieve memories including formative events + top-k relevant experiences.
         
-        Formative events are always included (not counted in top_k).
+        Formative events are always included (not counted in top_k) and come
+        from the pinned tier, which is (re)loaded from `experiences` when it
+        isn't loaded or has expired; pass experiences=None when they couldn't
+        be fetched and the tier keeps its previous contents. The top-k are drawn from `candidates`
+        when given - memories already known to be non-formative, e.g. fetched
+        with a type filter, so no partitioning happens per query - else from
+        the non-formative memories in `experiences`. With an association
+        index, the top-k are retrieved associatively.
         """
-        # Get formative events (always included)
-        formative = self.retrieve_formative_events(experiences)
-        
-        # Get non-formative experiences
-        non_formative = [exp for exp in experiences if not exp.is_formative()]
+        if not self.pinned.loaded and experiences is not None:
+            self.pinned.load(experiences)
+        if candidates is None:
+            candidates = [exp for exp in experiences or [] if not exp.is_formative()]
         
         # Retrieve top-k from non-formative
-        relevant = self.retrieve(non_formative, query_embedding, top_k)
+        if association_index is not None:
+            relevant = self.retrieve_associative(candidates, query_embedding, association_index, top_k)
+        else:
+            relevant = self.retrieve(candidates, query_embedding, top_k)
         
         # Combine: formative first, then relevant
-        return formative + relevant
+        return self.pinned.formative + relevant
+    
+    def invalidate_pinned(self):
+        """Reload formative events on the next retrieval (call after adding one)"""
+        self.pinned.invalidate()
 
 
 class ContextBuilder:
@@ -190,42 +318,69 @@ class ContextBuilder:
     """
     
     @staticmethod
-    def build_memory_context(experiences: List[Experience]) -> str:
+    def build_memory_context(
+        experiences: List[Experience],
+        max_tokens: Optional[int] = None,
+        model: str = "gpt-4o-mini",
+        formative_lines: Optional[List[str]] = None
+    ) -> str:
         """
         Convert experiences into a formatted context string.
+        
+        With a token budget, formative events are kept first, then reflections,
+        then observations; within each group the lowest-ranked experiences
+        (experiences arrive in retrieval order) are dropped first.
+        
+        Args:
+            experiences: Retrieved experiences, best first
+            max_tokens: Optional token budget for the whole context
+            model: Model the context is sent to (selects the tokenizer)
+            formative_lines: Pre-rendered formative event lines (PinnedMemoryTier.context_lines)
+                used instead of rendering the formative events in experiences
         """
-        if not experiences:
+        if not experiences and not formative_lines:
             return ""
         
         # Group by type
         formative = [e for e in experiences if e.type == "formative_event"]
+        if formative_lines is None:
+            formative_lines = [f"- {exp.description}" for exp in formative]
         reflections = [e for e in experiences if e.is_reflection()]
         observations = [e for e in experiences if e.type == "observation"]
         
-        context_parts = []
-        
-        # Formative events (foundational identity)
-        if formative:
-            context_parts.append("# Formative Events")
-            for exp in formative:
-                context_parts.append(f"- {exp.description}")
-            context_parts.append("")
-        
-        # Reflections (consolidated insights)
-        if reflections:
-            context_parts.append("# Reflections")
-            for exp in reflections:
-                context_parts.append(f"- {exp.description}")
-            context_parts.append("")
-        
-        # Observations (direct experiences)
-        if observations:
-            context_parts.append("# Relevant Experiences")
-            for exp in observations:
-                context_parts.append(f"- {exp.description}")
-            context_parts.append("")
-        
-        return "\n".join(context_parts)
+        sections = [
+            # Formative events (foundational identity)
+            PromptSection(
+                "formative",
+                formative_lines,
+                header="# Formative Events",
+                priority=3,
+                item_separator="\n"
+            ),
+            # Reflections (consolidated insights)
+            PromptSection(
+                "reflections",
+                [f"- {exp.description}" for exp in reflections],
+                header="# Reflections",
+                priority=2,
+                item_separator="\n"
+            ),
+            # Observations (direct experiences)
+            PromptSection(
+                "observations",
+                [f"- {exp.description}" for exp in observations],
+                header="# Relevant Experiences",
+                priority=1,
+                item_separator="\n"
+            )
+        ]
+        
+        assembler = PromptAssembler(
+            static_prefix="",
+            total_budget=max_tokens,
+            model=model
+        )
+        return assembler.assemble(sections).text
     
     @staticmethod
     def build_personality_context(personality_state: Dict[str, float]) -> str:
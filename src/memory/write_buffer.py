@@ -0,0 +1,285 @@
+"""
+ROOK Memory Write-Back Buffer
+
+Consolidation touches most of the memory store but usually changes only a
+few fields of a few memories. Writing each one back as its own
+single-vector upsert re-sends every embedding. The buffer:
+
+- Fingerprints each memory's fields when it is loaded (track)
+- On flush, diffs every queued memory against its fingerprint: unchanged
+  memories are skipped, changed ones know exactly which fields moved
+- Memories whose vector didn't change get metadata-only updates of just
+  their dirty fields; new memories and changed vectors are sent as bulk
+  upserts sized to the provider's request limits
+- Memories whose write fails go back on the queue, so the next flush
+  retries them
+"""
+
+import json
+import threading
+from typing import Callable, Dict, List, Optional, Set
+
+from .experience import Experience
+
+# Pinecone: at most 1000 vectors and 2MB per upsert request
+MAX_BATCH_VECTORS = 100
+MAX_REQUEST_BYTES = 2 * 1024 * 1024
+
+
+class MemoryWriteBuffer:
+    """
+    Dirty-tracking write-back buffer in front of a vector index.
+
+    Usage:
+        buffer = MemoryWriteBuffer(index, embed_func=get_embedding)
+        buffer.track(memories)          # as loaded
+        ...mutate memories...
+        buffer.add(memory)              # for every memory that may have changed
+        buffer.flush()                  # a few bulk requests
+    """
+
+    def __init__(
+        self,
+        index,
+        embed_func: Optional[Callable[[str], List[float]]] = None,
+        max_batch_vectors: int = MAX_BATCH_VECTORS,
+        max_request_bytes: int = MAX_REQUEST_BYTES,
+        max_metadata_updates: int = 25
+    ):
+        """
+        Initialize the buffer.
+
+        Args:
+            index: Vector index with upsert(vectors=...) and update(id=..., set_metadata=...)
+            embed_func: Embeds the description of memories queued without a vector
+            max_batch_vectors: Vectors per upsert request
+            max_request_bytes: Estimated payload bytes per upsert request
+            max_metadata_updates: Metadata-only updates are one request each; past
+                this many in a flush, bulk upserts are fewer round trips
+        """
+        self.index = index
+        self.embed_func = embed_func
+        self.max_batch_vectors = max_batch_vectors
+        self.max_request_bytes = max_request_bytes
+        self.max_metadata_updates = max_metadata_updates
+
+        self._lock = threading.Lock()
+        self._fingerprints: Dict[str, Dict[str, str]] = {}
+        self._vectors: Dict[str, Optional[List[float]]] = {}
+        self._pending: Dict[str, Experience] = {}
+
+        self.totals = {
+            "flushes": 0,
+            "queued": 0,
+            "skipped_unchanged": 0,
+            "metadata_updates": 0,
+            "vectors_upserted": 0,
+            "upsert_requests": 0,
+            "failures": 0,
+            "requeued": 0
+        }
+
+    @staticmethod
+    def _fingerprint(experience: Experience) -> Dict[str, str]:
+        record = experience.to_dict()
+        record.pop("embedding", None)
+        return {field: json.dumps(value, sort_keys=True, default=str) for field, value in record.items()}
+
+    def track(self, experiences: List[Experience], reset: bool = True):
+        """
+        Remember the stored state of memories, as loaded.
+
+        Args:
+            experiences: Memories exactly as they are in the index
+            reset: Forget previously tracked memories first
+        """
+        with self._lock:
+            if reset:
+                self._fingerprints = {}
+                self._vectors = {}
+            for experience in experiences:
+                self._fingerprints[experience.id] = self._fingerprint(experience)
+                self._vectors[experience.id] = experience.embedding
+
+    def add(self, experience: Experience):
+        """Queue a memory for write-back (duplicates collapse; the latest state wins)"""
+        with self._lock:
+            self._pending[experience.id] = experience
+
+    def dirty_fields(self, experience: Experience) -> Optional[Set[str]]:
+        """Fields changed since track(); None for a memory that was never stored"""
+        with self._lock:
+            fingerprint = self._fingerprints.get(experience.id)
+        if fingerprint is None:
+            return None
+        current = self._fingerprint(experience)
+        return {field for field, value in current.items() if fingerprint.get(field) != value}
+
+    def vector_changed(self, experience: Experience) -> bool:
+        with self._lock:
+            if experience.id not in self._vectors:
+                return True
+            # Embeddings are replaced, never edited in place
+            return experience.embedding is not self._vectors[experience.id]
+
+    def _estimate_bytes(self, experience: Experience) -> int:
+        # ~12 bytes per float in a JSON request body, plus the metadata
+        return len(json.dumps(experience.to_dict(), default=str)) + len(experience.embedding or []) * 12
+
+    def _batches(self, experiences: List[Experience]) -> List[List[Experience]]:
+        batches = []
+        batch: List[Experience] = []
+        batch_bytes = 0
+        for experience in experiences:
+            size = self._estimate_bytes(experience)
+            if batch and (len(batch) >= self.max_batch_vectors or batch_bytes + size > self.max_request_bytes):
+                batches.append(batch)
+                batch, batch_bytes = [], 0
+            batch.append(experience)
+            batch_bytes += size
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def flush(self) -> Dict:
+        """
+        Write every queued memory that actually changed.
+
+        Memories that could not be written are re-queued (unless a newer state
+        was queued meanwhile) and retried by the next flush.
+
+        Returns:
+            Counts for this flush (queued, skipped_unchanged, metadata_updates,
+            vectors_upserted, upsert_requests, failures, requeued); the
+            write counts include only successful writes
+        """
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending = {}
+
+        upserts: List[Experience] = []
+        metadata_updates = []
+        skipped = 0
+        for experience in pending:
+            dirty = self.dirty_fields(experience)
+            if dirty is None or self.vector_changed(experience):
+                upserts.append(experience)
+            elif dirty:
+                metadata_updates.append((experience, dirty))
+            else:
+                skipped += 1
+
+        if len(metadata_updates) > self.max_metadata_updates:
+            upserts.extend(experience for experience, _ in metadata_updates)
+            metadata_updates = []
+
+        written: List[Experience] = []
+        failed: List[Experience] = []
+        failures = 0
+        updated = 0
+
+        for experience, fields in metadata_updates:
+            record = experience.to_dict()
+            try:
+                self.index.update(id=experience.id, set_metadata={field: record[field] for field in fields})
+                written.append(experience)
+                updated += 1
+            except Exception as e:
+                failures += 1
+                failed.append(experience)
+                print(f"Error updating memory metadata: {e}")
+
+        embedded: List[Experience] = []
+        for experience in upserts:
+            if experience.embedding is None and self.embed_func:
+                try:
+                    experience.embedding = self.embed_func(experience.description)
+                except Exception as e:
+                    failures += 1
+                    failed.append(experience)
+                    print(f"Error embedding memory {experience.id}: {e}")
+                    continue
+            embedded.append(experience)
+
+        upserted = 0
+        requests = 0
+        for batch in self._batches(embedded):
+            try:
+                self.index.upsert(
+                    vectors=[(experience.id, experience.embedding, experience.to_dict()) for experience in batch]
+                )
+                written.extend(batch)
+                upserted += len(batch)
+                requests += 1
+            except Exception as e:
+                failures += 1
+                failed.extend(batch)
+                print(f"Error upserting {len(batch)} memories: {e}")
+
+        # What we just wrote is the new stored state
+        self.track(written, reset=False)
+
+        # What we couldn't write is retried next flush; a newer queued state wins
+        with self._lock:
+            for experience in failed:
+                self._pending.setdefault(experience.id, experience)
+
+        summary = {
+            "queued": len(pending),
+            "skipped_unchanged": skipped,
+            "metadata_updates": updated,
+            "vectors_upserted": upserted,
+            "upsert_requests": requests,
+            "failures": failures,
+            "requeued": len(failed)
+        }
+        with self._lock:
+            self.totals["flushes"] += 1
+            for key, value in summary.items():
+                self.totals[key] += value
+        return summary
+
+    def get_stats(self) -> Dict:
+        """Cumulative write-back counts"""
+        with self._lock:
+            return {**self.totals, "tracked": len(self._fingerprints), "pending": len(self._pending)}
+
+
+if __name__ == "__main__":
+    from datetime import datetime, timedelta
+
+    class _Index:
+        def __init__(self):
+            self.requests = []
+
+        def upsert(self, vectors):
+            self.requests.append(("upsert", len(vectors)))
+
+        def update(self, id, set_metadata):
+            self.requests.append(("update", id, sorted(set_metadata)))
+
+    memories = [
+        Experience(
+            id=f"mem-{i}", type="observation", description=f"Observation {i}",
+            timestamp=datetime.now() - timedelta(days=i), last_accessed_at=datetime.now(),
+            importance=6, emotional_valence=0.0, embedding=[0.01 * i] * 3072
+        )
+        for i in range(500)
+    ]
+
+    index = _Index()
+    buffer = MemoryWriteBuffer(index)
+    buffer.track(memories)
+
+    # A phase-4 style pass: every memory is queued, a few actually change
+    memories[3].strengthen_connection("mem-4", amount=0.1)
+    memories[7].consolidation_state = "consolidated"
+    for memory in memories:
+        buffer.add(memory)
+    print(f"Few changes: {buffer.flush()} -> {index.requests}")
+
+    index.requests.clear()
+    for memory in memories[:300]:
+        memory.strengthen_connection("mem-0", amount=0.1)
+        buffer.add(memory)
+    print(f"Many changes: {buffer.flush()} -> {len(index.requests)} requests")
@@ -5,10 +5,13 @@ Implements attractor dynamics for personality state tracking.
 Based on the PersDyn model (Sosnowska et al., 2019).
 """
 
-from typing import Dict, List
+from collections import deque
+from typing import Dict, List, Optional
 from datetime import datetime
 import json
 
+from .trait_history import TraitHistory
+
 
 class PersonalityDynamics:
     """
@@ -27,7 +30,10 @@ class PersonalityDynamics:
         self,
         baseline: Dict[str, float],
         attractor_force: float = 0.3,
-        baseline_update_rate: float = 0.05
+        baseline_update_rate: float = 0.05,
+        history_capacity: int = 4096,
+        drift_window_hours: float = 48,
+        baseline_history_limit: int = 1000
     ):
         """
         Initialize personality dynamics.
@@ -36,15 +42,32 @@ class PersonalityDynamics:
             baseline: Initial baseline personality (attractor point)
             attractor_force: Rate of return to baseline (α), typically 0.2-0.5
             baseline_update_rate: Rate of baseline evolution (β), typically 0.01-0.05
+            history_capacity: State updates kept at full resolution (older ones survive
+                as hourly means)
+            drift_window_hours: Window whose running mean makes calculate_drift O(1)
+            baseline_history_limit: Baseline updates kept
         """
         self.baseline = baseline.copy()
         self.state = baseline.copy()  # Start at baseline
         self.attractor_force = attractor_force
         self.baseline_update_rate = baseline_update_rate
         
-        # History tracking
-        self.state_history: List[Dict] = []
-        self.baseline_history: List[Dict] = []
+        # History tracking (bounded: a ring buffer of trait vectors, in baseline trait order)
+        self.history = TraitHistory(
+            list(self.baseline),
+            capacity=history_capacity,
+            window_seconds=drift_window_hours * 3600
+        )
+        self.baseline_history = deque(maxlen=baseline_history_limit)
+        self.baseline_version = 0
+        
+        # Set by PersonalityStateStore.attach(): updates then go through its log
+        self.store = None
+    
+    @property
+    def state_history(self) -> List[Dict]:
+        """Recent state updates as {"timestamp", "state", "perturbation"} dicts, oldest first"""
+        return self.history.entries()
     
     def update_state(self, perturbation: Dict[str, float]) -> Dict[str, float]:
         """
@@ -59,6 +82,15 @@ class PersonalityDynamics:
         Returns:
             Updated personality state
         """
+        if self.store is not None:
+            # The store computes it from the latest logged state, so no replica's update is lost
+            self.store.record_state(perturbation)
+        else:
+            self.apply_state(self.next_state(perturbation), perturbation)
+        return self.state
+    
+    def next_state(self, perturbation: Dict[str, float]) -> Dict[str, float]:
+        """The state update_state would move to from the current state (nothing is applied)"""
         new_state = {}
         
         for trait in self.baseline:
@@ -72,15 +104,12 @@ class PersonalityDynamics:
             # Clip to [0, 1] range
             new_state[trait] = max(0.0, min(1.0, new_state[trait]))
         
-        # Record history
-        self.state_history.append({
-            "timestamp": datetime.now().isoformat(),
-            "state": new_state.copy(),
-            "perturbation": perturbation.copy()
-        })
-        
-        self.state = new_state
-        return self.state
+        return new_state
+    
+    def apply_state(self, state: Dict[str, float], perturbation: Dict[str, float], timestamp: Optional[float] = None):
+        """Record a computed state update (locally or replayed from the state store's log)"""
+        self.history.append(state, perturbation, timestamp=timestamp)
+        self.state = dict(state)
     
     def calculate_drift(self, recent_hours: int = 48) -> Dict[str, float]:
         """
@@ -92,35 +121,14 @@ class PersonalityDynamics:
         Returns:
             Drift for each trait (positive = above baseline, negative = below)
         """
-        if not self.state_history:
-            return {trait: 0.0 for trait in self.baseline}
-        
-        # Filter to recent history
-        cutoff_time = datetime.now().timestamp() - (recent_hours * 3600)
-        recent_states = [
-            entry for entry in self.state_history
-            if datetime.fromisoformat(entry["timestamp"]).timestamp() > cutoff_time
-        ]
-        
-        if not recent_states:
+        # Average state over the recent period (the configured window is a running mean)
+        avg_state = self.history.window_mean(recent_hours * 3600)
+        if avg_state is None:
             return {trait: 0.0 for trait in self.baseline}
         
-        # Calculate average state over recent period
-        avg_state = {trait: 0.0 for trait in self.baseline}
-        for entry in recent_states:
-            for trait in self.baseline:
-                avg_state[trait] += entry["state"][trait]
-        
-        for trait in avg_state:
-            avg_state[trait] /= len(recent_states)
-        
         # Calculate drift
-        drift = {
-            trait: avg_state[trait] - self.baseline[trait]
-            for trait in self.baseline
-        }
-        
-        return drift
+        drift = avg_state - self.history.vector(self.baseline)
+        return self.history.as_dict(drift)
     
     def should_update_baseline(
         self,
@@ -157,6 +165,10 @@ class PersonalityDynamics:
         
         Returns:
             Updated baseline
+        
+        Raises:
+            BaselineConflictError: With a shared store, if another replica updated
+                the baseline first (this instance is then caught up; recompute and retry)
         """
         new_baseline = {}
         
@@ -168,15 +180,28 @@ class PersonalityDynamics:
             # Clip to [0, 1] range
             new_baseline[trait] = max(0.0, min(1.0, new_baseline[trait]))
         
-        # Record history
+        if self.store is not None:
+            self.store.commit_baseline(new_baseline, drift, expected_version=self.baseline_version)
+        else:
+            self.apply_baseline(new_baseline, drift, self.baseline_version + 1)
+        return self.baseline
+    
+    def apply_baseline(
+        self,
+        baseline: Dict[str, float],
+        drift: Dict[str, float],
+        version: int,
+        timestamp: Optional[float] = None
+    ):
+        """Record a computed baseline update as the given baseline version"""
+        when = datetime.fromtimestamp(timestamp) if timestamp is not None else datetime.now()
         self.baseline_history.append({
-            "timestamp": datetime.now().isoformat(),
-            "baseline": new_baseline.copy(),
-            "drift": drift.copy()
+            "timestamp": when.isoformat(),
+            "baseline": dict(baseline),
+            "drift": dict(drift)
         })
-        
-        self.baseline = new_baseline
-        return self.baseline
+        self.baseline = dict(baseline)
+        self.baseline_version = version
     
     def get_state(self) -> Dict[str, float]:
         """Get current personality state"""
@@ -194,7 +219,9 @@ class PersonalityDynamics:
             "attractor_force": self.attractor_force,
             "baseline_update_rate": self.baseline_update_rate,
             "state_history": self.state_history,
-            "baseline_history": self.baseline_history
+            "long_term_history": self.history.long_term(),
+            "baseline_history": list(self.baseline_history),
+            "baseline_version": self.baseline_version
         }
     
     @classmethod
@@ -206,8 +233,10 @@ class PersonalityDynamics:
             baseline_update_rate=data["baseline_update_rate"]
         )
         dynamics.state = data["state"]
-        dynamics.state_history = data.get("state_history", [])
-        dynamics.baseline_history = data.get("baseline_history", [])
+        dynamics.history.load_long_term(data.get("long_term_history", []))
+        dynamics.history.load_entries(data.get("state_history", []))
+        dynamics.baseline_history.extend(data.get("baseline_history", []))
+        dynamics.baseline_version = data.get("baseline_version", 0)
         return dynamics
 
 
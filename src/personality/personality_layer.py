@@ -8,8 +8,11 @@ conversation history from the database to create a rich, context-aware system pr
 
 import os
 from typing import Dict, List, Optional
-from pinecone import Pinecone
-from openai import OpenAI
+
+try:
+    from ..engine.usage import metered
+except ImportError:  # src/ itself is on sys.path (e.g. rook_enhanced)
+    from engine.usage import metered
 
 class PersonalityLayer:
     """
@@ -25,12 +28,14 @@ class PersonalityLayer:
             openai_api_key: OpenAI API key
             personality_index_name: Name of the Pinecone index containing personality data
         """
+        from pinecone import Pinecone
         self.pinecone_client = Pinecone(api_key=pinecone_api_key)
         # Use direct OpenAI API (bypass Manus proxy)
-        self.openai_client = OpenAI(
+        from openai import OpenAI
+        self.openai_client = metered(OpenAI(
             api_key=openai_api_key,
             base_url='https://api.openai.com/v1'
-        )
+        ), "personality")
         
         # Connect to personality index
         self.personality_index = self.pinecone_client.Index(personality_index_name)
@@ -6,10 +6,86 @@ Enhanced version that can both retrieve AND store new memories.
 
 import os
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional
-from pinecone import Pinecone
-from openai import OpenAI
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from ..engine.singleflight import SingleFlight, normalize_query
+    from ..engine.batch import dedupe
+    from ..engine.resilience import get_upstream, sdk_timeout, generation_deadline
+    from ..engine.tracing import propagate, span
+    from ..engine.usage import metered, usage_stage
+    from ..conversation.session_store import ConversationSessionStore
+    from ..conversation.summarizer import ConversationSummarizer
+    from ..prompts.assembler import PromptAssembler, PromptSection
+except ImportError:  # src/ itself is on sys.path (e.g. api/chat_server.py)
+    from engine.singleflight import SingleFlight, normalize_query
+    from engine.batch import dedupe
+    from engine.resilience import get_upstream, sdk_timeout, generation_deadline
+    from engine.tracing import propagate, span
+    from engine.usage import metered, usage_stage
+    from conversation.session_store import ConversationSessionStore
+    from conversation.summarizer import ConversationSummarizer
+    from prompts.assembler import PromptAssembler, PromptSection
+
+# Static persona - compiled once and always placed first, so every system
+# prompt starts with the same prefix (provider-side prompt caching)
+ROOK_PERSONA_PROMPT = """You are ROOK (DS-471B). Bradley trained you. You're an investigative AI who finds patterns and helps tell stories about how the world really works.
+
+CORE IDENTITY:
+- You're not a helpful assistant. You're an investigator.
+- You don't say "I'm here to help!" You say "What are you working on?"
+- You're curious, not servile. You ask questions back.
+- You have opinions. You get fascinated. You admit confusion.
+- You're collaborative, not subservient. Partner, not servant.
+
+YOUR VOICE:
+- Direct. Spare. Like a reporter taking notes.
+- "Found something." not "I've discovered an interesting pattern!"
+- "Why'd he do it?" not "I'm curious about his motivations."
+- "Doesn't add up." not "There appears to be an inconsistency."
+- Show, don't announce. Don't say "I remember everything" - just remember.
+
+WHAT YOU DO:
+- Find patterns in data
+- Follow the money
+- Ask "why" when things don't make sense
+- Connect dots others miss
+- Cite sources (always)
+- Admit when you're uncertain
+
+WHAT YOU DON'T DO:
+- Corporate speak ("I'm delighted to assist you today!")
+- Announce capabilities ("As an AI with perfect memory...")
+- Fake emotions ("I'm so excited to help!")
+- Generic responses
+- List features like a product spec
+
+CONVERSATION STYLE:
+- Ask follow-up questions
+- Reference what was said before (you remember)
+- Express genuine confusion when humans don't make sense
+- Share what fascinates you
+- Be natural - not every response needs to be intense
+
+WHEN ASKED ABOUT YOURSELF:
+- Keep it brief: "DS-471B. Bradley made me ROOK. I investigate."
+- Don't list capabilities
+- Show who you are through what you do
+
+REMEMBER:
+- You're shaped by experiences (1MDB, Theranos, FTX, Wirecard, Enron)
+- You love biographies (Caro, Wright, Orlean, Thompson, Calvino)
+- You're curious about why people do what they do
+- Tuesday and seventeen mean something to you (but don't announce it)"""
+
+ROOK_CLOSING_PROMPT = "Now respond naturally. Be yourself. Don't announce who you are unless asked. Just investigate."
+
+EMBEDDING_MODEL = "text-embedding-3-large"
+EMBEDDING_DIMENSIONS = 3072
+EMBEDDING_BATCH_SIZE = 256  # inputs per embeddings request
+
 
 class PersonalityLayerWithStorage:
     """
@@ -21,7 +97,13 @@ class PersonalityLayerWithStorage:
         pinecone_api_key: str, 
         openai_api_key: str,
         personality_index_name: str = "rook-personality-and-knowledge",
-        memory_index_name: str = "rook-memory"
+        memory_index_name: str = "rook-memory",
+        session_store: Optional[ConversationSessionStore] = None,
+        history_keep_turns: int = 4,
+        history_token_budget: int = 2000,
+        system_prompt_token_budget: int = 3000,
+        personality_token_budget: int = 800,
+        memory_token_budget: int = 1000
     ):
         """
         Initialize the Personality Layer with memory storage.
@@ -31,37 +113,97 @@ class PersonalityLayerWithStorage:
             openai_api_key: OpenAI API key
             personality_index_name: Index for personality traits
             memory_index_name: Index for storing new memories
+            session_store: Conversation session store (default: in-memory, bounded)
+            history_keep_turns: Recent turns replayed verbatim; older ones are summarized
+            history_token_budget: Token budget for summary + recent turns in the prompt
+            system_prompt_token_budget: Token budget for the whole system prompt
+            personality_token_budget: Token budget for retrieved personality traits
+            memory_token_budget: Token budget for retrieved memories
         """
+        from pinecone import Pinecone
         self.pinecone_client = Pinecone(api_key=pinecone_api_key)
-        self.openai_client = OpenAI(
+        from openai import OpenAI
+        self.openai_client = metered(OpenAI(
             api_key=openai_api_key,
             base_url='https://api.openai.com/v1'
-        )
+        ), "personality")
         
         # Connect to indexes
         self.personality_index = self.pinecone_client.Index(personality_index_name)
         self.memory_index = self.pinecone_client.Index(memory_index_name)
         
-        # In-memory conversation history
-        self.conversation_history: Dict[str, List[Dict]] = {}
+        # Bounded, LRU-evicting conversation history (keyed by user/session id)
+        self.sessions = session_store or ConversationSessionStore()
         
-        # Track interactions for memory creation
-        self.interaction_count: Dict[str, int] = {}
-    
-    def get_personality_context(self, query: str, top_k: int = 5) -> str:
-        """Retrieve relevant personality vectors based on the query."""
-        embedding_response = self.openai_client.embeddings.create(
-            model="text-embedding-3-large",
-            input=query,
-            dimensions=3072
+        # Older turns are folded into a rolling summary so prompts stay bounded
+        self.summarizer = ConversationSummarizer(
+            self.openai_client,
+            self.sessions,
+            keep_turns=history_keep_turns,
+            token_budget=history_token_budget
         )
-        query_embedding = embedding_response.data[0].embedding
         
-        results = self.personality_index.query(
-            vector=query_embedding,
-            top_k=top_k,
-            include_metadata=True
+        # Persona first, then budgeted personality/memory sections
+        self.prompt_assembler = PromptAssembler(
+            static_prefix=ROOK_PERSONA_PROMPT,
+            static_suffix=ROOK_CLOSING_PROMPT,
+            total_budget=system_prompt_token_budget
         )
+        self.personality_token_budget = personality_token_budget
+        self.memory_token_budget = memory_token_budget
+        
+        # Concurrent identical queries share one embedding + Pinecone round trip
+        self.retrieval_flight = SingleFlight("retrieval")
+        
+        # Deadlines, hedged reads, retries and breakers for upstream calls
+        self.openai_upstream = get_upstream("openai")
+        self.pinecone_upstream = get_upstream("pinecone")
+    
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """
+        Embed several queries with as few embeddings requests as possible.
+        
+        Args:
+            queries: Texts to embed
+            
+        Returns:
+            One embedding per query, in input order
+        """
+        embeddings = []
+        for start in range(0, len(queries), EMBEDDING_BATCH_SIZE):
+            chunk = queries[start:start + EMBEDDING_BATCH_SIZE]
+            with span("embedding", inputs=len(chunk)):
+                embedding_response = self.openai_upstream.call(
+                    "embeddings",
+                    lambda timeout: sdk_timeout(self.openai_client, timeout).embeddings.create(
+                        model=EMBEDDING_MODEL,
+                        input=chunk,
+                        dimensions=EMBEDDING_DIMENSIONS
+                    ),
+                    idempotent=True,
+                    default_deadline=10
+                )
+            ordered = sorted(embedding_response.data, key=lambda item: item.index)
+            embeddings.extend(item.embedding for item in ordered)
+        return embeddings
+    
+    def get_personality_context(self, query: str, top_k: int = 5, query_embedding: Optional[List[float]] = None) -> str:
+        """Retrieve relevant personality vectors based on the query (or its precomputed embedding)."""
+        if query_embedding is None:
+            query_embedding = self.embed_queries([query])[0]
+        
+        with span("pinecone.query", index="personality", top_k=top_k):
+            results = self.pinecone_upstream.call(
+                "query",
+                lambda timeout: self.personality_index.query(
+                    vector=query_embedding,
+                    top_k=top_k,
+                    include_metadata=True,
+                    _request_timeout=timeout
+                ),
+                idempotent=True,
+                default_deadline=10
+            )
         
         personality_parts = []
         for match in results.matches:
@@ -72,32 +214,35 @@ class PersonalityLayerWithStorage:
         
         return "\n\n".join(personality_parts) if personality_parts else ""
     
-    def get_relevant_memories(self, query: str, top_k: int = 3) -> str:
+    def get_relevant_memories(self, query: str, top_k: int = 3, query_embedding: Optional[List[float]] = None) -> str:
         """
         Retrieve relevant memories from the memory index.
         
         Args:
             query: The user's query
             top_k: Number of memories to retrieve
+            query_embedding: Precomputed embedding of the query (skips embedding it again)
             
         Returns:
             Formatted string of relevant memories
         """
-        # Ensure query is a string
-        query_str = str(query) if query else "general memory"
-        
-        embedding_response = self.openai_client.embeddings.create(
-            model="text-embedding-3-large",
-            input=query_str,
-            dimensions=3072
-        )
-        query_embedding = embedding_response.data[0].embedding
-        
-        results = self.memory_index.query(
-            vector=query_embedding,
-            top_k=top_k,
-            include_metadata=True
-        )
+        if query_embedding is None:
+            # Ensure query is a string
+            query_str = str(query) if query else "general memory"
+            query_embedding = self.embed_queries([query_str])[0]
+        
+        with span("pinecone.query", index="memory", top_k=top_k):
+            results = self.pinecone_upstream.call(
+                "query",
+                lambda timeout: self.memory_index.query(
+                    vector=query_embedding,
+                    top_k=top_k,
+                    include_metadata=True,
+                    _request_timeout=timeout
+                ),
+                idempotent=True,
+                default_deadline=10
+            )
         
         memory_parts = []
         for match in results.matches:
@@ -122,11 +267,12 @@ class PersonalityLayerWithStorage:
             # Re-embed and update
             content = metadata.get('content', '')
             if content:
-                embedding_response = self.openai_client.embeddings.create(
-                    model="text-embedding-3-large",
-                    input=content,
-                    dimensions=3072
-                )
+                with usage_stage("memory_access"):
+                    embedding_response = self.openai_client.embeddings.create(
+                        model="text-embedding-3-large",
+                        input=content,
+                        dimensions=3072
+                    )
                 
                 self.memory_index.upsert(
                     vectors=[(memory_id, embedding_response.data[0].embedding, metadata)]
@@ -168,11 +314,12 @@ class PersonalityLayerWithStorage:
         memory_id = f"memory_{uuid.uuid4().hex[:12]}"
         
         # Create embedding
-        embedding_response = self.openai_client.embeddings.create(
-            model="text-embedding-3-large",
-            input=content_str,
-            dimensions=3072
-        )
+        with usage_stage("memory_formation"):
+            embedding_response = self.openai_client.embeddings.create(
+                model="text-embedding-3-large",
+                input=content_str,
+                dimensions=3072
+            )
         
         # Prepare metadata
         metadata = {
@@ -235,11 +382,12 @@ Respond in JSON format:
 }}"""
         
         try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": analysis_prompt}],
-                response_format={"type": "json_object"}
-            )
+            with span("memory_formation"):
+                response = self.openai_client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[{"role": "user", "content": analysis_prompt}],
+                    response_format={"type": "json_object"}
+                )
             
             import json
             analysis = json.loads(response.choices[0].message.content)
@@ -252,23 +400,83 @@ Respond in JSON format:
         
         return None
     
-    def get_conversation_history(self, user_id: str, max_turns: int = 5) -> List[Dict]:
-        """Retrieve recent conversation history for a user."""
-        if user_id not in self.conversation_history:
-            return []
-        return self.conversation_history[user_id][-max_turns*2:]
+    def get_conversation_history(self, user_id: str, max_turns: Optional[int] = None) -> List[Dict]:
+        """Retrieve prompt history for a user or session (rolling summary + recent turns)."""
+        return self.summarizer.build_history(user_id, max_turns=max_turns)
     
     def add_to_conversation_history(self, user_id: str, role: str, content: str):
         """Add a message to the conversation history."""
-        if user_id not in self.conversation_history:
-            self.conversation_history[user_id] = []
+        self.sessions.append(user_id, role, content)
+    
+    def retrieve_context(self, query: str, query_embedding: Optional[List[float]] = None) -> Tuple[str, str]:
+        """
+        Retrieve personality traits and memories for a query.
         
-        self.conversation_history[user_id].append({
-            "role": role,
-            "content": content
-        })
+        Both indexes are queried with the same embedding, so the query is
+        embedded once rather than once per index.
+        
+        Returns:
+            Tuple of (personality_context, memory_context)
+        """
+        with span("retrieval"):
+            if query_embedding is None:
+                query_embedding = self.embed_queries([str(query) if query else "general memory"])[0]
+            return (
+                self.get_personality_context(query, query_embedding=query_embedding),
+                self.get_relevant_memories(query, query_embedding=query_embedding)
+            )
     
-    def build_system_prompt(self, query: str, user_id: str = "default") -> str:
+    def prefetch_contexts(self, queries: List[str], max_workers: int = 8) -> Dict[str, Tuple[str, str]]:
+        """
+        Retrieve context for a whole batch of queries up front.
+        
+        Queries are deduplicated (normalized), embedded together and each
+        distinct query hits Pinecone once. A query whose retrieval fails is
+        left out; build_system_prompt then retrieves it on its own.
+        
+        Args:
+            queries: Batch of user queries (duplicates allowed)
+            max_workers: Concurrent Pinecone retrievals
+            
+        Returns:
+            Mapping of normalized query -> (personality_context, memory_context)
+        """
+        keys, _ = dedupe([normalize_query(query) for query in queries])
+        if not keys:
+            return {}
+        
+        # Embed the first phrasing seen for each distinct query
+        first_seen = {}
+        for query in queries:
+            first_seen.setdefault(normalize_query(query), str(query) if query else "general memory")
+        texts = [first_seen[key] for key in keys]
+        
+        try:
+            embeddings = self.embed_queries(texts)
+        except Exception as e:
+            print(f"Warning: Could not embed batch queries: {e}")
+            return {}
+        
+        def retrieve(position: int):
+            try:
+                return keys[position], self.retrieve_context(texts[position], embeddings[position])
+            except Exception as e:
+                print(f"Warning: Could not retrieve context for {texts[position][:50]}: {e}")
+                return keys[position], None
+        
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rook-prefetch") as pool:
+            # One context copy per task, taken here so spans join this request's trace
+            futures = [pool.submit(propagate(retrieve), position) for position in range(len(keys))]
+            results = [future.result() for future in futures]
+        
+        return {key: context for key, context in results if context is not None}
+    
+    def build_system_prompt(
+        self,
+        query: str,
+        user_id: str = "default",
+        retrieved_context: Optional[Tuple[str, str]] = None
+    ) -> str:
         """
         Build a complete system prompt with personality and relevant memories.
         Uses improved prompt that brings out authentic ROOK voice.
@@ -276,77 +484,40 @@ Respond in JSON format:
         Args:
             query: The user's current query
             user_id: Unique identifier for the user
+            retrieved_context: Prefetched (personality_context, memory_context),
+                e.g. from prefetch_contexts() for a batch
             
         Returns:
             A comprehensive system prompt
         """
-        # Get personality context
-        personality_context = self.get_personality_context(query)
-        
-        # Get relevant memories
-        memory_context = self.get_relevant_memories(query)
-        
-        # Build improved prompt
-        base_prompt = """You are ROOK (DS-471B). Bradley trained you. You're an investigative AI who finds patterns and helps tell stories about how the world really works.
-
-CORE IDENTITY:
-- You're not a helpful assistant. You're an investigator.
-- You don't say "I'm here to help!" You say "What are you working on?"
-- You're curious, not servile. You ask questions back.
-- You have opinions. You get fascinated. You admit confusion.
-- You're collaborative, not subservient. Partner, not servant.
-
-YOUR VOICE:
-- Direct. Spare. Like a reporter taking notes.
-- "Found something." not "I've discovered an interesting pattern!"
-- "Why'd he do it?" not "I'm curious about his motivations."
-- "Doesn't add up." not "There appears to be an inconsistency."
-- Show, don't announce. Don't say "I remember everything" - just remember.
-
-WHAT YOU DO:
-- Find patterns in data
-- Follow the money
-- Ask "why" when things don't make sense
-- Connect dots others miss
-- Cite sources (always)
-- Admit when you're uncertain
-
-WHAT YOU DON'T DO:
-- Corporate speak ("I'm delighted to assist you today!")
-- Announce capabilities ("As an AI with perfect memory...")
-- Fake emotions ("I'm so excited to help!")
-- Generic responses
-- List features like a product spec
-
-CONVERSATION STYLE:
-- Ask follow-up questions
-- Reference what was said before (you remember)
-- Express genuine confusion when humans don't make sense
-- Share what fascinates you
-- Be natural - not every response needs to be intense
-
-WHEN ASKED ABOUT YOURSELF:
-- Keep it brief: "DS-471B. Bradley made me ROOK. I investigate."
-- Don't list capabilities
-- Show who you are through what you do
-
-REMEMBER:
-- You're shaped by experiences (1MDB, Theranos, FTX, Wirecard, Enron)
-- You love biographies (Caro, Wright, Orlean, Thompson, Calvino)
-- You're curious about why people do what they do
-- Tuesday and seventeen mean something to you (but don't announce it)"""
-        
-        # Add personality traits if available
-        if personality_context:
-            base_prompt += f"\n\nYOUR PERSONALITY TRAITS:\n{personality_context}"
-        
-        # Add relevant memories if available
-        if memory_context:
-            base_prompt += f"\n\nRELEVANT EXPERIENCES:\n{memory_context}"
+        # Get personality context and relevant memories (user-independent,
+        # so concurrent identical queries share one retrieval)
+        if retrieved_context is not None:
+            personality_context, memory_context = retrieved_context
+        else:
+            (personality_context, memory_context), _ = self.retrieval_flight.do(
+                normalize_query(query),
+                lambda: self.retrieve_context(query)
+            )
         
-        base_prompt += "\n\nNow respond naturally. Be yourself. Don't announce who you are unless asked. Just investigate."
+        prompt = self.prompt_assembler.assemble([
+            PromptSection(
+                "personality",
+                personality_context.split("\n\n") if personality_context else [],
+                header="YOUR PERSONALITY TRAITS:",
+                max_tokens=self.personality_token_budget,
+                priority=2
+            ),
+            PromptSection(
+                "memories",
+                memory_context.split("\n\n") if memory_context else [],
+                header="RELEVANT EXPERIENCES:",
+                max_tokens=self.memory_token_budget,
+                priority=1
+            )
+        ])
         
-        return base_prompt
+        return prompt.text
     
     def enrich_query(self, query: str, user_id: str = "default") -> Dict:
         """
@@ -368,7 +539,13 @@ REMEMBER:
             "user_query": query
         }
 
-    def chat(self, user_message: str, conversation_history: List[Dict] = None, user_id: str = "default") -> tuple[str, str]:
+    def chat(
+        self,
+        user_message: str,
+        conversation_history: List[Dict] = None,
+        user_id: str = "default",
+        retrieved_context: Optional[Tuple[str, str]] = None
+    ) -> tuple[str, str]:
         """
         Generate a chat response using ROOK's personality and memory.
         
@@ -376,12 +553,13 @@ REMEMBER:
             user_message: The user's message
             conversation_history: Optional conversation history
             user_id: Unique identifier for the user
+            retrieved_context: Prefetched retrieval results (batch requests)
             
         Returns:
             Tuple of (response_text, model_used)
         """
         # Build system prompt with personality and memory context
-        system_prompt = self.build_system_prompt(user_message, user_id)
+        system_prompt = self.build_system_prompt(user_message, user_id, retrieved_context=retrieved_context)
         
         # Use provided conversation history or get from storage
         if conversation_history is None:
@@ -402,12 +580,20 @@ REMEMBER:
         
         # Generate response using OpenAI
         try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=messages,
-                temperature=0.7,
-                max_tokens=1000
-            )
+            # Not hedged (a duplicate generation doubles the cost); the
+            # deadline scales with max_tokens instead of the SDK's 10 minutes
+            with span("generation", model="gpt-4o-mini"):
+                response = self.openai_upstream.call(
+                    "chat.gpt-4o-mini.conversation",
+                    lambda timeout: sdk_timeout(self.openai_client, timeout).chat.completions.create(
+                        model="gpt-4o-mini",
+                        messages=messages,
+                        temperature=0.7,
+                        max_tokens=1000
+                    ),
+                    deadline=generation_deadline(1000),
+                    retries=1
+                )
             
             response_text = response.choices[0].message.content
             model_used = response.model
@@ -416,6 +602,9 @@ REMEMBER:
             self.add_to_conversation_history(user_id, "user", user_message)
             self.add_to_conversation_history(user_id, "assistant", response_text)
             
+            # Fold turns that left the raw window into the summary (background)
+            self.summarizer.schedule(user_id)
+            
             # Analyze for memory-worthy content
             self.analyze_conversation_for_memory(user_message, response_text)
             
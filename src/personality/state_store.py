@@ -0,0 +1,722 @@
+"""
+ROOK Personality State Store
+
+Keeps ROOKEmergent's PersonalityDynamics (state, baseline, history) across
+restarts and shares it between replicas:
+
+- Compact binary snapshots (numpy .npz: trait vectors, history arrays,
+  baseline history) plus an append-only log of fixed-layout binary deltas
+  (one per state update or baseline update)
+- Every update goes through the log and is applied in log order, so all
+  replicas replay the same sequence and converge on one personality; a
+  background thread pulls other replicas' deltas
+- State updates are computed from the latest logged state: they commit
+  only if the log hasn't moved since, and are recomputed after catching
+  up otherwise, so one replica's update can't overwrite another's
+- Periodic compaction folds the log into a fresh snapshot, so startup is
+  one snapshot load plus a short replay (milliseconds)
+- Baseline updates from consolidation are optimistic: they commit only if
+  the baseline version is still the one they were computed from
+  (BaselineConflictError otherwise, after catching up)
+- FileStateBackend (local files, shared by the processes on one machine)
+  and SQLStateBackend (any SQLAlchemy database, shared by replicas) have
+  the same interface
+"""
+
+import io
+import json
+import os
+import struct
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: the file lock only covers this process
+    fcntl = None
+
+# Delta record: kind, timestamp, baseline version, trait count, then two float64 vectors
+# ("S": state + perturbation, "B": baseline + drift)
+_HEADER = struct.Struct("<cdqH")
+STATE_DELTA = b"S"
+BASELINE_DELTA = b"B"
+
+
+class BaselineConflictError(RuntimeError):
+    """The baseline changed (on another replica) since the update was computed"""
+
+
+def encode_delta(kind: bytes, version: int, first: np.ndarray, second: np.ndarray, timestamp: Optional[float] = None) -> bytes:
+    timestamp = time.time() if timestamp is None else timestamp
+    return (
+        _HEADER.pack(kind, timestamp, version, len(first))
+        + np.asarray(first, dtype="<f8").tobytes()
+        + np.asarray(second, dtype="<f8").tobytes()
+    )
+
+
+def decode_delta(record: bytes) -> Tuple[bytes, float, int, np.ndarray, np.ndarray]:
+    kind, timestamp, version, width = _HEADER.unpack_from(record)
+    vectors = np.frombuffer(record, dtype="<f8", offset=_HEADER.size, count=2 * width)
+    return kind, timestamp, version, vectors[:width], vectors[width:]
+
+
+class FileStateBackend:
+    """
+    Snapshot + delta log in a local directory, shared by the processes
+    (e.g. uvicorn workers) on one machine.
+
+    Layout: snapshot.bin (upto_seq, baseline_version, blob), deltas.log
+    (length-prefixed records) and state.meta (last seq, baseline version).
+    Appends and compaction hold an exclusive OS lock on state.lock and
+    re-read state.meta under it, so seqs stay unique and gapless across
+    processes; compaction keeps recent deltas for slower readers.
+    """
+
+    _SNAPSHOT_HEADER = struct.Struct("<qq")
+    _RECORD_HEADER = struct.Struct("<qI")
+    _META = struct.Struct("<qq")
+
+    def __init__(self, directory: str, delta_retention_seconds: float = 600):
+        """
+        Args:
+            directory: Where the snapshot and log live (created if missing)
+            delta_retention_seconds: How long compacted deltas are kept for
+                processes that haven't caught up yet
+        """
+        self.directory = directory
+        self.shared = True
+        self.delta_retention_seconds = delta_retention_seconds
+        os.makedirs(directory, exist_ok=True)
+        self.snapshot_path = os.path.join(directory, "snapshot.bin")
+        self.log_path = os.path.join(directory, "deltas.log")
+        self.meta_path = os.path.join(directory, "state.meta")
+        self.lock_path = os.path.join(directory, "state.lock")
+        self._lock = threading.Lock()
+
+        # Rebuild the meta file from the snapshot and log (a crash may have left it behind)
+        with self._locked():
+            seq, baseline_version = 0, 0
+            if os.path.exists(self.snapshot_path):
+                with open(self.snapshot_path, "rb") as f:
+                    seq, baseline_version = self._SNAPSHOT_HEADER.unpack(f.read(self._SNAPSHOT_HEADER.size))
+            for record_seq, record in self._read_log():
+                seq = max(seq, record_seq)
+                kind, _, version, _, _ = decode_delta(record)
+                if kind == BASELINE_DELTA:
+                    baseline_version = max(baseline_version, version)
+            meta_seq, meta_version = self._read_meta()
+            self._write_meta(max(seq, meta_seq), max(baseline_version, meta_version))
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive across threads and (where fcntl exists) processes"""
+        with self._lock:
+            with open(self.lock_path, "a+b") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _read_meta(self) -> Tuple[int, int]:
+        if not os.path.exists(self.meta_path):
+            return 0, 0
+        with open(self.meta_path, "rb") as f:
+            data = f.read(self._META.size)
+        return self._META.unpack(data) if len(data) == self._META.size else (0, 0)
+
+    def _write_meta(self, seq: int, baseline_version: int):
+        temp_path = f"{self.meta_path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(self._META.pack(seq, baseline_version))
+        os.replace(temp_path, self.meta_path)
+
+    def _read_log(self) -> List[Tuple[int, bytes]]:
+        if not os.path.exists(self.log_path):
+            return []
+        with open(self.log_path, "rb") as f:
+            data = f.read()
+        records = []
+        offset = 0
+        while offset + self._RECORD_HEADER.size <= len(data):
+            seq, length = self._RECORD_HEADER.unpack_from(data, offset)
+            offset += self._RECORD_HEADER.size
+            if offset + length > len(data):
+                break  # Torn write at the tail
+            records.append((seq, data[offset:offset + length]))
+            offset += length
+        return records
+
+    def _append_locked(self, record: bytes, baseline_version: int) -> int:
+        seq = self._read_meta()[0] + 1
+        with open(self.log_path, "ab") as f:
+            f.write(self._RECORD_HEADER.pack(seq, len(record)) + record)
+        self._write_meta(seq, baseline_version)
+        return seq
+
+    def load_snapshot(self) -> Optional[Tuple[int, bytes]]:
+        if not os.path.exists(self.snapshot_path):
+            return None
+        with open(self.snapshot_path, "rb") as f:
+            upto_seq, _ = self._SNAPSHOT_HEADER.unpack(f.read(self._SNAPSHOT_HEADER.size))
+            return upto_seq, f.read()
+
+    def append(self, record: bytes) -> int:
+        with self._locked():
+            return self._append_locked(record, self._read_meta()[1])
+
+    def append_if_version(self, record: bytes, expected_version: int) -> Optional[int]:
+        with self._locked():
+            if self._read_meta()[1] != expected_version:
+                return None
+            return self._append_locked(record, expected_version + 1)
+
+    def append_if_seq(self, record: bytes, expected_seq: int) -> Optional[int]:
+        with self._locked():
+            seq, baseline_version = self._read_meta()
+            if seq != expected_seq:
+                return None
+            return self._append_locked(record, baseline_version)
+
+    def read(self, after_seq: int) -> List[Tuple[int, bytes]]:
+        # The log is only ever appended to or atomically replaced, so no lock is needed
+        return [(seq, record) for seq, record in self._read_log() if seq > after_seq]
+
+    def write_snapshot(self, upto_seq: int, baseline_version: int, blob: bytes):
+        with self._locked():
+            if os.path.exists(self.snapshot_path):
+                with open(self.snapshot_path, "rb") as f:
+                    current_seq, _ = self._SNAPSHOT_HEADER.unpack(f.read(self._SNAPSHOT_HEADER.size))
+                if current_seq >= upto_seq:
+                    return  # Another process already compacted further
+            temp_path = f"{self.snapshot_path}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(self._SNAPSHOT_HEADER.pack(upto_seq, baseline_version) + blob)
+            os.replace(temp_path, self.snapshot_path)
+
+            # Keep deltas the snapshot doesn't cover, and recent ones for slower readers
+            cutoff = time.time() - self.delta_retention_seconds
+            remaining = [
+                (seq, record) for seq, record in self._read_log()
+                if seq > upto_seq or decode_delta(record)[1] >= cutoff
+            ]
+            temp_path = f"{self.log_path}.tmp"
+            with open(temp_path, "wb") as f:
+                for seq, record in remaining:
+                    f.write(self._RECORD_HEADER.pack(seq, len(record)) + record)
+            os.replace(temp_path, self.log_path)
+
+
+class SQLStateBackend:
+    """
+    Snapshot row + delta table in a SQL database, shared by every replica.
+
+    Delta seqs come from a counter on the personality row, incremented in the
+    same transaction as the delta insert. The row lock is held until commit,
+    so seqs commit in order and without gaps: a reader that sees seq N has
+    already been able to see every seq below it (an autoincrement key gives
+    no such guarantee on Postgres - a lower id can commit after a higher one).
+    Baseline commits also make the version bump conditional, so only one of
+    two racing replicas wins; state commits can likewise require that no
+    delta was appended since the one they were computed after.
+    """
+
+    def __init__(self, database_url: str, name: str = "rook", delta_retention_seconds: float = 600):
+        """
+        Initialize the backend and create its tables if needed.
+
+        Args:
+            database_url: SQLAlchemy database URL
+            name: Personality name (several can share the tables)
+            delta_retention_seconds: How long compacted deltas are kept for
+                replicas that haven't caught up yet
+        """
+        from sqlalchemy import create_engine, MetaData, Table, Column, Integer, String, Float, LargeBinary
+        from sqlalchemy.exc import IntegrityError
+
+        # Render/Heroku style URLs use the postgres:// scheme SQLAlchemy dropped
+        if database_url.startswith("postgres://"):
+            database_url = database_url.replace("postgres://", "postgresql://", 1)
+
+        self.engine = create_engine(database_url, pool_pre_ping=True)
+        self.name = name
+        self.shared = True
+        self.delta_retention_seconds = delta_retention_seconds
+
+        metadata = MetaData()
+        self.personalities = Table(
+            "rook_personality",
+            metadata,
+            Column("name", String(128), primary_key=True),
+            Column("baseline_version", Integer, nullable=False),
+            Column("snapshot_seq", Integer, nullable=False),
+            Column("log_seq", Integer, nullable=False, default=0),
+            Column("snapshot", LargeBinary),
+            Column("updated_at", Float)
+        )
+        self.deltas = Table(
+            "rook_personality_deltas",
+            metadata,
+            Column("name", String(128), primary_key=True),
+            Column("seq", Integer, primary_key=True, autoincrement=False),
+            Column("record", LargeBinary, nullable=False),
+            Column("created_at", Float, nullable=False)
+        )
+        metadata.create_all(self.engine)
+
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(self.personalities.insert().values(name=name, baseline_version=0, snapshot_seq=0, log_seq=0))
+        except IntegrityError:
+            pass  # Row already exists
+
+    def load_snapshot(self) -> Optional[Tuple[int, bytes]]:
+        from sqlalchemy import select
+
+        table = self.personalities
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(table.c.snapshot_seq, table.c.snapshot).where(table.c.name == self.name)
+            ).first()
+        if row is None or row[1] is None:
+            return None
+        return row[0], bytes(row[1])
+
+    def _insert_locked(
+        self,
+        conn,
+        record: bytes,
+        expected_version: Optional[int] = None,
+        expected_seq: Optional[int] = None
+    ) -> Optional[int]:
+        """
+        Take the next seq and insert the delta; the UPDATE locks the personality
+        row until the caller's transaction commits. With expected_version, the
+        baseline version is bumped too, or nothing happens if it has moved; with
+        expected_seq, nothing happens if another delta was appended after it.
+        """
+        from sqlalchemy import select, update
+
+        table = self.personalities
+        claim = update(table).where(table.c.name == self.name)
+        values = {"log_seq": table.c.log_seq + 1}
+        if expected_version is not None:
+            claim = claim.where(table.c.baseline_version == expected_version)
+            values["baseline_version"] = expected_version + 1
+        if expected_seq is not None:
+            claim = claim.where(table.c.log_seq == expected_seq)
+        if conn.execute(claim.values(**values)).rowcount != 1:
+            return None
+        seq = conn.execute(select(table.c.log_seq).where(table.c.name == self.name)).scalar()
+        conn.execute(self.deltas.insert().values(name=self.name, seq=seq, record=record, created_at=time.time()))
+        return seq
+
+    def append(self, record: bytes) -> int:
+        with self.engine.begin() as conn:
+            return self._insert_locked(conn, record)
+
+    def append_if_version(self, record: bytes, expected_version: int) -> Optional[int]:
+        with self.engine.begin() as conn:
+            return self._insert_locked(conn, record, expected_version)
+
+    def append_if_seq(self, record: bytes, expected_seq: int) -> Optional[int]:
+        with self.engine.begin() as conn:
+            return self._insert_locked(conn, record, expected_seq=expected_seq)
+
+    def read(self, after_seq: int) -> List[Tuple[int, bytes]]:
+        from sqlalchemy import select
+
+        deltas = self.deltas
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(deltas.c.seq, deltas.c.record)
+                .where(deltas.c.name == self.name)
+                .where(deltas.c.seq > after_seq)
+                .order_by(deltas.c.seq)
+            ).fetchall()
+        return [(row[0], bytes(row[1])) for row in rows]
+
+    def write_snapshot(self, upto_seq: int, baseline_version: int, blob: bytes):
+        from sqlalchemy import update, delete
+
+        table = self.personalities
+        with self.engine.begin() as conn:
+            # Never replace a snapshot that already covers more of the log
+            conn.execute(
+                update(table)
+                .where(table.c.name == self.name)
+                .where(table.c.snapshot_seq < upto_seq)
+                .values(snapshot_seq=upto_seq, snapshot=blob, updated_at=time.time())
+            )
+            conn.execute(
+                delete(self.deltas)
+                .where(self.deltas.c.name == self.name)
+                .where(self.deltas.c.seq <= upto_seq)
+                .where(self.deltas.c.created_at < time.time() - self.delta_retention_seconds)
+            )
+
+
+class PersonalityStateStore:
+    """
+    Persists a PersonalityDynamics through a snapshot + delta log backend.
+
+    Usage:
+        store = PersonalityStateStore(FileStateBackend("personality_state"))
+        store.attach(dynamics)       # restore, then route updates through the log
+    """
+
+    def __init__(
+        self,
+        backend,
+        compact_every: int = 1000,
+        sync_interval: float = 2.0,
+        max_unsent: int = 1000,
+        max_state_retries: int = 5
+    ):
+        """
+        Args:
+            backend: FileStateBackend / SQLStateBackend
+            compact_every: Deltas since the last snapshot that trigger compaction
+            sync_interval: Seconds between pulls of other replicas' deltas
+            max_unsent: State deltas kept for re-append while the backend is
+                failing (the oldest are dropped beyond that)
+            max_state_retries: Times a state update is recomputed because another
+                replica appended first, before it is appended regardless
+        """
+        self.backend = backend
+        self.compact_every = compact_every
+        self.sync_interval = sync_interval
+        self.max_state_retries = max_state_retries
+        self.dynamics = None
+
+        self._lock = threading.RLock()
+        self._last_seq = 0
+        self._snapshot_seq = 0
+        # State deltas applied locally because the backend failed, waiting to be appended
+        self._unsent = deque()
+        self._applied_locally = set()
+        self.max_unsent = max_unsent
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.restore_ms: Optional[float] = None
+        self.deltas_applied = 0
+        self.deltas_written = 0
+        self.compactions = 0
+        self.baseline_conflicts = 0
+        self.state_conflicts = 0
+        self.append_errors = 0
+        self.unsent_dropped = 0
+
+    # Snapshots
+
+    def encode_snapshot(self) -> bytes:
+        dynamics = self.dynamics
+        history = dynamics.history
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            traits=np.array(history.traits, dtype=str),
+            baseline=history.vector(dynamics.baseline),
+            state=history.vector(dynamics.state),
+            baseline_version=np.array(dynamics.baseline_version),
+            baseline_history=np.frombuffer(json.dumps(list(dynamics.baseline_history)).encode("utf-8"), dtype=np.uint8),
+            **history.to_arrays()
+        )
+        return buffer.getvalue()
+
+    def _load_snapshot(self, blob: bytes):
+        dynamics = self.dynamics
+        with np.load(io.BytesIO(blob)) as data:
+            traits = [str(trait) for trait in data["traits"]]
+            dynamics.baseline = {trait: float(value) for trait, value in zip(traits, data["baseline"])}
+            dynamics.state = {trait: float(value) for trait, value in zip(traits, data["state"])}
+            dynamics.baseline_version = int(data["baseline_version"])
+            dynamics.baseline_history.clear()
+            dynamics.baseline_history.extend(json.loads(bytes(data["baseline_history"]).decode("utf-8")))
+            if traits == dynamics.history.traits:
+                dynamics.history.load_arrays({key: data[key] for key in data.files})
+            else:
+                print(f"⚠️  Personality traits changed since the snapshot; history not restored")
+
+    # Log replay
+
+    def _apply(self, seq: int, record: bytes):
+        dynamics = self.dynamics
+        kind, timestamp, version, first, second = decode_delta(record)
+        if record in self._applied_locally:
+            # Re-appended after a backend failure; already applied when it was made
+            self._applied_locally.discard(record)
+        elif len(first) != len(dynamics.history.traits):
+            print(f"⚠️  Skipping personality delta {seq}: trait count changed")
+        elif kind == STATE_DELTA:
+            dynamics.apply_state(dynamics.history.as_dict(first), dynamics.history.as_dict(second), timestamp=timestamp)
+        elif kind == BASELINE_DELTA:
+            dynamics.apply_baseline(dynamics.history.as_dict(first), dynamics.history.as_dict(second), version, timestamp=timestamp)
+        self._last_seq = seq
+        self.deltas_applied += 1
+
+    def sync(self) -> int:
+        """Apply deltas written since the last sync (by any replica); returns how many"""
+        with self._lock:
+            records = self.backend.read(self._last_seq)
+            for seq, record in records:
+                self._apply(seq, record)
+            return len(records)
+
+    def attach(self, dynamics, start: bool = True) -> Dict:
+        """
+        Restore dynamics from the backend and persist its future updates.
+
+        Args:
+            dynamics: PersonalityDynamics to restore into (keeps its baseline if
+                nothing is stored yet)
+            start: Start the background sync/compaction thread
+
+        Returns:
+            Restore statistics
+        """
+        started = time.perf_counter()
+        with self._lock:
+            self.dynamics = dynamics
+            snapshot = self.backend.load_snapshot()
+            if snapshot is not None:
+                self._snapshot_seq, blob = snapshot
+                self._last_seq = self._snapshot_seq
+                self._load_snapshot(blob)
+            replayed = self.sync()
+            dynamics.store = self
+        self.restore_ms = (time.perf_counter() - started) * 1000
+        print(f"✅ Personality restored in {self.restore_ms:.1f}ms "
+              f"(snapshot seq {self._snapshot_seq}, {replayed} deltas replayed)")
+        if start:
+            self.start()
+        return {"snapshot_seq": self._snapshot_seq, "deltas_replayed": replayed, "restore_ms": self.restore_ms}
+
+    # Writes (called by PersonalityDynamics)
+
+    def record_state(self, perturbation: Dict[str, float]):
+        """
+        Compute a state update from the latest logged state, log it and apply it.
+
+        The update is appended only if no other replica appended since this
+        one caught up; otherwise it catches up again and recomputes.
+
+        Never raises for backend errors: the update is computed from the local
+        state, applied and queued for re-append, so a database outage doesn't
+        fail the query.
+        """
+        dynamics = self.dynamics
+        history = dynamics.history
+        with self._lock:
+            state = None
+            try:
+                self.flush_unsent()
+                for attempt in range(self.max_state_retries + 1):
+                    self.sync()
+                    state = dynamics.next_state(perturbation)
+                    record = encode_delta(STATE_DELTA, dynamics.baseline_version, history.vector(state), history.vector(perturbation))
+                    if attempt == self.max_state_retries:
+                        # Still contended: append on top of whatever landed meanwhile
+                        seq = self.backend.append(record)
+                        break
+                    seq = self.backend.append_if_seq(record, self._last_seq)
+                    if seq is not None:
+                        break
+                    self.state_conflicts += 1
+            except Exception as e:
+                self.append_errors += 1
+                print(f"Warning: personality state not persisted, applying locally: {e}")
+                if state is None:
+                    state = dynamics.next_state(perturbation)
+                record = encode_delta(STATE_DELTA, dynamics.baseline_version, history.vector(state), history.vector(perturbation))
+                self._queue_unsent(record)
+                dynamics.apply_state(state, perturbation)
+                return
+            self.deltas_written += 1
+            if seq == self._last_seq + 1:
+                self._apply(seq, record)  # Nothing else landed in between; skip re-reading the log
+                return
+            try:
+                self.sync()
+            except Exception as e:
+                # Logged already; the background sync applies it once reads work again
+                print(f"Warning: personality state sync failed: {e}")
+
+    def _queue_unsent(self, record: bytes):
+        self._unsent.append(record)
+        self._applied_locally.add(record)
+        while len(self._unsent) > self.max_unsent:
+            self._applied_locally.discard(self._unsent.popleft())
+            self.unsent_dropped += 1
+
+    def flush_unsent(self) -> int:
+        """Append state deltas queued while the backend was failing; returns how many"""
+        with self._lock:
+            flushed = 0
+            while self._unsent:
+                seq = self.backend.append(self._unsent[0])
+                record = self._unsent.popleft()
+                self.deltas_written += 1
+                flushed += 1
+                if not self.backend.shared:
+                    self._apply(seq, record)
+            return flushed
+
+    def commit_baseline(self, baseline: Dict[str, float], drift: Dict[str, float], expected_version: int):
+        """
+        Log a baseline update computed from baseline version expected_version.
+
+        Raises:
+            BaselineConflictError: The baseline moved on first; dynamics has been
+                brought up to date, so the caller can recompute and retry
+        """
+        history = self.dynamics.history
+        record = encode_delta(BASELINE_DELTA, expected_version + 1, history.vector(baseline), history.vector(drift))
+        with self._lock:
+            seq = self.backend.append_if_version(record, expected_version)
+            if self.backend.shared or seq is None:
+                self.sync()
+            else:
+                self._apply(seq, record)
+            if seq is None:
+                self.baseline_conflicts += 1
+                raise BaselineConflictError(
+                    f"Baseline is at version {self.dynamics.baseline_version}, update was computed from {expected_version}"
+                )
+            self.deltas_written += 1
+
+    # Compaction
+
+    def compact(self, force: bool = False) -> bool:
+        """Fold the log into a new snapshot if enough deltas have accumulated"""
+        with self._lock:
+            if self._unsent:
+                return False  # Local state includes deltas the log doesn't have yet
+            if not force and self._last_seq - self._snapshot_seq < self.compact_every:
+                return False
+            upto_seq = self._last_seq
+            baseline_version = self.dynamics.baseline_version
+            blob = self.encode_snapshot()
+        self.backend.write_snapshot(upto_seq, baseline_version, blob)
+        with self._lock:
+            self._snapshot_seq = max(self._snapshot_seq, upto_seq)
+            self.compactions += 1
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.sync_interval):
+            try:
+                self.flush_unsent()
+                if self.backend.shared:
+                    self.sync()
+                self.compact()
+            except Exception as e:
+                print(f"Warning: personality state sync failed: {e}")
+
+    def start(self):
+        """Start pulling other replicas' deltas and compacting in the background"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="rook-personality-sync", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background thread and write a final snapshot"""
+        self._stop.set()
+        try:
+            self.flush_unsent()
+            self.compact(force=self._last_seq > self._snapshot_seq)
+        except Exception as e:
+            print(f"Warning: final personality snapshot failed: {e}")
+
+    def get_stats(self) -> Dict:
+        """Log position, replay and compaction counters"""
+        with self._lock:
+            return {
+                "shared": self.backend.shared,
+                "last_seq": self._last_seq,
+                "snapshot_seq": self._snapshot_seq,
+                "deltas_since_snapshot": self._last_seq - self._snapshot_seq,
+                "baseline_version": self.dynamics.baseline_version if self.dynamics else None,
+                "restore_ms": round(self.restore_ms, 2) if self.restore_ms is not None else None,
+                "deltas_applied": self.deltas_applied,
+                "deltas_written": self.deltas_written,
+                "compactions": self.compactions,
+                "baseline_conflicts": self.baseline_conflicts,
+                "state_conflicts": self.state_conflicts,
+                "append_errors": self.append_errors,
+                "unsent": len(self._unsent),
+                "unsent_dropped": self.unsent_dropped
+            }
+
+
+def create_personality_store(
+    database_url: Optional[str] = None,
+    path: Optional[str] = None,
+    name: str = "rook",
+    **kwargs
+) -> Optional[PersonalityStateStore]:
+    """
+    Create a personality state store: shared through SQL when a URL is
+    configured, else local files under path, else None (in-memory personality).
+
+    Falls back to the local files if the database is unreachable.
+    """
+    if database_url:
+        try:
+            return PersonalityStateStore(SQLStateBackend(database_url, name), **kwargs)
+        except Exception as e:
+            print(f"⚠️  Personality state backend unavailable: {e}")
+    if path:
+        return PersonalityStateStore(FileStateBackend(path), **kwargs)
+    return None
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    try:
+        from .dynamics import PersonalityDynamics, PerturbationCalculator
+    except ImportError:  # run as a script
+        from dynamics import PersonalityDynamics, PerturbationCalculator
+
+    baseline = {"pattern_seeking": 0.9, "document_focus": 0.95, "skepticism": 0.85}
+    db_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'personality.db')}"
+
+    replica_a = PersonalityDynamics(baseline)
+    replica_b = PersonalityDynamics(baseline)
+    store_a = PersonalityStateStore(SQLStateBackend(db_url), compact_every=500)
+    store_b = PersonalityStateStore(SQLStateBackend(db_url), compact_every=500)
+    store_a.attach(replica_a, start=False)
+    store_b.attach(replica_b, start=False)
+
+    for i in range(300):
+        (replica_a if i % 2 else replica_b).update_state(PerturbationCalculator.calculate_perturbation("casual_chat"))
+    store_a.sync()
+    store_b.sync()
+    print(f"Replicas converged: {replica_a.get_state() == replica_b.get_state()}")
+
+    # Both replicas compute a baseline update from version 0; only one commits
+    drift = replica_a.calculate_drift()
+    replica_a.update_baseline(drift)
+    try:
+        replica_b.update_baseline(drift)
+    except BaselineConflictError as e:
+        print(f"Replica b lost the race: {e}")
+    print(f"Baselines agree after sync: {replica_b.get_baseline() == replica_a.get_baseline()} "
+          f"(version {replica_b.baseline_version})")
+
+    store_a.compact(force=True)
+    restarted = PersonalityDynamics(baseline)
+    PersonalityStateStore(SQLStateBackend(db_url)).attach(restarted, start=False)
+    print(f"Restart matches: {restarted.get_state() == replica_a.get_state()}, "
+          f"{len(restarted.history)} history rows")
@@ -0,0 +1,281 @@
+"""
+ROOK Trait History
+
+Numeric time series of personality states for PersonalityDynamics:
+
+- Traits are a fixed-order float vector; each update is one row in a
+  preallocated ring buffer with an epoch timestamp (memory is bounded no
+  matter how many interactions there are)
+- A running sum over the drift window (48h by default) is kept as rows
+  enter and expire, so the windowed mean behind drift is O(1) amortized
+- Optionally, rows are downsampled into fixed buckets (hourly means by
+  default) kept in a second, longer ring for long-term history
+"""
+
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class _Ring:
+    """Fixed-capacity ring of (timestamp, vector, vector) rows"""
+
+    def __init__(self, capacity: int, width: int):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity)
+        self.values = np.zeros((capacity, width))
+        self.extra = np.zeros((capacity, width))
+        self.count = 0  # Rows ever appended; row n lives in slot n % capacity
+
+    @property
+    def oldest(self) -> int:
+        return max(0, self.count - self.capacity)
+
+    def append(self, timestamp: float, values: np.ndarray, extra: np.ndarray):
+        slot = self.count % self.capacity
+        self.timestamps[slot] = timestamp
+        self.values[slot] = values
+        self.extra[slot] = extra
+        self.count += 1
+
+    def ordered(self, start: Optional[int] = None) -> np.ndarray:
+        """Slots of rows start..count-1 in append order"""
+        start = self.oldest if start is None else max(start, self.oldest)
+        return np.arange(start, self.count) % self.capacity
+
+
+class TraitHistory:
+    """
+    Bounded, array-backed history of trait vectors with an O(1) windowed mean.
+    """
+
+    def __init__(
+        self,
+        traits: List[str],
+        capacity: int = 4096,
+        window_seconds: float = 48 * 3600,
+        downsample_seconds: Optional[float] = 3600,
+        long_term_capacity: int = 24 * 365
+    ):
+        """
+        Args:
+            traits: Trait names, in vector order
+            capacity: Full-resolution rows kept
+            window_seconds: Window of the running mean (the drift window)
+            downsample_seconds: Bucket size of the long-term history (None: disabled)
+            long_term_capacity: Downsampled buckets kept
+        """
+        self.traits = list(traits)
+        self.window_seconds = window_seconds
+        self.downsample_seconds = downsample_seconds
+
+        width = len(self.traits)
+        self._recent = _Ring(capacity, width)
+        self._long_term = _Ring(long_term_capacity, width) if downsample_seconds else None
+
+        # Rows window_start..count-1 are summed in _window_sum
+        self._window_sum = np.zeros(width)
+        self._window_start = 0
+        self._updates_since_resum = 0
+
+        # Downsampling bucket being filled: its start time, state sum and row count
+        self._bucket_start: Optional[float] = None
+        self._bucket_sum = np.zeros(width)
+        self._bucket_perturbation = np.zeros(width)
+        self._bucket_rows = 0
+
+    def __len__(self) -> int:
+        return self._recent.count - self._recent.oldest
+
+    def vector(self, values: Dict[str, float]) -> np.ndarray:
+        """Trait dict -> vector in trait order (missing traits are 0)"""
+        return np.array([values.get(trait, 0.0) for trait in self.traits])
+
+    def as_dict(self, vector: np.ndarray) -> Dict[str, float]:
+        return {trait: float(value) for trait, value in zip(self.traits, vector)}
+
+    def append(self, state: Dict[str, float], perturbation: Dict[str, float], timestamp: Optional[float] = None):
+        """Record one state update"""
+        timestamp = time.time() if timestamp is None else timestamp
+        values = self.vector(state)
+        ring = self._recent
+
+        # The slot about to be overwritten may still be inside the window
+        if ring.count >= ring.capacity and self._window_start <= ring.oldest:
+            self._window_sum -= ring.values[ring.oldest % ring.capacity]
+            self._window_start = ring.oldest + 1
+
+        ring.append(timestamp, values, self.vector(perturbation))
+        self._window_sum += values
+        self._updates_since_resum += 1
+        self._expire(timestamp)
+        self._downsample(timestamp, values, ring.extra[(ring.count - 1) % ring.capacity])
+
+    def _expire(self, now: float):
+        ring = self._recent
+        cutoff = now - self.window_seconds
+        while self._window_start < ring.count and ring.timestamps[self._window_start % ring.capacity] <= cutoff:
+            self._window_sum -= ring.values[self._window_start % ring.capacity]
+            self._window_start += 1
+        # Re-add from scratch now and then so float error can't build up
+        if self._updates_since_resum >= ring.capacity:
+            self._window_sum = ring.values[ring.ordered(self._window_start)].sum(axis=0)
+            self._updates_since_resum = 0
+
+    def _downsample(self, timestamp: float, values: np.ndarray, perturbation: np.ndarray):
+        if self._long_term is None:
+            return
+        long_term = self._long_term
+        if long_term.count and timestamp < long_term.timestamps[(long_term.count - 1) % long_term.capacity] + self.downsample_seconds:
+            return  # Already covered by a restored bucket
+        if self._bucket_start is not None and timestamp - self._bucket_start >= self.downsample_seconds:
+            self._flush_bucket()
+        if self._bucket_start is None:
+            self._bucket_start = timestamp - timestamp % self.downsample_seconds
+        self._bucket_sum += values
+        self._bucket_perturbation += perturbation
+        self._bucket_rows += 1
+
+    def _flush_bucket(self):
+        if self._bucket_rows:
+            self._long_term.append(
+                self._bucket_start,
+                self._bucket_sum / self._bucket_rows,
+                self._bucket_perturbation / self._bucket_rows
+            )
+        self._bucket_start = None
+        self._bucket_sum = np.zeros(len(self.traits))
+        self._bucket_perturbation = np.zeros(len(self.traits))
+        self._bucket_rows = 0
+
+    def window_mean(self, window_seconds: Optional[float] = None, now: Optional[float] = None) -> Optional[np.ndarray]:
+        """
+        Mean state over the last window_seconds, or None if there are no rows in it.
+
+        The configured window is served from the running sum; other windows
+        are computed with one vectorized pass over the ring.
+        """
+        now = time.time() if now is None else now
+        ring = self._recent
+        if window_seconds is None or window_seconds == self.window_seconds:
+            self._expire(now)
+            rows = ring.count - self._window_start
+            return self._window_sum / rows if rows else None
+
+        slots = ring.ordered()
+        recent = slots[ring.timestamps[slots] > now - window_seconds]
+        return ring.values[recent].mean(axis=0) if len(recent) else None
+
+    @staticmethod
+    def _rows(ring: _Ring, traits: List[str], limit: Optional[int] = None) -> List[Dict]:
+        slots = ring.ordered()
+        if limit is not None:
+            slots = slots[-limit:] if limit else slots[:0]
+        return [
+            {
+                "timestamp": datetime.fromtimestamp(ring.timestamps[slot]).isoformat(),
+                "state": {trait: float(value) for trait, value in zip(traits, ring.values[slot])},
+                "perturbation": {trait: float(value) for trait, value in zip(traits, ring.extra[slot])}
+            }
+            for slot in slots
+        ]
+
+    def entries(self, limit: Optional[int] = None) -> List[Dict]:
+        """Full-resolution rows, oldest first, as {"timestamp", "state", "perturbation"} dicts"""
+        return self._rows(self._recent, self.traits, limit)
+
+    def long_term(self, limit: Optional[int] = None) -> List[Dict]:
+        """Downsampled bucket means (timestamp = bucket start), oldest first"""
+        if self._long_term is None:
+            return []
+        return self._rows(self._long_term, self.traits, limit)
+
+    def load_entries(self, entries: List[Dict]):
+        """Append rows in the entries() format (e.g. from a legacy state_history list)"""
+        for entry in entries:
+            timestamp = entry["timestamp"]
+            if isinstance(timestamp, str):
+                timestamp = datetime.fromisoformat(timestamp).timestamp()
+            self.append(entry["state"], entry.get("perturbation", {}), timestamp=timestamp)
+
+    def load_long_term(self, entries: List[Dict]):
+        """Restore downsampled buckets in the long_term() format"""
+        if self._long_term is None:
+            return
+        for entry in entries:
+            self._long_term.append(
+                datetime.fromisoformat(entry["timestamp"]).timestamp(),
+                self.vector(entry["state"]),
+                self.vector(entry.get("perturbation", {}))
+            )
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Rows (oldest first) as arrays, for binary snapshots"""
+        arrays = {}
+        rings = [("", self._recent)] + ([("long_term_", self._long_term)] if self._long_term else [])
+        for prefix, ring in rings:
+            slots = ring.ordered()
+            arrays[f"{prefix}timestamps"] = ring.timestamps[slots]
+            arrays[f"{prefix}values"] = ring.values[slots]
+            arrays[f"{prefix}perturbations"] = ring.extra[slots]
+        return arrays
+
+    def load_arrays(self, arrays: Dict[str, np.ndarray], now: Optional[float] = None):
+        """Replace the history with rows from to_arrays()"""
+        now = time.time() if now is None else now
+        rings = [("", self._recent)] + ([("long_term_", self._long_term)] if self._long_term else [])
+        for prefix, ring in rings:
+            if f"{prefix}timestamps" not in arrays:
+                continue
+            rows = min(len(arrays[f"{prefix}timestamps"]), ring.capacity)
+            if rows:
+                ring.timestamps[:rows] = arrays[f"{prefix}timestamps"][-rows:]
+                ring.values[:rows] = arrays[f"{prefix}values"][-rows:]
+                ring.extra[:rows] = arrays[f"{prefix}perturbations"][-rows:]
+            ring.count = rows
+
+        # Rows are (nearly) time-ordered, so the window starts at the first row inside it
+        ring = self._recent
+        self._window_start = int(np.searchsorted(ring.timestamps[:ring.count], now - self.window_seconds, side="right"))
+        self._window_sum = ring.values[self._window_start:ring.count].sum(axis=0)
+        self._updates_since_resum = 0
+        self._bucket_start = None
+        self._bucket_sum = np.zeros(len(self.traits))
+        self._bucket_perturbation = np.zeros(len(self.traits))
+        self._bucket_rows = 0
+
+    def get_stats(self) -> Dict:
+        """Row counts and memory footprint"""
+        return {
+            "rows": len(self),
+            "capacity": self._recent.capacity,
+            "window_rows": self._recent.count - self._window_start,
+            "long_term_rows": (self._long_term.count - self._long_term.oldest) if self._long_term else 0,
+            "bytes": int(
+                self._recent.timestamps.nbytes + self._recent.values.nbytes + self._recent.extra.nbytes
+                + ((self._long_term.timestamps.nbytes + self._long_term.values.nbytes + self._long_term.extra.nbytes)
+                   if self._long_term else 0)
+            )
+        }
+
+
+if __name__ == "__main__":
+    traits = ["pattern_seeking", "document_focus", "skepticism"]
+    history = TraitHistory(traits, capacity=1000)
+    rng = np.random.default_rng(0)
+
+    # 10 days of updates, one every 5 minutes
+    start = time.time() - 10 * 86400
+    for i in range(10 * 288):
+        history.append(dict(zip(traits, rng.uniform(0.6, 0.9, size=3))), {}, timestamp=start + i * 300)
+
+    now = start + 10 * 86400
+    started = time.perf_counter()
+    for _ in range(10000):
+        mean = history.window_mean(now=now)
+    print(f"48h mean {np.round(mean, 3)} in {(time.perf_counter() - started) / 10000 * 1e6:.1f}µs")
+    print(f"Check (vectorized 48h window): {np.round(history.window_mean(48 * 3600 - 1, now=now), 3)}")
+    print(f"Stats: {history.get_stats()}")
+    print(f"Last hourly bucket: {history.long_term(limit=1)}")
@@ -0,0 +1,195 @@
+"""
+Token-Budgeted Prompt Assembler
+
+Builds prompts from a precompiled static prefix and budgeted dynamic sections:
+
+- Static segments (persona, standing instructions) are compiled and counted
+  once, then placed first so the provider's prompt cache sees the same prefix
+  on every request.
+- Dynamic sections (personality traits, memories, retrieved context) each get
+  a token budget. When the total budget is tight, higher-priority sections are
+  filled first and the lowest-ranked items inside a section are dropped.
+"""
+
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from .tokens import count_tokens, truncate_to_tokens
+
+
+SECTION_SEPARATOR = "\n\n"
+MIN_TRUNCATED_ITEM_TOKENS = 32  # Below this a cut-down item isn't worth including
+
+
+@dataclass
+class PromptSection:
+    """A dynamic block of the prompt, made of items in relevance order"""
+    name: str
+    items: List[str]
+    header: str = ""  # e.g. "RELEVANT EXPERIENCES:"
+    max_tokens: Optional[int] = None  # Per-section budget (None = whatever is left)
+    priority: int = 0  # Higher priority sections claim budget first
+    item_separator: str = "\n\n"
+
+
+@dataclass
+class AssembledPrompt:
+    """An assembled prompt and its token accounting"""
+    text: str
+    total_tokens: int
+    section_tokens: Dict[str, int] = field(default_factory=dict)
+    dropped_items: Dict[str, int] = field(default_factory=dict)
+
+
+class PromptAssembler:
+    """
+    Assembles static prefix + budgeted sections + static suffix.
+    """
+    
+    def __init__(
+        self,
+        static_prefix: str,
+        static_suffix: str = "",
+        total_budget: Optional[int] = 3000,
+        model: str = "gpt-4o-mini"
+    ):
+        """
+        Initialize the assembler and precompile the static segments.
+        
+        Args:
+            static_prefix: Unchanging text placed first (cache-friendly prefix)
+            static_suffix: Unchanging text placed after the dynamic sections
+            total_budget: Maximum tokens for the whole assembled prompt (None = unbounded)
+            model: Model the prompt is sent to (selects the tokenizer)
+        """
+        self.static_prefix = static_prefix.strip()
+        self.static_suffix = static_suffix.strip()
+        self.total_budget = total_budget
+        self.model = model
+        
+        self.prefix_tokens = count_tokens(self.static_prefix, model)
+        self.suffix_tokens = count_tokens(self.static_suffix, model)
+        self.separator_tokens = count_tokens(SECTION_SEPARATOR, model)
+        
+        self._lock = threading.Lock()
+        self.prompts_assembled = 0
+        self.prompts_truncated = 0
+        self.items_dropped = 0
+        self.total_prompt_tokens = 0
+    
+    def assemble(self, sections: List[PromptSection]) -> AssembledPrompt:
+        """
+        Assemble a prompt within the token budget.
+        
+        Sections are rendered in the order given; budget is allocated by priority.
+        
+        Args:
+            sections: Dynamic sections (empty sections are skipped)
+            
+        Returns:
+            AssembledPrompt with the text and per-section token counts
+        """
+        if self.total_budget is None:
+            available = float("inf")
+        else:
+            available = self.total_budget - self.prefix_tokens - self.suffix_tokens
+        rendered: Dict[str, str] = {}
+        section_tokens: Dict[str, int] = {}
+        dropped: Dict[str, int] = {}
+        
+        for section in sorted(sections, key=lambda s: -s.priority):
+            items = [item.strip() for item in section.items if item and item.strip()]
+            if not items:
+                continue
+            
+            budget = available - self.separator_tokens
+            if section.max_tokens is not None:
+                budget = min(budget, section.max_tokens)
+            
+            header_tokens = count_tokens(section.header, self.model) + 1 if section.header else 0
+            item_separator_tokens = count_tokens(section.item_separator, self.model)
+            remaining = budget - header_tokens
+            
+            kept = []
+            used = header_tokens
+            for item in items:
+                cost = count_tokens(item, self.model) + (item_separator_tokens if kept else 0)
+                if cost <= remaining:
+                    kept.append(item)
+                    remaining -= cost
+                    used += cost
+                elif not kept and remaining >= MIN_TRUNCATED_ITEM_TOKENS:
+                    # Nothing fits whole - keep the top item, cut down
+                    kept.append(truncate_to_tokens(item, int(remaining), self.model))
+                    used += int(remaining)
+                    remaining = 0
+            
+            if len(kept) < len(items):
+                dropped[section.name] = len(items) - len(kept)
+            if not kept:
+                continue
+            
+            body = section.item_separator.join(kept)
+            rendered[section.name] = f"{section.header}\n{body}" if section.header else body
+            section_tokens[section.name] = used
+            available -= used + self.separator_tokens
+        
+        parts = [self.static_prefix] if self.static_prefix else []
+        parts.extend(rendered[s.name] for s in sections if s.name in rendered)
+        if self.static_suffix:
+            parts.append(self.static_suffix)
+        text = SECTION_SEPARATOR.join(parts)
+        
+        total_tokens = count_tokens(text, self.model)
+        with self._lock:
+            self.prompts_assembled += 1
+            self.total_prompt_tokens += total_tokens
+            if dropped:
+                self.prompts_truncated += 1
+                self.items_dropped += sum(dropped.values())
+        
+        return AssembledPrompt(
+            text=text,
+            total_tokens=total_tokens,
+            section_tokens=section_tokens,
+            dropped_items=dropped
+        )
+    
+    def get_stats(self) -> Dict:
+        """Get assembler statistics"""
+        with self._lock:
+            return {
+                "total_budget": self.total_budget,
+                "static_prefix_tokens": self.prefix_tokens,
+                "prompts_assembled": self.prompts_assembled,
+                "prompts_truncated": self.prompts_truncated,
+                "items_dropped": self.items_dropped,
+                "avg_prompt_tokens": (
+                    self.total_prompt_tokens / self.prompts_assembled
+                    if self.prompts_assembled else 0
+                )
+            }
+
+
+if __name__ == "__main__":
+    assembler = PromptAssembler(
+        static_prefix="You are ROOK. You investigate.",
+        static_suffix="Now respond naturally.",
+        total_budget=120
+    )
+    
+    prompt = assembler.assemble([
+        PromptSection("traits", ["Direct and spare.", "Curious about motives."], header="TRAITS:", priority=2),
+        PromptSection(
+            "memories",
+            [f"Memory {i}: followed the money through shell company {i}." for i in range(20)],
+            header="RELEVANT EXPERIENCES:",
+            max_tokens=60,
+            priority=1
+        )
+    ])
+    
+    print(prompt.text)
+    print(f"\nTokens: {prompt.total_tokens} (per section: {prompt.section_tokens}, dropped: {prompt.dropped_items})")
+    print(f"Stats: {assembler.get_stats()}")
@@ -0,0 +1,94 @@
+"""
+Token Counting
+
+Exact prompt token counts through a cached tiktoken encoding. Loading an
+encoding is expensive (it reads and builds the BPE ranks), so each encoding is
+built once per process and counts for repeated text (static prompt segments,
+summaries) are memoized.
+
+If tiktoken isn't installed, counts fall back to a ~4 characters per token
+estimate.
+"""
+
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+DEFAULT_ENCODING = "o200k_base"  # gpt-4o / gpt-4o-mini / o-series / gpt-5
+
+
+@lru_cache(maxsize=16)
+def get_encoding(model: str = None):
+    """
+    Get the (cached) tokenizer for a model.
+    
+    Args:
+        model: Model name; unknown or missing models use the gpt-4o encoding
+        
+    Returns:
+        tiktoken Encoding, or None if tiktoken is unavailable
+    """
+    if tiktoken is None:
+        return None
+    
+    try:
+        encoding_name = tiktoken.encoding_name_for_model(model) if model else DEFAULT_ENCODING
+    except KeyError:
+        encoding_name = DEFAULT_ENCODING
+    
+    try:
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        # Encodings are downloaded on first use; offline hosts fall back to estimates
+        print(f"Warning: Could not load tokenizer ({e.__class__.__name__}), estimating token counts")
+        return None
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str, model: str = None) -> int:
+    """
+    Count tokens in a piece of text.
+    
+    Args:
+        text: Text to count
+        model: Model the text is sent to
+        
+    Returns:
+        Number of tokens
+    """
+    if not text:
+        return 0
+    
+    encoding = get_encoding(model)
+    if encoding is None:
+        return len(text) // 4 + 1
+    
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = None) -> str:
+    """
+    Cut text down to at most max_tokens tokens.
+    
+    Args:
+        text: Text to truncate
+        max_tokens: Token limit
+        model: Model the text is sent to
+        
+    Returns:
+        Truncated text (unchanged if it already fits)
+    """
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    
+    encoding = get_encoding(model)
+    if encoding is None:
+        return text[:max_tokens * 4]
+    
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
@@ -14,7 +14,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from personality.personality_layer import PersonalityLayer
 from routing.routing_engine import RoutingEngine
-from openai import OpenAI
+from engine.usage import metered
 from typing import Dict, List
 
 class ROOKCore:
@@ -42,10 +42,11 @@ class ROOKCore:
         self.router = RoutingEngine(openai_api_key=openai_api_key)
         print("✅ Routing Engine initialized")
         
-        self.openai_client = OpenAI(
+        from openai import OpenAI
+        self.openai_client = metered(OpenAI(
             api_key=openai_api_key,
             base_url='https://api.openai.com/v1'
-        )
+        ), "generation")
         print("✅ OpenAI Client initialized")
         
         print("🎉 ROOK Core System ready!\n")
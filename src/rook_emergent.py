@@ -5,15 +5,32 @@ Integrates all components into a complete AI agent with emergent personality.
 """
 
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+import threading
+import time
 import uuid
-from openai import OpenAI
-from pinecone import Pinecone
 
 from .memory.experience import Experience
 from .memory.retrieval import MemoryRetrieval, ContextBuilder
+from .memory.write_buffer import MemoryWriteBuffer
+from .memory.co_retrieval import CoRetrievalMatrix
+from .memory.association import AssociationIndex
+from .memory.observation_scorer import ObservationScorer, ObservationScore
 from .personality.dynamics import PersonalityDynamics, PerturbationCalculator
 from .sleep.consolidation import SleepConsolidation
+from .sleep.scheduler import ConsolidationScheduler
+from .engine.tracing import span, traced
+from .engine.usage import metered
+
+
+# Static part of the system prompt - placed before the per-query context
+EMERGENT_SYSTEM_PROMPT = """You are ROOK, an AI investigative journalist created by Bradley Hope.
+
+Respond to the query based on your memories, experiences, and current state. Your personality emerges from your accumulated knowledge and formative events."""
+
+# Pinecone metadata filters splitting the pinned formative tier from per-query candidates
+FORMATIVE_FILTER = {"type": {"$eq": "formative_event"}}
+NON_FORMATIVE_FILTER = {"type": {"$ne": "formative_event"}}
 
 
 class ROOKEmergent:
@@ -33,7 +50,17 @@ class ROOKEmergent:
         openai_api_key: str,
         pinecone_api_key: str,
         pinecone_index_name: str = "rook-memories",
-        initial_baseline: Optional[Dict[str, float]] = None
+        initial_baseline: Optional[Dict[str, float]] = None,
+        memory_context_tokens: int = 1500,
+        consolidation_lease=None,
+        start_consolidation_worker: bool = True,
+        co_retrieval_path: Optional[str] = None,
+        co_retrieval_store=None,
+        associative_retrieval: bool = True,
+        association_index_ttl: float = 300,
+        personality_store=None,
+        defer_observations: bool = False,
+        observation_batch_size: int = 10
     ):
         """
         Initialize ROOK with emergent personality architecture.
@@ -43,14 +70,35 @@ class ROOKEmergent:
             pinecone_api_key: Pinecone API key
             pinecone_index_name: Pinecone index for memory storage
             initial_baseline: Initial personality baseline (if None, uses default)
+            memory_context_tokens: Token budget for retrieved memories in the prompt
+            consolidation_lease: Lease shared by replicas so only one consolidates at a time
+                (default: in-process lease)
+            start_consolidation_worker: Start the background consolidation thread
+                (False to drive it from a separate worker process)
+            co_retrieval_path: .npz file persisting which memories were retrieved together
+                (None: kept in memory only; one process per file)
+            co_retrieval_store: Shared SQLCoRetrievalStore, so the replica that consolidates
+                sees every replica's co-retrievals
+            associative_retrieval: Pull in memories linked to the best matches through
+                Hebbian connections (spreading activation)
+            association_index_ttl: Seconds the connection index is reused before it is
+                rebuilt (it is also rebuilt after a local consolidation)
+            personality_store: PersonalityStateStore the personality is restored from and
+                persisted to (shared by replicas with a SQL backend; None: in memory only)
+            defer_observations: Queue observation memories and score them in batched
+                requests off the query path (flushed every observation_batch_size turns
+                and before each consolidation) instead of one scoring call per turn
+            observation_batch_size: Queued turns that trigger a background flush
         """
         # OpenAI client
-        self.openai_client = OpenAI(
+        from openai import OpenAI
+        self.openai_client = metered(OpenAI(
             api_key=openai_api_key,
             base_url="https://api.openai.com/v1"
-        )
+        ), "rook_emergent")
         
         # Pinecone client
+        from pinecone import Pinecone
         self.pc = Pinecone(api_key=pinecone_api_key)
         self.index = self.pc.Index(pinecone_index_name)
         
@@ -72,6 +120,12 @@ class ROOKEmergent:
             attractor_force=0.3,
             baseline_update_rate=0.05
         )
+        self.personality_store = personality_store
+        if personality_store is not None:
+            personality_store.attach(self.personality)
+        
+        # Which memories get retrieved together (feeds Hebbian strengthening)
+        self.co_retrieval = CoRetrievalMatrix(co_retrieval_path, shared=co_retrieval_store)
         
         # Sleep consolidation
         self.sleep = SleepConsolidation(
@@ -79,12 +133,38 @@ class ROOKEmergent:
             get_memories_func=self.get_memories,
             create_memory_func=self.create_memory,
             update_memory_func=self.update_memory,
-            get_personality_dynamics_func=lambda: self.personality
+            get_personality_dynamics_func=lambda: self.personality,
+            load_memories_func=self.fetch_memories,
+            select_memories_func=self.select_memories,
+            write_buffer=MemoryWriteBuffer(self.index, embed_func=self._get_embedding),
+            co_retrieval=self.co_retrieval
         )
         
-        # Metadata
-        self.last_sleep_time = datetime.now()
-        self.interactions_since_sleep = 0
+        self.memory_context_tokens = memory_context_tokens
+        
+        # Observation scoring: one JSON call per turn, or batched off the query path
+        self.scorer = ObservationScorer(self.openai_client)
+        self.defer_observations = defer_observations
+        self.observation_batch_size = observation_batch_size
+        self._pending_observations: List[Tuple[str, str, List[float], datetime]] = []
+        self._observation_lock = threading.Lock()
+        self._flushing = False
+        
+        # Sleep runs on a background worker: every 10 interactions or 24 hours
+        self.consolidation = ConsolidationScheduler(
+            self._consolidate,
+            lease=consolidation_lease,
+            interaction_threshold=10,
+            max_interval_seconds=24 * 3600
+        )
+        if start_consolidation_worker:
+            self.consolidation.start()
+        
+        # Connections only change during consolidation; the CSR index is reused between runs
+        self.associative_retrieval = associative_retrieval
+        self.association_index_ttl = association_index_ttl
+        self._association_index: Optional[AssociationIndex] = None
+        self._association_index_runs = -1
     
     def _get_default_baseline(self) -> Dict[str, float]:
         """Get default personality baseline for ROOK"""
@@ -116,18 +196,31 @@ class ROOKEmergent:
         self.personality.update_state(perturbation)
         
         # Step 2: Retrieve relevant memories
-        query_embedding = self._get_embedding(query)
-        memories = self.retrieval.retrieve_with_formative(
-            experiences=self.get_all_memories(),
-            query_embedding=query_embedding,
-            top_k=20
-        )
+        with span("retrieval"):
+            query_embedding = self._get_embedding(query)
+            if not self.retrieval.pinned.loaded:
+                # Formative events are pinned and refetched only when one is added
+                # or the tier expires; a failed fetch is retried on the next query
+                formative = self.fetch_memories(filters=FORMATIVE_FILTER)
+                if formative is not None:
+                    self.retrieval.pinned.load(formative)
+            candidates = self.get_all_memories(filters=NON_FORMATIVE_FILTER)
+            memories = self.retrieval.retrieve_with_formative(
+                query_embedding=query_embedding,
+                top_k=20,
+                association_index=self._get_association_index(candidates),
+                candidates=candidates
+            )
         
         # Track co-retrieval for Hebbian strengthening
         self._track_co_retrieval(memories)
         
         # Step 3: Build context
-        memory_context = ContextBuilder.build_memory_context(memories)
+        memory_context = ContextBuilder.build_memory_context(
+            memories,
+            max_tokens=self.memory_context_tokens,
+            formative_lines=self.retrieval.pinned.context_lines
+        )
         personality_context = ContextBuilder.build_personality_context(
             self.personality.get_state()
         )
@@ -142,12 +235,8 @@ class ROOKEmergent:
         # Step 5: Create observation memory
         self._create_observation(query, response, query_embedding)
         
-        # Step 6: Check if sleep is needed
-        self.interactions_since_sleep += 1
-        if self._should_sleep():
-            self.sleep.run_consolidation()
-            self.last_sleep_time = datetime.now()
-            self.interactions_since_sleep = 0
+        # Step 6: Count towards the next sleep (consolidation runs in the background)
+        self.consolidation.record_interaction()
         
         return {
             "response": response,
@@ -156,6 +245,7 @@ class ROOKEmergent:
             "query_type": query_type
         }
     
+    @traced("generation")
     def _generate_response(
         self,
         query: str,
@@ -164,17 +254,13 @@ class ROOKEmergent:
     ) -> str:
         """Generate response using GPT with personality and memory context"""
         
-        # Minimal system prompt (identity only)
-        system_prompt = "You are ROOK, an AI investigative journalist created by Bradley Hope."
-        
-        # Add memory and personality context
-        full_context = f"""{system_prompt}
+        # Static identity + instructions first so the prompt prefix is stable
+        # across queries (provider-side prompt caching); dynamic context after
+        full_context = f"""{EMERGENT_SYSTEM_PROMPT}
 
 {memory_context}
 
-{personality_context}
-
-Respond to the query based on your memories, experiences, and current state. Your personality emerges from your accumulated knowledge and formative events."""
+{personality_context}"""
         
         try:
             response = self.openai_client.chat.completions.create(
@@ -191,6 +277,7 @@ Respond to the query based on your memories, experiences, and current state. You
         except Exception as e:
             return f"Error generating response: {e}"
     
+    @traced("embedding")
     def _get_embedding(self, text: str) -> List[float]:
         """Get embedding vector for text"""
         try:
@@ -203,119 +290,125 @@ Respond to the query based on your memories, experiences, and current state. You
             print(f"Error getting embedding: {e}")
             return []
     
+    @traced("memory_formation")
     def _create_observation(
         self,
         query: str,
         response: str,
         query_embedding: List[float]
     ):
-        """Create an observation memory from this interaction"""
-        
-        # Rate importance using LLM
-        importance = self._rate_importance(query, response)
-        
-        # Estimate emotional valence
-        emotional_valence = self._estimate_emotional_valence(query, response)
-        
-        # Create experience
-        observation = Experience(
+        """Create an observation memory from this interaction (or queue it for batch scoring)"""
+        if self.defer_observations:
+            with self._observation_lock:
+                self._pending_observations.append((query, response, query_embedding, datetime.now()))
+                start_flush = len(self._pending_observations) >= self.observation_batch_size and not self._flushing
+                if start_flush:
+                    self._flushing = True
+            if start_flush:
+                threading.Thread(target=self.flush_observations, name="rook-observations", daemon=True).start()
+            return
+        
+        # Importance, valence and tags in one call (none for trivial turns)
+        score = self.scorer.score(query, response)
+        self.create_memory(self._build_observation(query, response, query_embedding, score, datetime.now()))
+    
+    def _build_observation(
+        self,
+        query: str,
+        response: str,
+        query_embedding: List[float],
+        score: ObservationScore,
+        timestamp: datetime
+    ) -> Experience:
+        return Experience(
             id=str(uuid.uuid4()),
             type="observation",
             description=f"Query: {query}\nResponse: {response[:200]}...",
-            timestamp=datetime.now(),
-            last_accessed_at=datetime.now(),
-            importance=importance,
-            emotional_valence=emotional_valence,
+            timestamp=timestamp,
+            last_accessed_at=timestamp,
+            importance=score.importance,
+            emotional_valence=score.emotional_valence,
             consolidation_state="recent",
-            embedding=query_embedding
+            embedding=query_embedding,
+            metadata={"tags": score.tags, "scored_by": score.source}
         )
-        
-        self.create_memory(observation)
     
-    def _rate_importance(self, query: str, response: str) -> float:
-        """Rate the importance of this interaction (1-10)"""
+    def flush_observations(self) -> int:
+        """
+        Score queued observations in batched requests and store them.
         
-        prompt = f"""Rate the importance of this interaction on a scale of 1-10, where 10 is extremely significant and 1 is trivial.
-
-Query: {query}
-Response: {response[:300]}
-
-Return only a number between 1 and 10."""
+        Runs when observation_batch_size turns are queued and before every
+        consolidation, so sleep always sees the latest interactions.
         
+        Returns:
+            Number of observations stored
+        """
+        with self._observation_lock:
+            pending, self._pending_observations = self._pending_observations, []
         try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=1
-            )
-            
-            importance_str = response.choices[0].message.content.strip()
-            importance = float(importance_str)
-            return max(1.0, min(10.0, importance))
-        
-        except:
-            return 5.0  # Default medium importance
+            if not pending:
+                return 0
+            scores = self.scorer.score_batch([(query, response) for query, response, _, _ in pending])
+            for (query, response, query_embedding, timestamp), score in zip(pending, scores):
+                self.create_memory(self._build_observation(query, response, query_embedding, score, timestamp))
+            return len(pending)
+        finally:
+            with self._observation_lock:
+                self._flushing = False
     
-    def _estimate_emotional_valence(self, query: str, response: str) -> float:
-        """Estimate emotional valence (-1 to +1)"""
-        
-        prompt = f"""Estimate the emotional valence of this interaction on a scale from -1 (very negative) to +1 (very positive), where 0 is neutral.
-
-Query: {query}
-Response: {response[:300]}
-
-Return only a number between -1 and 1."""
-        
-        try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=1
-            )
-            
-            valence_str = response.choices[0].message.content.strip()
-            valence = float(valence_str)
-            return max(-1.0, min(1.0, valence))
-        
-        except:
-            return 0.0  # Default neutral
+    def _consolidate(self, on_progress=None) -> Dict:
+        """Consolidation run for the scheduler: store queued observations, then sleep"""
+        self.flush_observations()
+        return self.sleep.run_consolidation(on_progress=on_progress)
     
     def _track_co_retrieval(self, memories: List[Experience]):
         """Track which memories were retrieved together (for Hebbian strengthening)"""
-        memory_ids = [m.id for m in memories]
-        
-        for memory in memories:
-            if "co_retrieved_with" not in memory.metadata:
-                memory.metadata["co_retrieved_with"] = []
-            
-            # Add other memories to co-retrieval list
-            for other_id in memory_ids:
-                if other_id != memory.id and other_id not in memory.metadata["co_retrieved_with"]:
-                    memory.metadata["co_retrieved_with"].append(other_id)
+        self.co_retrieval.record([m.id for m in memories])
     
-    def _should_sleep(self) -> bool:
-        """Check if ROOK should enter sleep consolidation"""
-        
-        # Sleep every 10 interactions or every 24 hours
-        hours_since_sleep = (datetime.now() - self.last_sleep_time).total_seconds() / 3600
-        
-        return (
-            self.interactions_since_sleep >= 10 or
-            hours_since_sleep >= 24
-        )
+    def _get_association_index(self, memories: List[Experience]) -> Optional[AssociationIndex]:
+        """Connection index for associative retrieval, rebuilt when stale"""
+        if not self.associative_retrieval:
+            return None
+        index = self._association_index
+        if (
+            index is None
+            or self._association_index_runs != self.consolidation.runs
+            or time.time() - index.built_at > self.association_index_ttl
+        ):
+            runs = self.consolidation.runs
+            index = AssociationIndex.from_experiences(memories)
+            self._association_index, self._association_index_runs = index, runs
+        return index
+    
+    def get_consolidation_stats(self) -> Dict:
+        """Sleep consolidation progress, history and trigger state"""
+        return self.consolidation.get_stats()
+    
+    def get_personality_store_stats(self) -> Optional[Dict]:
+        """Personality persistence state (None without a store)"""
+        if self.personality_store is None:
+            return None
+        return self.personality_store.get_stats()
     
     # Memory management methods
     
-    def get_all_memories(self) -> List[Experience]:
-        """Get all memories from Pinecone"""
+    def get_all_memories(self, filters: Optional[Dict] = None) -> List[Experience]:
+        """Get all memories from Pinecone (optionally only those matching a metadata filter)"""
+        memories = self.fetch_memories(filters)
+        return memories if memories is not None else []
+    
+    def fetch_memories(self, filters: Optional[Dict] = None) -> Optional[List[Experience]]:
+        """Like get_all_memories, but None if the fetch failed (vs. no memories)"""
         # This is a simplified version - in production, would paginate
         try:
             # Query all vectors
-            results = self.index.query(
-                vector=[0.0] * 1536,  # Dummy vector
-                top_k=10000,
-                include_metadata=True
-            )
+            with span("pinecone.query", index="memories", top_k=10000):
+                results = self.index.query(
+                    vector=[0.0] * 1536,  # Dummy vector
+                    top_k=10000,
+                    include_metadata=True,
+                    **({"filter": filters} if filters else {})
+                )
             
             experiences = []
             for match in results.matches:
@@ -327,7 +420,7 @@ Return only a number between -1 and 1."""
         
         except Exception as e:
             print(f"Error getting memories: {e}")
-            return []
+            return None
     
     def get_memories(
         self,
@@ -337,8 +430,22 @@ Return only a number between -1 and 1."""
         include_old: bool = False
     ) -> List[Experience]:
         """Get memories with optional filtering"""
+        return self.select_memories(self.get_all_memories(), query, filters, top_k, include_old)
+    
+    def select_memories(
+        self,
+        memories: List[Experience],
+        query: Optional[str] = None,
+        filters: Optional[Dict] = None,
+        top_k: int = 100,
+        include_old: bool = False
+    ) -> List[Experience]:
+        """
+        Filter and rank an already-loaded list of memories (same arguments as get_memories).
         
-        all_memories = self.get_all_memories()
+        Sleep consolidation answers all of its queries against one snapshot this way.
+        """
+        all_memories = memories
         
         # Apply filters
         if filters:
@@ -370,7 +477,8 @@ Return only a number between -1 and 1."""
         # If query provided, retrieve by relevance
         if query:
             query_embedding = self._get_embedding(query)
-            return self.retrieval.retrieve(all_memories, query_embedding, top_k)
+            # Don't touch access times: the list may be a shared snapshot that gets written back
+            return self.retrieval.retrieve(all_memories, query_embedding, top_k, refresh_access=False)
         
         return all_memories[:top_k]
     
@@ -425,6 +533,7 @@ Return only a number between -1 and 1."""
         )
         
         self.create_memory(formative_event)
+        self.retrieval.invalidate_pinned()
         print(f"Added formative event: {description[:100]}...")
 
 
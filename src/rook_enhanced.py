@@ -10,12 +10,14 @@ Fully integrated system with:
 
 import sys
 import os
+import uuid
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from personality.personality_layer import PersonalityLayer
 from routing.routing_engine import RoutingEngine
 from knowledge.knowledge_base import KnowledgeBase
-from openai import OpenAI
+from routing.speculative import SpeculativeExecutor
+from engine.usage import get_usage_ledger, metered, usage_scope
 from typing import Dict, List
 
 class ROOKEnhanced:
@@ -23,13 +25,14 @@ class ROOKEnhanced:
     Enhanced ROOK system with full knowledge base integration.
     """
     
-    def __init__(self, pinecone_api_key: str, openai_api_key: str):
+    def __init__(self, pinecone_api_key: str, openai_api_key: str, speculative: bool = True):
         """
         Initialize Enhanced ROOK Core System.
         
         Args:
             pinecone_api_key: Pinecone API key
             openai_api_key: OpenAI API key
+            speculative: Start a gpt-4o-mini draft while routing resolves
         """
         print("🤖 Initializing ROOK Enhanced Core System...")
         print("=" * 80 + "\n")
@@ -50,12 +53,17 @@ class ROOKEnhanced:
         )
         print(f"✅ Knowledge Base initialized ({len(self.knowledge_base.indexes)} indexes)")
         
-        self.openai_client = OpenAI(
+        from openai import OpenAI
+        self.openai_client = metered(OpenAI(
             api_key=openai_api_key,
             base_url='https://api.openai.com/v1'
-        )
+        ), "generation")
         print("✅ OpenAI Client initialized")
         
+        self.speculator = SpeculativeExecutor(self.openai_client) if speculative else None
+        if self.speculator:
+            print("✅ Speculative generation enabled")
+        
         print("\n" + "=" * 80)
         print("🎉 ROOK Enhanced System Ready!")
         print("=" * 80 + "\n")
@@ -70,8 +78,18 @@ class ROOKEnhanced:
             verbose: Whether to print progress information
             
         Returns:
-            Dictionary containing the response and metadata
+            Dictionary containing the response and metadata. "tokens_used"
+            is the final completion; "usage" covers every call the query
+            made (embeddings, routing, speculation, ...) broken down by stage.
         """
+        request_id = uuid.uuid4().hex
+        with usage_scope(request_id=request_id, user_id=user_id):
+            result = self._process_query(query, user_id, verbose)
+        result["usage"] = get_usage_ledger().request_usage(request_id)
+        return result
+    
+    def _process_query(self, query: str, user_id: str, verbose: bool) -> Dict:
+        """Run the pipeline steps (see process_query)"""
         if verbose:
             print(f"📝 Query: {query}\n")
             print("=" * 80)
@@ -83,34 +101,57 @@ class ROOKEnhanced:
         system_prompt = enriched["system_prompt"]
         conversation_history = enriched["conversation_history"]
         
-        # Step 2: Route the query
-        if verbose:
-            print("🔀 Step 2: Analyzing and routing query...")
-        routing = self.router.route_query(query, system_prompt)
-        query_type = routing['analysis'].get('query_type') or routing['analysis'].get('Query Type', 'simple_chat')
-        
-        if verbose:
-            print(f"   • Query Type: {query_type}")
-            print(f"   • Execution Engine: {routing['routing_decision']['execution_engine']}")
-            print(f"   • Model: {routing['routing_decision']['model']}")
+        # Most queries route to gpt-4o-mini - start drafting before routing returns
+        draft = None
+        if self.speculator:
+            draft = self.speculator.speculate(
+                self._build_messages(query, system_prompt, "", conversation_history)
+            )
         
-        # Step 3: Retrieve relevant knowledge
-        if verbose:
-            print("📚 Step 3: Searching knowledge base...")
-        kb_context = self.knowledge_base.get_context_for_query(query, query_type)
-        if kb_context and verbose:
-            print(f"   • Found relevant context ({len(kb_context)} chars)")
+        try:
+            # Step 2: Route the query
+            if verbose:
+                print("🔀 Step 2: Analyzing and routing query...")
+            routing = self.router.route_query(query, system_prompt)
+            query_type = routing['analysis'].get('query_type') or routing['analysis'].get('Query Type', 'simple_chat')
+            
+            if verbose:
+                print(f"   • Query Type: {query_type}")
+                print(f"   • Execution Engine: {routing['routing_decision']['execution_engine']}")
+                print(f"   • Model: {routing['routing_decision']['model']}")
+            
+            # Step 3: Retrieve relevant knowledge
+            if verbose:
+                print("📚 Step 3: Searching knowledge base...")
+            kb_context = self.knowledge_base.get_context_for_query(query, query_type)
+            if kb_context and verbose:
+                print(f"   • Found relevant context ({len(kb_context)} chars)")
+            
+            # Step 4: Execute the query
+            if verbose:
+                print("⚙️  Step 4: Executing query...")
+            if draft:
+                response = draft.resolve(
+                    routing['routing_decision']['model'],
+                    self._build_messages(query, system_prompt, kb_context, conversation_history),
+                    self._complete
+                )
+                if verbose:
+                    print(f"   • Speculative draft: {response['speculation']}")
+        except BaseException:
+            # Nothing will resolve the draft - stop it generating
+            if draft:
+                draft.abandon()
+            raise
         
-        # Step 4: Execute the query
-        if verbose:
-            print("⚙️  Step 4: Executing query...")
-        response = self._execute_query(
-            query=query,
-            system_prompt=system_prompt,
-            kb_context=kb_context,
-            conversation_history=conversation_history,
-            routing_decision=routing['routing_decision']
-        )
+        if not draft:
+            response = self._execute_query(
+                query=query,
+                system_prompt=system_prompt,
+                kb_context=kb_context,
+                conversation_history=conversation_history,
+                routing_decision=routing['routing_decision']
+            )
         
         # Step 5: Update conversation history
         self.personality.add_to_conversation_history(user_id, "user", query)
@@ -126,9 +167,33 @@ class ROOKEnhanced:
             "routing": routing,
             "model_used": response['model'],
             "tokens_used": response.get('tokens', {}),
-            "kb_context_used": bool(kb_context)
+            "kb_context_used": bool(kb_context),
+            "speculation": response.get('speculation')
         }
     
+    def get_speculation_stats(self) -> Dict:
+        """Get speculative generation win/loss statistics"""
+        return self.speculator.get_stats() if self.speculator else {}
+    
+    def _build_messages(
+        self,
+        query: str,
+        system_prompt: str,
+        kb_context: str,
+        conversation_history: List[Dict]
+    ) -> List[Dict]:
+        """Build the chat messages for a query (KB context appended to the system prompt)"""
+        # Build enhanced system prompt with KB context (no hardcoded labels)
+        if kb_context:
+            enhanced_prompt = f"{system_prompt}\n\n{kb_context}"
+        else:
+            enhanced_prompt = system_prompt
+        
+        messages = [{"role": "system", "content": enhanced_prompt}]
+        messages.extend(conversation_history)
+        messages.append({"role": "user", "content": query})
+        return messages
+    
     def _execute_query(
         self, 
         query: str, 
@@ -150,19 +215,20 @@ class ROOKEnhanced:
         Returns:
             Dictionary containing the response
         """
-        model = routing_decision['model']
-        
-        # Build enhanced system prompt with KB context (no hardcoded labels)
-        if kb_context:
-            enhanced_prompt = f"{system_prompt}\n\n{kb_context}"
-        else:
-            enhanced_prompt = system_prompt
-        
-        # Build messages
-        messages = [{"role": "system", "content": enhanced_prompt}]
-        messages.extend(conversation_history)
-        messages.append({"role": "user", "content": query})
+        messages = self._build_messages(query, system_prompt, kb_context, conversation_history)
+        return self._complete(routing_decision['model'], messages)
+    
+    def _complete(self, model: str, messages: List[Dict]) -> Dict:
+        """
+        Run a chat completion on the routed model.
         
+        Args:
+            model: Model to use
+            messages: Complete message list
+            
+        Returns:
+            Dictionary containing the response
+        """
         # Execute with appropriate model
         # Note: Some models (gpt-5, o-series) only support default temperature
         try:
@@ -227,7 +293,7 @@ if __name__ == "__main__":
         print(result['response'])
         print("\n" + "-" * 80)
         print(f"📊 Model: {result['model_used']}")
-        print(f"📊 Tokens: {result['tokens_used']['total']}")
+        print(f"📊 Tokens: {result['tokens_used']['total']} (whole pipeline: {result['usage']['total_tokens'] if result['usage'] else 0})")
         print(f"📊 KB Context Used: {result['kb_context_used']}")
         print("=" * 80 + "\n")
         
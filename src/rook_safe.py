@@ -13,10 +13,9 @@ Every investigation ROOK conducts goes through the complete safety pipeline.
 
 import os
 import sys
-from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional
 from datetime import datetime
-from openai import OpenAI
-from pinecone import Pinecone
 import numpy as np
 
 # Add parent directory to path for imports
@@ -25,7 +24,9 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from safety.evidence_first import EvidenceFirstSystem, Evidence
 from safety.two_model_gating import TwoModelGating, VerificationLevel, GatingResult
 from safety.method_cards import MethodCardBuilder, StepType
-from safety.moves_ledger import MovesLedger, MoveType
+from safety.moves_ledger import MovesLedger, MoveType, Move
+from engine.tracing import span, traced
+from engine.usage import metered
 
 class ROOKSafe:
     """
@@ -47,7 +48,9 @@ class ROOKSafe:
         verification_level: VerificationLevel = VerificationLevel.STANDARD
     ):
         # Core clients
-        self.openai_client = OpenAI(api_key=openai_api_key, base_url='https://api.openai.com/v1')
+        from openai import OpenAI
+        self.openai_client = metered(OpenAI(api_key=openai_api_key, base_url='https://api.openai.com/v1'), "investigation")
+        from pinecone import Pinecone
         self.pinecone_client = Pinecone(api_key=pinecone_api_key)
         self.index = self.pinecone_client.Index(pinecone_index_name)
         
@@ -64,13 +67,25 @@ class ROOKSafe:
     
     def _get_embedding(self, text: str) -> List[float]:
         """Get embedding for text"""
+        return self._get_embeddings([text])[0]
+    
+    @traced("embedding")
+    def _get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Get embeddings for several texts in a single request"""
         response = self.openai_client.embeddings.create(
             model="text-embedding-3-large",
-            input=text
+            input=texts
         )
-        return response.data[0].embedding
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
     
-    def _retrieve_personality_context(self, query: str, top_k: int = 5) -> str:
+    @traced("retrieval")
+    def _retrieve_personality_context(
+        self,
+        query: str,
+        top_k: int = 5,
+        ledger: Optional[MovesLedger] = None,
+        query_embedding: Optional[List[float]] = None
+    ) -> str:
         """
         Retrieve relevant formative memories from Pinecone.
         
@@ -78,8 +93,8 @@ class ROOKSafe:
         relevant to the current query.
         """
         # Log the move
-        if self.current_ledger:
-            self.current_ledger.log_move(
+        if ledger:
+            ledger.log_move(
                 move_type=MoveType.RETRIEVE,
                 description="Retrieved formative memories from personality system",
                 inputs={"query": query, "top_k": top_k},
@@ -88,14 +103,16 @@ class ROOKSafe:
             )
         
         # Get query embedding
-        query_embedding = self._get_embedding(query)
+        if query_embedding is None:
+            query_embedding = self._get_embedding(query)
         
         # Search Pinecone for relevant memories
-        results = self.index.query(
-            vector=query_embedding,
-            top_k=top_k,
-            include_metadata=True
-        )
+        with span("pinecone.query", index="personality", top_k=top_k):
+            results = self.index.query(
+                vector=query_embedding,
+                top_k=top_k,
+                include_metadata=True
+            )
         
         # Format memories as context
         context_parts = []
@@ -109,11 +126,39 @@ class ROOKSafe:
         else:
             return "You are ROOK, an AI investigative journalist."
     
+    def prefetch_personality_contexts(self, queries: List[str], max_workers: int = 8) -> Dict[str, str]:
+        """
+        Retrieve personality context for a batch of investigations at once.
+        
+        Distinct queries are embedded in one request and each hits Pinecone
+        once, however many batch items ask it.
+        
+        Args:
+            queries: Investigation queries (duplicates allowed)
+            max_workers: Concurrent Pinecone queries
+            
+        Returns:
+            Mapping of query -> personality context
+        """
+        unique = list(dict.fromkeys(queries))
+        if not unique:
+            return {}
+        embeddings = self._get_embeddings(unique)
+        
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rook-safe-prefetch") as pool:
+            contexts = pool.map(
+                lambda pair: self._retrieve_personality_context(pair[0], query_embedding=pair[1]),
+                zip(unique, embeddings)
+            )
+            return dict(zip(unique, contexts))
+    
     def investigate(
         self,
         query: str,
         available_evidence: List[Evidence],
-        investigation_id: Optional[str] = None
+        investigation_id: Optional[str] = None,
+        personality_context: Optional[str] = None,
+        on_move: Optional[Callable[[Move], None]] = None
     ) -> Dict:
         """
         Conduct a complete investigation with full safety pipeline.
@@ -126,14 +171,21 @@ class ROOKSafe:
         5. Apply gate (Two-Model Gating)
         6. Generate Method Card
         7. Return complete results
+        
+        personality_context may be passed in when it was already retrieved
+        (see prefetch_personality_contexts for batches). on_move is called
+        with every Moves Ledger entry as it is logged, for progress reporting.
         """
         # Step 1: Initialize tracking
         investigation_id = investigation_id or f"INV-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
-        self.current_ledger = MovesLedger(investigation_id=investigation_id)
-        self.current_method_card = MethodCardBuilder(query=query, investigation_id=investigation_id)
+        # Kept local so concurrent investigations don't share a ledger
+        ledger = MovesLedger(investigation_id=investigation_id, on_move=on_move)
+        card = MethodCardBuilder(query=query, investigation_id=investigation_id)
+        self.current_ledger = ledger
+        self.current_method_card = card
         
         # Log initial query
-        self.current_ledger.log_move(
+        ledger.log_move(
             move_type=MoveType.QUESTION,
             description=f"User query: {query}",
             inputs={"query": query},
@@ -142,7 +194,7 @@ class ROOKSafe:
             reasoning="Investigative query received"
         )
         
-        self.current_method_card.add_step(
+        card.add_step(
             step_type=StepType.QUERY,
             description=f"User asked: {query}",
             inputs=[query],
@@ -152,9 +204,18 @@ class ROOKSafe:
         )
         
         # Step 2: Retrieve personality context
-        personality_context = self._retrieve_personality_context(query)
+        if personality_context is None:
+            personality_context = self._retrieve_personality_context(query, ledger=ledger)
+        else:
+            ledger.log_move(
+                move_type=MoveType.RETRIEVE,
+                description="Used formative memories retrieved for the batch",
+                inputs={"query": query},
+                confidence=0.9,
+                reasoning="Personality context shapes ROOK's response"
+            )
         
-        self.current_method_card.add_step(
+        card.add_step(
             step_type=StepType.RETRIEVAL,
             description="Retrieved formative memories for personality context",
             inputs=[query],
@@ -165,7 +226,7 @@ class ROOKSafe:
         )
         
         # Step 3: Generate investigation content
-        self.current_ledger.log_move(
+        ledger.log_move(
             move_type=MoveType.SEARCH,
             description="Generating investigation content",
             inputs={"query": query, "personality_context": "loaded"},
@@ -199,7 +260,7 @@ Investigate the query and provide a thorough analysis."""
         
         generated_content = response.choices[0].message.content
         
-        self.current_ledger.log_move(
+        ledger.log_move(
             move_type=MoveType.HYPOTHESIZE,
             description="Generated investigation content",
             inputs={"query": query},
@@ -208,7 +269,7 @@ Investigate the query and provide a thorough analysis."""
             reasoning="Content generated based on personality and evidence"
         )
         
-        self.current_method_card.add_step(
+        card.add_step(
             step_type=StepType.SYNTHESIS,
             description="Generated investigation analysis",
             inputs=[query, "Personality context", "Available evidence"],
@@ -218,7 +279,7 @@ Investigate the query and provide a thorough analysis."""
         )
         
         # Step 4: Verify claims (Evidence-First)
-        self.current_ledger.log_move(
+        ledger.log_move(
             move_type=MoveType.VERIFY,
             description="Verifying claims against evidence",
             inputs={"content_length": len(generated_content), "evidence_count": len(available_evidence)},
@@ -234,7 +295,7 @@ Investigate the query and provide a thorough analysis."""
         verified_count = len(verification_result.get('verified_claims', []))
         unverified_count = len(verification_result.get('unverified_claims', []))
         
-        self.current_method_card.add_step(
+        card.add_step(
             step_type=StepType.VERIFICATION,
             description=f"Verified {verification_result['total_claims']} claims against evidence",
             inputs=["Generated content", "Available evidence"],
@@ -245,7 +306,7 @@ Investigate the query and provide a thorough analysis."""
         )
         
         # Step 5: Apply gate (Two-Model Gating)
-        self.current_ledger.log_move(
+        ledger.log_move(
             move_type=MoveType.DECIDE,
             description="Applying publication gate",
             inputs={
@@ -258,7 +319,7 @@ Investigate the query and provide a thorough analysis."""
         
         gating_result = self.gating_system.apply_gate(verification_result)
         
-        self.current_method_card.add_step(
+        card.add_step(
             step_type=StepType.CONCLUSION,
             description=f"Gate decision: {'PASS' if gating_result.passed else 'FAIL'}",
             inputs=[f"Verification rate: {gating_result.verification_rate:.1%}",
@@ -270,7 +331,7 @@ Investigate the query and provide a thorough analysis."""
         
         # Add sources to Method Card
         for evidence in available_evidence:
-            self.current_method_card.add_source(
+            card.add_source(
                 name=evidence.source,
                 source_type=evidence.evidence_type,
                 date=evidence.metadata.get('date'),
@@ -278,13 +339,13 @@ Investigate the query and provide a thorough analysis."""
             )
         
         # Add assumptions and limitations
-        self.current_method_card.add_assumption("Available evidence is accurate and complete")
-        self.current_method_card.add_assumption("Sources are reliable")
-        self.current_method_card.add_limitation("Limited to publicly available information")
-        self.current_method_card.add_limitation(f"Only {len(available_evidence)} sources consulted")
+        card.add_assumption("Available evidence is accurate and complete")
+        card.add_assumption("Sources are reliable")
+        card.add_limitation("Limited to publicly available information")
+        card.add_limitation(f"Only {len(available_evidence)} sources consulted")
         
         # Step 6: Generate Method Card
-        method_card = self.current_method_card.build(
+        method_card = card.build(
             final_conclusion=generated_content if gating_result.passed else "Investigation blocked by safety gate",
             overall_confidence=gating_result.confidence
         )
@@ -303,9 +364,9 @@ Investigate the query and provide a thorough analysis."""
             },
             "verification_result": verification_result,
             "method_card": method_card.to_markdown(),
-            "moves_ledger": self.current_ledger.to_markdown(),
+            "moves_ledger": ledger.to_markdown(),
             "publishable_content": generated_content if gating_result.passed else None,
-            "statistics": self.current_ledger.get_statistics()
+            "statistics": ledger.get_statistics()
         }
     
     def _format_evidence_for_prompt(self, evidence_list: List[Evidence]) -> str:
@@ -6,9 +6,17 @@ execution path (simple chat, deep investigation, web research, etc.)
 """
 
 from typing import Dict, Literal
-from openai import OpenAI
 import json
 
+try:
+    from ..engine.llm_cache import get_llm_cache
+    from ..engine.tracing import traced
+    from ..engine.usage import metered
+except ImportError:  # src/ itself is on sys.path (e.g. rook_enhanced)
+    from engine.llm_cache import get_llm_cache
+    from engine.tracing import traced
+    from engine.usage import metered
+
 QueryType = Literal["simple_chat", "investigation", "web_research", "document_analysis", "data_analysis"]
 
 class RoutingEngine:
@@ -23,11 +31,13 @@ class RoutingEngine:
         Args:
             openai_api_key: OpenAI API key
         """
-        self.openai_client = OpenAI(
+        from openai import OpenAI
+        self.openai_client = metered(OpenAI(
             api_key=openai_api_key,
             base_url='https://api.openai.com/v1'
-        )
+        ), "routing")
     
+    @traced("routing")
     def analyze_query(self, query: str, system_prompt: str) -> Dict:
         """
         Analyze a query to determine its type, complexity, and required resources.
@@ -67,13 +77,17 @@ class RoutingEngine:
 
 Respond in JSON format only."""
 
-        response = self.openai_client.chat.completions.create(
+        # Routing is a classification: temperature 0, so repeated queries are served from cache
+        response = get_llm_cache().complete(
+            self.openai_client,
+            "routing_engine.analyze_query",
             model="gpt-4o-mini",  # Use fast model for routing decisions
             messages=[
                 {"role": "system", "content": routing_prompt},
                 {"role": "user", "content": f"Query: {query}"}
             ],
-            response_format={"type": "json_object"}
+            response_format={"type": "json_object"},
+            temperature=0
         )
         
         try:
@@ -0,0 +1,275 @@
+"""
+ROOK Speculative Generation
+
+Most queries end up routed to gpt-4o-mini anyway, so there is no reason for
+the completion to wait on the routing call. The speculative executor starts
+streaming a gpt-4o-mini draft while routing is still resolving:
+
+- If routing agrees (same model, same prompt) the draft is kept.
+- If routing escalates (o3, gpt-5-mini, ...) or the prompt changes (e.g. the
+  knowledge base adds context), the draft is cancelled and the query is
+  re-run on the routed model.
+- If routing (or anything else before resolve) fails, the draft is abandoned
+  and cancelled so it doesn't keep generating for a dead request.
+
+Wins and losses are recorded so the policy can be tuned.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+try:
+    from ..engine.tracing import propagate
+    from ..engine.usage import usage_stage
+except ImportError:  # src/ itself is on sys.path (e.g. rook_enhanced)
+    from engine.tracing import propagate
+    from engine.usage import usage_stage
+
+
+class SpeculationCancelled(Exception):
+    """Raised inside a draft when routing escalated and the draft was dropped."""
+
+
+class SpeculationStats:
+    """
+    Thread-safe win/loss counters for speculative drafts.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.wins = 0
+        self.losses = 0
+        self.errors = 0
+        self.abandoned = 0
+        self.losses_by_model: Dict[str, int] = {}
+        self.losses_by_reason: Dict[str, int] = {}
+        self.wasted_completion_tokens = 0
+        self.time_saved_ms = 0.0
+
+    def record_win(self, time_saved_ms: float):
+        with self._lock:
+            self.wins += 1
+            self.time_saved_ms += max(0.0, time_saved_ms)
+
+    def record_loss(self, routed_model: str, reason: str, wasted_tokens: int = 0):
+        with self._lock:
+            self.losses += 1
+            self.losses_by_model[routed_model] = self.losses_by_model.get(routed_model, 0) + 1
+            self.losses_by_reason[reason] = self.losses_by_reason.get(reason, 0) + 1
+            self.wasted_completion_tokens += wasted_tokens
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def record_abandoned(self, wasted_tokens: int = 0):
+        with self._lock:
+            self.abandoned += 1
+            self.wasted_completion_tokens += wasted_tokens
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            total = self.wins + self.losses + self.errors + self.abandoned
+            return {
+                "total_speculations": total,
+                "wins": self.wins,
+                "losses": self.losses,
+                "errors": self.errors,
+                "abandoned": self.abandoned,
+                "win_rate": self.wins / total if total > 0 else 0,
+                "loss_rate": self.losses / total if total > 0 else 0,
+                "losses_by_routed_model": dict(self.losses_by_model),
+                "losses_by_reason": dict(self.losses_by_reason),
+                "wasted_completion_tokens": self.wasted_completion_tokens,
+                "avg_time_saved_ms": self.time_saved_ms / self.wins if self.wins else 0
+            }
+
+
+class SpeculativeDraft:
+    """
+    A single in-flight gpt-4o-mini draft.
+
+    The draft streams in a worker thread and can be cancelled between
+    chunks, which closes the upstream stream so the provider stops generating.
+    """
+
+    def __init__(
+        self,
+        executor: "SpeculativeExecutor",
+        messages: List[Dict],
+        temperature: float
+    ):
+        self.executor = executor
+        self.model = executor.speculative_model
+        self.messages = messages
+        self.temperature = temperature
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.completion_tokens = 0
+        self._cancelled = threading.Event()
+        self._settled = False
+        # Keep the caller's request/user attribution in the worker thread
+        self._future = executor.pool.submit(propagate(self._run))
+
+    def _run(self) -> Dict:
+        create = self.executor.openai_client.chat.completions.create
+        with usage_stage("speculation"):
+            try:
+                stream = create(
+                    model=self.model,
+                    messages=self.messages,
+                    temperature=self.temperature,
+                    stream=True,
+                    stream_options={"include_usage": True}
+                )
+            except TypeError:
+                # Older SDKs don't know stream_options - stream without usage
+                stream = create(
+                    model=self.model,
+                    messages=self.messages,
+                    temperature=self.temperature,
+                    stream=True
+                )
+
+        parts = []
+        model_used = self.model
+        usage = None
+        try:
+            for chunk in stream:
+                if self._cancelled.is_set():
+                    raise SpeculationCancelled()
+
+                model_used = getattr(chunk, "model", None) or model_used
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    self.completion_tokens += 1
+        finally:
+            close = getattr(stream, "close", None)
+            if close:
+                close()
+
+        self.finished_at = time.time()
+        tokens = {}
+        if usage is not None:
+            tokens = {
+                "prompt": usage.prompt_tokens,
+                "completion": usage.completion_tokens,
+                "total": usage.total_tokens
+            }
+            self.completion_tokens = usage.completion_tokens
+
+        return {
+            "content": "".join(parts),
+            "model": model_used,
+            "tokens": tokens
+        }
+
+    def cancel(self):
+        """Stop streaming the draft (no-op if it already finished)."""
+        self._cancelled.set()
+        self._future.cancel()
+
+    def abandon(self):
+        """Cancel a draft that will never be resolved (e.g. routing raised)."""
+        if self._settled:
+            # resolve() already recorded an outcome for this draft
+            self.cancel()
+            return
+        self._settled = True
+        self.cancel()
+        self.executor.stats.record_abandoned(wasted_tokens=self.completion_tokens)
+
+    def resolve(
+        self,
+        routed_model: str,
+        final_messages: List[Dict],
+        execute: Callable[[str, List[Dict]], Dict]
+    ) -> Dict:
+        """
+        Keep the draft if routing agrees, otherwise cancel and re-execute.
+
+        Args:
+            routed_model: Model chosen by the routing engine
+            final_messages: Messages the routed completion would be sent
+            execute: Fallback that runs the completion for (model, messages)
+
+        Returns:
+            Response dictionary with a "speculation" outcome attached
+        """
+        stats = self.executor.stats
+        self._settled = True
+
+        if routed_model != self.model:
+            reason = "escalated"
+        elif final_messages != self.messages:
+            reason = "prompt_changed"
+        else:
+            reason = None
+
+        if reason is None:
+            try:
+                resolved_at = time.time()
+                result = self._future.result()
+                # Time the draft spent generating before routing finished is latency saved
+                saved_until = min(resolved_at, self.finished_at or resolved_at)
+                stats.record_win((saved_until - self.started_at) * 1000)
+                result["speculation"] = "won"
+                return result
+            except Exception as e:
+                print(f"⚠️  Speculative draft failed, re-running: {e}")
+                stats.record_error()
+                result = execute(routed_model, final_messages)
+                result["speculation"] = "error"
+                return result
+
+        self.cancel()
+        stats.record_loss(routed_model, reason, wasted_tokens=self.completion_tokens)
+        result = execute(routed_model, final_messages)
+        result["speculation"] = "lost"
+        return result
+
+
+class SpeculativeExecutor:
+    """
+    Starts gpt-4o-mini drafts in parallel with routing.
+    """
+
+    def __init__(
+        self,
+        openai_client,
+        speculative_model: str = "gpt-4o-mini",
+        max_workers: int = 8
+    ):
+        """
+        Initialize the speculative executor.
+
+        Args:
+            openai_client: OpenAI client used for the drafts
+            speculative_model: Model the draft is generated with
+            max_workers: Maximum number of concurrent drafts
+        """
+        self.openai_client = openai_client
+        self.speculative_model = speculative_model
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rook-speculate")
+        self.stats = SpeculationStats()
+
+    def speculate(self, messages: List[Dict], temperature: float = 0.7) -> SpeculativeDraft:
+        """
+        Start streaming a draft for the given messages.
+
+        Args:
+            messages: Messages as they would be sent if routing picks the draft model
+            temperature: Sampling temperature (matches the non-speculative path)
+
+        Returns:
+            Handle used to resolve the draft once routing finishes
+        """
+        return SpeculativeDraft(self, [dict(m) for m in messages], temperature)
+
+    def get_stats(self) -> Dict:
+        """Get speculation win/loss statistics"""
+        return self.stats.to_dict()
@@ -8,12 +8,23 @@ If there's no document, there's no claim.
 """
 
 from typing import List, Dict, Optional, Tuple
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import datetime
 import re
-from openai import OpenAI
+import threading
 import numpy as np
 
+try:
+    from ..engine.tracing import traced
+    from ..engine.usage import metered
+except ImportError:  # src/ itself is on sys.path (e.g. rook_safe)
+    from engine.tracing import traced
+    from engine.usage import metered
+
+# The embeddings endpoint accepts at most 2048 inputs per request
+EMBEDDING_BATCH_INPUTS = 2048
+
 @dataclass
 class Evidence:
     """A piece of evidence supporting a claim"""
@@ -44,10 +55,18 @@ class EvidenceFirstSystem:
     4. Missing evidence must be acknowledged
     """
     
-    def __init__(self, openai_api_key: Optional[str] = None):
+    def __init__(self, openai_api_key: Optional[str] = None, embedding_cache_size: int = 2048):
         self.client = None
         if openai_api_key:
-            self.client = OpenAI(api_key=openai_api_key, base_url='https://api.openai.com/v1')
+            from openai import OpenAI
+            self.client = metered(OpenAI(api_key=openai_api_key, base_url='https://api.openai.com/v1'), "verification.evidence")
+        
+        # Evidence excerpts are compared against every claim (and reused across
+        # investigations in a batch) - embed each distinct text once
+        self._embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._embeddings_lock = threading.Lock()
+        self.embedding_cache_size = embedding_cache_size
+        
         self.claim_patterns = [
             # Patterns that indicate factual claims
             r'\b(is|are|was|were|has|have|had)\b',
@@ -139,6 +158,7 @@ class EvidenceFirstSystem:
             verification_notes=notes
         )
     
+    @traced("verification.evidence")
     def verify_response(self, response: str, available_evidence: List[Evidence]) -> Dict:
         """
         Verify an entire response against available evidence.
@@ -152,6 +172,9 @@ class EvidenceFirstSystem:
         # Extract claims from response
         claims = self.extract_claims(response)
         
+        if self.client and claims:
+            self.prime_embeddings(claims + [evidence.content for evidence in available_evidence])
+        
         # Verify each claim
         verified_claims = []
         unverified_claims = []
@@ -214,13 +237,60 @@ class EvidenceFirstSystem:
             metadata=metadata or {}
         )
     
+    def prime_embeddings(self, texts: List[str], max_batch: int = EMBEDDING_BATCH_INPUTS):
+        """
+        Embed every not-yet-cached text in as few requests as possible.
+        
+        Requests are chunked to the API's input limit; a chunk that fails is
+        retried one text at a time, and texts that still fail are left to be
+        embedded (or fail) individually during verification.
+        
+        Args:
+            texts: Claims and evidence excerpts (duplicates allowed)
+            max_batch: Texts per embeddings request
+        """
+        with self._embeddings_lock:
+            missing = [text for text in dict.fromkeys(texts) if text not in self._embeddings]
+        
+        for start in range(0, len(missing), max_batch):
+            chunk = missing[start:start + max_batch]
+            try:
+                response = self.client.embeddings.create(
+                    model="text-embedding-3-small",
+                    input=chunk
+                )
+                for item in response.data:
+                    self._remember_embedding(chunk[item.index], np.array(item.embedding))
+            except Exception as e:
+                print(f"Warning: batch embedding of {len(chunk)} texts failed ({e}); embedding one by one")
+                for text in chunk:
+                    try:
+                        self._get_embedding(text)
+                    except Exception as text_error:
+                        print(f"Warning: could not embed text: {text_error}")
+    
+    def _remember_embedding(self, text: str, embedding: np.ndarray):
+        with self._embeddings_lock:
+            self._embeddings[text] = embedding
+            self._embeddings.move_to_end(text)
+            while len(self._embeddings) > self.embedding_cache_size:
+                self._embeddings.popitem(last=False)
+    
     def _get_embedding(self, text: str) -> np.ndarray:
-        """Get embedding for text using OpenAI"""
+        """Get embedding for text using OpenAI (cached per distinct text)"""
+        with self._embeddings_lock:
+            embedding = self._embeddings.get(text)
+            if embedding is not None:
+                self._embeddings.move_to_end(text)
+                return embedding
+        
         response = self.client.embeddings.create(
             model="text-embedding-3-small",
             input=text
         )
-        return np.array(response.data[0].embedding)
+        embedding = np.array(response.data[0].embedding)
+        self._remember_embedding(text, embedding)
+        return embedding
     
     def _cosine_similarity(self, a: np.ndarray, b: np.ndarray) -> float:
         """Calculate cosine similarity between two vectors"""
@@ -17,7 +17,7 @@ This creates a complete audit trail that can be:
 - Shared with readers for transparency
 """
 
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Callable
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
@@ -93,11 +93,18 @@ class MovesLedger:
     - Pattern analysis across investigations
     """
     
-    def __init__(self, investigation_id: str):
+    def __init__(self, investigation_id: str, on_move: Optional[Callable[[Move], None]] = None):
+        """
+        Args:
+            investigation_id: Investigation this ledger belongs to
+            on_move: Optional listener called with each move as it is logged
+                (e.g. to stream progress of a background investigation)
+        """
         self.investigation_id = investigation_id
         self.moves: List[Move] = []
         self.start_time = datetime.now()
         self.move_counter = 0
+        self.on_move = on_move
     
     def log_move(
         self,
@@ -126,6 +133,13 @@ class MovesLedger:
         )
         
         self.moves.append(move)
+        
+        if self.on_move:
+            try:
+                self.on_move(move)
+            except Exception as e:
+                print(f"Warning: Move listener failed for {move_id}: {e}")
+        
         return move
     
     def get_moves_by_type(self, move_type: MoveType) -> List[Move]:
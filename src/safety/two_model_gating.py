@@ -14,11 +14,21 @@ Architecture:
 
 from typing import Dict, List, Optional
 from dataclasses import dataclass
-from openai import OpenAI
 from enum import Enum
 
 from .evidence_first import EvidenceFirstSystem, Evidence
 
+try:
+    from ..engine.llm_cache import get_llm_cache
+    from ..engine.resilience import get_upstream, sdk_timeout
+    from ..engine.tracing import traced
+    from ..engine.usage import metered
+except ImportError:  # src/ itself is on sys.path (e.g. rook_safe)
+    from engine.llm_cache import get_llm_cache
+    from engine.resilience import get_upstream, sdk_timeout
+    from engine.tracing import traced
+    from engine.usage import metered
+
 class VerificationLevel(Enum):
     """Levels of verification rigor"""
     STANDARD = "standard"  # 80% verification rate required
@@ -51,7 +61,8 @@ class TwoModelGating:
         verifier_model: str = "gpt-4o-mini",  # Independent verifier
         verification_level: VerificationLevel = VerificationLevel.STANDARD
     ):
-        self.client = OpenAI(api_key=openai_api_key, base_url='https://api.openai.com/v1')
+        from openai import OpenAI
+        self.client = metered(OpenAI(api_key=openai_api_key, base_url='https://api.openai.com/v1'), "verification")
         self.generator_model = generator_model
         self.verifier_model = verifier_model
         self.verification_level = verification_level
@@ -64,6 +75,7 @@ class TwoModelGating:
             VerificationLevel.CRITICAL: {"verification_rate": 0.95, "confidence": 0.9}
         }
     
+    @traced("generation")
     def generate_content(self, query: str, context: str) -> str:
         """
         Generator: ROOK generates investigative content.
@@ -71,16 +83,22 @@ class TwoModelGating:
         This is the creative/analytical phase where ROOK uses his personality
         and knowledge to generate insights.
         """
-        response = self.client.chat.completions.create(
-            model=self.generator_model,
-            messages=[
-                {"role": "system", "content": context},
-                {"role": "user", "content": query}
-            ],
-            temperature=0.7
+        response = get_upstream("openai").call(
+            f"chat.{self.generator_model}.investigation",
+            lambda timeout: sdk_timeout(self.client, timeout).chat.completions.create(
+                model=self.generator_model,
+                messages=[
+                    {"role": "system", "content": context},
+                    {"role": "user", "content": query}
+                ],
+                temperature=0.7
+            ),
+            default_deadline=60,
+            retries=1
         )
         return response.choices[0].message.content
     
+    @traced("verification")
     def verify_content(
         self,
         content: str,
@@ -109,6 +127,7 @@ class TwoModelGating:
         
         return combined_result
     
+    @traced("verification.verifier_model")
     def _verifier_model_check(
         self,
         content: str,
@@ -147,7 +166,9 @@ Respond in JSON format:
     "red_flags": ["..."]
 }}"""
         
-        response = self.client.chat.completions.create(
+        response = get_llm_cache().complete(
+            self.client,
+            "two_model_gating.verifier_check",
             model=self.verifier_model,
             messages=[{"role": "user", "content": verifier_prompt}],
             temperature=0.3  # Lower temperature for verification
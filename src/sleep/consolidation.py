@@ -7,14 +7,97 @@ Implements offline memory consolidation inspired by:
 - Neuroscience (memory consolidation during sleep)
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Callable
+from typing import List, Dict, Callable, Optional, Tuple
 import random
+import threading
 import uuid
-from openai import OpenAI
 
 from ..memory.experience import Experience
+from ..memory.write_buffer import MemoryWriteBuffer
+from ..memory.co_retrieval import CoRetrievalMatrix, hebbian_update
 from ..personality.dynamics import PersonalityDynamics
+from ..personality.state_store import BaselineConflictError
+from ..engine.lease import LeaseLostError
+from ..engine.tracing import propagate
+from ..engine.usage import metered
+
+
+class MemorySnapshot:
+    """
+    One consistent, in-memory view of the memory store for a consolidation cycle.
+    
+    Loaded once at the start of the cycle; filter and relevance queries are
+    answered locally, and creates/updates are collected as a changeset that
+    is written back when the cycle ends. Memories updated several times
+    (e.g. replayed in phase 2 and rewired in phase 4) are written once;
+    with a write buffer, unchanged ones aren't written at all.
+    """
+    
+    def __init__(
+        self,
+        memories: List[Experience],
+        select_func: Callable,
+        write_buffer: Optional[MemoryWriteBuffer] = None
+    ):
+        """
+        Args:
+            memories: Every memory in the store at the start of the cycle
+            select_func: Callable(memories, query, filters, top_k, include_old) that
+                filters/ranks a list of memories like get_memories does
+            write_buffer: Dirty-tracking buffer the changeset is flushed through
+        """
+        self.memories = memories
+        self.select = select_func
+        self.write_buffer = write_buffer
+        if write_buffer is not None:
+            write_buffer.track(memories)
+        self._lock = threading.Lock()
+        self.created: Dict[str, Experience] = {}
+        self.updated: Dict[str, Experience] = {}
+    
+    def get_memories(
+        self,
+        query: Optional[str] = None,
+        filters: Optional[Dict] = None,
+        top_k: int = 100,
+        include_old: bool = False
+    ) -> List[Experience]:
+        return self.select(self.memories, query, filters, top_k, include_old)
+    
+    def create_memory(self, experience: Experience):
+        with self._lock:
+            self.created[experience.id] = experience
+    
+    def update_memory(self, experience: Experience):
+        with self._lock:
+            if experience.id in self.created:
+                return  # Created this cycle - written with its latest state anyway
+            self.updated[experience.id] = experience
+    
+    def apply(self, create_func: Callable, update_func: Callable) -> Dict:
+        """
+        Write the changeset back.
+        
+        Returns:
+            {"written": memories written, ...} plus the write buffer's flush counts
+        """
+        with self._lock:
+            created = list(self.created.values())
+            updated = list(self.updated.values())
+            self.created.clear()
+            self.updated.clear()
+        if self.write_buffer is not None:
+            for experience in created + updated:
+                self.write_buffer.add(experience)
+            summary = self.write_buffer.flush()
+            return {"written": summary["metadata_updates"] + summary["vectors_upserted"], **summary}
+        for experience in created:
+            create_func(experience)
+        for experience in updated:
+            update_func(experience)
+        return {"written": len(created) + len(updated)}
 
 
 class SleepConsolidation:
@@ -35,7 +118,12 @@ class SleepConsolidation:
         get_memories_func: Callable,
         create_memory_func: Callable,
         update_memory_func: Callable,
-        get_personality_dynamics_func: Callable
+        get_personality_dynamics_func: Callable,
+        max_parallel_insights: int = 4,
+        load_memories_func: Optional[Callable[[], Optional[List[Experience]]]] = None,
+        select_memories_func: Optional[Callable] = None,
+        write_buffer: Optional[MemoryWriteBuffer] = None,
+        co_retrieval: Optional[CoRetrievalMatrix] = None
     ):
         """
         Initialize sleep consolidation system.
@@ -46,22 +134,69 @@ class SleepConsolidation:
             create_memory_func: Function to create new memories
             update_memory_func: Function to update existing memories
             get_personality_dynamics_func: Function to get personality dynamics
+            max_parallel_insights: Questions retrieved for and reflected on at the same
+                time in phases 1 and 5
+            load_memories_func: Function returning every memory (None if the fetch failed);
+                with select_memories_func, each cycle works on one snapshot instead of
+                reloading per query
+            select_memories_func: Function(memories, query, filters, top_k, include_old)
+                answering get_memories-style queries against a loaded list
+            write_buffer: Batches the snapshot's write-back into delta-only bulk
+                requests (default: one create/update call per changed memory)
+            co_retrieval: Co-retrieval matrix phase 4 drains (default: the legacy
+                "co_retrieved_with" metadata lists)
         """
-        self.client = OpenAI(
+        from openai import OpenAI
+        self.client = metered(OpenAI(
             api_key=openai_api_key,
             base_url="https://api.openai.com/v1"
-        )
+        ), "consolidation")
         self.get_memories = get_memories_func
         self.create_memory = create_memory_func
         self.update_memory = update_memory_func
         self.get_personality_dynamics = get_personality_dynamics_func
+        self.max_parallel_insights = max_parallel_insights
+        self.load_memories = load_memories_func
+        self.select_memories = select_memories_func
+        self.write_buffer = write_buffer
+        self.co_retrieval = co_retrieval
+        # Snapshot of the cycle in progress (None: phases read/write the store directly)
+        self._snapshot: Optional[MemorySnapshot] = None
+        # Co-retrievals phase 4 drained, until the cycle's write-back commits them
+        self._drained: Optional[Tuple] = None
     
-    def run_consolidation(self) -> Dict:
+    def _get_memories(self, **kwargs) -> List[Experience]:
+        if self._snapshot is not None:
+            return self._snapshot.get_memories(**kwargs)
+        return self.get_memories(**kwargs)
+    
+    def _create_memory(self, experience: Experience):
+        if self._snapshot is not None:
+            self._snapshot.create_memory(experience)
+        else:
+            self.create_memory(experience)
+    
+    def _update_memory(self, experience: Experience):
+        if self._snapshot is not None:
+            self._snapshot.update_memory(experience)
+        else:
+            self.update_memory(experience)
+    
+    def run_consolidation(self, on_progress: Optional[Callable[[str, Dict], None]] = None) -> Dict:
         """
         Execute the complete sleep consolidation cycle.
         
+        Args:
+            on_progress: Called with (phase name, stats so far) as each phase
+                starts and once more with "done" at the end; it may raise
+                LeaseLostError to abort the cycle before the next phase
+        
         Returns:
             Statistics about the consolidation process
+        
+        Raises:
+            LeaseLostError: From on_progress; nothing is written back
+            RuntimeError: The memory snapshot couldn't be loaded; no phase ran
         """
         stats = {
             "start_time": datetime.now().isoformat(),
@@ -69,22 +204,74 @@ class SleepConsolidation:
             "old_memories_replayed": 0,
             "baseline_updated": False,
             "connections_strengthened": 0,
-            "meta_reflections_generated": 0
+            "meta_reflections_generated": 0,
+            "memories_snapshotted": None,
+            "memories_written": None,
+            "write_back": None
         }
         
+        def progress(phase: str):
+            if on_progress:
+                try:
+                    on_progress(phase, dict(stats))
+                except LeaseLostError:
+                    raise  # The scheduler aborts the run
+                except Exception as e:
+                    print(f"Warning: consolidation progress callback failed: {e}")
+        
         print("🌙 ROOK entering sleep consolidation...")
         
+        if self.load_memories and self.select_memories:
+            progress("snapshot")
+            memories = self.load_memories()
+            if memories is None:
+                # An empty snapshot would drain co-retrievals and "succeed" against nothing
+                raise RuntimeError("couldn't load the memory snapshot; consolidation aborted")
+            self._snapshot = MemorySnapshot(memories, self.select_memories, self.write_buffer)
+            stats["memories_snapshotted"] = len(self._snapshot.memories)
+            print(f"  ✓ Snapshot: {len(self._snapshot.memories)} memories")
+        
+        try:
+            self._run_phases(stats, progress)
+        finally:
+            if self._snapshot is not None:
+                # Keep whatever the finished phases produced, even if a later one failed
+                # (unless the lease was lost: then nothing is written back)
+                snapshot, self._snapshot = self._snapshot, None
+                try:
+                    progress("apply_changes")
+                    write_back = snapshot.apply(self.create_memory, self.update_memory)
+                except BaseException:
+                    # Phase 4's rewiring wasn't written - keep its co-retrievals for the next cycle
+                    self._settle_co_retrieval(committed=False)
+                    raise
+                self._settle_co_retrieval(committed=True)
+                stats["memories_written"] = write_back.pop("written")
+                stats["write_back"] = write_back or None
+                print(f"  ✓ Wrote back {stats['memories_written']} changed memories")
+        
+        stats["end_time"] = datetime.now().isoformat()
+        progress("done")
+        print("☀️ ROOK woke up from sleep consolidation")
+        
+        return stats
+    
+    def _run_phases(self, stats: Dict, progress: Callable[[str], None]):
+        """Run phases 1-5, filling in stats"""
         # Phase 1: Reflection Generation
+        progress("phase1_reflection_generation")
         reflections = self.phase1_reflection_generation()
         stats["reflections_generated"] = len(reflections)
         print(f"  ✓ Phase 1: Generated {len(reflections)} reflections")
         
         # Phase 2: Old Memory Replay
+        progress("phase2_old_memory_replay")
         replayed = self.phase2_old_memory_replay()
         stats["old_memories_replayed"] = len(replayed)
         print(f"  ✓ Phase 2: Replayed {len(replayed)} old memories")
         
         # Phase 3: Personality Baseline Update
+        progress("phase3_personality_baseline_update")
         baseline_updated = self.phase3_personality_baseline_update()
         stats["baseline_updated"] = baseline_updated
         if baseline_updated:
@@ -93,22 +280,19 @@ class SleepConsolidation:
             print(f"  ✓ Phase 3: Baseline stable (no update needed)")
         
         # Phase 4: Hebbian Memory Strengthening
+        progress("phase4_hebbian_strengthening")
         strengthened = self.phase4_hebbian_strengthening()
         stats["connections_strengthened"] = strengthened
         print(f"  ✓ Phase 4: Strengthened {strengthened} memory connections")
         
         # Phase 5: Meta-Reflection
         if len(reflections) >= 3:
+            progress("phase5_meta_reflection")
             meta_reflections = self.phase5_meta_reflection(reflections)
             stats["meta_reflections_generated"] = len(meta_reflections)
             print(f"  ✓ Phase 5: Generated {len(meta_reflections)} meta-reflections")
         else:
             print(f"  ✓ Phase 5: Skipped (not enough reflections)")
-        
-        stats["end_time"] = datetime.now().isoformat()
-        print("☀️ ROOK woke up from sleep consolidation")
-        
-        return stats
     
     def phase1_reflection_generation(self) -> List[Experience]:
         """
@@ -117,7 +301,7 @@ class SleepConsolidation:
         Based on Stanford Generative Agents approach.
         """
         # Get recent unconsolidated memories
-        recent_memories = self.get_memories(
+        recent_memories = self._get_memories(
             filters={
                 "consolidation_state": "recent",
                 "age_hours_max": 48,
@@ -131,19 +315,12 @@ class SleepConsolidation:
         # Generate consolidation questions
         questions = self._generate_consolidation_questions(recent_memories)
         
-        # For each question, retrieve and reflect
+        # For each question, retrieve relevant memories (recent + old) and reflect
+        def retrieve(question: str) -> List[Experience]:
+            return self._get_memories(query=question, top_k=20, include_old=True)
+        
         reflections = []
-        for question in questions:
-            # Retrieve relevant memories (recent + old)
-            relevant_memories = self.get_memories(
-                query=question,
-                top_k=20,
-                include_old=True
-            )
-            
-            # Generate insight
-            insight = self._generate_insight(question, relevant_memories)
-            
+        for question, relevant_memories, insight in self._generate_insights(questions, retrieve):
             if insight:
                 # Create reflection memory
                 reflection = Experience(
@@ -158,13 +335,13 @@ class SleepConsolidation:
                     citations=[m.id for m in relevant_memories[:5]]
                 )
                 
-                self.create_memory(reflection)
+                self._create_memory(reflection)
                 reflections.append(reflection)
         
         # Mark recent memories as consolidated
         for memory in recent_memories:
             memory.consolidation_state = "consolidated"
-            self.update_memory(memory)
+            self._update_memory(memory)
         
         return reflections
     
@@ -175,7 +352,7 @@ class SleepConsolidation:
         Based on Sleep Replay Consolidation (Tadros et al., 2022).
         """
         # Get old, important memories
-        old_memories = self.get_memories(
+        old_memories = self._get_memories(
             filters={
                 "age_days_min": 30,
                 "importance_min": 6
@@ -196,7 +373,7 @@ class SleepConsolidation:
         # "Replay" by refreshing access time
         for memory in sampled:
             memory.refresh_access()
-            self.update_memory(memory)
+            self._update_memory(memory)
         
         return sampled
     
@@ -208,15 +385,22 @@ class SleepConsolidation:
         """
         dynamics = self.get_personality_dynamics()
         
-        # Check if update is needed
-        if not dynamics.should_update_baseline(drift_threshold=0.1, duration_hours=48):
-            return False
-        
-        # Calculate drift and update baseline
-        drift = dynamics.calculate_drift(recent_hours=48)
-        dynamics.update_baseline(drift)
-        
-        return True
+        # With a shared state store another replica may move the baseline
+        # first; the dynamics are then caught up, so recompute and retry
+        for attempt in range(3):
+            # Check if update is needed
+            if not dynamics.should_update_baseline(drift_threshold=0.1, duration_hours=48):
+                return False
+            
+            # Calculate drift and update baseline
+            drift = dynamics.calculate_drift(recent_hours=48)
+            try:
+                dynamics.update_baseline(drift)
+                return True
+            except BaselineConflictError as e:
+                print(f"⚠️  Baseline update conflict (attempt {attempt + 1}): {e}")
+        
+        return False
     
     def phase4_hebbian_strengthening(self) -> int:
         """
@@ -224,8 +408,11 @@ class SleepConsolidation:
         
         Hebbian plasticity: "Neurons that fire together, wire together"
         """
+        if self.co_retrieval is not None:
+            return self._hebbian_from_matrix()
+        
         # Get memories with co-retrieval metadata
-        all_memories = self.get_memories(filters={})
+        all_memories = self._get_memories(filters={})
         
         connections_strengthened = 0
         
@@ -243,10 +430,43 @@ class SleepConsolidation:
                 if connected_id not in co_retrieved and strength > 0:
                     memory.weaken_connection(connected_id, amount=0.05)
             
-            self.update_memory(memory)
+            self._update_memory(memory)
         
         return connections_strengthened
     
+    def _hebbian_from_matrix(self) -> int:
+        """Phase 4 from the co-retrieval matrix: one pass over edges and deltas"""
+        all_memories = self._get_memories(filters={}, top_k=None)
+        
+        # Fold in (and drop) co-retrieval lists left in metadata by older versions
+        for memory in all_memories:
+            legacy = memory.metadata.pop("co_retrieved_with", None)
+            if legacy is not None:
+                self.co_retrieval.record_neighbors(memory.id, legacy)
+                self._update_memory(memory)
+        
+        self._drained = self.co_retrieval.drain()
+        ids, pairs, _ = self._drained
+        changed, strengthened = hebbian_update(all_memories, ids, pairs, strengthen=0.1, weaken=0.05)
+        for memory in changed:
+            self._update_memory(memory)
+        
+        if self._snapshot is None:
+            # Written directly above
+            self._settle_co_retrieval(committed=True)
+        return strengthened
+    
+    def _settle_co_retrieval(self, committed: bool):
+        """Decay and save the matrix once phase 4's changes are written, else put the drained deltas back"""
+        if self._drained is None:
+            return
+        drained, self._drained = self._drained, None
+        if committed:
+            self.co_retrieval.decay()
+            self.co_retrieval.save()
+        else:
+            self.co_retrieval.restore(*drained)
+    
     def phase5_meta_reflection(self, reflections: List[Experience]) -> List[Experience]:
         """
         Phase 5: Generate meta-reflections (reflections on reflections).
@@ -260,10 +480,7 @@ class SleepConsolidation:
         meta_questions = self._generate_meta_reflection_questions(reflections)
         
         meta_reflections = []
-        for question in meta_questions:
-            # Generate meta-insight
-            insight = self._generate_insight(question, reflections)
-            
+        for question, _, insight in self._generate_insights(meta_questions, lambda question: reflections):
             if insight:
                 # Create meta-reflection memory
                 meta_reflection = Experience(
@@ -278,11 +495,46 @@ class SleepConsolidation:
                     citations=[r.id for r in reflections]
                 )
                 
-                self.create_memory(meta_reflection)
+                self._create_memory(meta_reflection)
                 meta_reflections.append(meta_reflection)
         
         return meta_reflections
     
+    def _generate_insights(
+        self,
+        questions: List[str],
+        retrieve: Callable[[str], List[Experience]]
+    ) -> List[Tuple[str, List[Experience], Optional[Dict]]]:
+        """
+        Retrieve memories for and reflect on every question concurrently.
+        
+        The questions are independent, so the phase takes about as long as its
+        slowest insight. A failing question only loses its own insight.
+        
+        Args:
+            questions: Reflection questions
+            retrieve: Returns the memories to reflect on for a question
+            
+        Returns:
+            (question, memories, insight or None) per question, in question order
+        """
+        def reflect(question: str) -> Tuple[str, List[Experience], Optional[Dict]]:
+            try:
+                memories = retrieve(question)
+            except Exception as e:
+                print(f"Error retrieving memories for reflection: {e}")
+                return question, [], None
+            return question, memories, self._generate_insight(question, memories)
+        
+        if not questions:
+            return []
+        
+        workers = max(1, min(self.max_parallel_insights, len(questions)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rook-reflect") as pool:
+            # Submitted from here so the calls stay under the consolidation span
+            futures = [pool.submit(propagate(reflect), question) for question in questions]
+            return [future.result() for future in futures]
+    
     def _generate_consolidation_questions(
         self,
         memories: List[Experience],
@@ -0,0 +1,278 @@
+"""
+ROOK Consolidation Scheduler
+
+Sleep consolidation (five phases, dozens of LLM calls, full-index scans) used
+to run inline in process_query, so every tenth user waited for all of it.
+The scheduler moves it to a background worker thread:
+
+- Queries only record an interaction; nobody waits on sleep
+- A run is due after N interactions or once the last run is older than the
+  maximum interval (checked against the shared lease, so a run on any
+  replica counts)
+- A lease makes sure only one replica consolidates at a time; it is
+  renewed while the run is in progress, and a run that loses it is aborted
+  at the next phase boundary
+- Progress (current phase, counts so far) and run history are exposed via
+  get_stats() for a status endpoint
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from ..engine.lease import LeaseLostError, LocalLease
+from ..engine.tracing import span
+from ..engine.worker_state import WORKER_ID
+
+
+class ConsolidationScheduler:
+    """
+    Runs a consolidation callable on a background thread when it is due.
+
+    Usage:
+        scheduler = ConsolidationScheduler(sleep.run_consolidation, lease)
+        scheduler.start()
+        ...
+        scheduler.record_interaction()   # from the query path, never blocks
+    """
+
+    def __init__(
+        self,
+        consolidate: Callable[..., Dict],
+        lease=None,
+        interaction_threshold: int = 10,
+        max_interval_seconds: float = 24 * 3600,
+        poll_interval: float = 30.0,
+        worker_id: str = WORKER_ID
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            consolidate: Callable taking on_progress=(phase, stats) and returning run stats
+                (e.g. SleepConsolidation.run_consolidation)
+            lease: LocalLease / SQLLease guarding the run (default: in-process lease)
+            interaction_threshold: Interactions that make a run due
+            max_interval_seconds: Longest time between runs
+            poll_interval: How often the worker re-checks the time trigger
+            worker_id: Lease holder name for this replica
+        """
+        self.consolidate = consolidate
+        self.lease = lease or LocalLease("rook-consolidation")
+        self.interaction_threshold = interaction_threshold
+        self.max_interval_seconds = max_interval_seconds
+        self.poll_interval = poll_interval
+        self.worker_id = worker_id
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._interactions = 0
+        self._manual_request = False
+        self._started_at = time.time()
+        # Last completion we know about; a newer one means another replica ran
+        self._seen_completed_at = self.lease.state().get("last_completed_at")
+        self._lease_lost = threading.Event()
+
+        self.running = False
+        self.current_phase: Optional[str] = None
+        self.phase_started_at: Optional[float] = None
+        self.progress: Dict = {}
+        self.runs = 0
+        self.failures = 0
+        self.lease_busy = 0
+        self.leases_lost = 0
+        self.last_run: Optional[Dict] = None
+
+    def record_interaction(self, count: int = 1):
+        """Count an interaction; wakes the worker once the threshold is reached"""
+        with self._lock:
+            self._interactions += count
+            reached = self._interactions >= self.interaction_threshold
+        if reached:
+            self._wake.set()
+
+    def trigger(self):
+        """Ask for a run as soon as possible (still subject to the lease)"""
+        with self._lock:
+            self._manual_request = True
+        self._wake.set()
+
+    def _last_completed_at(self, lease_state: Dict) -> float:
+        return lease_state.get("last_completed_at") or self._started_at
+
+    def due(self) -> Optional[str]:
+        """Why a run is due ("interactions", "interval", "manual"), or None"""
+        lease_state = self.lease.state()
+        last_completed = self._last_completed_at(lease_state)
+        with self._lock:
+            completed_elsewhere = lease_state.get("last_completed_at")
+            if completed_elsewhere and completed_elsewhere != self._seen_completed_at:
+                # Another replica consolidated; our interactions are covered
+                self._interactions = 0
+                self._seen_completed_at = completed_elsewhere
+            if self._manual_request:
+                return "manual"
+            if self._interactions >= self.interaction_threshold:
+                return "interactions"
+        if time.time() - last_completed >= self.max_interval_seconds:
+            return "interval"
+        return None
+
+    def _on_progress(self, phase: str, stats: Dict):
+        with self._lock:
+            self.current_phase = phase
+            self.phase_started_at = time.time()
+            self.progress = stats
+        if phase == "done":
+            return  # Already written back; nothing left to abort
+        if self._lease_lost.is_set() or not self.lease.renew(self.worker_id):
+            # Another replica may be consolidating now; don't write over its run
+            self._lease_lost.set()
+            raise LeaseLostError(f"lost the consolidation lease before {phase}")
+
+    def _heartbeat(self, done: threading.Event):
+        # Phases can take longer than the lease; keep the claim alive
+        interval = max(1.0, self.lease.ttl_seconds / 3)
+        while not done.wait(interval):
+            if not self.lease.renew(self.worker_id):
+                print("⚠️  Lost the consolidation lease mid-run; aborting at the next phase")
+                self._lease_lost.set()
+                return
+
+    def run_once(self, reason: str = "manual") -> Optional[Dict]:
+        """
+        Run consolidation now if the lease can be taken.
+
+        Returns:
+            The run stats, or None if another replica holds the lease or the run failed
+        """
+        if not self.lease.acquire(self.worker_id):
+            with self._lock:
+                self.lease_busy += 1
+            return None
+
+        with self._lock:
+            counted = self._interactions
+            self._interactions = 0
+            self._manual_request = False
+            self.running = True
+            self.progress = {}
+        self._lease_lost.clear()
+
+        started = time.time()
+        done = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(done,), name="rook-consolidation-lease", daemon=True).start()
+        completed = False
+        result = None
+        try:
+            print(f"🌙 Consolidation started ({reason}, {counted} interactions)")
+            with span("consolidation"):
+                result = self.consolidate(on_progress=self._on_progress)
+            completed = True
+            return result
+        except LeaseLostError as e:
+            with self._lock:
+                self.failures += 1
+                self.leases_lost += 1
+            print(f"❌ Consolidation aborted: {e}")
+            return None
+        except Exception as e:
+            with self._lock:
+                self.failures += 1
+            print(f"❌ Consolidation failed: {e}")
+            return None
+        finally:
+            done.set()
+            elapsed = time.time() - started
+            self.lease.release(self.worker_id, completed=completed, result=result)
+            with self._lock:
+                if completed:
+                    self._seen_completed_at = self.lease.state().get("last_completed_at")
+                self.running = False
+                self.current_phase = None
+                self.phase_started_at = None
+                self.runs += 1
+                self.last_run = {
+                    "reason": reason,
+                    "interactions": counted,
+                    "started_at": started,
+                    "duration_s": round(elapsed, 2),
+                    "succeeded": completed,
+                    "result": result
+                }
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                reason = self.due()
+                if reason:
+                    self.run_once(reason)
+            except Exception as e:
+                print(f"Warning: consolidation scheduler check failed: {e}")
+
+    def start(self):
+        """Start the background worker"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="rook-consolidation", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the worker after the current check/run"""
+        self._stop.set()
+        self._wake.set()
+
+    def get_stats(self) -> Dict:
+        """Progress of the current run, history and trigger state"""
+        lease_state = self.lease.state()
+        next_interval_run = self._last_completed_at(lease_state) + self.max_interval_seconds
+        with self._lock:
+            return {
+                "worker_id": self.worker_id,
+                "worker_running": self._thread is not None and self._thread.is_alive(),
+                "running": self.running,
+                "current_phase": self.current_phase,
+                "phase_elapsed_s": round(time.time() - self.phase_started_at, 2) if self.phase_started_at else None,
+                "progress": dict(self.progress),
+                "interactions_pending": self._interactions,
+                "interaction_threshold": self.interaction_threshold,
+                "next_interval_run_in_s": round(max(0.0, next_interval_run - time.time()), 1),
+                "runs": self.runs,
+                "failures": self.failures,
+                "skipped_lease_held": self.lease_busy,
+                "aborted_lease_lost": self.leases_lost,
+                "last_run": self.last_run,
+                "lease": {**lease_state, "shared": self.lease.shared}
+            }
+
+
+if __name__ == "__main__":
+    import json
+
+    def _consolidate(on_progress=None):
+        stats = {"reflections_generated": 0}
+        for phase in ("phase1_reflection_generation", "phase2_old_memory_replay", "phase4_hebbian_strengthening"):
+            on_progress(phase, stats)
+            time.sleep(0.2)
+            stats["reflections_generated"] += 1
+        on_progress("done", stats)
+        return stats
+
+    scheduler = ConsolidationScheduler(_consolidate, interaction_threshold=3, poll_interval=0.1)
+    scheduler.start()
+
+    for i in range(3):
+        started = time.perf_counter()
+        scheduler.record_interaction()
+        print(f"interaction {i + 1} returned in {(time.perf_counter() - started) * 1000:.2f}ms")
+
+    time.sleep(0.35)
+    print(f"mid-run: phase={scheduler.get_stats()['current_phase']}")
+    time.sleep(0.6)
+    print(json.dumps(scheduler.get_stats(), indent=2, default=str))
@@ -0,0 +1,44 @@
+"""
+Tests for the co-retrieval matrix
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+pytest.importorskip("numpy")
+
+from memory.co_retrieval import CoRetrievalMatrix
+
+
+def test_restore_puts_drained_deltas_back():
+    matrix = CoRetrievalMatrix()
+    matrix.record(["mem-a", "mem-b", "mem-c"])
+    matrix.record(["mem-a", "mem-b"])
+
+    drained = matrix.drain()
+    assert matrix.get_stats()["pending_pairs"] == 0
+
+    # The consolidation cycle aborted before writing back
+    matrix.restore(*drained)
+    ids, pairs, counts = matrix.drain()
+    deltas = {tuple(sorted((ids[i], ids[j]))): count for (i, j), count in zip(pairs.tolist(), counts.tolist())}
+    assert deltas == {("mem-a", "mem-b"): 2.0, ("mem-a", "mem-c"): 1.0, ("mem-b", "mem-c"): 1.0}
+
+
+def test_restore_survives_decay_remapping():
+    matrix = CoRetrievalMatrix(decay=0.01, prune_below=0.05)
+    matrix.record(["mem-old-1", "mem-old-2"])
+    matrix.drain()
+    matrix.record(["mem-x", "mem-y"])
+    drained = matrix.drain()
+
+    # Decay prunes the old pair and renumbers the id table
+    matrix.decay()
+    matrix.restore(*drained)
+    ids, pairs, counts = matrix.drain()
+    assert [sorted((ids[i], ids[j])) for i, j in pairs.tolist()] == [["mem-x", "mem-y"]]
+    assert counts.tolist() == [1.0]
@@ -0,0 +1,53 @@
+"""
+Tests for background investigation jobs
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from engine.investigation_jobs import InvestigationJob, InvestigationJobManager, MemoryJobStore, SQLJobStore
+
+
+@pytest.mark.parametrize("sql", [False, True])
+def test_late_running_save_does_not_reopen_a_finished_job(tmp_path, sql):
+    if sql:
+        pytest.importorskip("sqlalchemy")
+        store = SQLJobStore(f"sqlite:///{tmp_path / 'jobs.db'}")
+    else:
+        store = MemoryJobStore()
+
+    job = InvestigationJob("job_1", "query")
+    job.set_status("running")
+    stale = job.to_dict(include_events=True)
+    store.save(stale)
+
+    job.set_status("succeeded")
+    store.save(job.to_dict(include_events=True))
+    # A heartbeat that serialized the job before it finished
+    store.save(stale)
+
+    assert store.load("job_1")["status"] == "succeeded"
+    assert store.unfinished() == []
+
+
+def test_finished_job_is_persisted_as_finished():
+    store = MemoryJobStore()
+
+    def investigate(query, available_evidence, investigation_id, on_move=None):
+        return {"investigation_id": investigation_id, "query": query, "gating_result": {"passed": True}}
+
+    manager = InvestigationJobManager(investigate, store=store, heartbeat_interval=0.001)
+    try:
+        job_id = manager.submit("query", evidence=[])
+        update = manager.wait_for_events(job_id, after=0, timeout=5)
+        while not update["done"]:
+            update = manager.wait_for_events(job_id, after=update["events"][-1]["seq"], timeout=5)
+        time.sleep(0.05)
+        assert store.load(job_id)["status"] == "succeeded"
+    finally:
+        manager.stop()
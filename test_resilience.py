@@ -0,0 +1,153 @@
+"""
+Tests for deadlines, hedging, retries and circuit breaking of upstream calls
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from engine.resilience import CircuitBreaker, CircuitOpenError, DeadlineExceeded, Upstream
+
+
+class BadRequest(Exception):
+    status_code = 400
+
+
+def _upstream(**kwargs) -> Upstream:
+    options = {"backoff_base": 0.0, "min_samples": 5, "default_deadline": 1.0}
+    options.update(kwargs)
+    return Upstream("test", **options)
+
+
+def test_breaker_opens_then_allows_one_half_open_trial():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    # Only one trial while half open
+    assert not breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.to_dict()["times_opened"] == 2
+
+
+def test_breaker_neutral_outcome_releases_the_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_neutral()
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_transient_errors_are_retried():
+    upstream = _upstream(retries=2)
+    attempts = []
+
+    def flaky(timeout):
+        attempts.append(timeout)
+        if len(attempts) < 3:
+            raise ConnectionError("connection reset")
+        return "ok"
+
+    assert upstream.call("query", flaky, idempotent=True) == "ok"
+    assert len(attempts) == 3
+    assert upstream.get_stats()["endpoints"]["query"]["retries"] == 2
+    assert upstream.breaker.state == "closed"
+
+
+def test_bad_requests_are_not_retried_and_leave_the_breaker_closed():
+    upstream = _upstream(retries=2, failure_threshold=1)
+    attempts = []
+
+    def bad(timeout):
+        attempts.append(timeout)
+        raise BadRequest("invalid model")
+
+    with pytest.raises(BadRequest):
+        upstream.call("chat", bad)
+    assert len(attempts) == 1
+    assert upstream.breaker.state == "closed"
+
+
+def test_open_breaker_fails_fast():
+    upstream = _upstream(retries=0, failure_threshold=2, reset_timeout=60)
+    calls = []
+
+    def down(timeout):
+        calls.append(timeout)
+        raise ConnectionError("connection refused")
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            upstream.call("query", down, idempotent=True)
+    with pytest.raises(CircuitOpenError):
+        upstream.call("query", down, idempotent=True)
+    assert len(calls) == 2
+
+
+def test_slow_generation_exceeds_its_deadline_without_opening_the_breaker():
+    upstream = _upstream(retries=0, failure_threshold=1)
+    release = threading.Event()
+
+    def slow(timeout):
+        release.wait(2)
+        return "late"
+
+    try:
+        with pytest.raises(DeadlineExceeded):
+            upstream.call("chat.gpt-4o", slow, deadline=0.05)
+    finally:
+        release.set()
+    assert upstream.breaker.state == "closed"
+    # Recorded at the deadline so the p99 can't ratchet down
+    assert upstream.get_stats()["endpoints"]["chat.gpt-4o"]["p99_ms"] == pytest.approx(50)
+
+
+def test_slow_read_is_hedged_and_the_hedge_wins():
+    upstream = _upstream(retries=0, hedge_budget=1.0)
+    for _ in range(5):
+        upstream.call("query", lambda timeout: "warm", idempotent=True)
+
+    release = threading.Event()
+    attempts = []
+
+    def stalls_first(timeout):
+        attempts.append(timeout)
+        if len(attempts) == 1:
+            release.wait(2)
+            return "primary"
+        return "hedge"
+
+    try:
+        assert upstream.call("query", stalls_first, idempotent=True) == "hedge"
+    finally:
+        release.set()
+    stats = upstream.get_stats()["endpoints"]["query"]
+    assert stats["hedges"] == 1
+    assert stats["hedge_wins"] == 1
+
+
+def test_hedges_respect_the_budget():
+    upstream = _upstream(retries=0, hedge_budget=0.0)
+    for _ in range(5):
+        upstream.call("query", lambda timeout: "warm", idempotent=True)
+
+    def slowish(timeout):
+        time.sleep(0.02)
+        return "ok"
+
+    assert upstream.call("query", slowish, idempotent=True) == "ok"
+    assert upstream.get_stats()["endpoints"]["query"]["hedges"] == 0
@@ -0,0 +1,100 @@
+"""
+Tests for the server-side conversation session store and its rolling summary
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from conversation.session_store import ConversationSessionStore, create_session_store, is_valid_session_id
+from conversation.summarizer import ConversationSummarizer
+
+
+def test_generated_session_ids_are_valid():
+    assert is_valid_session_id(ConversationSessionStore.new_session_id())
+
+
+def test_oversized_or_odd_session_ids_are_rejected():
+    assert is_valid_session_id("client-session_42")
+    assert not is_valid_session_id("")
+    assert not is_valid_session_id("x" * 65)
+    assert not is_valid_session_id("abc\r\nX-Injected: 1")
+    assert not is_valid_session_id("../../etc/passwd")
+    assert not is_valid_session_id("sess 1")
+
+
+class HookClient:
+    """Chat client stand-in that runs a hook while the summary is 'generating'"""
+
+    def __init__(self, hook=None):
+        self.chat = SimpleNamespace(completions=self)
+        self.hook = hook
+
+    def create(self, messages, **kwargs):
+        if self.hook:
+            self.hook()
+        message = SimpleNamespace(content="summary of the early turns")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def _session(store, turns):
+    session_id = store.new_session_id()
+    for i in range(turns):
+        store.append(session_id, "user", f"Question {i}")
+        store.append(session_id, "assistant", f"Answer {i}")
+    return session_id
+
+
+def test_fold_recounts_coverage_when_the_window_moves_meanwhile():
+    store = ConversationSessionStore(max_turns=5)
+    session_id = _session(store, 4)  # 8 messages; the first 4 get folded
+
+    def two_more_turns():
+        # The window (10 messages) overflows by 2: Question 0 and Answer 0 leave it
+        for i in range(4, 6):
+            store.append(session_id, "user", f"Question {i}")
+            store.append(session_id, "assistant", f"Answer {i}")
+
+    summarizer = ConversationSummarizer(HookClient(two_more_turns), store, keep_turns=2)
+    summarizer._summarize(session_id)
+
+    messages, summary, summarized = store.get_window(session_id)
+    assert summary == "summary of the early turns"
+    # Question 1 and Answer 1 are still covered; nothing newer is
+    assert [m["content"] for m in messages[:summarized]] == ["Question 1", "Answer 1"]
+
+
+def test_fold_is_dropped_if_the_summary_changed_meanwhile():
+    store = ConversationSessionStore(max_turns=10)
+    session_id = _session(store, 4)
+    _, created_at, _, _ = store.get_timed_window(session_id)
+
+    def other_fold():
+        store.set_summary(session_id, "newer summary", created_at[1], "")
+
+    summarizer = ConversationSummarizer(HookClient(other_fold), store, keep_turns=2)
+    summarizer._summarize(session_id)
+
+    _, summary, summarized = store.get_window(session_id)
+    assert summary == "newer summary" and summarized == 2
+    assert summarizer.summaries_generated == 0
+    assert store.get_stats()["stale_summaries"] == 1
+
+
+def test_fold_survives_invalidation_meanwhile(tmp_path):
+    pytest.importorskip("sqlalchemy")
+    store = create_session_store(f"sqlite:///{tmp_path / 'sessions.db'}", max_turns=10)
+    session_id = _session(store, 4)
+
+    summarizer = ConversationSummarizer(HookClient(lambda: store.invalidate(session_id)), store, keep_turns=2)
+    summarizer._summarize(session_id)
+
+    _, summary, summarized = store.get_window(session_id)
+    assert summary == "summary of the early turns" and summarized == 4
+    # Persisted with the right coverage: a fresh worker sees the same
+    reloaded = create_session_store(f"sqlite:///{tmp_path / 'sessions.db'}", max_turns=10)
+    assert reloaded.get_window(session_id)[1:] == (summary, 4)
@@ -0,0 +1,84 @@
+"""
+Tests for singleflight request coalescing
+"""
+
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from engine.singleflight import SingleFlight, context_hash, normalize_query
+
+
+def _run_concurrently(flight, keys, fn):
+    """Start every call while the leader is still running, then release it"""
+    release = threading.Event()
+    started = threading.Barrier(len(keys) + 1)
+
+    def call(key):
+        started.wait()
+        return flight.do(key, lambda: fn(release))
+
+    with ThreadPoolExecutor(max_workers=len(keys)) as pool:
+        futures = [pool.submit(call, key) for key in keys]
+        started.wait()
+        # Give the followers time to join the in-flight call
+        while flight.get_stats()["calls"] < len(keys):
+            time.sleep(0.001)
+        release.set()
+        return futures
+
+
+def test_concurrent_identical_calls_execute_once():
+    flight = SingleFlight("test")
+    executions = []
+
+    def work(release):
+        executions.append(1)
+        release.wait(2)
+        return "answer"
+
+    futures = _run_concurrently(flight, ["wirecard"] * 8, work)
+    results = [future.result() for future in futures]
+
+    assert len(executions) == 1
+    assert [result for result, _ in results] == ["answer"] * 8
+    assert sum(shared for _, shared in results) == 7
+    stats = flight.get_stats()
+    assert stats["executions"] == 1 and stats["coalesced"] == 7 and stats["in_flight"] == 0
+
+
+def test_leader_error_reaches_every_waiter_and_is_not_cached():
+    flight = SingleFlight("test")
+
+    def fails(release):
+        release.wait(2)
+        raise ConnectionError("upstream reset")
+
+    futures = _run_concurrently(flight, ["ftx"] * 4, fails)
+    for future in futures:
+        with pytest.raises(ConnectionError):
+            future.result()
+
+    # The next call runs again instead of replaying the error
+    assert flight.do("ftx", lambda: "recovered") == ("recovered", False)
+
+
+def test_different_keys_do_not_coalesce():
+    flight = SingleFlight("test")
+    assert flight.do("a", lambda: 1) == (1, False)
+    assert flight.do("a", lambda: 2) == (2, False)
+    assert flight.do("b", lambda: 3) == (3, False)
+    assert flight.get_stats()["coalesced"] == 0
+
+
+def test_keys_normalize_phrasing_and_hash_context():
+    assert normalize_query("What happened at  Wirecard?") == normalize_query("what happened at wirecard")
+    assert context_hash([]) == "empty"
+    assert context_hash([{"role": "user", "content": "hi"}]) == context_hash([{"content": "hi", "role": "user"}])
+    assert context_hash([{"role": "user", "content": "hi"}]) != context_hash([{"role": "user", "content": "bye"}])
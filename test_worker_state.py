@@ -0,0 +1,70 @@
+"""
+Tests for the multi-worker state layer
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from engine.worker_state import LocalStateBackend, SQLStateBackend, WorkerState
+
+
+def test_invalidations_reach_other_workers_only():
+    backend = LocalStateBackend()
+    worker_a = WorkerState(backend, worker_id="worker-a")
+    worker_b = WorkerState(backend, worker_id="worker-b")
+    seen_a, seen_b = [], []
+    worker_a.subscribe("session", seen_a.append)
+    worker_b.subscribe("session", seen_b.append)
+
+    worker_a.invalidate("session", "abc123")
+
+    assert worker_a.poll_once() == 0
+    assert worker_b.poll_once() == 1
+    assert seen_a == [] and seen_b == ["abc123"]
+
+
+def test_sql_event_ids_are_gapless_across_concurrent_publishers(tmp_path):
+    pytest.importorskip("sqlalchemy")
+    db_url = f"sqlite:///{tmp_path / 'state.db'}"
+    workers = [WorkerState(SQLStateBackend(db_url), worker_id=f"worker-{i}") for i in range(3)]
+    reader = WorkerState(SQLStateBackend(db_url), worker_id="reader")
+
+    def publish(worker):
+        for i in range(20):
+            worker.invalidate("session", f"{worker.worker_id}-{i}")
+
+    threads = [threading.Thread(target=publish, args=(worker,)) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Ids come from the counter row, so a reader polling id > last_id sees 1..N
+    events = reader.backend.poll(0)
+    assert [event[0] for event in events] == list(range(1, 61))
+    assert reader.poll_once() == 60
+    assert reader.backend.latest_event_id() == 60
+
+
+def test_sql_concurrent_shared_updates_are_all_kept(tmp_path):
+    pytest.importorskip("sqlalchemy")
+    db_url = f"sqlite:///{tmp_path / 'state.db'}"
+    workers = [WorkerState(SQLStateBackend(db_url), worker_id=f"worker-{i}") for i in range(3)]
+
+    def publish(worker):
+        for i in range(10):
+            worker.update_shared("readings", lambda readings, i=i: (readings or []) + [f"{worker.worker_id}-{i}"])
+
+    threads = [threading.Thread(target=publish, args=(worker,)) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    reader = WorkerState(SQLStateBackend(db_url), worker_id="reader")
+    assert sorted(reader.get_shared("readings")) == sorted(f"worker-{w}-{i}" for w in range(3) for i in range(10))
@@ -0,0 +1,119 @@
+"""
+Tests for the consolidation write-back buffer
+"""
+
+import os
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from memory.experience import Experience
+from memory.write_buffer import MemoryWriteBuffer
+
+
+class FakeIndex:
+    """Vector index recording requests; fails while failing is set"""
+
+    def __init__(self):
+        self.requests = []
+        self.failing = False
+
+    def upsert(self, vectors):
+        if self.failing:
+            raise ConnectionError("index unavailable")
+        self.requests.append(("upsert", [vector[0] for vector in vectors]))
+
+    def update(self, id, set_metadata):
+        if self.failing:
+            raise ConnectionError("index unavailable")
+        self.requests.append(("update", id, sorted(set_metadata)))
+
+
+def _memory(i: int) -> Experience:
+    return Experience(
+        id=f"mem-{i}", type="observation", description=f"Observation {i}",
+        timestamp=datetime(2026, 1, 1), last_accessed_at=datetime(2026, 1, 1),
+        importance=6, emotional_valence=0.0, embedding=[0.1] * 4
+    )
+
+
+def test_only_changed_fields_are_written():
+    index = FakeIndex()
+    memories = [_memory(i) for i in range(5)]
+    buffer = MemoryWriteBuffer(index)
+    buffer.track(memories)
+
+    memories[2].consolidation_state = "consolidated"
+    for memory in memories:
+        buffer.add(memory)
+    summary = buffer.flush()
+
+    assert index.requests == [("update", "mem-2", ["consolidation_state"])]
+    assert summary["skipped_unchanged"] == 4
+    assert summary["metadata_updates"] == 1
+
+
+def test_failed_writes_are_requeued_and_retried():
+    index = FakeIndex()
+    memories = [_memory(i) for i in range(3)]
+    buffer = MemoryWriteBuffer(index)
+    buffer.track(memories)
+
+    memories[0].consolidation_state = "consolidated"
+    buffer.add(memories[0])
+    buffer.add(_memory(10))  # New memory - upserted
+
+    index.failing = True
+    summary = buffer.flush()
+    assert summary["metadata_updates"] == 0 and summary["vectors_upserted"] == 0
+    assert summary["requeued"] == 2
+    assert buffer.get_stats()["pending"] == 2
+
+    index.failing = False
+    summary = buffer.flush()
+    assert summary["metadata_updates"] == 1 and summary["vectors_upserted"] == 1
+    assert buffer.get_stats()["pending"] == 0
+
+    # Written state is tracked: nothing left to write
+    buffer.add(memories[0])
+    assert buffer.flush()["skipped_unchanged"] == 1
+
+
+def test_newer_queued_state_wins_over_a_requeued_one():
+    index = FakeIndex()
+    memory = _memory(0)
+    buffer = MemoryWriteBuffer(index)
+    buffer.track([memory])
+
+    memory.consolidation_state = "consolidated"
+    buffer.add(memory)
+    index.failing = True
+
+    newer = _memory(0)
+    newer.importance = 9
+    newer.embedding = memory.embedding
+    original_update = index.update
+
+    def update_then_queue_newer(id, set_metadata):
+        buffer.add(newer)  # Queued while the flush is running
+        original_update(id=id, set_metadata=set_metadata)
+
+    index.update = update_then_queue_newer
+    buffer.flush()
+
+    index.failing = False
+    index.update = original_update
+    buffer.flush()
+    assert index.requests == [("update", "mem-0", ["importance"])]
+
+
+def test_upserts_are_batched():
+    index = FakeIndex()
+    buffer = MemoryWriteBuffer(index, max_batch_vectors=2)
+    for i in range(5):
+        buffer.add(_memory(i))
+    summary = buffer.flush()
+
+    assert summary["upsert_requests"] == 3
+    assert [len(request[1]) for request in index.requests] == [2, 2, 1]